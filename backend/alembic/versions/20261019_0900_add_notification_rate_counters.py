@@ -0,0 +1,46 @@
+"""add notification_rate_counters table
+
+Revision ID: add_notification_rate_counters
+Revises: 8f6074480db0
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_notification_rate_counters'
+down_revision: Union[str, None] = '8f6074480db0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_rate_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('window_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_notification_rate_counters_id', 'notification_rate_counters', ['id'], unique=False)
+    op.create_index(
+        'ix_notification_rate_counters_key',
+        'notification_rate_counters',
+        ['user_id', 'channel', 'window_start'],
+        unique=True,
+    )
+    op.create_index('ix_notification_rate_counters_window', 'notification_rate_counters', ['window_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_rate_counters_window', table_name='notification_rate_counters')
+    op.drop_index('ix_notification_rate_counters_key', table_name='notification_rate_counters')
+    op.drop_index('ix_notification_rate_counters_id', table_name='notification_rate_counters')
+    op.drop_table('notification_rate_counters')
@@ -0,0 +1,50 @@
+"""add transactions.updated_at and transaction_tombstones for delta export
+
+Revision ID: add_transaction_sync_tracking
+Revises: add_notification_rate_counters
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_transaction_sync_tracking'
+down_revision: Union[str, None] = 'add_notification_rate_counters'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'transactions',
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    )
+    op.create_index('ix_transactions_user_updated', 'transactions', ['user_id', 'updated_at'], unique=False)
+
+    op.create_table('transaction_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_transaction_tombstones_id', 'transaction_tombstones', ['id'], unique=False)
+    op.create_index(
+        'ix_transaction_tombstones_user_deleted',
+        'transaction_tombstones',
+        ['user_id', 'deleted_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_tombstones_user_deleted', table_name='transaction_tombstones')
+    op.drop_index('ix_transaction_tombstones_id', table_name='transaction_tombstones')
+    op.drop_table('transaction_tombstones')
+    op.drop_index('ix_transactions_user_updated', table_name='transactions')
+    op.drop_column('transactions', 'updated_at')
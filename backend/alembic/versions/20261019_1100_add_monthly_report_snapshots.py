@@ -0,0 +1,40 @@
+"""add monthly_report_snapshots table
+
+Revision ID: add_monthly_report_snapshots
+Revises: add_transaction_sync_tracking
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_monthly_report_snapshots'
+down_revision: Union[str, None] = 'add_transaction_sync_tracking'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('monthly_report_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'year', 'month', name='uq_monthly_report_snapshot'),
+    )
+    op.create_index('ix_monthly_report_snapshots_id', 'monthly_report_snapshots', ['id'], unique=False)
+    op.create_index('ix_monthly_report_snapshots_user_id', 'monthly_report_snapshots', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_monthly_report_snapshots_user_id', table_name='monthly_report_snapshots')
+    op.drop_index('ix_monthly_report_snapshots_id', table_name='monthly_report_snapshots')
+    op.drop_table('monthly_report_snapshots')
@@ -0,0 +1,53 @@
+"""add defillama_pools and defillama_catalog_state tables
+
+Revision ID: add_defillama_pool_catalog
+Revises: add_background_jobs
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_defillama_pool_catalog'
+down_revision: Union[str, None] = 'add_background_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('defillama_pools',
+        sa.Column('pool_id', sa.String(length=100), nullable=False),
+        sa.Column('project_key', sa.String(length=100), nullable=False),
+        sa.Column('chain_key', sa.String(length=50), nullable=False),
+        sa.Column('symbol_key', sa.String(length=200), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('pool_id'),
+    )
+    op.create_index(
+        'ix_defillama_pools_match',
+        'defillama_pools',
+        ['project_key', 'chain_key', 'symbol_key'],
+        unique=False,
+    )
+
+    op.create_table('defillama_catalog_state',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('etag', sa.String(length=200), nullable=True),
+        sa.Column('last_modified', sa.String(length=100), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('pool_count', sa.Integer(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('defillama_catalog_state')
+    op.drop_index('ix_defillama_pools_match', table_name='defillama_pools')
+    op.drop_table('defillama_pools')
@@ -0,0 +1,47 @@
+"""add reward_scan_cursors table
+
+Revision ID: add_reward_scan_cursors
+Revises: add_defillama_pool_catalog
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_reward_scan_cursors'
+down_revision: Union[str, None] = 'add_defillama_pool_catalog'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reward_scan_cursors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('wallet_address', sa.String(length=42), nullable=False),
+        sa.Column('chain_id', sa.String(length=20), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('start_block', sa.BigInteger(), nullable=False),
+        sa.Column('last_block', sa.BigInteger(), nullable=False),
+        sa.Column('last_scanned_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_reward_scan_cursors_id'), 'reward_scan_cursors', ['id'], unique=False)
+    op.create_index(
+        'ix_reward_scan_cursor_key',
+        'reward_scan_cursors',
+        ['user_id', 'wallet_address', 'chain_id', 'source'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reward_scan_cursor_key', table_name='reward_scan_cursors')
+    op.drop_index(op.f('ix_reward_scan_cursors_id'), table_name='reward_scan_cursors')
+    op.drop_table('reward_scan_cursors')
@@ -0,0 +1,69 @@
+"""add defi_position_rollups table
+
+Revision ID: add_defi_position_rollups
+Revises: add_reward_scan_cursors
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_defi_position_rollups'
+down_revision: Union[str, None] = 'add_reward_scan_cursors'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('defi_position_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('wallet_address', sa.String(length=42), nullable=False),
+        sa.Column('position_id', sa.String(length=255), nullable=False),
+        sa.Column('protocol', sa.String(length=100), nullable=False),
+        sa.Column('chain_id', sa.String(length=20), nullable=False),
+        sa.Column('position_type', sa.String(length=50), nullable=False),
+        sa.Column('symbol', sa.String(length=50), nullable=False),
+        sa.Column('token_name', sa.String(length=100), nullable=True),
+        sa.Column('resolution', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.DateTime(), nullable=False),
+        sa.Column('last_snapshot_date', sa.DateTime(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False),
+        sa.Column('balance_last', sa.Numeric(precision=36, scale=18), nullable=False),
+        sa.Column('balance_usd_min', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('balance_usd_max', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('balance_usd_last', sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column('price_usd_min', sa.Numeric(precision=20, scale=8), nullable=True),
+        sa.Column('price_usd_max', sa.Numeric(precision=20, scale=8), nullable=True),
+        sa.Column('price_usd_last', sa.Numeric(precision=20, scale=8), nullable=True),
+        sa.Column('protocol_apy_min', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('protocol_apy_max', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('protocol_apy_last', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_defi_position_rollups_id'), 'defi_position_rollups', ['id'], unique=False)
+    op.create_index(
+        'ix_defi_rollups_unique',
+        'defi_position_rollups',
+        ['user_id', 'position_id', 'resolution', 'period_start'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_defi_rollups_wallet',
+        'defi_position_rollups',
+        ['user_id', 'wallet_address', 'resolution', 'period_start'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_defi_rollups_wallet', table_name='defi_position_rollups')
+    op.drop_index('ix_defi_rollups_unique', table_name='defi_position_rollups')
+    op.drop_index(op.f('ix_defi_position_rollups_id'), table_name='defi_position_rollups')
+    op.drop_table('defi_position_rollups')
@@ -0,0 +1,41 @@
+"""add categorization_memos table
+
+Revision ID: add_categorization_memos
+Revises: add_defi_position_rollups
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_categorization_memos'
+down_revision: Union[str, None] = 'add_defi_position_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('categorization_memos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('merchant', sa.String(length=255), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('is_new_category', sa.Boolean(), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('reason', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'merchant', name='uq_categorization_memo_merchant'),
+    )
+    op.create_index(op.f('ix_categorization_memos_id'), 'categorization_memos', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_categorization_memos_id'), table_name='categorization_memos')
+    op.drop_table('categorization_memos')
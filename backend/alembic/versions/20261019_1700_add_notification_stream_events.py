@@ -0,0 +1,37 @@
+"""add notification_stream_events table
+
+Revision ID: add_notification_stream_events
+Revises: add_categorization_memos
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_notification_stream_events'
+down_revision: Union[str, None] = 'add_categorization_memos'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_stream_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('origin', sa.String(length=100), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event', sa.String(length=30), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_notification_stream_events_created', 'notification_stream_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_stream_events_created', table_name='notification_stream_events')
+    op.drop_table('notification_stream_events')
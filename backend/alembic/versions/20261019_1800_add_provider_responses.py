@@ -0,0 +1,36 @@
+"""add provider_responses table
+
+Revision ID: add_provider_responses
+Revises: add_notification_stream_events
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_provider_responses'
+down_revision: Union[str, None] = 'add_notification_stream_events'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('provider_responses',
+        sa.Column('cache_key', sa.String(length=500), nullable=False),
+        sa.Column('wallet_address', sa.String(length=100), nullable=True),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index('ix_provider_responses_wallet', 'provider_responses', ['wallet_address'], unique=False)
+    op.create_index('ix_provider_responses_fetched_at', 'provider_responses', ['fetched_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_provider_responses_fetched_at', table_name='provider_responses')
+    op.drop_index('ix_provider_responses_wallet', table_name='provider_responses')
+    op.drop_table('provider_responses')
@@ -38,9 +38,42 @@ class Settings(BaseSettings):
     sepay_secret_key: str = ""
     sepay_base_url: str = "https://api.sepay.vn"
 
+    # Background jobs: when enabled, each API process also fires cron triggers
+    # (leader-elected) and runs a queue worker; otherwise run `python -m app.worker`
+    embedded_job_worker: bool = True
+    job_worker_concurrency: int = 4
+    # In-app notification stream events are relayed between API and worker
+    # processes through the notification_stream_events table
+    notification_relay_enabled: bool = True
+    notification_relay_interval_seconds: float = 1.0
+
+    # Report PDF rendering
+    pdf_render_workers: int = 2
+
     # DeFi API Keys
     zerion_api_key: str = ""
     polygonscan_api_key: str = ""
+    zerion_requests_per_second: float = 5.0
+    polygonscan_requests_per_second: float = 5.0
+    defi_snapshot_concurrency: int = 8
+    # Wallet portfolio/position responses: served fresh for the TTL, then
+    # served stale (while refreshing) for the stale window. Shared through the
+    # provider_responses table unless disabled; the memory bound applies to the
+    # in-process fallback
+    provider_cache_ttl_seconds: int = 300
+    provider_cache_stale_seconds: int = 1800
+    provider_cache_shared: bool = True
+    provider_cache_max_bytes: int = 64 * 1024 * 1024
+    # Chat financial context: max age of cached sections, and the token budget
+    # above which the context is compacted
+    chat_context_cache_seconds: int = 300
+    chat_context_max_tokens: int = 3000
+    # AI categorization answers are reused per merchant for this many days
+    ai_categorization_memo_days: int = 90
+    # Merchants are sent in chunks of about this many prompt tokens, with at
+    # most this many AI calls in flight per request
+    ai_categorization_chunk_tokens: int = 1500
+    ai_categorization_concurrency: int = 4
 
     class Config:
         env_file = ".env"
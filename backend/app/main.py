@@ -13,7 +13,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from fastapi.exceptions import RequestValidationError
 
 from .config import settings as app_settings
-from .database import SessionLocal, init_db
+from .database import init_db
 from .routes.accounts import router as accounts_router
 from .routes.actions import router as actions_router
 from .routes.ai_categorization import router as ai_categorization_router
@@ -55,12 +55,20 @@ from .routes.exchange_rates import router as exchange_rates_router
 from .routes.export import router as export_router
 from .routes.health_score import router as health_score_router
 from .routes.user_categories import router as user_categories_router
-from .services.exchange_rate_service import ExchangeRateService
-from .services.recurring_service import RecurringTransactionService
-from .services.defi_snapshot_service import DefiSnapshotService
+from .services.http_client import http_clients
+from .services.notification_relay import NotificationEventRelay
+from .services.scheduled_tasks import (
+    rate_counter_maintenance,
+    register_cron_triggers,
+    register_local_jobs,
+    release_cron_lease,
+)
+from .worker import JobWorker
 
 logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler()
+job_worker: JobWorker | None = None
+notification_relay: NotificationEventRelay | None = None
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -146,380 +154,54 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 
-# Scheduled jobs
-def scheduled_rate_update():
-    """Background job to update exchange rates daily."""
-    db = SessionLocal()
-    try:
-        result = ExchangeRateService.fetch_and_update_rates(db)
-        logger.info(f"Scheduled rate update: {result}")
-    except Exception as e:
-        logger.error(f"Scheduled rate update failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_recurring_transactions():
-    """Background job to process due recurring transactions daily."""
-    db = SessionLocal()
-    try:
-        created = RecurringTransactionService.process_due_recurring(db)
-        logger.info(f"Scheduled recurring processing: created {created} transactions")
-    except Exception as e:
-        logger.error(f"Scheduled recurring processing failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_defi_snapshots():
-    """Background job to capture DeFi position snapshots daily."""
-    import asyncio
-
-    db = SessionLocal()
-    try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        stats = loop.run_until_complete(DefiSnapshotService.capture_all_snapshots(db))
-        loop.close()
-        logger.info(f"DeFi snapshots captured: {stats}")
-    except Exception as e:
-        logger.error(f"DeFi snapshot capture failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_anomaly_scan():
-    """Background job to scan for transaction anomalies daily."""
-    from sqlalchemy.orm import Session
-    from .models.user import User
-    from .models.transaction import Transaction
-    from .services.anomaly_detection_service import AnomalyDetectionService
-    from datetime import datetime, timedelta
-
-    db = SessionLocal()
-    try:
-        users = db.query(User).filter(User.is_active == True).all()
-        for user in users:
-            try:
-                service = AnomalyDetectionService(db)
-                transactions = (
-                    db.query(Transaction)
-                    .filter(
-                        Transaction.user_id == user.id,
-                        Transaction.date >= (datetime.utcnow() - timedelta(days=90)).date(),
-                    )
-                    .all()
-                )
-                tx_dicts = [
-                    {
-                        "id": tx.id,
-                        "date": tx.date.isoformat(),
-                        "description": tx.description,
-                        "amount": tx.amount,
-                        "category": tx.category,
-                    }
-                    for tx in transactions
-                ]
-                anomalies = service.detect_user_anomalies(user.id, tx_dicts)
-                if anomalies:
-                    service.save_anomalies(user.id, anomalies)
-                    logger.info(
-                        f"Anomaly scan for user {user.id}: {len(anomalies)} anomalies detected"
-                    )
-            except Exception as e:
-                logger.error(f"Anomaly scan failed for user {user.id}: {e}")
-    except Exception as e:
-        logger.error(f"Scheduled anomaly scan job failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_snapshot_cleanup():
-    """Weekly cleanup of old DeFi snapshots (>365 days)."""
-    db = SessionLocal()
-    try:
-        deleted = DefiSnapshotService.cleanup_old_snapshots(db, retention_days=365)
-        logger.info(f"Snapshot cleanup: deleted {deleted} old records")
-    except Exception as e:
-        logger.error(f"Snapshot cleanup failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_budget_monitoring():
-    """Background job to monitor budget thresholds."""
-    db = SessionLocal()
-    try:
-        from .services.budget_monitoring_job import BudgetMonitoringJob
-
-        job = BudgetMonitoringJob()
-        result = job.check_all_budgets(db)
-        logger.info(f"Budget monitoring: {result}")
-    except Exception as e:
-        logger.error(f"Budget monitoring failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_queued_notifications():
-    """Process queued notifications every 10 minutes."""
-    db = SessionLocal()
-    try:
-        from .services.queued_notification_job import QueuedNotificationJob
-
-        job = QueuedNotificationJob()
-        result = job.process_queue(db)
-        if result["processed"] > 0 or result["failed"] > 0:
-            logger.info(f"Queued notifications: {result}")
-    except Exception as e:
-        logger.error(f"Queued notification processing failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_bill_reminders():
-    """Process bill reminder notifications hourly."""
-    db = SessionLocal()
-    try:
-        from .services.bill_reminder_job import BillReminderJob
-
-        job = BillReminderJob()
-        result = job.process_reminders(db)
-        if result["notified"] > 0 or result["errors"] > 0:
-            logger.info(f"Bill reminders: {result}")
-    except Exception as e:
-        logger.error(f"Bill reminder processing failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_insight_generation():
-    """Background job to generate daily spending insights for all users."""
-    db = SessionLocal()
-    try:
-        from .models.user import User
-        from .services.insight_generator_service import InsightGeneratorService
-        from .services.notification_service import NotificationService
-        import asyncio
-
-        service = InsightGeneratorService()
-        notification_service = NotificationService()
-        users = db.query(User).filter(User.is_active == True).all()
-
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        for user in users:
-            try:
-                insights = loop.run_until_complete(
-                    service.generate_dashboard_insights(db, user.id)
-                )
-                loop.run_until_complete(
-                    service.save_insights_to_db(db, user.id, insights)
-                )
-
-                # Create notifications for warning-level insights (priority 1-2)
-                for insight in insights:
-                    if insight.get("priority", 5) <= 2:
-                        loop.run_until_complete(
-                            notification_service.send_notification(
-                                db=db,
-                                user_id=user.id,
-                                notification_type="spending_insight",
-                                title=insight["title"],
-                                message=insight["message"],
-                                data=insight.get("data"),
-                                priority=insight.get("priority", 3),
-                                action_url=insight.get("action_url"),
-                                action_label=insight.get("action_label"),
-                            )
-                        )
-
-                if insights:
-                    logger.info(f"User {user.id}: generated {len(insights)} insight(s)")
-            except Exception as e:
-                logger.error(f"Insight generation failed for user {user.id}: {e}")
-
-        loop.close()
-    except Exception as e:
-        logger.error(f"Scheduled insight generation failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_action_generation():
-    """Background job to generate pending actions daily."""
-    from .services.action_generation_job import ActionGenerationJob
-
-    db = SessionLocal()
-    try:
-        job = ActionGenerationJob()
-        result = job.run(db)
-        logger.info(f"Action generation: {result}")
-    except Exception as e:
-        logger.error(f"Scheduled action generation failed: {e}")
-    finally:
-        db.close()
-
-
-def scheduled_export_cleanup():
-    """Clean up expired export files (older than 10 minutes)."""
-    import time
-
-    exports_dir = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)), "uploads", "exports"
-    )
-    if not os.path.isdir(exports_dir):
-        return
-    now = time.time()
-    deleted = 0
-    for filename in os.listdir(exports_dir):
-        if not filename.endswith(".json"):
-            continue
-        filepath = os.path.join(exports_dir, filename)
-        if now - os.path.getmtime(filepath) > 600:
-            os.remove(filepath)
-            deleted += 1
-    if deleted:
-        logger.info(f"Export cleanup: deleted {deleted} expired files")
-
-
 # Startup event
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database and start scheduler on startup."""
+    """Initialize database and start background scheduling on startup."""
+    global job_worker, notification_relay
     init_db()
 
-    # Schedule daily exchange rate updates at 4 AM UTC
-    scheduler.add_job(
-        scheduled_rate_update,
-        trigger="cron",
-        hour=4,
-        minute=0,
-        id="exchange_rate_update",
-        replace_existing=True,
-    )
-
-    # Schedule daily recurring transaction processing at 00:05 JST (15:05 UTC previous day)
-    scheduler.add_job(
-        scheduled_recurring_transactions,
-        trigger="cron",
-        hour=15,
-        minute=5,
-        id="recurring_transactions",
-        replace_existing=True,
-    )
-
-    # Schedule daily DeFi position snapshots at 00:30 UTC
-    scheduler.add_job(
-        scheduled_defi_snapshots,
-        trigger="cron",
-        hour=0,
-        minute=30,
-        id="defi_snapshots",
-        replace_existing=True,
-    )
-
-    # Weekly cleanup of old snapshots (Sundays at 3 AM UTC)
-    scheduler.add_job(
-        scheduled_snapshot_cleanup,
-        trigger="cron",
-        day_of_week="sun",
-        hour=3,
-        minute=0,
-        id="snapshot_cleanup",
-        replace_existing=True,
-    )
-
-    # Schedule daily anomaly detection scan at 2 AM UTC
-    scheduler.add_job(
-        scheduled_anomaly_scan,
-        trigger="cron",
-        hour=2,
-        minute=0,
-        id="anomaly_scan",
-        replace_existing=True,
-    )
-
-    # Schedule budget monitoring every 15 minutes
-    scheduler.add_job(
-        scheduled_budget_monitoring,
-        trigger="cron",
-        hour="*",
-        minute="*/15",
-        id="budget_monitoring",
-        replace_existing=True,
-        max_instances=1,
-    )
-    logger.info("Budget monitoring scheduled (every 15 minutes)")
-
-    # Schedule queued notification processing every 10 minutes
-    scheduler.add_job(
-        scheduled_queued_notifications,
-        trigger="cron",
-        minute="*/10",
-        id="queued_notifications",
-        replace_existing=True,
-    )
-    logger.info("Queued notification processing scheduled (every 10 minutes)")
-
-    # Schedule bill reminder processing every hour at minute 0
-    scheduler.add_job(
-        scheduled_bill_reminders,
-        trigger="cron",
-        minute=0,
-        id="bill_reminders",
-        replace_existing=True,
-    )
-    logger.info("Bill reminder processing scheduled (hourly)")
-
-    # Schedule export link cleanup every 5 minutes
-    scheduler.add_job(
-        scheduled_export_cleanup,
-        trigger="cron",
-        minute="*/5",
-        id="export_cleanup",
-        replace_existing=True,
-    )
-    logger.info("Export cleanup scheduled (every 5 minutes)")
-
-    # Schedule daily insight generation at 7 AM UTC
-    scheduler.add_job(
-        scheduled_insight_generation,
-        trigger="cron",
-        hour=7,
-        minute=0,
-        id="insight_generation",
-        replace_existing=True,
-    )
-    logger.info("Insight generation scheduled (daily at 7 AM UTC)")
-
-    # Schedule daily action generation at 2:30 AM UTC
-    scheduler.add_job(
-        scheduled_action_generation,
-        trigger="cron",
-        hour=2,
-        minute=30,
-        id="action_generation",
-        replace_existing=True,
-    )
-    logger.info("Action generation scheduled (daily at 2:30 AM UTC)")
-
     # Ensure exports directory exists
     exports_dir = os.path.join(uploads_dir, "exports")
     os.makedirs(exports_dir, exist_ok=True)
 
+    # Per-process maintenance (in-memory rate counters, local export/report files)
+    register_local_jobs(scheduler)
+
+    # Cron triggers enqueue onto the durable job queue; only the process that
+    # holds the cron lease fires them. Production runs `python -m app.worker`.
+    if app_settings.embedded_job_worker:
+        job_worker = JobWorker()
+        register_cron_triggers(scheduler, job_worker.worker_id)
+        job_worker.start()
+
+    # Stream events published by the job worker reach this process's SSE clients
+    if app_settings.notification_relay_enabled:
+        notification_relay = NotificationEventRelay()
+        notification_relay.start()
+
     scheduler.start()
+    await http_clients.start()
     logger.info(
-        "Schedulers started (rates: 4 AM UTC, recurring: 00:05 JST, defi: 00:30 UTC, cleanup: Sun 3 AM UTC)"
+        f"Schedulers started (embedded job worker: {app_settings.embedded_job_worker})"
     )
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Shutdown scheduler on app shutdown."""
+    """Stop background scheduling on app shutdown."""
     scheduler.shutdown()
-    logger.info("Exchange rate scheduler stopped")
+    if job_worker is not None:
+        job_worker.stop(wait=False)
+        release_cron_lease(job_worker.worker_id)
+    if notification_relay is not None:
+        notification_relay.stop()
+    rate_counter_maintenance()
+    from .services.report_render_service import report_renderer
+
+    report_renderer.shutdown()
+    await http_clients.close()
+    logger.info("Schedulers stopped")
 
 
 # Include routers
@@ -2,9 +2,11 @@
 
 from .account import Account
 from .anomaly import AnomalyAlert, AnomalyConfig
+from .background_job import BackgroundJob, SchedulerLease
 from .bill import Bill, BillHistory
 from .budget import Budget, BudgetAllocation, BudgetFeedback
 from .budget_alert import BudgetAlert
+from .categorization_memo import CategorizationMemo
 from .category import Category
 from .category_rule import CategoryRule
 from .challenges import Challenge, UserChallenge, XPMultiplier
@@ -15,10 +17,13 @@ from .crypto_wallet import (
     RewardContract,
     CryptoSyncState,
     RewardClaim,
+    RewardScanCursor,
     DefiPositionSnapshot,
+    DefiPositionRollup,
     PositionReward,
     PositionCostBasis,
 )
+from .defi_pool import DefiLlamaCatalogState, DefiLlamaPool
 from .dismissed_suggestion import DismissedSuggestion
 from .exchange_rate import ExchangeRate
 from .gamification import UserGamification, Achievement, UserAchievement, XPEvent
@@ -32,12 +37,16 @@ from .notification import (
     PushSubscription,
     InAppNotification,
     NotificationLog,
+    NotificationRateCounter,
+    NotificationStreamEvent,
     BillReminderSchedule,
     BurnRateAlert,
     QueuedNotification,
 )
 from .position_closure import PositionClosure
+from .provider_response import ProviderResponse
 from .receipt import Receipt
+from .monthly_report_snapshot import MonthlyReportSnapshot
 from .report_ai_summary import ReportAISummary
 from .recurring_transaction import RecurringTransaction
 from .regional_data import (
@@ -72,7 +81,7 @@ from .social_learning import (
     GroupChallenge,
 )
 from .tag import Tag
-from .transaction import Base, Transaction
+from .transaction import Base, Transaction, TransactionTombstone
 from .transaction_tag import TransactionTag
 from .user import User
 from .user_category import UserCategory
@@ -81,6 +90,7 @@ from .user_credit import UserCredit
 __all__ = [
     "Base",
     "Transaction",
+    "TransactionTombstone",
     "Goal",
     "AppSettings",
     "ExchangeRate",
@@ -116,6 +126,7 @@ __all__ = [
     "XPStreakBonus",
     "AnomalyAlert",
     "AnomalyConfig",
+    "CategorizationMemo",
     "Category",
     "CategoryRule",
     "Bill",
@@ -125,16 +136,24 @@ __all__ = [
     "RewardContract",
     "CryptoSyncState",
     "RewardClaim",
+    "RewardScanCursor",
     "DefiPositionSnapshot",
+    "DefiPositionRollup",
     "PositionReward",
     "PositionCostBasis",
+    "DefiLlamaCatalogState",
+    "DefiLlamaPool",
     "DismissedSuggestion",
     "GoalType",
     "Holding",
     "HoldingLot",
     "PositionClosure",
+    "ProviderResponse",
     "Receipt",
     "ReportAISummary",
+    "MonthlyReportSnapshot",
+    "BackgroundJob",
+    "SchedulerLease",
     "RecurringTransaction",
     "Quiz",
     "QuizQuestion",
@@ -151,6 +170,8 @@ __all__ = [
     "PushSubscription",
     "InAppNotification",
     "NotificationLog",
+    "NotificationRateCounter",
+    "NotificationStreamEvent",
     "BudgetAlert",
     "BillReminderSchedule",
     "BurnRateAlert",
@@ -123,6 +123,38 @@ class CryptoSyncState(Base):
     )
 
 
+class RewardScanCursor(Base):
+    """Block range already scanned for reward claims per wallet, chain and source."""
+
+    __tablename__ = "reward_scan_cursors"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    wallet_address: Mapped[str] = mapped_column(String(42), nullable=False)
+    chain_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    source: Mapped[str] = mapped_column(String(20), nullable=False)  # merkl, symbiotic
+    # Inclusive range of blocks fully processed
+    start_block: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_block: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_scanned_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_reward_scan_cursor_key",
+            "user_id",
+            "wallet_address",
+            "chain_id",
+            "source",
+            unique=True,
+        ),
+    )
+
+
 class RewardClaim(Base):
     """Detected reward claims from LP positions."""
 
@@ -197,6 +229,57 @@ class DefiPositionSnapshot(Base):
     )
 
 
+class DefiPositionRollup(Base):
+    """Weekly or monthly aggregates of daily DeFi position snapshots.
+
+    Daily snapshots are kept for a limited window; older history is served
+    from these rollups (min/max/last of each tracked value per period).
+    """
+
+    __tablename__ = "defi_position_rollups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    wallet_address: Mapped[str] = mapped_column(String(42), nullable=False)
+    position_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    protocol: Mapped[str] = mapped_column(String(100), nullable=False)
+    chain_id: Mapped[str] = mapped_column(String(20), nullable=False)
+    position_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(50), nullable=False)
+    token_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    resolution: Mapped[str] = mapped_column(String(10), nullable=False)  # week, month
+    period_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_snapshot_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    balance_last: Mapped[Decimal] = mapped_column(Numeric(36, 18), nullable=False)
+    balance_usd_min: Mapped[Decimal] = mapped_column(Numeric(18, 2), nullable=False)
+    balance_usd_max: Mapped[Decimal] = mapped_column(Numeric(18, 2), nullable=False)
+    balance_usd_last: Mapped[Decimal] = mapped_column(Numeric(18, 2), nullable=False)
+    price_usd_min: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    price_usd_max: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    price_usd_last: Mapped[Decimal | None] = mapped_column(Numeric(20, 8), nullable=True)
+    protocol_apy_min: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    protocol_apy_max: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    protocol_apy_last: Mapped[Decimal | None] = mapped_column(Numeric(10, 4), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_defi_rollups_unique",
+            "user_id",
+            "position_id",
+            "resolution",
+            "period_start",
+            unique=True,
+        ),
+        Index("ix_defi_rollups_wallet", "user_id", "wallet_address", "resolution", "period_start"),
+    )
+
+
 class PositionReward(Base):
     """Claimed rewards linked to LP positions."""
 
@@ -0,0 +1,45 @@
+"""Persisted DeFiLlama yield pool catalog models."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from ..utils.db_types import JSONBCompat as JSONB
+from .transaction import Base
+
+
+class DefiLlamaPool(Base):
+    """One pool from the DeFiLlama ``/pools`` response."""
+
+    __tablename__ = "defillama_pools"
+
+    pool_id: Mapped[str] = mapped_column(String(100), primary_key=True)
+    # Match keys: project and chain lower-cased, symbol upper-cased
+    project_key: Mapped[str] = mapped_column(String(100), nullable=False)
+    chain_key: Mapped[str] = mapped_column(String(50), nullable=False)
+    symbol_key: Mapped[str] = mapped_column(String(200), nullable=False)
+    # Order in the upstream response; earlier pools win ties when matching
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_defillama_pools_match", "project_key", "chain_key", "symbol_key"),
+    )
+
+
+class DefiLlamaCatalogState(Base):
+    """Validators and version of the stored catalog, for conditional refreshes."""
+
+    __tablename__ = "defillama_catalog_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # Bumped whenever the stored pools change; workers reload their index on change
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    pool_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
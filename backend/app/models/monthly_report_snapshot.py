@@ -0,0 +1,101 @@
+"""Precomputed monthly usage report snapshots for closed months."""
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Integer,
+    UniqueConstraint,
+    and_,
+    delete,
+    event,
+    or_,
+    select,
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapped, Session, mapped_column
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.sql import func
+
+from ..utils.db_bulk import chunked
+from ..utils.db_types import JSONBCompat as JSONB
+from .transaction import Base, Transaction
+
+_INVALIDATE_CHUNK_SIZE = 200
+# A report compares against the previous month and shows a 3-month trend,
+# so a change in one month also stales the two reports that follow it
+_DEPENDENT_MONTHS = 2
+
+
+class MonthlyReportSnapshot(Base):
+    """Serialized MonthlyUsageReportData for a user's closed month."""
+
+    __tablename__ = "monthly_report_snapshots"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False, index=True,
+    )
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    month: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "year", "month",
+                         name="uq_monthly_report_snapshot"),
+    )
+
+
+def invalidate_report_snapshots(
+    connection: Connection, keys: set[tuple[int, str]]
+) -> None:
+    """Delete snapshots for (user_id, "YYYY-MM") month keys and the months that depend on them."""
+    targets = set()
+    for user_id, month_key in keys:
+        if user_id is None or not month_key:
+            continue
+        year, month = (int(part) for part in month_key.split("-"))
+        for offset in range(_DEPENDENT_MONTHS + 1):
+            dependent_year, dependent_month = divmod(year * 12 + month - 1 + offset, 12)
+            targets.add((user_id, dependent_year, dependent_month + 1))
+    conditions = [
+        and_(
+            MonthlyReportSnapshot.user_id == user_id,
+            MonthlyReportSnapshot.year == year,
+            MonthlyReportSnapshot.month == month,
+        )
+        for user_id, year, month in targets
+    ]
+    for chunk in chunked(conditions, _INVALIDATE_CHUNK_SIZE):
+        connection.execute(delete(MonthlyReportSnapshot).where(or_(*chunk)))
+
+
+def invalidate_report_snapshots_for(db: Session, *criteria) -> None:
+    """Invalidate snapshots for the months of transactions matching ``criteria``.
+
+    Call before a bulk ``query(Transaction).update(...)``, which skips the
+    ORM hooks below, while the criteria still match the affected rows.
+    """
+    keys = db.execute(
+        select(Transaction.user_id, Transaction.month_key).where(*criteria).distinct()
+    ).all()
+    invalidate_report_snapshots(db.connection(), {tuple(key) for key in keys})
+
+
+@event.listens_for(Transaction, "after_insert")
+@event.listens_for(Transaction, "after_delete")
+def _invalidate_on_insert_or_delete(mapper, connection, target: Transaction) -> None:
+    invalidate_report_snapshots(connection, {(target.user_id, target.month_key)})
+
+
+@event.listens_for(Transaction, "after_update")
+def _invalidate_on_update(mapper, connection, target: Transaction) -> None:
+    # Invalidate the month the transaction moved out of as well
+    keys = {(target.user_id, target.month_key)}
+    keys.update((target.user_id, old) for old in get_history(target, "month_key").deleted)
+    keys.update((old, target.month_key) for old in get_history(target, "user_id").deleted)
+    invalidate_report_snapshots(connection, keys)
@@ -169,6 +169,65 @@ class NotificationLog(Base):
     )
 
 
+class NotificationRateCounter(Base):
+    """Per-window send counters backing the notification rate limiter.
+
+    One row per (user, channel, window); channel '*' holds the global count.
+    Only the current and previous windows are kept.
+    """
+
+    __tablename__ = "notification_rate_counters"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    channel: Mapped[str] = mapped_column(
+        String(20), nullable=False, comment="'push', 'email', 'in_app' or '*' for global"
+    )
+    window_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_notification_rate_counters_key",
+            "user_id",
+            "channel",
+            "window_start",
+            unique=True,
+        ),
+        Index("ix_notification_rate_counters_window", "window_start"),
+    )
+
+
+class NotificationStreamEvent(Base):
+    """Stream events relayed between processes for ``/api/notifications/stream``.
+
+    Each process writes the events it publishes and polls rows written by
+    other processes (``origin``). Rows are short-lived and purged by age.
+    """
+
+    __tablename__ = "notification_stream_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    origin: Mapped[str] = mapped_column(String(100), nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    event: Mapped[str] = mapped_column(String(30), nullable=False)
+    data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_notification_stream_events_created", "created_at"),
+    )
+
+
 class BillReminderSchedule(Base):
     """Bill reminder scheduling configuration."""
 
@@ -3,7 +3,7 @@
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -57,4 +57,13 @@ class PendingAction(Base):
         Index("ix_pending_action_user_type_status", "user_id", "type", "status"),
         Index("ix_pending_action_user_status", "user_id", "status"),
         Index("ix_pending_action_expires", "expires_at"),
+        # Only one active (pending/surfaced) action per user and type
+        Index(
+            "uq_pending_action_active",
+            "user_id",
+            "type",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'surfaced')"),
+            sqlite_where=text("status IN ('pending', 'surfaced')"),
+        ),
     )
@@ -0,0 +1,25 @@
+"""Shared cache of third-party provider responses."""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .transaction import Base
+
+
+class ProviderResponse(Base):
+    """A cached provider response, shared by every API and worker process."""
+
+    __tablename__ = "provider_responses"
+
+    # JSON-encoded cache key (see services.provider_cache.wallet_cache_key)
+    cache_key: Mapped[str] = mapped_column(String(500), primary_key=True)
+    wallet_address: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    # Encoded by services.provider_cache so Decimal values survive the round trip
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_provider_responses_wallet", "wallet_address"),
+        Index("ix_provider_responses_fetched_at", "fetched_at"),
+    )
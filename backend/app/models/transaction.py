@@ -16,6 +16,7 @@ from sqlalchemy import (
     Integer,
     Numeric,
     String,
+    event,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -73,6 +74,10 @@ class Transaction(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    # Bumped on every change; drives delta sync for the iOS export
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
 
     # Foreign Keys
     user_id: Mapped[int | None] = mapped_column(
@@ -107,5 +112,41 @@ class Transaction(Base):
     __table_args__ = (
         Index("ix_duplicate_check", "date", "amount", "description", "source"),
         Index("ix_month_category", "month_key", "category"),
+        Index("ix_transactions_user_updated", "user_id", "updated_at"),
         CheckConstraint("amount != 0", name="amount_nonzero"),
     )
+
+
+class TransactionTombstone(Base):
+    """Record of a deleted transaction, so delta exports can report removals."""
+
+    __tablename__ = "transaction_tombstones"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    transaction_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_transaction_tombstones_user_deleted", "user_id", "deleted_at"),
+    )
+
+
+@event.listens_for(Transaction, "after_delete")
+def _record_transaction_tombstone(mapper, connection, target: Transaction) -> None:
+    """Write a tombstone in the same flush as an ORM delete.
+
+    Bulk ``query(...).delete()`` bypasses this hook, so transaction deletes
+    should go through ``Session.delete``.
+    """
+    if target.user_id is None:
+        return
+    connection.execute(
+        TransactionTombstone.__table__.insert().values(
+            user_id=target.user_id, transaction_id=target.id
+        )
+    )
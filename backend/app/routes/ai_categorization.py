@@ -1,14 +1,21 @@
 """AI-powered transaction categorization routes."""
+import json
+import logging
 import time
 from collections import defaultdict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..auth.dependencies import get_current_user
 from ..database import get_db
@@ -21,9 +28,12 @@ from ..services.claude_ai_service import ClaudeAIService
 from ..services.credit_service import CreditService, InsufficientCreditsError
 from ..services.exchange_rate_service import ExchangeRateService
 from ..services.category_rule_service import CategoryRuleService
+from ..services.categorization_memo_service import CategorizationMemoService, parse_ai_result
 from ..models.credit_transaction import CreditTransaction
 from ..utils.currency_utils import convert_to_jpy
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
 
@@ -58,6 +68,8 @@ class CategorizeSuggestionsResponse(BaseModel):
     total_other_count: int
     credits_used: float
     new_categories_suggested: list[str]
+    cached_merchants: int = 0
+    failed_transaction_ids: list[int] = []
 
 
 class ApplySuggestionsRequest(BaseModel):
@@ -73,59 +85,15 @@ class ApplySuggestionsResponse(BaseModel):
     failed_ids: list[int]
 
 
-@router.post("/categorize/suggestions", response_model=CategorizeSuggestionsResponse)
-def get_categorization_suggestions(
-    request: CategorizeSuggestionsRequest,
-    db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
-):
-    """Get AI-powered categorization suggestions for 'Other' transactions.
-
-    Args:
-        request: Request with limit and language
-        db: Database session
-        current_user: Authenticated user
-
-    Returns:
-        List of category suggestions with confidence scores
-
-    Raises:
-        HTTPException: If insufficient credits or AI fails
-    """
-    # Get transactions categorized as 'Other'
-    other_transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.category == "Other",
-        Transaction.is_income == False,
-        Transaction.is_transfer == False,
-        Transaction.is_adjustment == False,
-    ).order_by(Transaction.date.desc()).limit(request.limit).all()
-
-    total_other_count = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.category == "Other",
-    ).count()
-
-    if not other_transactions:
-        return CategorizeSuggestionsResponse(
-            suggestions=[],
-            total_other_count=0,
-            credits_used=0,
-            new_categories_suggested=[]
-        )
-
-    # Check credits before calling AI
-    credit_service = CreditService(db)
-    account = credit_service.get_account(current_user.id)
-    estimated_cost = Decimal("0.50")  # Estimate ~0.5 credits for categorization
+def _credits_for_usage(usage: dict[str, int]) -> Decimal:
+    """Credits charged for an AI call's token usage."""
+    input_cost = Decimal(usage["input_tokens"]) * Decimal("0.080") / Decimal("1000")
+    output_cost = Decimal(usage["output_tokens"]) * Decimal("0.400") / Decimal("1000")
+    return input_cost + output_cost
 
-    if account.balance < estimated_cost:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail="Insufficient credits. Please purchase more credits."
-        )
 
-    # Build category hierarchy from Category model
+def _expense_category_hierarchy(db: Session, user_id: int) -> dict[str, list[str]]:
+    """Build {parent_name: [child_names]} from system and the user's expense categories."""
     # Get all system parent categories (expense type)
     parent_categories = db.query(Category).filter(
         Category.is_system == True,
@@ -133,7 +101,6 @@ def get_categorization_suggestions(
         Category.type == "expense"
     ).all()
 
-    # Build hierarchy dict: {parent_name: [child_names]}
     category_hierarchy: dict[str, list[str]] = {}
     for parent in parent_categories:
         # Get system children
@@ -145,99 +112,395 @@ def get_categorization_suggestions(
         # Get user's custom children under this parent
         user_children = db.query(Category).filter(
             Category.parent_id == parent.id,
-            Category.user_id == current_user.id,
+            Category.user_id == user_id,
             Category.is_system == False
         ).all()
 
         child_names = [c.name for c in system_children] + [c.name for c in user_children]
         if child_names:
             category_hierarchy[parent.name] = child_names
+    return category_hierarchy
 
-    # Prepare transaction data for AI
-    tx_data = [
-        {"id": tx.id, "description": tx.description, "amount": tx.amount}
-        for tx in other_transactions
-    ]
 
-    # Call AI service with hierarchy
-    try:
-        ai_service = ClaudeAIService()
-        results, usage = ai_service.categorize_transactions(
-            transactions=tx_data,
-            available_categories=category_hierarchy,
-            language=request.language
-        )
+def _new_categories(suggestions: list[CategorySuggestion]) -> list[str]:
+    return list(dict.fromkeys(s.suggested_category for s in suggestions if s.is_new_category))
 
-        # Calculate and deduct credits
-        input_cost = Decimal(usage["input_tokens"]) * Decimal("0.080") / Decimal("1000")
-        output_cost = Decimal(usage["output_tokens"]) * Decimal("0.400") / Decimal("1000")
-        total_credits = input_cost + output_cost
 
-        try:
-            credit_service.deduct_credits(
-                user_id=current_user.id,
-                amount=total_credits,
-                transaction_type="usage",
-                description=f"AI categorization ({usage['input_tokens']} input + {usage['output_tokens']} output tokens)",
-                extra_data={
-                    "input_tokens": usage["input_tokens"],
-                    "output_tokens": usage["output_tokens"],
-                    "transactions_analyzed": len(tx_data)
-                }
-            )
-            db.commit()
-        except InsufficientCreditsError as e:
-            db.rollback()
+@dataclass
+class _CategorizationPlan:
+    """Work for one suggestion request: memo hits and AI chunks of the rest."""
+
+    groups: dict[str, list[Transaction]]
+    category_hierarchy: dict[str, list[str]]
+    cached: dict[str, dict]
+    # Each chunk holds one representative transaction per uncached merchant
+    chunks: list[list[dict]]
+    representatives: dict[int, str]
+    estimated_credits: Decimal
+
+
+def _plan_categorization(
+    db: Session, user_id: int, transactions: list[Transaction], language: str
+) -> _CategorizationPlan:
+    """Group transactions by merchant, look up the memo and chunk the misses.
+
+    Raises:
+        HTTPException: 402 if AI calls are needed and the balance does not
+            cover their estimated cost
+    """
+    groups = CategorizationMemoService.group_by_merchant(transactions)
+    category_hierarchy = _expense_category_hierarchy(db, user_id)
+    valid_categories = {name for children in category_hierarchy.values() for name in children}
+    cached = CategorizationMemoService.get_cached(db, user_id, groups, valid_categories)
+
+    representatives: dict[int, str] = {}
+    tx_data = []
+    for merchant, group in groups.items():
+        if merchant in cached:
+            continue
+        tx = group[0]
+        representatives[tx.id] = merchant
+        tx_data.append({"id": tx.id, "description": tx.description, "amount": tx.amount})
+
+    chunks = ClaudeAIService.chunk_for_categorization(tx_data)
+    estimated_credits = Decimal("0")
+    if chunks:
+        estimated_credits = _credits_for_usage(ClaudeAIService.estimate_categorization_usage(
+            chunks, category_hierarchy, language
+        ))
+        account = CreditService(db).get_account(user_id)
+        if account.balance < estimated_credits:
             raise HTTPException(
                 status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail=str(e)
+                detail="Insufficient credits. Please purchase more credits."
             )
 
-        # Build response with suggestions
-        tx_map = {tx.id: tx for tx in other_transactions}
-        suggestions = []
-        new_categories = set()
-
-        for result in results:
-            tx_id = result.get("id")
-            if tx_id not in tx_map:
-                continue
+    return _CategorizationPlan(
+        groups=groups,
+        category_hierarchy=category_hierarchy,
+        cached=cached,
+        chunks=chunks,
+        representatives=representatives,
+        estimated_credits=estimated_credits,
+    )
 
-            tx = tx_map[tx_id]
-            category = result.get("category", "Other")
-            is_new = category.startswith("NEW:")
-
-            if is_new:
-                category = category[4:]  # Remove "NEW:" prefix
-                new_categories.add(category)
-
-            suggestions.append(CategorySuggestion(
-                transaction_id=tx_id,
-                description=tx.description,
-                amount=tx.amount,
-                current_category="Other",
-                suggested_category=category,
-                confidence=result.get("confidence", 0.5),
-                reason=result.get("reason", ""),
-                is_new_category=is_new
-            ))
 
-        return CategorizeSuggestionsResponse(
-            suggestions=suggestions,
-            total_other_count=total_other_count,
-            credits_used=float(total_credits),
-            new_categories_suggested=list(new_categories)
+def _suggestions(groups: dict[str, list[Transaction]], answers: dict[str, dict]) -> list[CategorySuggestion]:
+    return [
+        CategorySuggestion(
+            transaction_id=tx.id,
+            description=tx.description,
+            amount=tx.amount,
+            current_category=tx.category,
+            suggested_category=answer["category"],
+            confidence=answer["confidence"],
+            reason=answer["reason"],
+            is_new_category=answer["is_new_category"],
         )
+        for tx, answer in CategorizationMemoService.fan_out(groups, answers)
+    ]
+
+
+def _chunk_transaction_ids(plan: _CategorizationPlan, chunk: list[dict]) -> list[int]:
+    """Ids of every transaction whose merchant was in ``chunk``."""
+    return [
+        tx.id
+        for item in chunk
+        for tx in plan.groups[plan.representatives[item["id"]]]
+    ]
+
 
-    except HTTPException:
+def _apply_chunk(
+    db: Session,
+    user_id: int,
+    plan: _CategorizationPlan,
+    outcome: dict,
+    usage_label: str,
+    extra_data: dict | None,
+) -> tuple[list[CategorySuggestion], Decimal]:
+    """Charge credits for a completed chunk and memoize its answers in one commit.
+
+    Raises:
+        InsufficientCreditsError: If the balance no longer covers the chunk
+    """
+    answers = {}
+    for result in outcome["results"]:
+        merchant = plan.representatives.get(result.get("id"))
+        if merchant is not None:
+            answers[merchant] = parse_ai_result(result)
+
+    usage = outcome["usage"]
+    credits = _credits_for_usage(usage)
+    credit_service = CreditService(db)
+    try:
+        credit_service.deduct_credits(
+            user_id=user_id,
+            amount=credits,
+            transaction_type="usage",
+            description=f"{usage_label} ({usage['input_tokens']} input + {usage['output_tokens']} output tokens)",
+            extra_data={
+                "input_tokens": usage["input_tokens"],
+                "output_tokens": usage["output_tokens"],
+                "transactions_analyzed": len(_chunk_transaction_ids(plan, outcome["transactions"])),
+                "merchants_analyzed": len(outcome["transactions"]),
+                "chunk": outcome["chunk"],
+                **(extra_data or {}),
+            }
+        )
+        CategorizationMemoService.save(db, user_id, answers)
+        db.commit()
+    except InsufficientCreditsError:
+        db.rollback()
         raise
+    return _suggestions(plan.groups, answers), credits
+
+
+async def _categorization_events(
+    db: Session,
+    user_id: int,
+    plan: _CategorizationPlan,
+    language: str,
+    usage_label: str,
+    extra_data: dict | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Run a plan's AI chunks concurrently, yielding suggestion events.
+
+    Yields ("cached", ...) first, then ("chunk", ...) or ("chunk_error", ...)
+    per chunk in completion order; see ``stream_categorization_suggestions``.
+    """
+    if plan.cached:
+        yield "cached", {"suggestions": _suggestions(plan.groups, plan.cached)}
+    if not plan.chunks:
+        return
+
+    ai_service = ClaudeAIService()
+    async for outcome in ai_service.stream_categorize_transactions(
+        plan.chunks, plan.category_hierarchy, language
+    ):
+        error = outcome.get("error")
+        code = "ai_error"
+        if error is None:
+            try:
+                suggestions, credits = await run_in_threadpool(
+                    _apply_chunk, db, user_id, plan, outcome, usage_label, extra_data
+                )
+            except InsufficientCreditsError as e:
+                error, code = str(e), "insufficient_credits"
+            else:
+                yield "chunk", {
+                    "chunk": outcome["chunk"],
+                    "suggestions": suggestions,
+                    "credits_used": float(credits),
+                }
+                continue
+        yield "chunk_error", {
+            "chunk": outcome["chunk"],
+            "code": code,
+            "detail": error,
+            "transaction_ids": _chunk_transaction_ids(plan, outcome["transactions"]),
+        }
+
+
+async def _collect_suggestions(
+    db: Session,
+    user_id: int,
+    transactions: list[Transaction],
+    total_count: int,
+    language: str,
+    usage_label: str,
+    extra_data: dict | None = None,
+) -> CategorizeSuggestionsResponse:
+    """Run the whole categorization and return its combined response.
+
+    Suggestions from failed chunks are missing and their transactions listed
+    in ``failed_transaction_ids``; the request fails only if every chunk did
+    and nothing was served from the memo.
+    """
+    plan = await run_in_threadpool(_plan_categorization, db, user_id, transactions, language)
+    suggestions: list[CategorySuggestion] = []
+    credits_used = 0.0
+    failed_ids: list[int] = []
+    error_codes: list[str] = []
+    errors: list[str] = []
+    try:
+        async for event, data in _categorization_events(db, user_id, plan, language, usage_label, extra_data):
+            if event == "chunk_error":
+                failed_ids.extend(data["transaction_ids"])
+                error_codes.append(data["code"])
+                errors.append(data["detail"])
+                continue
+            suggestions.extend(data["suggestions"])
+            credits_used += data.get("credits_used", 0)
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{usage_label} failed: {str(e)}"
+        )
+
+    if errors and not suggestions:
+        if "insufficient_credits" in error_codes:
+            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=errors[0])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"AI categorization failed: {str(e)}"
+            detail=f"{usage_label} failed: {errors[0]}"
         )
 
+    return CategorizeSuggestionsResponse(
+        suggestions=suggestions,
+        total_other_count=total_count,
+        credits_used=credits_used,
+        new_categories_suggested=_new_categories(suggestions),
+        cached_merchants=len(plan.cached),
+        failed_transaction_ids=failed_ids,
+    )
+
+
+def _format_sse(event: str, data: Any) -> str:
+    """Serialize an event in text/event-stream format."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+async def _stream_suggestions(
+    db: Session,
+    user_id: int,
+    transactions: list[Transaction],
+    total_count: int,
+    language: str,
+    usage_label: str,
+    extra_data: dict | None = None,
+) -> StreamingResponse:
+    """Plan the categorization, then stream its events as SSE.
+
+    Raises:
+        HTTPException: 402 if insufficient credits (before the stream starts)
+    """
+    plan = await run_in_threadpool(_plan_categorization, db, user_id, transactions, language)
+
+    async def event_stream():
+        credits_used = 0.0
+        failed_ids: list[int] = []
+        new_categories: dict[str, None] = {}
+        try:
+            async for event, data in _categorization_events(
+                db, user_id, plan, language, usage_label, extra_data
+            ):
+                if event == "chunk_error":
+                    failed_ids.extend(data["transaction_ids"])
+                else:
+                    credits_used += data.get("credits_used", 0)
+                    new_categories.update(dict.fromkeys(_new_categories(data["suggestions"])))
+                yield _format_sse(event, data)
+            yield _format_sse("done", {
+                "total_other_count": total_count,
+                "credits_used": credits_used,
+                "new_categories_suggested": list(new_categories),
+                "cached_merchants": len(plan.cached),
+                "failed_transaction_ids": failed_ids,
+            })
+        except Exception as e:
+            logger.error(f"{usage_label} stream error: {e}", exc_info=True)
+            yield _format_sse("error", {"detail": f"{usage_label} failed: {str(e)}"})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _other_transactions(db: Session, user_id: int, limit: int) -> tuple[list[Transaction], int]:
+    """Latest 'Other' expense transactions and the user's total 'Other' count."""
+    other_transactions = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.category == "Other",
+        Transaction.is_income == False,
+        Transaction.is_transfer == False,
+        Transaction.is_adjustment == False,
+    ).order_by(Transaction.date.desc()).limit(limit).all()
+
+    total_other_count = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.category == "Other",
+    ).count()
+    return other_transactions, total_other_count
+
+
+@router.post("/categorize/suggestions", response_model=CategorizeSuggestionsResponse)
+async def get_categorization_suggestions(
+    request: CategorizeSuggestionsRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    """Get AI-powered categorization suggestions for 'Other' transactions.
+
+    Args:
+        request: Request with limit and language
+        db: Database session
+        current_user: Authenticated user
+
+    Returns:
+        List of category suggestions with confidence scores
+
+    Raises:
+        HTTPException: If insufficient credits or AI fails
+    """
+    other_transactions, total_other_count = await run_in_threadpool(
+        _other_transactions, db, current_user.id, request.limit
+    )
+    if not other_transactions:
+        return CategorizeSuggestionsResponse(
+            suggestions=[],
+            total_other_count=0,
+            credits_used=0,
+            new_categories_suggested=[]
+        )
+
+    return await _collect_suggestions(
+        db,
+        current_user.id,
+        other_transactions,
+        total_other_count,
+        request.language,
+        usage_label="AI categorization",
+    )
+
+
+@router.post("/categorize/suggestions/stream")
+async def stream_categorization_suggestions(
+    request: CategorizeSuggestionsRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    """Categorization suggestions for 'Other' transactions as Server-Sent Events.
+
+    Events:
+    - ``cached``: ``{"suggestions"}`` answered from the merchant memo
+    - ``chunk``: ``{"chunk", "suggestions", "credits_used"}`` as each AI
+      chunk completes (credits are charged per chunk)
+    - ``chunk_error``: ``{"chunk", "code", "detail", "transaction_ids"}``
+      for a failed chunk; the other chunks continue
+    - ``done``: totals (``total_other_count``, ``credits_used``,
+      ``new_categories_suggested``, ``cached_merchants``,
+      ``failed_transaction_ids``)
+
+    Raises:
+        HTTPException: 402 if insufficient credits (before the stream starts)
+    """
+    other_transactions, total_other_count = await run_in_threadpool(
+        _other_transactions, db, current_user.id, request.limit
+    )
+    return await _stream_suggestions(
+        db,
+        current_user.id,
+        other_transactions,
+        total_other_count,
+        request.language,
+        usage_label="AI categorization",
+    )
+
 
 @router.post("/categorize/apply", response_model=ApplySuggestionsResponse)
 def apply_categorization_suggestions(
@@ -342,20 +605,20 @@ def apply_categorization_suggestions(
     )
 
 
-@router.post("/categorize/budget-suggestions", response_model=CategorizeSuggestionsResponse)
-def get_budget_categorization_suggestions(
-    request: BudgetCategorizeSuggestionsRequest,
-    db: Annotated[Session, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
-):
-    """Get AI categorization suggestions for transactions not matched to any budget allocation.
+def _unmatched_budget_transactions(
+    db: Session, user_id: int, month: str, limit: int
+) -> tuple[list[Transaction], int]:
+    """Latest expense transactions of ``month`` not matched to any budget allocation.
 
-    Finds expense transactions in the given month whose categories are not covered
-    by any budget allocation, then sends them to AI for re-categorization.
+    Returns:
+        Tuple of (up to ``limit`` transactions, total unmatched count)
+
+    Raises:
+        HTTPException: 400 for a malformed month, 404 without an active budget
     """
     # Validate month format
     try:
-        year, month_num = map(int, request.month.split('-'))
+        year, month_num = map(int, month.split('-'))
         month_start = date(year, month_num, 1)
         if month_num == 12:
             month_end = date(year + 1, 1, 1) - timedelta(days=1)
@@ -369,20 +632,20 @@ def get_budget_categorization_suggestions(
 
     # Get active budget for the month
     budget = db.query(Budget).filter(
-        Budget.user_id == current_user.id,
-        Budget.month == request.month,
+        Budget.user_id == user_id,
+        Budget.month == month,
         Budget.is_active == True
     ).first()
 
     if not budget:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No active budget found for {request.month}."
+            detail=f"No active budget found for {month}."
         )
 
     # Get all expense transactions for the month
     expense_transactions = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
+        Transaction.user_id == user_id,
         Transaction.is_income == False,
         Transaction.is_transfer == False,
         Transaction.is_adjustment == False,
@@ -391,15 +654,10 @@ def get_budget_categorization_suggestions(
     ).all()
 
     if not expense_transactions:
-        return CategorizeSuggestionsResponse(
-            suggestions=[],
-            total_other_count=0,
-            credits_used=0,
-            new_categories_suggested=[]
-        )
+        return [], 0
 
     # Build category hierarchy (same as budget tracking service)
-    hierarchy = BudgetTrackingService._build_category_hierarchy(db, current_user.id)
+    hierarchy = BudgetTrackingService._build_category_hierarchy(db, user_id)
 
     # Get exchange rates for currency conversion
     rates = ExchangeRateService.get_cached_rates(db)
@@ -430,9 +688,26 @@ def get_budget_categorization_suggestions(
     # Sort by date desc and apply limit
     unmatched_transactions.sort(key=lambda t: t.date, reverse=True)
     total_unmatched_count = len(unmatched_transactions)
-    unmatched_transactions = unmatched_transactions[:request.limit]
+    unmatched_transactions = unmatched_transactions[:limit]
+
+    return unmatched_transactions, total_unmatched_count
+
+
+@router.post("/categorize/budget-suggestions", response_model=CategorizeSuggestionsResponse)
+async def get_budget_categorization_suggestions(
+    request: BudgetCategorizeSuggestionsRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    """Get AI categorization suggestions for transactions not matched to any budget allocation.
 
-    if not unmatched_transactions:
+    Finds expense transactions in the given month whose categories are not covered
+    by any budget allocation, then sends them to AI for re-categorization.
+    """
+    transactions, total_unmatched_count = await run_in_threadpool(
+        _unmatched_budget_transactions, db, current_user.id, request.month, request.limit
+    )
+    if not transactions:
         return CategorizeSuggestionsResponse(
             suggestions=[],
             total_other_count=0,
@@ -440,123 +715,39 @@ def get_budget_categorization_suggestions(
             new_categories_suggested=[]
         )
 
-    # Check credits before calling AI
-    credit_service = CreditService(db)
-    account = credit_service.get_account(current_user.id)
-    estimated_cost = Decimal("0.50")
-
-    if account.balance < estimated_cost:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail="Insufficient credits. Please purchase more credits."
-        )
-
-    # Build category hierarchy for AI (from Category model, same as existing endpoint)
-    parent_categories = db.query(Category).filter(
-        Category.is_system == True,
-        Category.parent_id == None,
-        Category.type == "expense"
-    ).all()
-
-    category_hierarchy: dict[str, list[str]] = {}
-    for parent in parent_categories:
-        system_children = db.query(Category).filter(
-            Category.parent_id == parent.id,
-            Category.is_system == True
-        ).all()
-        user_children = db.query(Category).filter(
-            Category.parent_id == parent.id,
-            Category.user_id == current_user.id,
-            Category.is_system == False
-        ).all()
-        child_names = [c.name for c in system_children] + [c.name for c in user_children]
-        if child_names:
-            category_hierarchy[parent.name] = child_names
-
-    # Prepare transaction data for AI
-    tx_data = [
-        {"id": tx.id, "description": tx.description, "amount": tx.amount}
-        for tx in unmatched_transactions
-    ]
-
-    try:
-        ai_service = ClaudeAIService()
-        results, usage = ai_service.categorize_transactions(
-            transactions=tx_data,
-            available_categories=category_hierarchy,
-            language=request.language
-        )
-
-        # Calculate and deduct credits
-        input_cost = Decimal(usage["input_tokens"]) * Decimal("0.080") / Decimal("1000")
-        output_cost = Decimal(usage["output_tokens"]) * Decimal("0.400") / Decimal("1000")
-        total_credits = input_cost + output_cost
-
-        try:
-            credit_service.deduct_credits(
-                user_id=current_user.id,
-                amount=total_credits,
-                transaction_type="usage",
-                description=f"Budget AI categorization ({usage['input_tokens']} input + {usage['output_tokens']} output tokens)",
-                extra_data={
-                    "input_tokens": usage["input_tokens"],
-                    "output_tokens": usage["output_tokens"],
-                    "transactions_analyzed": len(tx_data),
-                    "budget_month": request.month
-                }
-            )
-            db.commit()
-        except InsufficientCreditsError as e:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_402_PAYMENT_REQUIRED,
-                detail=str(e)
-            )
-
-        # Build response
-        tx_map = {tx.id: tx for tx in unmatched_transactions}
-        suggestions = []
-        new_categories = set()
-
-        for result in results:
-            tx_id = result.get("id")
-            if tx_id not in tx_map:
-                continue
+    return await _collect_suggestions(
+        db,
+        current_user.id,
+        transactions,
+        total_unmatched_count,
+        request.language,
+        usage_label="Budget AI categorization",
+        extra_data={"budget_month": request.month},
+    )
 
-            tx = tx_map[tx_id]
-            category = result.get("category", "Other")
-            is_new = category.startswith("NEW:")
-
-            if is_new:
-                category = category[4:]
-                new_categories.add(category)
-
-            suggestions.append(CategorySuggestion(
-                transaction_id=tx_id,
-                description=tx.description,
-                amount=tx.amount,
-                current_category=tx.category,
-                suggested_category=category,
-                confidence=result.get("confidence", 0.5),
-                reason=result.get("reason", ""),
-                is_new_category=is_new
-            ))
 
-        return CategorizeSuggestionsResponse(
-            suggestions=suggestions,
-            total_other_count=total_unmatched_count,
-            credits_used=float(total_credits),
-            new_categories_suggested=list(new_categories)
-        )
+@router.post("/categorize/budget-suggestions/stream")
+async def stream_budget_categorization_suggestions(
+    request: BudgetCategorizeSuggestionsRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)]
+):
+    """Budget-scoped suggestions streamed per chunk as Server-Sent Events.
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Budget AI categorization failed: {str(e)}"
-        )
+    Emits the same events as ``/categorize/suggestions/stream``.
+    """
+    transactions, total_unmatched_count = await run_in_threadpool(
+        _unmatched_budget_transactions, db, current_user.id, request.month, request.limit
+    )
+    return await _stream_suggestions(
+        db,
+        current_user.id,
+        transactions,
+        total_unmatched_count,
+        request.language,
+        usage_label="Budget AI categorization",
+        extra_data={"budget_month": request.month},
+    )
 
 
 # --- Inline AI categorization (Layer 3) ---
@@ -672,9 +863,7 @@ def categorize_inline(
         is_income = ai_parent in income_parents
 
         # Deduct credits
-        input_cost = Decimal(usage["input_tokens"]) * Decimal("0.080") / Decimal("1000")
-        output_cost = Decimal(usage["output_tokens"]) * Decimal("0.400") / Decimal("1000")
-        total_credits = input_cost + output_cost
+        total_credits = _credits_for_usage(usage)
 
         try:
             credit_service.deduct_credits(
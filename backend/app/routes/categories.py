@@ -148,11 +148,15 @@ def delete_custom_category(
         ).first()
 
     if misc_child:
+        from ..models.monthly_report_snapshot import invalidate_report_snapshots_for
         from ..models.transaction import Transaction
-        db.query(Transaction).filter(
+        criteria = (
             Transaction.user_id == current_user.id,
-            Transaction.category == category.name
-        ).update({"category": misc_child.name})
+            Transaction.category == category.name,
+        )
+        # Bulk updates skip the ORM hooks that drop stale report snapshots
+        invalidate_report_snapshots_for(db, *criteria)
+        db.query(Transaction).filter(*criteria).update({"category": misc_child.name})
 
     db.delete(category)
     db.commit()
@@ -1,10 +1,14 @@
 """Chat API routes for AI financial assistant."""
+import json
+import logging
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..auth.dependencies import get_current_user
 from ..database import get_db
@@ -14,6 +18,8 @@ from ..services.claude_ai_service import ClaudeAIService
 from ..services.credit_service import CreditService, InsufficientCreditsError
 from ..services.tool_executor import ToolExecutor
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 # Cost per chat message in credits
@@ -27,6 +33,41 @@ class ExecuteActionRequest(BaseModel):
     payload: dict
 
 
+def _require_chat_credits(credit_service: CreditService, user_id: int) -> None:
+    """Raise 402 unless the user can pay for one chat message."""
+    balance = credit_service.get_balance(user_id)
+    if balance < CHAT_CREDIT_COST:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient credits. Please purchase more credits to continue chatting."
+        )
+
+
+def _charge_chat_message(credit_service: CreditService, user_id: int, usage: dict[str, int]) -> None:
+    """Deduct the chat credit and record token usage.
+
+    Raises:
+        InsufficientCreditsError: If the balance no longer covers the message
+    """
+    credit_service.deduct_credits(
+        user_id=user_id,
+        amount=CHAT_CREDIT_COST,
+        transaction_type="usage",
+        description="AI Chat - 1 message",
+        extra_data={
+            "feature": "chat",
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0)
+        }
+    )
+    credit_service.db.commit()
+
+
+def _format_sse(event: str, data: Any) -> str:
+    """Serialize an event in text/event-stream format."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
@@ -52,17 +93,13 @@ async def chat(
     credit_service = CreditService(db)
 
     # Check credits before processing
-    balance = credit_service.get_balance(current_user.id)
-    if balance < CHAT_CREDIT_COST:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail="Insufficient credits. Please purchase more credits to continue chatting."
-        )
+    _require_chat_credits(credit_service, current_user.id)
 
-    # Build financial context and call AI
+    # Build financial context and call AI (blocking client, so off the event loop)
     ai_service = ClaudeAIService()
     try:
-        response_data, usage = ai_service.chat_with_context(
+        response_data, usage = await run_in_threadpool(
+            ai_service.chat_with_context,
             db=db,
             user_id=current_user.id,
             messages=[{"role": m.role, "content": m.content} for m in request.messages],
@@ -77,18 +114,7 @@ async def chat(
 
     # Deduct credit after successful response
     try:
-        credit_service.deduct_credits(
-            user_id=current_user.id,
-            amount=CHAT_CREDIT_COST,
-            transaction_type="usage",
-            description="AI Chat - 1 message",
-            extra_data={
-                "feature": "chat",
-                "input_tokens": usage.get("input_tokens", 0),
-                "output_tokens": usage.get("output_tokens", 0)
-            }
-        )
-        db.commit()
+        _charge_chat_message(credit_service, current_user.id, usage)
     except InsufficientCreditsError:
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
@@ -106,6 +132,71 @@ async def chat(
     )
 
 
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    db: Annotated[Session, Depends(get_db)],
+    current_user: Annotated[User, Depends(get_current_user)]
+) -> StreamingResponse:
+    """Chat with AI about financial data, streamed as Server-Sent Events.
+
+    Same credits and payload as ``POST /api/chat``. Events:
+    - ``delta``: ``{"text"}`` token delta of the answer
+    - ``tool_call`` / ``tool_result``: ``{"id", "name"[, "is_error"]}``
+    - ``action``: suggested action awaiting confirmation
+    - ``reset``: discard the text streamed so far (an answer using tool
+      results follows)
+    - ``done``: the full ``ChatResponse``; the credit is charged only here
+    - ``error``: ``{"detail"}``; the stream ends and no credit is charged
+
+    Raises:
+        HTTPException: 402 if insufficient credits (before the stream starts)
+    """
+    user_id = current_user.id
+    credit_service = CreditService(db)
+    _require_chat_credits(credit_service, user_id)
+
+    ai_service = ClaudeAIService()
+    messages = [{"role": m.role, "content": m.content} for m in request.messages]
+
+    async def event_stream():
+        try:
+            async for event, data in ai_service.stream_chat_with_context(
+                db=db,
+                user_id=user_id,
+                messages=messages,
+                language=request.language,
+                current_page=request.current_page
+            ):
+                if event != "done":
+                    yield _format_sse(event, data)
+                    continue
+
+                response_data = data["response"]
+                await run_in_threadpool(_charge_chat_message, credit_service, user_id, data["usage"])
+                new_balance = await run_in_threadpool(credit_service.get_balance, user_id)
+                response = ChatResponse(
+                    message=response_data["message"],
+                    suggested_action=response_data.get("action"),
+                    quick_actions=response_data.get("quick_actions", []),
+                    credits_remaining=float(new_balance)
+                )
+                yield _format_sse("done", response.model_dump())
+        except InsufficientCreditsError:
+            yield _format_sse("error", {"detail": "Insufficient credits"})
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}", exc_info=True)
+            yield _format_sse("error", {"detail": f"AI service error: {str(e)}"})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/execute-action")
 async def execute_action(
     request: ExecuteActionRequest,
@@ -1,4 +1,5 @@
 """Crypto wallet API routes."""
+import httpx
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
@@ -21,6 +22,7 @@ from ..schemas.crypto_wallet import (
     BackfillResponse,
     PositionPerformanceResponse,
     ILScenarioResponse,
+    PositionILSeriesResponse,
     PositionInsightsResponse,
     PortfolioInsightsResponse,
     PositionRewardResponse,
@@ -46,6 +48,7 @@ from ..services.crypto_wallet_service import CryptoWalletService
 from ..services.defi_snapshot_service import DefiSnapshotService
 from ..services.defillama_service import DeFiLlamaService
 from ..services.il_calculator_service import ILCalculatorService
+from ..services.scenario_engine import ScenarioEngine
 from ..services.defi_insights_service import DefiInsightsService
 
 router = APIRouter(prefix="/api/crypto", tags=["crypto"])
@@ -327,24 +330,14 @@ async def get_position_performance(
     current_user: User = Depends(get_current_user),
 ):
     """Get performance metrics including IL for a DeFi position."""
-    from ..models.crypto_wallet import DefiPositionSnapshot
-    from sqlalchemy import and_
-
-    # Get all snapshots for this position
-    snapshots = db.query(DefiPositionSnapshot).filter(
-        and_(
-            DefiPositionSnapshot.user_id == current_user.id,
-            DefiPositionSnapshot.position_id == position_id
-        )
-    ).order_by(DefiPositionSnapshot.snapshot_date.desc()).all()
+    # Get all snapshots for this position (newest first), including rolled-up history
+    snapshot_responses = DefiSnapshotService.get_position_series(
+        db, current_user.id, [position_id]
+    )[::-1]
 
-    if not snapshots:
+    if not snapshot_responses:
         raise HTTPException(status_code=404, detail="Position not found or no snapshots available")
 
-    # Convert to response objects for IL calculator
-    from ..schemas.crypto_wallet import DefiPositionSnapshotResponse
-    snapshot_responses = [DefiPositionSnapshotResponse.model_validate(s) for s in snapshots]
-
     # Calculate performance with IL
     performance = ILCalculatorService.calculate_position_performance(snapshot_responses)
     if not performance:
@@ -356,17 +349,64 @@ async def get_position_performance(
 @router.get("/il/scenarios", response_model=list[ILScenarioResponse])
 async def get_il_scenarios(
     current_price_ratio: float = 1.0,
+    points: int | None = None,
+    min_ratio: float = 0.1,
+    max_ratio: float = 10.0,
+    apy: float | None = None,
+    days: int = 365,
     current_user: User = Depends(get_current_user),
 ):
     """Get IL scenarios for educational purposes.
 
     Shows how impermanent loss changes at various price ratios.
     Useful for understanding IL risk before entering LP positions.
+    Pass ``points`` for a full curve over a log-spaced ratio grid, and
+    ``apy`` to include the fee offset over ``days``.
     """
-    scenarios = ILCalculatorService.get_il_scenarios(current_price_ratio)
+    price_ratios = None
+    if points is not None:
+        if not 2 <= points <= 1000:
+            raise HTTPException(status_code=400, detail="points must be between 2 and 1000")
+        try:
+            price_ratios = ScenarioEngine.price_ratio_grid(min_ratio, max_ratio, points)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    scenarios = ILCalculatorService.get_il_scenarios(
+        current_price_ratio, price_ratios=price_ratios, apy=apy, days=days
+    )
     return [ILScenarioResponse(**s) for s in scenarios]
 
 
+@router.post("/il/series", response_model=list[PositionILSeriesResponse])
+async def get_il_series(
+    position_ids: list[str],
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the historical IL series of several positions.
+
+    Each series is relative to the position's first snapshot.
+    """
+    if not position_ids:
+        raise HTTPException(status_code=400, detail="No position IDs provided")
+
+    snapshots = DefiSnapshotService.get_position_series(db, current_user.id, position_ids)
+    by_position: dict[str, list] = {}
+    for snap in snapshots:
+        by_position.setdefault(snap.position_id, []).append(snap)
+
+    return [
+        PositionILSeriesResponse(
+            position_id=position_id,
+            symbol=by_position[position_id][-1].symbol,
+            points=ILCalculatorService.calculate_il_series(by_position[position_id]),
+        )
+        for position_id in position_ids
+        if position_id in by_position
+    ]
+
+
 # ==================== AI Insights Endpoints ====================
 
 @router.get("/positions/{position_id:path}/insights", response_model=PositionInsightsResponse)
@@ -384,23 +424,16 @@ async def get_position_insights(
     - Risk assessment
     - Scenario projections
     """
-    from ..models.crypto_wallet import DefiPositionSnapshot
-    from sqlalchemy import and_
-    from ..schemas.crypto_wallet import DefiPositionSnapshotResponse
-
-    # Get snapshots for this position
-    snapshots = db.query(DefiPositionSnapshot).filter(
-        and_(
-            DefiPositionSnapshot.user_id == current_user.id,
-            DefiPositionSnapshot.position_id == position_id
-        )
-    ).order_by(DefiPositionSnapshot.snapshot_date.desc()).all()
+    # Get snapshots for this position (newest first), including rolled-up history
+    snapshot_responses = DefiSnapshotService.get_position_series(
+        db, current_user.id, [position_id]
+    )[::-1]
 
-    if not snapshots:
+    if not snapshot_responses:
         raise HTTPException(status_code=404, detail="Position not found or no snapshots available")
 
     # Get latest snapshot for position data
-    latest = snapshots[0]
+    latest = snapshot_responses[0]
     position_data = {
         "protocol": latest.protocol,
         "symbol": latest.symbol,
@@ -409,7 +442,6 @@ async def get_position_insights(
     }
 
     # Calculate performance metrics
-    snapshot_responses = [DefiPositionSnapshotResponse.model_validate(s) for s in snapshots]
     performance_metrics = ILCalculatorService.calculate_position_performance(snapshot_responses)
 
     if not performance_metrics:
@@ -580,7 +612,6 @@ async def batch_create_transactions(
     """
     from ..services.reward_service import RewardService, get_token_prices
     from ..models.crypto_wallet import PositionReward
-    from decimal import Decimal
     import logging
 
     logger = logging.getLogger(__name__)
@@ -601,48 +632,26 @@ async def batch_create_transactions(
         logger.info(f"Fetched prices for {len(token_prices)} tokens: {token_prices}")
 
         # Update reward_usd for all rewards
+        updated = 0
         for reward in rewards:
             if reward.reward_token_symbol and reward.reward_amount:
                 price = token_prices.get(reward.reward_token_symbol)
                 if price:
                     reward.reward_usd = reward.reward_amount * price
-                    logger.info(f"Updated reward {reward.id}: {reward.reward_amount} {reward.reward_token_symbol} = ${reward.reward_usd}")
+                    updated += 1
+        logger.info(f"Updated USD values of {updated}/{len(rewards)} rewards")
 
         db.commit()
 
     # Step 2: Create transactions
-    created = 0
-    skipped = 0
-    failed = 0
-    total_usd = 0.0
-
-    for reward_id in body.reward_ids:
-        try:
-            result = RewardService.create_transaction_from_reward(
-                db=db,
-                user_id=current_user.id,
-                reward_id=reward_id
-            )
-            created += 1
-            total_usd += result["amount_usd"]
-        except ValueError as e:
-            error_msg = str(e)
-            if "already linked" in error_msg or "no USD value" in error_msg:
-                skipped += 1
-            else:
-                failed += 1
-                logger.warning(f"Skipped reward {reward_id}: {error_msg}")
-        except Exception as e:
-            failed += 1
-            logger.error(f"Failed to create transaction for reward {reward_id}: {e}")
-
-    return BatchCreateTransactionsResponse(
-        created=created,
-        skipped=skipped,
-        failed=failed,
-        total_usd=total_usd
+    stats = RewardService.create_transactions_from_rewards(
+        db=db,
+        user_id=current_user.id,
+        reward_ids=body.reward_ids
     )
 
+    return BatchCreateTransactionsResponse(**stats)
+
 
 @router.post("/rewards/{reward_id}/attribute", response_model=PositionRewardResponse)
 async def attribute_reward(
@@ -674,17 +683,10 @@ async def batch_attribute_rewards(
     """Batch attribute multiple rewards to a single position."""
     from ..services.reward_matching_service import RewardMatchingService
 
-    attributed = 0
-    failed = 0
-
-    for reward_id in body.reward_ids:
-        success = RewardMatchingService.manually_attribute_reward(
-            db, current_user.id, reward_id, body.position_id
-        )
-        if success:
-            attributed += 1
-        else:
-            failed += 1
+    attributed = RewardMatchingService.bulk_attribute_rewards(
+        db, current_user.id, body.reward_ids, body.position_id
+    )
+    failed = len(set(body.reward_ids)) - attributed
 
     return BatchAttributeResponse(attributed=attributed, failed=failed)
 
@@ -703,24 +705,28 @@ async def scan_rewards(
         raise HTTPException(status_code=400, detail="No wallets registered")
 
     total = {"scanned_claims": 0, "new_claims": 0, "matched": 0, "unmatched": 0}
-    for wallet in wallets:
-        # Scan Merkl claims on Polygon
-        if "polygon" in wallet.chains:
-            stats = await RewardService.scan_historical_claims(
-                db, current_user.id, wallet.wallet_address, days=body.days
-            )
-            total["scanned_claims"] += stats["scanned"]
-            total["new_claims"] += stats["new"]
-            total["matched"] += stats["matched"]
-            total["unmatched"] += stats["unmatched"]
-
-        # Scan Symbiotic claims on Ethereum
-        if "eth" in wallet.chains:
-            stats = await RewardService.scan_symbiotic_claims(
-                db, current_user.id, wallet.wallet_address, days=body.days
-            )
-            total["scanned_claims"] += stats["scanned"]
-            total["new_claims"] += stats["new"]
+    try:
+        for wallet in wallets:
+            # Scan Merkl claims on Polygon
+            if "polygon" in wallet.chains:
+                stats = await RewardService.scan_historical_claims(
+                    db, current_user.id, wallet.wallet_address, days=body.days
+                )
+                total["scanned_claims"] += stats["scanned"]
+                total["new_claims"] += stats["new"]
+                total["matched"] += stats["matched"]
+                total["unmatched"] += stats["unmatched"]
+
+            # Scan Symbiotic claims on Ethereum
+            if "eth" in wallet.chains:
+                stats = await RewardService.scan_symbiotic_claims(
+                    db, current_user.id, wallet.wallet_address, days=body.days
+                )
+                total["scanned_claims"] += stats["scanned"]
+                total["new_claims"] += stats["new"]
+    except (RuntimeError, httpx.HTTPError) as e:
+        # Etherscan errors leave the scan cursors where they were; retrying is safe
+        raise HTTPException(status_code=502, detail=f"Reward scan failed: {str(e)}")
 
     return RewardsScanResponse(**total)
 
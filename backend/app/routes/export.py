@@ -1,17 +1,22 @@
 """Export API routes for iOS app data transfer."""
+import base64
 import csv
 import io
 import json
 import os
 import re
 import time
+import zlib
+from collections.abc import Iterator
 from datetime import date, datetime, timedelta
 from typing import Optional
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
 
 from ..auth.dependencies import get_current_user
 from ..config import settings as app_settings
@@ -23,7 +28,7 @@ from ..models.category import Category
 from ..models.goal import Goal
 from ..models.settings import AppSettings
 from ..models.tag import Tag
-from ..models.transaction import Transaction
+from ..models.transaction import Transaction, TransactionTombstone
 from ..models.user import User
 
 router = APIRouter(prefix="/api/export", tags=["export"])
@@ -34,15 +39,35 @@ EXPORTS_DIR = os.path.join(
 LINK_EXPIRY_SECONDS = 600  # 10 minutes
 
 
-def _build_export_data(db: Session, user_id: int) -> dict:
-    """Build the export data dict for a given user."""
-    transactions = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == user_id)
-        .order_by(Transaction.date.desc())
-        .all()
-    )
+EXPORT_FORMAT_VERSION = "1.0"
+DELTA_FORMAT_VERSION = "1.1"
+EXPORT_BATCH_ROWS = 1000  # transactions fetched per cursor batch and written per chunk
+# Delta queries look back this far before the token so rows committed by
+# transactions that started before the previous export are not missed.
+SYNC_TOKEN_OVERLAP = timedelta(minutes=5)
+
+
+def _serialize_transaction(tx: Transaction) -> dict:
+    return {
+        "id": tx.id,
+        "date": tx.date.isoformat(),
+        "description": tx.description,
+        "amount": tx.amount,
+        "currency": tx.currency,
+        "category": tx.category,
+        "subcategory": tx.subcategory,
+        "source": tx.source,
+        "paymentMethod": tx.payment_method,
+        "notes": tx.notes,
+        "type": "income" if tx.is_income else "expense",
+        "isTransfer": tx.is_transfer,
+        "isAdjustment": tx.is_adjustment,
+        "accountId": tx.account_id,
+    }
 
+
+def _reference_sections(db: Session, user_id: int) -> list[tuple[str, list[dict]]]:
+    """Build the small per-user collections, which are always exported in full."""
     accounts = (
         db.query(Account)
         .filter(Account.user_id == user_id)
@@ -51,6 +76,7 @@ def _build_export_data(db: Session, user_id: int) -> dict:
 
     budgets = (
         db.query(Budget)
+        .options(selectinload(Budget.allocations))
         .filter(Budget.user_id == user_id, Budget.is_active == True)
         .all()
     )
@@ -63,6 +89,7 @@ def _build_export_data(db: Session, user_id: int) -> dict:
 
     bills = (
         db.query(Bill)
+        .options(selectinload(Bill.history))
         .filter(Bill.user_id == user_id)
         .all()
     )
@@ -81,199 +108,373 @@ def _build_export_data(db: Session, user_id: int) -> dict:
         .all()
     )
 
+    return [
+        ("accounts", [
+            {
+                "id": acc.id,
+                "name": acc.name,
+                "type": acc.type,
+                "initialBalance": acc.initial_balance,
+                "initialBalanceDate": acc.initial_balance_date.isoformat(),
+                "isActive": acc.is_active,
+                "currency": acc.currency,
+                "notes": acc.notes,
+            }
+            for acc in accounts
+        ]),
+        ("budgets", [
+            {
+                "id": b.id,
+                "month": b.month,
+                "monthlyIncome": b.monthly_income,
+                "savingsTarget": b.savings_target,
+                "advice": b.advice,
+                "allocations": [
+                    {
+                        "category": a.category,
+                        "amount": a.amount,
+                        "reasoning": a.reasoning,
+                    }
+                    for a in b.allocations
+                ],
+            }
+            for b in budgets
+        ]),
+        ("goals", [
+            {
+                "id": g.id,
+                "years": g.years,
+                "targetAmount": g.target_amount,
+                "currency": "JPY",
+                "startDate": g.start_date.isoformat() if g.start_date else None,
+            }
+            for g in goals
+        ]),
+        ("bills", [
+            {
+                "id": bill.id,
+                "name": bill.name,
+                "description": bill.description,
+                "amount": bill.amount,
+                "category": bill.category,
+                "color": bill.color,
+                "dueDay": bill.due_day,
+                "dueTime": bill.due_time.strftime("%H:%M") if bill.due_time else None,
+                "isRecurring": bill.is_recurring,
+                "recurrenceType": bill.recurrence_type,
+                "nextDueDate": bill.next_due_date.isoformat(),
+                "lastPaidDate": bill.last_paid_date.isoformat() if bill.last_paid_date else None,
+                "reminderDaysBefore": bill.reminder_days_before,
+                "reminderEnabled": bill.reminder_enabled,
+                "isPaid": bill.is_paid,
+                "isActive": bill.is_active,
+                "history": [
+                    {
+                        "paidDate": h.paid_date.isoformat(),
+                        "amountPaid": h.amount_paid,
+                        "notes": h.notes,
+                    }
+                    for h in bill.history
+                ],
+            }
+            for bill in bills
+        ]),
+        ("categories", [
+            {
+                "id": cat.id,
+                "name": cat.name,
+                "icon": cat.icon,
+                "type": cat.type,
+                "parentId": cat.parent_id,
+                "isSystem": cat.is_system,
+                "displayOrder": cat.display_order,
+            }
+            for cat in categories
+        ]),
+        ("tags", [
+            {
+                "id": tag.id,
+                "name": tag.name,
+                "color": tag.color,
+            }
+            for tag in tags
+        ]),
+    ]
+
+
+def _settings_payload(db: Session, user_id: int) -> dict:
     settings = (
         db.query(AppSettings)
         .filter(AppSettings.user_id == user_id)
         .first()
     )
-
-    now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-
     return {
-        "version": "1.0",
-        "exportedAt": now,
-        "app": "smartmoney-web",
-        "data": {
-            "transactions": [
-                {
-                    "id": tx.id,
-                    "date": tx.date.isoformat(),
-                    "description": tx.description,
-                    "amount": tx.amount,
-                    "currency": tx.currency,
-                    "category": tx.category,
-                    "subcategory": tx.subcategory,
-                    "source": tx.source,
-                    "paymentMethod": tx.payment_method,
-                    "notes": tx.notes,
-                    "type": "income" if tx.is_income else "expense",
-                    "isTransfer": tx.is_transfer,
-                    "isAdjustment": tx.is_adjustment,
-                    "accountId": tx.account_id,
-                }
-                for tx in transactions
-            ],
-            "accounts": [
-                {
-                    "id": acc.id,
-                    "name": acc.name,
-                    "type": acc.type,
-                    "initialBalance": acc.initial_balance,
-                    "initialBalanceDate": acc.initial_balance_date.isoformat(),
-                    "isActive": acc.is_active,
-                    "currency": acc.currency,
-                    "notes": acc.notes,
-                }
-                for acc in accounts
-            ],
-            "budgets": [
-                {
-                    "id": b.id,
-                    "month": b.month,
-                    "monthlyIncome": b.monthly_income,
-                    "savingsTarget": b.savings_target,
-                    "advice": b.advice,
-                    "allocations": [
-                        {
-                            "category": a.category,
-                            "amount": a.amount,
-                            "reasoning": a.reasoning,
-                        }
-                        for a in b.allocations
-                    ],
-                }
-                for b in budgets
-            ],
-            "goals": [
-                {
-                    "id": g.id,
-                    "years": g.years,
-                    "targetAmount": g.target_amount,
-                    "currency": "JPY",
-                    "startDate": g.start_date.isoformat() if g.start_date else None,
-                }
-                for g in goals
-            ],
-            "bills": [
-                {
-                    "id": bill.id,
-                    "name": bill.name,
-                    "description": bill.description,
-                    "amount": bill.amount,
-                    "category": bill.category,
-                    "color": bill.color,
-                    "dueDay": bill.due_day,
-                    "dueTime": bill.due_time.strftime("%H:%M") if bill.due_time else None,
-                    "isRecurring": bill.is_recurring,
-                    "recurrenceType": bill.recurrence_type,
-                    "nextDueDate": bill.next_due_date.isoformat(),
-                    "lastPaidDate": bill.last_paid_date.isoformat() if bill.last_paid_date else None,
-                    "reminderDaysBefore": bill.reminder_days_before,
-                    "reminderEnabled": bill.reminder_enabled,
-                    "isPaid": bill.is_paid,
-                    "isActive": bill.is_active,
-                    "history": [
-                        {
-                            "paidDate": h.paid_date.isoformat(),
-                            "amountPaid": h.amount_paid,
-                            "notes": h.notes,
-                        }
-                        for h in bill.history
-                    ],
-                }
-                for bill in bills
-            ],
-            "categories": [
-                {
-                    "id": cat.id,
-                    "name": cat.name,
-                    "icon": cat.icon,
-                    "type": cat.type,
-                    "parentId": cat.parent_id,
-                    "isSystem": cat.is_system,
-                    "displayOrder": cat.display_order,
-                }
-                for cat in categories
-            ],
-            "tags": [
-                {
-                    "id": tag.id,
-                    "name": tag.name,
-                    "color": tag.color,
-                }
-                for tag in tags
-            ],
-            "settings": {
-                "currency": settings.currency if settings else "JPY",
-                "baseCurrency": settings.base_currency if settings else "JPY",
-                "baseDate": settings.base_date if settings else 25,
-                "budgetCarryOver": settings.budget_carry_over if settings else False,
-                "budgetEmailAlerts": settings.budget_email_alerts if settings else True,
-            },
-        },
+        "currency": settings.currency if settings else "JPY",
+        "baseCurrency": settings.base_currency if settings else "JPY",
+        "baseDate": settings.base_date if settings else 25,
+        "budgetCarryOver": settings.budget_carry_over if settings else False,
+        "budgetEmailAlerts": settings.budget_email_alerts if settings else True,
     }
 
 
+def _iter_transactions(db: Session, user_id: int, since: Optional[datetime] = None):
+    """Transactions to export, fetched in batches (server-side cursor on PostgreSQL)."""
+    stmt = select(Transaction).where(Transaction.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(Transaction.updated_at > since - SYNC_TOKEN_OVERLAP)
+    stmt = stmt.order_by(Transaction.date.desc(), Transaction.id.desc())
+    return db.scalars(stmt.execution_options(yield_per=EXPORT_BATCH_ROWS))
+
+
+def _db_now(db: Session) -> datetime:
+    """Current time on the database clock, which stamps ``updated_at``."""
+    return db.scalar(select(func.now()))
+
+
+def _encode_sync_token(synced_at: datetime) -> str:
+    return base64.urlsafe_b64encode(synced_at.isoformat().encode()).decode().rstrip("=")
+
+
+def _decode_sync_token(token: str) -> datetime:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def _iter_export_json(bind, user_id: int) -> Iterator[str]:
+    """Yield a full export as JSON text chunks.
+
+    Produces the same document as the original in-memory export (plus a
+    ``syncToken`` for subsequent delta syncs) without holding every
+    transaction in memory.
+    """
+    db = Session(bind=bind)
+    try:
+        header = {
+            "version": EXPORT_FORMAT_VERSION,
+            "exportedAt": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "app": "smartmoney-web",
+            "syncToken": _encode_sync_token(_db_now(db)),
+        }
+        yield json.dumps(header)[:-1] + ', "data": {"transactions": ['
+
+        parts: list[str] = []
+        first = True
+        for tx in _iter_transactions(db, user_id):
+            parts.append(("" if first else ",") + json.dumps(_serialize_transaction(tx)))
+            first = False
+            if len(parts) >= EXPORT_BATCH_ROWS:
+                yield "".join(parts)
+                parts = []
+        parts.append("]")
+        yield "".join(parts)
+
+        for name, items in _reference_sections(db, user_id):
+            yield f', "{name}": {json.dumps(items)}'
+        yield f', "settings": {json.dumps(_settings_payload(db, user_id))}}}}}'
+    finally:
+        db.close()
+
+
+def _iter_delta_ndjson(bind, user_id: int, since: Optional[datetime]) -> Iterator[bytes]:
+    """Yield an NDJSON export of changes since ``since`` (everything if None).
+
+    Line types, in order: ``meta`` (with the next ``syncToken``), one
+    ``section`` per small collection and ``settings`` (always complete),
+    ``transaction`` upserts, ``deleted`` transaction ids, and a final ``end``
+    line. Clients should only store the new token after reading ``end``.
+    Rows near the token boundary may be repeated; upserts are idempotent.
+    """
+    db = Session(bind=bind)
+    try:
+        meta = {
+            "type": "meta",
+            "version": DELTA_FORMAT_VERSION,
+            "exportedAt": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "app": "smartmoney-web",
+            "full": since is None,
+            "syncToken": _encode_sync_token(_db_now(db)),
+        }
+        lines = [json.dumps(meta)]
+        for name, items in _reference_sections(db, user_id):
+            lines.append(json.dumps({"type": "section", "name": name, "items": items}))
+        lines.append(json.dumps({"type": "settings", "data": _settings_payload(db, user_id)}))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+        upserted = 0
+        lines = []
+        for tx in _iter_transactions(db, user_id, since):
+            lines.append(json.dumps({"type": "transaction", "data": _serialize_transaction(tx)}))
+            upserted += 1
+            if len(lines) >= EXPORT_BATCH_ROWS:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+
+        deleted = 0
+        if since is not None:
+            tombstones = (
+                db.query(TransactionTombstone.transaction_id)
+                .filter(
+                    TransactionTombstone.user_id == user_id,
+                    TransactionTombstone.deleted_at > since - SYNC_TOKEN_OVERLAP,
+                )
+                .execution_options(yield_per=EXPORT_BATCH_ROWS)
+            )
+            for (transaction_id,) in tombstones:
+                lines.append(json.dumps(
+                    {"type": "deleted", "entity": "transaction", "id": transaction_id}
+                ))
+                deleted += 1
+                if len(lines) >= EXPORT_BATCH_ROWS:
+                    yield ("\n".join(lines) + "\n").encode("utf-8")
+                    lines = []
+
+        lines.append(json.dumps({"type": "end", "transactions": upserted, "deleted": deleted}))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+    finally:
+        db.close()
+
+
+def _write_export_file(bind, user_id: int, file_path: str) -> None:
+    """Write a full export to ``file_path`` chunk by chunk, then move it into place."""
+    part_path = f"{file_path}.part"
+    try:
+        with open(part_path, "w") as f:
+            for chunk in _iter_export_json(bind, user_id):
+                f.write(chunk)
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+
+CSV_HEADER = [
+    "Date", "Description", "Amount", "Currency", "Type",
+    "Category", "Subcategory", "Source", "Account", "Notes",
+]
+CSV_CHUNK_ROWS = 1000  # rows fetched per cursor batch and written per chunk
+
+
+def _iter_csv_chunks(
+    bind,
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category: Optional[str],
+    account_id: Optional[int],
+) -> Iterator[bytes]:
+    """Yield UTF-8 CSV chunks for a user's transactions.
+
+    Runs on its own session so the stream outlives the request dependency.
+    Only the exported columns are fetched, in batches of CSV_CHUNK_ROWS via
+    ``yield_per`` (a server-side cursor on PostgreSQL), so memory stays flat
+    regardless of history size.
+    """
+    db = Session(bind=bind)
+    try:
+        accounts_map: dict[int, str] = dict(
+            db.query(Account.id, Account.name).filter(Account.user_id == user_id).all()
+        )
+
+        query = (
+            db.query(
+                Transaction.date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.currency,
+                Transaction.is_income,
+                Transaction.category,
+                Transaction.subcategory,
+                Transaction.source,
+                Transaction.account_id,
+                Transaction.notes,
+            )
+            .filter(Transaction.user_id == user_id)
+            .order_by(Transaction.date.desc(), Transaction.id.desc())
+        )
+        if start_date:
+            query = query.filter(Transaction.date >= start_date)
+        if end_date:
+            query = query.filter(Transaction.date <= end_date)
+        if category:
+            query = query.filter(Transaction.category == category)
+        if account_id:
+            query = query.filter(Transaction.account_id == account_id)
+
+        buffer = io.StringIO()
+        buffer.write("\ufeff")  # BOM for Excel Japanese text
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+
+        rows_in_chunk = 0
+        for tx in query.execution_options(yield_per=CSV_CHUNK_ROWS):
+            writer.writerow([
+                tx.date.isoformat(),
+                tx.description,
+                tx.amount,
+                tx.currency,
+                "income" if tx.is_income else "expense",
+                tx.category,
+                tx.subcategory or "",
+                tx.source,
+                accounts_map.get(tx.account_id, "") if tx.account_id else "",
+                tx.notes or "",
+            ])
+            rows_in_chunk += 1
+            if rows_in_chunk >= CSV_CHUNK_ROWS:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                rows_in_chunk = 0
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into gzip format on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
 @router.get("/csv")
 async def export_csv(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     category: Optional[str] = Query(None),
     account_id: Optional[int] = Query(None),
+    gzip: bool = Query(False, description="Download as gzip-compressed .csv.gz"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Export transactions as CSV with optional filters."""
-    query = (
-        db.query(Transaction)
-        .filter(Transaction.user_id == current_user.id)
-        .order_by(Transaction.date.desc())
+    """Export transactions as CSV with optional filters.
+
+    Rows are streamed as they are read from the database.
+    """
+    chunks = _iter_csv_chunks(
+        db.get_bind(), current_user.id, start_date, end_date, category, account_id
     )
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    if category:
-        query = query.filter(Transaction.category == category)
-    if account_id:
-        query = query.filter(Transaction.account_id == account_id)
-
-    transactions = query.all()
-
-    # Build account name lookup
-    account_ids = {tx.account_id for tx in transactions if tx.account_id}
-    accounts_map: dict[int, str] = {}
-    if account_ids:
-        accs = db.query(Account).filter(Account.id.in_(account_ids)).all()
-        accounts_map = {a.id: a.name for a in accs}
-
-    output = io.StringIO()
-    output.write("\ufeff")  # BOM for Excel Japanese text
-    writer = csv.writer(output)
-    writer.writerow([
-        "Date", "Description", "Amount", "Currency", "Type",
-        "Category", "Subcategory", "Source", "Account", "Notes",
-    ])
-    for tx in transactions:
-        writer.writerow([
-            tx.date.isoformat(),
-            tx.description,
-            tx.amount,
-            tx.currency,
-            "income" if tx.is_income else "expense",
-            tx.category,
-            tx.subcategory or "",
-            tx.source,
-            accounts_map.get(tx.account_id, "") if tx.account_id else "",
-            tx.notes or "",
-        ])
-
-    output.seek(0)
+
     today = datetime.utcnow().strftime("%Y-%m-%d")
     filename = f"smartmoney-transactions-{today}.csv"
+    media_type = "text/csv"
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
     return StreamingResponse(
-        output,
-        media_type="text/csv",
+        chunks,
+        media_type=media_type,
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
@@ -284,13 +485,31 @@ async def export_ios(
     current_user: User = Depends(get_current_user),
 ):
     """Export all user data as JSON for iOS app import."""
-    export_data = _build_export_data(db, current_user.id)
-
     today = datetime.utcnow().strftime("%Y-%m-%d")
     filename = f"smartmoney-export-{today}.json"
-    response = JSONResponse(content=export_data)
-    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+    return StreamingResponse(
+        _iter_export_json(db.get_bind(), current_user.id),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/ios/delta")
+async def export_ios_delta(
+    since: Optional[str] = Query(None, description="syncToken from a previous export"),
+    gzip: bool = Query(False, description="Gzip-compress the NDJSON stream"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream changes since a sync token as NDJSON (a full snapshot without one)."""
+    since_at = _decode_sync_token(since) if since else None
+    chunks = _iter_delta_ndjson(db.get_bind(), current_user.id, since_at)
+
+    headers = {}
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
 
 
 @router.post("/ios/link")
@@ -299,14 +518,11 @@ async def export_ios_link(
     current_user: User = Depends(get_current_user),
 ):
     """Generate a temporary download link for iOS export data."""
-    export_data = _build_export_data(db, current_user.id)
-
     token = uuid4().hex
     os.makedirs(EXPORTS_DIR, exist_ok=True)
     file_path = os.path.join(EXPORTS_DIR, f"{token}.json")
 
-    with open(file_path, "w") as f:
-        json.dump(export_data, f)
+    await run_in_threadpool(_write_export_file, db.get_bind(), current_user.id, file_path)
 
     expires_at = (datetime.utcnow() + timedelta(seconds=LINK_EXPIRY_SECONDS)).strftime(
         "%Y-%m-%dT%H:%M:%SZ"
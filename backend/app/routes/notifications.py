@@ -1,9 +1,12 @@
 """Notification API endpoints."""
 
+import asyncio
+import json
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -11,6 +14,7 @@ from ..auth.dependencies import get_current_user
 from ..database import get_db
 from ..models import User
 from ..models.notification import NotificationPreference, PushSubscription
+from ..services.notification_events import format_sse, notification_events
 from ..services.notification_service import (
     NotificationService,
     NotificationPreferenceService,
@@ -19,6 +23,9 @@ from ..services.notification_service import (
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
+STREAM_KEEPALIVE_SECONDS = 25
+STREAM_RETRY_MS = 5000
+
 
 class NotificationResponse(BaseModel):
     """Notification response schema."""
@@ -131,6 +138,56 @@ async def get_unread_count(
     return NotificationCountResponse(count=count)
 
 
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Server-Sent Events stream of new in-app notifications and unread counts.
+
+    Sends the current unread count on connect, replays missed events when the
+    client reconnects with Last-Event-ID (or a ``resync`` event if they are no
+    longer buffered), then pushes events as they are published.
+    """
+    user_id = current_user.id
+    service = NotificationService()
+    count = await service.get_unread_count(db, user_id)
+    # Release the pooled connection; idle streams need no database access
+    db.close()
+
+    queue = notification_events.subscribe(user_id)
+    replay = notification_events.replay(user_id, last_event_id)
+
+    async def event_stream():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n"
+            if replay is None:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                for event in replay:
+                    yield format_sse(event)
+            yield f"event: unread_count\ndata: {json.dumps({'count': count})}\n\n"
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            notification_events.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/{notification_id}/read", response_model=MarkReadResponse)
 async def mark_notification_read(
     notification_id: int,
@@ -41,7 +41,7 @@ async def generate_ai_summary(
             return cached
 
     # Generate report data for AI context
-    report = MonthlyReportService.generate_report(
+    report = MonthlyReportService.get_report(
         db, current_user.id, year, month,
     )
 
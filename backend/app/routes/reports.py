@@ -2,17 +2,21 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi.responses import FileResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..auth.dependencies import get_current_user
 from ..database import get_db
+from ..models.exchange_rate import ExchangeRate
+from ..models.monthly_report_snapshot import MonthlyReportSnapshot
 from ..models.transaction import Transaction
 from ..models.user import User
-from ..schemas.report import MonthlyUsageReportData
+from ..schemas.report import MonthlyUsageReportData, PDFRenderJobRequest, PDFRenderJobResponse
 from ..services.monthly_report_service import MonthlyReportService
-from ..services.monthly_report_pdf_service import get_monthly_report_pdf_service
-from ..services.report_service import get_pdf_service
+from ..services.report_render_service import RenderJob, ReportRenderService, report_renderer
 from ..services.exchange_rate_service import ExchangeRateService
 from ..utils.currency_utils import convert_to_jpy
 
@@ -32,54 +36,26 @@ async def get_monthly_usage_report(
     current_user: User = Depends(get_current_user),
 ):
     """Get comprehensive monthly usage report data."""
-    return MonthlyReportService.generate_report(db, current_user.id, year, month)
-
-
-@router.get("/monthly-usage/{year}/{month}/pdf")
-async def download_monthly_usage_pdf(
-    year: int = Path(..., ge=2020, le=2100),
-    month: int = Path(..., ge=1, le=12),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Download monthly usage report as PDF."""
-    data = MonthlyReportService.generate_report(db, current_user.id, year, month)
-    pdf_bytes = get_monthly_report_pdf_service().generate_monthly_usage_pdf(data)
-
-    from fastapi.responses import Response
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": (
-                f'attachment; filename="monthly_report_{year}_{month:02d}.pdf"'
-            )
-        },
-    )
-
-
-@router.get("/yearly")
-async def generate_yearly_report(
-    year: int = Query(..., ge=2020, le=2100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Generate yearly financial report PDF.
-
-    Returns:
-        PDF file download
-    """
-    # Get all transactions for the year
-    transactions = (
-        db.query(Transaction)
-        .filter(
-            Transaction.user_id == current_user.id,
-            Transaction.month_key.startswith(str(year)),
-        )
-        .order_by(Transaction.date.desc())
-        .all()
-    )
-
+    return MonthlyReportService.get_report(db, current_user.id, year, month)
+
+
+# Common deductible categories (can be customized)
+DEDUCTIBLE_CATEGORIES = [
+    '医療費',
+    'Medical',
+    '、交通費',
+    'Transport',
+    '書籍',
+    'Books',
+    '新聞',
+    'Newspaper',
+    '水道',
+    'Utilities',
+]
+
+
+def _summary_payload(db: Session, user_id: int, year: int, transactions: list) -> dict:
+    """Build the yearly-report payload (amounts converted to JPY)."""
     # Convert amounts to JPY before aggregating
     rates = ExchangeRateService.get_cached_rates(db)
 
@@ -114,112 +90,231 @@ async def generate_yearly_report(
         for tx in transactions
     ]
 
-    totals = {
-        'income': total_income,
-        'expense': total_expense,
-        'net': net,
+    return {
+        'user_id': user_id,
+        'year': year,
+        'transactions': tx_dicts,
+        'totals': {
+            'income': total_income,
+            'expense': total_expense,
+            'net': net,
+        },
+        'categories': categories_sorted,
     }
 
-    # Generate PDF
-    pdf_bytes = get_pdf_service().generate_yearly_report(
-        user_id=current_user.id,
-        year=year,
-        transactions=tx_dicts,
-        totals=totals,
-        categories=categories_sorted,
-    )
 
-    from fastapi.responses import Response
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="yearly_report_{year}.pdf"'
-        },
+def _yearly_payload(db: Session, user_id: int, year: int) -> dict:
+    transactions = (
+        db.query(Transaction)
+        .filter(
+            Transaction.user_id == user_id,
+            Transaction.month_key.startswith(str(year)),
+        )
+        .order_by(Transaction.date.desc())
+        .all()
     )
+    return _summary_payload(db, user_id, year, transactions)
 
 
-@router.get("/monthly")
-async def generate_monthly_report(
-    year: int = Query(..., ge=2020, le=2100),
-    month: int = Query(..., ge=1, le=12),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Generate monthly financial report PDF.
-
-    Returns:
-        PDF file download
-    """
-    month_key = get_month_key(year, month)
-
-    # Get transactions for the month
+def _monthly_payload(db: Session, user_id: int, year: int, month: int) -> dict:
     transactions = (
         db.query(Transaction)
         .filter(
-            Transaction.user_id == current_user.id,
-            Transaction.month_key == month_key,
+            Transaction.user_id == user_id,
+            Transaction.month_key == get_month_key(year, month),
         )
         .order_by(Transaction.date.desc())
         .all()
     )
+    # Reuses the yearly report layout for a single month
+    return _summary_payload(db, user_id, year, transactions)
 
-    # Convert amounts to JPY before aggregating
-    rates = ExchangeRateService.get_cached_rates(db)
 
-    total_income = sum(
-        convert_to_jpy(tx.amount, tx.currency, rates)
-        for tx in transactions if tx.is_income
-    )
-    total_expense = sum(
-        convert_to_jpy(abs(tx.amount), tx.currency, rates)
-        for tx in transactions if not tx.is_income
+def _deductible_payload(
+    db: Session, user_id: int, year: int, category: Optional[str]
+) -> dict:
+    query = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.month_key.startswith(str(year)),
+        Transaction.is_income == False,
     )
-    net = total_income - total_expense
 
-    # Category breakdown with currency conversion
-    categories = {}
-    for tx in transactions:
-        if not tx.is_income:
-            cat = tx.category
-            categories[cat] = categories.get(cat, 0) + convert_to_jpy(abs(tx.amount), tx.currency, rates)
+    if category:
+        query = query.filter(Transaction.category == category)
 
-    categories_sorted = sorted(categories.items(), key=lambda x: x[1], reverse=True)
+    transactions = query.order_by(Transaction.date.desc()).all()
 
-    # Convert to dict format (amounts pre-converted to JPY)
-    tx_dicts = [
+    # Convert amounts to JPY for deductible report
+    rates = ExchangeRateService.get_cached_rates(db)
+
+    # Filter deductible categories (contains keyword), amounts pre-converted to JPY
+    deductible = [
         {
             'date': tx.date.isoformat(),
             'description': tx.description,
             'amount': convert_to_jpy(tx.amount, tx.currency, rates),
-            'is_income': tx.is_income,
             'category': tx.category,
         }
         for tx in transactions
+        if any(cat in tx.category for cat in DEDUCTIBLE_CATEGORIES)
     ]
 
-    totals = {
-        'income': total_income,
-        'expense': total_expense,
-        'net': net,
+    return {
+        'user_id': user_id,
+        'year': year,
+        'deductible_expenses': deductible,
     }
 
-    # Generate PDF (reuse yearly report for single month)
-    pdf_bytes = get_pdf_service().generate_yearly_report(
-        user_id=current_user.id,
-        year=year,
-        transactions=tx_dicts,
-        totals=totals,
-        categories=categories_sorted,
+
+def _render_target(request: PDFRenderJobRequest) -> tuple[str, str, str]:
+    """Resolve a render request to (renderer type, period, filename)."""
+    year, month = request.year, request.month
+    if request.report_type in ("monthly_usage", "monthly") and month is None:
+        raise HTTPException(status_code=422, detail="month is required for monthly reports")
+
+    if request.report_type == "monthly_usage":
+        return "monthly_usage", get_month_key(year, month), f"monthly_report_{year}_{month:02d}.pdf"
+    if request.report_type == "monthly":
+        return "yearly", get_month_key(year, month), f"monthly_report_{year}_{month:02d}.pdf"
+    if request.report_type == "deductible":
+        return "deductible", f"{year}:{request.category or ''}", f"deductible_report_{year}.pdf"
+    return "yearly", str(year), f"yearly_report_{year}.pdf"
+
+
+def _data_version(db: Session, user_id: int, request: PDFRenderJobRequest) -> Optional[str]:
+    """Cheap version of the data behind a report, or None if there is none.
+
+    Count and latest ``updated_at`` of the report's transactions (served by
+    ``ix_transactions_user_updated``) plus the latest exchange rate update.
+    The open month's usage report also reflects budgets and goals, which have
+    no change timestamp, so it is versioned by its built payload instead.
+    """
+    year, month = request.year, request.month
+    if request.report_type == "monthly_usage":
+        if not MonthlyReportService.is_closed_month(year, month):
+            return None
+        # Closed months are served from a snapshot, rewritten when it changes
+        snapshot_at = db.query(MonthlyReportSnapshot.created_at).filter(
+            MonthlyReportSnapshot.user_id == user_id,
+            MonthlyReportSnapshot.year == year,
+            MonthlyReportSnapshot.month == month,
+        ).scalar()
+        if snapshot_at is None:
+            return None
+        return f"snapshot:{snapshot_at.isoformat()}"
+
+    query = db.query(func.count(Transaction.id), func.max(Transaction.updated_at)).filter(
+        Transaction.user_id == user_id
+    )
+    if request.report_type == "monthly":
+        query = query.filter(Transaction.month_key == get_month_key(year, month))
+    else:
+        query = query.filter(Transaction.month_key.startswith(str(year)))
+    count, last_updated = query.one()
+    rates_updated = db.query(func.max(ExchangeRate.updated_at)).scalar()
+    return f"{count}:{last_updated}:{rates_updated}"
+
+
+def _build_payload(db: Session, user_id: int, request: PDFRenderJobRequest) -> dict:
+    """Build the renderer payload for a request (queries every report row)."""
+    year, month = request.year, request.month
+    if request.report_type == "monthly_usage":
+        return MonthlyReportService.get_report(db, user_id, year, month).model_dump(mode="json")
+    if request.report_type == "monthly":
+        return _monthly_payload(db, user_id, year, month)
+    if request.report_type == "deductible":
+        return _deductible_payload(db, user_id, year, request.category)
+    return _yearly_payload(db, user_id, year)
+
+
+async def _submit_render(
+    db: Session, user_id: int, request: PDFRenderJobRequest
+) -> tuple[RenderJob, str]:
+    """Get a render job for the request, building the payload only on a cache miss.
+
+    Database work runs in the threadpool so report queries never block the
+    event loop.
+    """
+    report_type, period, filename = _render_target(request)
+    data_version = await run_in_threadpool(_data_version, db, user_id, request)
+    if data_version is not None:
+        job = report_renderer.cached_job(user_id, report_type, period, data_version)
+        if job is not None:
+            return job, filename
+
+    payload = await run_in_threadpool(_build_payload, db, user_id, request)
+    if data_version is None:
+        data_version = ReportRenderService.payload_version(payload)
+    job = report_renderer.submit(user_id, report_type, period, data_version, payload)
+    return job, filename
+
+
+async def _render_pdf_response(
+    db: Session, user_id: int, request: PDFRenderJobRequest
+) -> FileResponse:
+    """Render (or reuse a cached) PDF without blocking the event loop."""
+    job, filename = await _submit_render(db, user_id, request)
+    path = await report_renderer.wait(job)
+    return FileResponse(path, media_type="application/pdf", filename=filename)
+
+
+def _job_response(job: RenderJob) -> PDFRenderJobResponse:
+    status = job.status
+    return PDFRenderJobResponse(
+        job_id=job.job_id,
+        status=status,
+        download_url=f"/api/reports/pdf-jobs/{job.job_id}/download" if status == "done" else None,
+        error=job.error,
     )
 
-    from fastapi.responses import Response
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="monthly_report_{year}_{month:02d}.pdf"'
-        },
+
+@router.get("/monthly-usage/{year}/{month}/pdf")
+async def download_monthly_usage_pdf(
+    year: int = Path(..., ge=2020, le=2100),
+    month: int = Path(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Download monthly usage report as PDF."""
+    return await _render_pdf_response(
+        db,
+        current_user.id,
+        PDFRenderJobRequest(report_type="monthly_usage", year=year, month=month),
+    )
+
+
+@router.get("/yearly")
+async def generate_yearly_report(
+    year: int = Query(..., ge=2020, le=2100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Generate yearly financial report PDF.
+
+    Returns:
+        PDF file download
+    """
+    return await _render_pdf_response(
+        db, current_user.id, PDFRenderJobRequest(report_type="yearly", year=year)
+    )
+
+
+@router.get("/monthly")
+async def generate_monthly_report(
+    year: int = Query(..., ge=2020, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Generate monthly financial report PDF.
+
+    Returns:
+        PDF file download
+    """
+    return await _render_pdf_response(
+        db,
+        current_user.id,
+        PDFRenderJobRequest(report_type="monthly", year=year, month=month),
     )
 
 
@@ -235,61 +330,50 @@ async def generate_deductible_report(
     Returns:
         PDF file download
     """
-    # Common deductible categories (can be customized)
-    DEDUCTIBLE_CATEGORIES = [
-        '医療費',
-        'Medical',
-        '、交通費',
-        'Transport',
-        '書籍',
-        'Books',
-        '新聞',
-        'Newspaper',
-        '水道',
-        'Utilities',
-    ]
-
-    # Get transactions for the year
-    query = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.month_key.startswith(str(year)),
-        Transaction.is_income == False,
+    return await _render_pdf_response(
+        db,
+        current_user.id,
+        PDFRenderJobRequest(report_type="deductible", year=year, category=category),
     )
 
-    if category:
-        query = query.filter(Transaction.category == category)
 
-    transactions = query.order_by(Transaction.date.desc()).all()
+@router.post("/pdf-jobs", response_model=PDFRenderJobResponse, status_code=202)
+async def create_pdf_job(
+    request: PDFRenderJobRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Start rendering a report PDF in the background.
 
-    # Convert amounts to JPY for deductible report
-    rates = ExchangeRateService.get_cached_rates(db)
+    Returns immediately; poll the job until ``status`` is ``done``. Reports
+    whose data has not changed are served from cache and are done at once.
+    """
+    job, _ = await _submit_render(db, current_user.id, request)
+    return _job_response(job)
 
-    # Filter deductible categories (contains keyword), amounts pre-converted to JPY
-    deductible = [
-        {
-            'date': tx.date.isoformat(),
-            'description': tx.description,
-            'amount': convert_to_jpy(tx.amount, tx.currency, rates),
-            'category': tx.category,
-        }
-        for tx in transactions
-        if any(cat in tx.category for cat in DEDUCTIBLE_CATEGORIES)
-    ]
 
-    pdf_bytes = get_pdf_service().generate_deductible_report(
-        user_id=current_user.id,
-        year=year,
-        deductible_expenses=deductible,
-    )
+@router.get("/pdf-jobs/{job_id}", response_model=PDFRenderJobResponse)
+async def get_pdf_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Get the status of a PDF render job."""
+    job = report_renderer.get_job(current_user.id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
 
-    from fastapi.responses import Response
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="deductible_report_{year}.pdf"'
-        },
-    )
+
+@router.get("/pdf-jobs/{job_id}/download")
+async def download_pdf_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Download the PDF produced by a finished render job."""
+    job = report_renderer.get_job(current_user.id, job_id)
+    if job is None or job.status != "done":
+        raise HTTPException(status_code=404, detail="Report not ready")
+    return FileResponse(job.path, media_type="application/pdf", filename=f"report_{job_id}.pdf")
 
 
 @router.get("/transactions/csv")
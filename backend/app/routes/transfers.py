@@ -132,14 +132,19 @@ async def delete_transfer(
     current_user: User = Depends(get_current_user),
 ):
     """Delete all transactions associated with a transfer."""
-    deleted = db.query(Transaction).filter(
+    # ORM deletes (not a bulk delete) so tombstones are recorded for delta export
+    transactions = db.query(Transaction).filter(
         Transaction.transfer_id == transfer_id,
         Transaction.user_id == current_user.id,
-    ).delete()
+    ).all()
 
-    if deleted == 0:
+    if not transactions:
         raise HTTPException(status_code=404, detail="Transfer not found")
 
+    for tx in transactions:
+        db.delete(tx)
+    deleted = len(transactions)
+
     db.commit()
     return {"deleted": deleted, "transfer_id": transfer_id}
 
@@ -238,6 +238,11 @@ class DefiPositionSnapshotResponse(BaseModel):
     price_usd: Optional[Decimal] = None
     protocol_apy: Optional[Decimal] = None
     snapshot_date: datetime
+    # "day" for a daily snapshot; "week"/"month" for a rollup point, whose
+    # values are the period's last and which also carries the period's range
+    resolution: str = "day"
+    balance_usd_min: Optional[Decimal] = None
+    balance_usd_max: Optional[Decimal] = None
 
     class Config:
         from_attributes = True
@@ -299,6 +304,7 @@ class PositionPerformanceResponse(BaseModel):
     hodl_value_usd: Optional[Decimal] = None
     lp_vs_hodl_usd: Optional[Decimal] = None
     lp_outperformed_hodl: Optional[bool] = None
+    max_il_percentage: Optional[float] = None  # Worst IL seen across the series
 
     # Yield estimates
     estimated_yield_usd: Optional[Decimal] = None
@@ -312,6 +318,27 @@ class ILScenarioResponse(BaseModel):
     price_ratio: float
     il_percentage: float
     vs_hodl: str
+    # LP value including the APY offset relative to HODL (only when an APY is given)
+    lp_vs_hodl_pct: Optional[float] = None
+
+
+class ILSeriesPoint(BaseModel):
+    """IL of a position at one snapshot, relative to its first snapshot."""
+
+    snapshot_date: datetime
+    price_ratio: float
+    il_percentage: float
+    lp_value_usd: Decimal
+    hodl_value_usd: Decimal
+    lp_vs_hodl_usd: Decimal
+
+
+class PositionILSeriesResponse(BaseModel):
+    """Historical IL series of a position."""
+
+    position_id: str
+    symbol: Optional[str] = None
+    points: list[ILSeriesPoint] = []
 
 
 class PositionInsightsResponse(BaseModel):
@@ -509,6 +536,15 @@ class HodlScenarioItem(BaseModel):
     return_usd: Decimal
 
 
+class HodlScenarioPoint(BaseModel):
+    """Value of each strategy at one snapshot date."""
+
+    date: str
+    lp_value_usd: Decimal
+    hodl_value_usd: Decimal
+    token_values_usd: dict[str, Decimal]
+
+
 class HodlScenariosResponse(BaseModel):
     """Schema for HODL scenarios comparison."""
 
@@ -520,6 +556,7 @@ class HodlScenariosResponse(BaseModel):
     scenarios: list[HodlScenarioItem]
     winner: Optional[str] = None
     winner_vs_lp_usd: Decimal = Decimal(0)
+    history: list[HodlScenarioPoint] = []
 
 
 # Update forward reference
@@ -163,11 +163,13 @@ class RecurringSuggestion(BaseModel):
     frequency: str
     day_of_month: Optional[int] = None
     day_of_week: Optional[int] = None
+    month_of_year: Optional[int] = None
     interval_days: Optional[int] = None
     is_income: bool
     occurrences: int
     last_date: str
     avg_interval: float
+    periodicity_score: Optional[float] = None  # 0-1 fit of intervals to the detected period
     confidence: int  # 0-100
 
 
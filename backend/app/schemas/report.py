@@ -1,6 +1,6 @@
 """Monthly usage report schemas for API validation."""
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -116,3 +116,21 @@ class AIReportSummary(BaseModel):
     generated_at: datetime
     is_cached: bool
     credits_used: float
+
+
+class PDFRenderJobRequest(BaseModel):
+    """Request to render a report PDF in the background."""
+
+    report_type: Literal["monthly_usage", "yearly", "monthly", "deductible"]
+    year: int = Field(ge=2020, le=2100)
+    month: Optional[int] = Field(default=None, ge=1, le=12)
+    category: Optional[str] = Field(default=None, description="Deductible report filter")
+
+
+class PDFRenderJobResponse(BaseModel):
+    """Status of a background PDF render job."""
+
+    job_id: str
+    status: Literal["pending", "done", "failed"]
+    download_url: Optional[str] = None
+    error: Optional[str] = None
@@ -5,14 +5,21 @@ import logging
 from sqlalchemy.orm import Session
 
 from ..models.user import User
+from ..utils.db_bulk import chunked
 from .action_service import get_action_service
 
 logger = logging.getLogger(__name__)
 
 
+DEFAULT_PAGE_SIZE = 500
+
+
 class ActionGenerationJob:
     """Daily job to generate pending actions for all active users."""
 
+    def __init__(self, page_size: int = DEFAULT_PAGE_SIZE):
+        self.page_size = page_size
+
     def run(self, db: Session) -> dict:
         """Generate actions for all users and expire stale ones."""
         service = get_action_service()
@@ -22,20 +29,20 @@ class ActionGenerationJob:
         if expired:
             logger.info(f"Expired {expired} stale actions")
 
-        # Generate for each active user
-        users = db.query(User).filter(User.is_active == True).all()
+        # Generate for pages of active users with set-based queries
+        user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.is_active == True)]
         total_created = 0
         errors = 0
 
-        for user in users:
+        for page in chunked(user_ids, self.page_size):
             try:
-                created = service.generate_actions(db, user.id)
-                total_created += created
+                created = service.generate_actions_batch(db, list(page))
+                total_created += sum(created.values())
                 if created:
-                    logger.info(f"User {user.id}: created {created} action(s)")
+                    logger.info(f"Created {sum(created.values())} action(s) for {len(created)} user(s)")
             except Exception as e:
                 db.rollback()
                 errors += 1
-                logger.error(f"Action generation failed for user {user.id}: {e}")
+                logger.error(f"Action generation failed for {len(page)} user(s): {e}")
 
-        return {"users": len(users), "created": total_created, "expired": expired, "errors": errors}
+        return {"users": len(user_ids), "created": total_created, "expired": expired, "errors": errors}
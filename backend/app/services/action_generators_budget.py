@@ -2,152 +2,168 @@
 
 import logging
 from datetime import datetime, timedelta
+from typing import Any
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..models.budget import Budget
-from ..models.pending_action import PendingAction
+from ..models.budget import Budget, BudgetAllocation
 from ..models.transaction import Transaction
 from .action_copy_service import generate_action_copy
-from .action_generators_common import safe_add_action
+from .action_generators_common import action_row, insert_actions
 
 logger = logging.getLogger(__name__)
 
 
-def generate_copy_or_create_budget(db: Session, user_id: int) -> bool:
-    """Generate action if current month has no active budget."""
-    current_month = datetime.utcnow().strftime("%Y-%m")
-    has_budget = (
-        db.query(Budget)
+def _current_budget_ids(db: Session, user_ids: list[int], month: str) -> dict[int, int]:
+    """Active budget id for ``month`` per user (the oldest, if several are active)."""
+    budget_ids: dict[int, int] = {}
+    for user_id, budget_id in (
+        db.query(Budget.user_id, Budget.id)
         .filter(
-            Budget.user_id == user_id,
-            Budget.month == current_month,
+            Budget.user_id.in_(user_ids),
+            Budget.month == month,
             Budget.is_active == True,
         )
-        .first()
-    )
-    if has_budget:
-        return False
+        .order_by(Budget.id)
+    ):
+        budget_ids.setdefault(user_id, budget_id)
+    return budget_ids
+
+
+def copy_or_create_budget_candidates(db: Session, user_ids: list[int]) -> list[dict[str, Any]]:
+    """Users whose current month has no active budget, with suggested allocations."""
+    current_month = datetime.utcnow().strftime("%Y-%m")
+    with_budget = _current_budget_ids(db, user_ids, current_month)
+    missing = [user_id for user_id in user_ids if user_id not in with_budget]
+    if not missing:
+        return []
 
     # Compute 3-month rolling average per category
     three_months_ago = (datetime.utcnow() - timedelta(days=90)).strftime("%Y-%m")
     category_averages = (
         db.query(
+            Transaction.user_id,
             Transaction.category,
             func.avg(func.abs(Transaction.amount)).label("avg_amount"),
             func.count(Transaction.id).label("count"),
         )
         .filter(
-            Transaction.user_id == user_id,
+            Transaction.user_id.in_(missing),
             Transaction.amount < 0,
             Transaction.is_transfer == False,
-            func.to_char(Transaction.date, "YYYY-MM") >= three_months_ago,
-            func.to_char(Transaction.date, "YYYY-MM") < current_month,
+            Transaction.month_key >= three_months_ago,
+            Transaction.month_key < current_month,
         )
-        .group_by(Transaction.category)
+        .group_by(Transaction.user_id, Transaction.category)
         .all()
     )
 
-    suggested_allocations = {
-        row.category: int(row.avg_amount)
-        for row in category_averages
-        if row.count >= 2  # at least 2 transactions to be meaningful
-    }
-    total_suggested = sum(suggested_allocations.values())
-
-    params = {
-        "month": current_month,
-        "suggested_source": "rolling_average",
-        "suggested_total": total_suggested,
-        "suggested_allocations": suggested_allocations,
-        "category_count": len(suggested_allocations),
-    }
-    title, description = generate_action_copy("copy_or_create_budget", params)
-
-    action = PendingAction(
-        user_id=user_id,
-        type="copy_or_create_budget",
-        surface="budget_page",
-        title=title,
-        description=description,
-        params=params,
-        priority=2,
-    )
-    return safe_add_action(db, action)
+    suggested: dict[int, dict[str, int]] = {user_id: {} for user_id in missing}
+    for row in category_averages:
+        if row.count >= 2:  # at least 2 transactions to be meaningful
+            suggested[row.user_id][row.category] = int(row.avg_amount)
+
+    rows = []
+    for user_id in missing:
+        allocations = suggested[user_id]
+        params = {
+            "month": current_month,
+            "suggested_source": "rolling_average",
+            "suggested_total": sum(allocations.values()),
+            "suggested_allocations": allocations,
+            "category_count": len(allocations),
+        }
+        title, description = generate_action_copy("copy_or_create_budget", params)
+        rows.append(
+            action_row(user_id, "copy_or_create_budget", "budget_page", title, description, params, 2)
+        )
+    return rows
 
 
-def generate_adjust_budget_category(db: Session, user_id: int) -> bool:
-    """Generate action for worst over-budget category."""
+def adjust_budget_category_candidates(db: Session, user_ids: list[int]) -> list[dict[str, Any]]:
+    """The worst over-budget category of each user's current budget."""
     current_month = datetime.utcnow().strftime("%Y-%m")
     three_months_ago = (datetime.utcnow() - timedelta(days=90)).strftime("%Y-%m")
 
-    budget = (
-        db.query(Budget)
-        .filter(
-            Budget.user_id == user_id,
-            Budget.month == current_month,
-            Budget.is_active == True,
-        )
-        .first()
-    )
-    if not budget:
-        return False
-
-    worst = None
-    worst_overspend = 0
-    for alloc in budget.allocations:
-        spent = (
-            db.query(func.coalesce(func.sum(Transaction.amount), 0))
+    budget_ids = _current_budget_ids(db, user_ids, current_month)
+    if not budget_ids:
+        return []
+    budget_users = {budget_id: user_id for user_id, budget_id in budget_ids.items()}
+
+    spent_by_category = {
+        (user_id, category): abs(int(total or 0))
+        for user_id, category, total in (
+            db.query(Transaction.user_id, Transaction.category, func.sum(Transaction.amount))
             .filter(
-                Transaction.user_id == user_id,
-                Transaction.category == alloc.category,
-                func.to_char(Transaction.date, "YYYY-MM") == current_month,
+                Transaction.user_id.in_(list(budget_ids)),
+                Transaction.month_key == current_month,
                 Transaction.amount < 0,
             )
-            .scalar()
+            .group_by(Transaction.user_id, Transaction.category)
         )
-        spent_abs = abs(int(spent or 0))
-        overspend = spent_abs - alloc.amount
-        if overspend > worst_overspend:
-            worst_overspend = overspend
-            worst = (alloc, spent_abs)
+    }
 
-    if worst is None:
-        return False
+    worst: dict[int, tuple[BudgetAllocation, int]] = {}
+    worst_overspend: dict[int, int] = {}
+    for alloc in (
+        db.query(BudgetAllocation)
+        .filter(BudgetAllocation.budget_id.in_(list(budget_users)))
+        .order_by(BudgetAllocation.id)
+    ):
+        user_id = budget_users[alloc.budget_id]
+        spent_abs = spent_by_category.get((user_id, alloc.category), 0)
+        overspend = spent_abs - alloc.amount
+        if overspend > worst_overspend.get(user_id, 0):
+            worst_overspend[user_id] = overspend
+            worst[user_id] = (alloc, spent_abs)
 
-    alloc, spent_abs = worst
+    if not worst:
+        return []
 
     # Use 3-month average instead of naive spent * 1.1
-    avg_3mo = (
-        db.query(func.avg(func.abs(Transaction.amount)))
-        .filter(
-            Transaction.user_id == user_id,
-            Transaction.category == alloc.category,
-            Transaction.amount < 0,
-            func.to_char(Transaction.date, "YYYY-MM") >= three_months_ago,
+    averages = {
+        (user_id, category): avg
+        for user_id, category, avg in (
+            db.query(
+                Transaction.user_id,
+                Transaction.category,
+                func.avg(func.abs(Transaction.amount)),
+            )
+            .filter(
+                Transaction.user_id.in_(list(worst)),
+                Transaction.category.in_({alloc.category for alloc, _ in worst.values()}),
+                Transaction.amount < 0,
+                Transaction.month_key >= three_months_ago,
+            )
+            .group_by(Transaction.user_id, Transaction.category)
         )
-        .scalar()
-    )
-    suggested = int(avg_3mo * 1.1) if avg_3mo else int(spent_abs * 1.1)
-
-    params = {
-        "category": alloc.category,
-        "spent": spent_abs,
-        "allocated": alloc.amount,
-        "suggested_new": suggested,
-        "allocation_id": alloc.id,
-        "budget_id": alloc.budget_id,
     }
-    title, description = generate_action_copy("adjust_budget_category", params)
-
-    action = PendingAction(
-        user_id=user_id,
-        type="adjust_budget_category",
-        surface="budget_page",
-        title=title,
-        description=description,
-        params=params,
-        priority=2,
-    )
-    return safe_add_action(db, action)
+
+    rows = []
+    for user_id, (alloc, spent_abs) in worst.items():
+        avg_3mo = averages.get((user_id, alloc.category))
+        suggested = int(avg_3mo * 1.1) if avg_3mo else int(spent_abs * 1.1)
+        params = {
+            "category": alloc.category,
+            "spent": spent_abs,
+            "allocated": alloc.amount,
+            "suggested_new": suggested,
+            "allocation_id": alloc.id,
+            "budget_id": alloc.budget_id,
+        }
+        title, description = generate_action_copy("adjust_budget_category", params)
+        rows.append(
+            action_row(user_id, "adjust_budget_category", "budget_page", title, description, params, 2)
+        )
+    return rows
+
+
+def generate_copy_or_create_budget(db: Session, user_id: int) -> bool:
+    """Generate action if current month has no active budget."""
+    return bool(insert_actions(db, copy_or_create_budget_candidates(db, [user_id])))
+
+
+def generate_adjust_budget_category(db: Session, user_id: int) -> bool:
+    """Generate action for worst over-budget category."""
+    return bool(insert_actions(db, adjust_budget_category_candidates(db, [user_id])))
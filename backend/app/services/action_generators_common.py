@@ -1,22 +1,65 @@
 """Shared utilities for action generators."""
 
 import logging
+from collections import Counter
+from typing import Any
 
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..models.pending_action import PendingAction
+from ..utils.db_bulk import DEFAULT_CHUNK_SIZE, chunked, dialect_insert
 
 logger = logging.getLogger(__name__)
 
+ACTIVE_STATUSES = ("pending", "surfaced")
 
-def safe_add_action(db: Session, action: PendingAction) -> bool:
-    """Add action with IntegrityError handling for dedup constraint."""
-    try:
-        db.add(action)
-        db.commit()
-        return True
-    except IntegrityError:
-        db.rollback()
-        logger.debug(f"Duplicate action skipped: {action.type} for user {action.user_id}")
-        return False
+
+def action_row(
+    user_id: int,
+    action_type: str,
+    surface: str,
+    title: str,
+    description: str,
+    params: dict[str, Any],
+    priority: int,
+) -> dict[str, Any]:
+    """Build a pending_actions row for :func:`insert_actions`."""
+    return {
+        "user_id": user_id,
+        "type": action_type,
+        "surface": surface,
+        "title": title,
+        "description": description,
+        "params": params,
+        "priority": priority,
+    }
+
+
+def insert_actions(db: Session, rows: list[dict[str, Any]]) -> Counter:
+    """Insert candidate actions in batches and commit.
+
+    Rows that collide with an existing active action of the same type
+    (``uq_pending_action_active``) are skipped.
+
+    Returns:
+        Count of inserted actions per user_id
+    """
+    created: Counter = Counter()
+    if not rows:
+        return created
+    for chunk in chunked(rows, DEFAULT_CHUNK_SIZE):
+        stmt = (
+            dialect_insert(db, PendingAction)
+            .values(list(chunk))
+            .on_conflict_do_nothing(
+                index_elements=["user_id", "type"],
+                index_where=PendingAction.status.in_(ACTIVE_STATUSES),
+            )
+            .returning(PendingAction.user_id)
+        )
+        created.update(db.scalars(stmt))
+    db.commit()
+    skipped = len(rows) - sum(created.values())
+    if skipped:
+        logger.debug(f"Skipped {skipped} duplicate action(s)")
+    return created
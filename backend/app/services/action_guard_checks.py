@@ -1,12 +1,16 @@
 """Guard checks for action generation: dedup, cooldown, auto-pause."""
 
+from collections import defaultdict
 from datetime import datetime, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 from ..models.pending_action import PendingAction
 
+COOLDOWN_DAYS = 30
+AUTO_PAUSE_DISMISSALS = 3
+
 
 def has_active_action(db: Session, user_id: int, action_type: str) -> bool:
     """Check if user already has an active action of this type."""
@@ -23,7 +27,7 @@ def has_active_action(db: Session, user_id: int, action_type: str) -> bool:
 
 def is_in_cooldown(db: Session, user_id: int, action_type: str) -> bool:
     """Check if action type was recently dismissed (30-day cooldown)."""
-    cutoff = datetime.utcnow() - timedelta(days=30)
+    cutoff = datetime.utcnow() - timedelta(days=COOLDOWN_DAYS)
     return (
         db.query(PendingAction)
         .filter(
@@ -38,7 +42,7 @@ def is_in_cooldown(db: Session, user_id: int, action_type: str) -> bool:
 
 def is_auto_paused(db: Session, user_id: int) -> bool:
     """Check if user dismissed 3+ actions in last 30 days (auto-pause)."""
-    cutoff = datetime.utcnow() - timedelta(days=30)
+    cutoff = datetime.utcnow() - timedelta(days=COOLDOWN_DAYS)
     dismissed_count = (
         db.query(func.count(PendingAction.id))
         .filter(
@@ -48,4 +52,38 @@ def is_auto_paused(db: Session, user_id: int) -> bool:
         )
         .scalar()
     ) or 0
-    return dismissed_count >= 3
+    return dismissed_count >= AUTO_PAUSE_DISMISSALS
+
+
+def load_action_guards(
+    db: Session, user_ids: list[int]
+) -> tuple[dict[int, set[str]], set[int]]:
+    """Resolve dedup, cooldown and auto-pause guards for many users in one query.
+
+    Returns:
+        (blocked action types per user, auto-paused user ids)
+    """
+    cutoff = datetime.utcnow() - timedelta(days=COOLDOWN_DAYS)
+    rows = (
+        db.query(PendingAction.user_id, PendingAction.type, PendingAction.status)
+        .filter(
+            PendingAction.user_id.in_(user_ids),
+            or_(
+                PendingAction.status.in_(["pending", "surfaced"]),
+                and_(
+                    PendingAction.status == "dismissed",
+                    PendingAction.dismissed_at >= cutoff,
+                ),
+            ),
+        )
+        .all()
+    )
+
+    blocked: dict[int, set[str]] = defaultdict(set)
+    dismissed: dict[int, int] = defaultdict(int)
+    for user_id, action_type, status in rows:
+        blocked[user_id].add(action_type)
+        if status == "dismissed":
+            dismissed[user_id] += 1
+    paused = {user_id for user_id, count in dismissed.items() if count >= AUTO_PAUSE_DISMISSALS}
+    return blocked, paused
@@ -3,20 +3,21 @@
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import case, update
 from sqlalchemy.orm import Session
 
 from ..models.pending_action import PendingAction
 from ..models.settings import AppSettings
 from ..models.transaction import Transaction
 from .action_generators import (
-    generate_review_uncategorized,
-    generate_copy_or_create_budget,
-    generate_adjust_budget_category,
-    generate_monthly_report_nudge,
-    generate_review_goal_catch_up,
+    adjust_budget_category_candidates,
+    copy_or_create_budget_candidates,
+    monthly_report_nudge_candidates,
+    review_goal_catch_up_candidates,
+    review_uncategorized_candidates,
 )
-from .action_guard_checks import has_active_action, is_in_cooldown, is_auto_paused
+from .action_generators_common import insert_actions
+from .action_guard_checks import load_action_guards
 from .action_lifecycle_ops import ActionLifecycleOps
 
 logger = logging.getLogger(__name__)
@@ -37,72 +38,98 @@ class ActionService(ActionLifecycleOps):
 
     def generate_actions(self, db: Session, user_id: int) -> int:
         """Run all generators, return count of new actions created."""
-        if is_auto_paused(db, user_id):
-            return 0
+        return self.generate_actions_batch(db, [user_id]).get(user_id, 0)
 
-        # Read expansion settings
-        settings = db.query(AppSettings).filter(AppSettings.user_id == user_id).first()
-        expanded = settings.smart_actions_expanded if settings else False
-        auto_execute = settings.smart_actions_auto_execute if settings else False
+    def generate_actions_batch(self, db: Session, user_ids: list[int]) -> dict[int, int]:
+        """Run all generators for many users with set-based queries.
+
+        Guards are resolved with one lookup of existing actions, each generator
+        finds its candidates for all eligible users at once, and new actions are
+        inserted in one batch.
 
-        goal_surface = "goals_page" if expanded else "dashboard"
+        Returns:
+            Count of new actions created per user (users with none are omitted)
+        """
+        blocked, paused = load_action_guards(db, user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id not in paused]
+        if not user_ids:
+            return {}
+
+        # Read expansion settings
+        settings = {
+            s.user_id: s
+            for s in db.query(AppSettings).filter(AppSettings.user_id.in_(user_ids))
+        }
+        goal_surfaces = {
+            user_id: "goals_page" if s.smart_actions_expanded else "dashboard"
+            for user_id, s in settings.items()
+        }
         generators = [
-            ("review_uncategorized", generate_review_uncategorized),
-            ("copy_or_create_budget", generate_copy_or_create_budget),
-            ("adjust_budget_category", generate_adjust_budget_category),
-            ("review_goal_catch_up", lambda d, u: generate_review_goal_catch_up(d, u, surface=goal_surface)),
-            ("monthly_report_nudge", generate_monthly_report_nudge),
+            ("review_uncategorized", review_uncategorized_candidates),
+            ("copy_or_create_budget", copy_or_create_budget_candidates),
+            ("adjust_budget_category", adjust_budget_category_candidates),
+            ("review_goal_catch_up", lambda d, u: review_goal_catch_up_candidates(d, u, goal_surfaces)),
+            ("monthly_report_nudge", monthly_report_nudge_candidates),
         ]
-        created = 0
-        for action_type, gen in generators:
+        rows = []
+        for action_type, candidates in generators:
+            eligible = [u for u in user_ids if action_type not in blocked.get(u, ())]
+            if not eligible:
+                continue
             try:
-                if has_active_action(db, user_id, action_type):
-                    continue
-                if is_in_cooldown(db, user_id, action_type):
-                    continue
-                if gen(db, user_id):
-                    created += 1
+                rows.extend(candidates(db, eligible))
             except Exception as e:
                 db.rollback()
-                logger.error(f"Action generator failed for user {user_id}: {e}")
+                logger.error(f"Action generator {action_type} failed: {e}")
+
+        created = dict(insert_actions(db, rows))
+        if not created:
+            return created
 
         # Boost budget/savings action priority after payday
-        if created > 0 and self._detect_recent_payday(db, user_id):
-            budget_actions = db.query(PendingAction).filter(
-                PendingAction.user_id == user_id,
-                PendingAction.status == "pending",
-                PendingAction.type.in_(["copy_or_create_budget", "adjust_budget_category"]),
-            ).all()
-            for a in budget_actions:
-                a.priority = max(a.priority - 1, 1)  # Lower number = higher priority
-                logger.info(f"Payday boost: action {a.id} priority -> {a.priority}")
-            if budget_actions:
-                db.commit()
+        payday_users = self._recent_payday_users(db, list(created))
+        if payday_users:
+            boosted = db.execute(
+                update(PendingAction)
+                .where(
+                    PendingAction.user_id.in_(payday_users),
+                    PendingAction.status == "pending",
+                    PendingAction.type.in_(["copy_or_create_budget", "adjust_budget_category"]),
+                )
+                # Lower number = higher priority
+                .values(priority=case((PendingAction.priority > 1, PendingAction.priority - 1), else_=1))
+            ).rowcount
+            db.commit()
+            logger.info(f"Payday boost: raised priority of {boosted} budget action(s)")
 
         # Auto-execute mutation actions if enabled (never navigation actions)
-        if auto_execute and created > 0:
+        auto_users = [
+            user_id for user_id in created
+            if user_id in settings and settings[user_id].smart_actions_auto_execute
+        ]
+        if auto_users:
             auto_types = ["copy_or_create_budget", "adjust_budget_category"]
-            new_auto = db.query(PendingAction).filter(
-                PendingAction.user_id == user_id,
+            new_auto = db.query(PendingAction.user_id, PendingAction.id, PendingAction.type).filter(
+                PendingAction.user_id.in_(auto_users),
                 PendingAction.status == "pending",
                 PendingAction.type.in_(auto_types),
             ).all()
-            for action in new_auto:
-                self.execute_action(db, user_id, action.id)
-                logger.info(f"Auto-executed action {action.id} ({action.type})")
+            for user_id, action_id, action_type in new_auto:
+                self.execute_action(db, user_id, action_id)
+                logger.info(f"Auto-executed action {action_id} ({action_type})")
 
         return created
 
-    def _detect_recent_payday(self, db: Session, user_id: int) -> bool:
-        """Check if user received income in the last 3 days."""
+    def _recent_payday_users(self, db: Session, user_ids: list[int]) -> set[int]:
+        """Users who received income in the last 3 days."""
         three_days_ago = datetime.utcnow().date() - timedelta(days=3)
-        income_count = (
-            db.query(func.count(Transaction.id))
+        return {
+            user_id
+            for (user_id,) in db.query(Transaction.user_id)
             .filter(
-                Transaction.user_id == user_id,
+                Transaction.user_id.in_(user_ids),
                 Transaction.is_income == True,
                 Transaction.date >= three_days_ago,
             )
-            .scalar()
-        ) or 0
-        return income_count > 0
+            .distinct()
+        }
@@ -0,0 +1,133 @@
+"""Merchant-level deduplication and memoization for AI categorization.
+
+Transactions are grouped by normalized merchant name so the AI is asked once
+per merchant, and each answer is stored per ``(user_id, merchant)``. Later
+requests are served from the memo without an AI call, and every answer is
+fanned back out to all transactions of its merchant.
+"""
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.categorization_memo import CategorizationMemo
+from ..models.transaction import Transaction
+from ..utils.db_bulk import bulk_upsert
+from ..utils.merchant_normalizer import normalize_merchant
+
+_MERCHANT_MAX_LENGTH = 255
+
+
+def merchant_key(description: str) -> str:
+    """Memo key for a transaction description."""
+    key = normalize_merchant(description) or description.strip().upper()
+    return key[:_MERCHANT_MAX_LENGTH]
+
+
+def parse_ai_result(result: dict) -> dict[str, Any]:
+    """Normalize one ``categorize_transactions`` result item."""
+    category = str(result.get("category") or "Other")
+    is_new = category.startswith("NEW:")
+    if is_new:
+        category = category[4:]
+    return {
+        "category": category,
+        "is_new_category": is_new,
+        "confidence": float(result.get("confidence", 0.5)),
+        "reason": str(result.get("reason") or ""),
+    }
+
+
+class CategorizationMemoService:
+    """Service for the per-merchant categorization memo."""
+
+    @staticmethod
+    def group_by_merchant(transactions: Iterable[Transaction]) -> dict[str, list[Transaction]]:
+        """Group transactions by merchant key, keeping first-seen order."""
+        groups: dict[str, list[Transaction]] = {}
+        for tx in transactions:
+            groups.setdefault(merchant_key(tx.description), []).append(tx)
+        return groups
+
+    @staticmethod
+    def get_cached(
+        db: Session,
+        user_id: int,
+        merchants: Iterable[str],
+        valid_categories: set[str],
+        now: datetime | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Fresh memo answers for the given merchants.
+
+        Answers older than ``settings.ai_categorization_memo_days`` are
+        ignored, as are answers naming an existing category that is no longer
+        in ``valid_categories``. A suggested new category that has since been
+        created is reported as existing.
+        """
+        merchants = list(merchants)
+        if not merchants:
+            return {}
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.ai_categorization_memo_days)
+        memos = db.execute(
+            select(CategorizationMemo).where(
+                CategorizationMemo.user_id == user_id,
+                CategorizationMemo.merchant.in_(merchants),
+                CategorizationMemo.updated_at >= cutoff,
+            )
+        ).scalars()
+
+        cached = {}
+        for memo in memos:
+            exists = memo.category in valid_categories
+            if not exists and not memo.is_new_category:
+                continue
+            cached[memo.merchant] = {
+                "category": memo.category,
+                "is_new_category": not exists,
+                "confidence": memo.confidence,
+                "reason": memo.reason,
+            }
+        return cached
+
+    @staticmethod
+    def save(
+        db: Session,
+        user_id: int,
+        answers: dict[str, dict[str, Any]],
+        now: datetime | None = None,
+    ) -> int:
+        """Store parsed answers per merchant, replacing older ones.
+
+        Runs inside the session's current transaction; the caller commits.
+        """
+        now = now or datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "merchant": merchant,
+                "category": answer["category"][:100],
+                "is_new_category": answer["is_new_category"],
+                "confidence": answer["confidence"],
+                "reason": answer["reason"],
+                "updated_at": now,
+            }
+            for merchant, answer in answers.items()
+        ]
+        return bulk_upsert(db, CategorizationMemo, rows, ["user_id", "merchant"])
+
+    @staticmethod
+    def fan_out(
+        groups: dict[str, list[Transaction]],
+        answers: dict[str, dict[str, Any]],
+    ) -> list[tuple[Transaction, dict[str, Any]]]:
+        """Pair every transaction with its merchant's answer, in group order."""
+        return [
+            (tx, answers[merchant])
+            for merchant, transactions in groups.items()
+            if merchant in answers
+            for tx in transactions
+        ]
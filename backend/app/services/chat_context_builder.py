@@ -1,82 +1,140 @@
-"""Build financial context for AI chat assistant."""
+"""Build financial context for AI chat assistant.
+
+The context is assembled from independent sections, each cached per user in
+``chat_context_cache`` and rebuilt only when the data it depends on changes.
+"""
+from collections.abc import Callable
 from datetime import date, timedelta
-from typing import Any
 
-from sqlalchemy import func
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
 from ..models.budget import Budget
 from ..models.goal import Goal
 from ..models.transaction import Transaction
-from ..models.account import Account
 from ..services.goal_service import GoalService
 from ..services.account_service import AccountService
+from .chat_context_cache import chat_context_cache
 
+# Detail kept by the compact rendering
+COMPACT_RECENT_DAYS = 7
+COMPACT_RECENT_TRANSACTIONS = 5
+COMPACT_TOP_CATEGORIES = 3
+COMPACT_ACCOUNTS = 5
+COMPACT_BUDGET_ALERT_PCT = 80
 
-def build_financial_context(db: Session, user_id: int, days: int = 30) -> str:
-    """Build financial context summary for Claude AI.
 
-    Args:
-        db: Database session
-        user_id: User ID
-        days: Number of days to look back (default 30)
+def estimate_tokens(text: str) -> int:
+    """Rough token count; errs high for mixed English/Japanese text."""
+    return len(text) // 3 + 1
+
+
+def _window(today: date, days: int) -> tuple[date, date]:
+    return today - timedelta(days=days), today
 
-    Returns:
-        Formatted context string
-    """
-    # Calculate date range
-    end_date = date.today()
-    start_date = end_date - timedelta(days=days)
 
-    # Fetch transactions
-    transactions = db.query(Transaction).filter(
+def _expense_filter(user_id: int, start_date: date, end_date: date) -> tuple:
+    return (
         Transaction.user_id == user_id,
         Transaction.date >= start_date,
-        Transaction.date <= end_date
-    ).order_by(Transaction.date.desc()).all()
+        Transaction.date <= end_date,
+        Transaction.is_income == False,  # noqa: E712
+        Transaction.is_transfer == False,  # noqa: E712
+    )
+
 
-    # Calculate summary
-    total_income = sum(t.amount for t in transactions if t.is_income)
-    total_expenses = sum(abs(t.amount) for t in transactions if not t.is_income and not t.is_transfer)
+def _activity_section(db: Session, user_id: int, today: date, days: int, compact: bool) -> list[str]:
+    """Cashflow summary and top spending categories."""
+    start_date, end_date = _window(today, days)
+
+    count, total_income, total_expenses = db.query(
+        func.count(Transaction.id),
+        func.coalesce(func.sum(case((Transaction.is_income == True, Transaction.amount), else_=0)), 0),  # noqa: E712
+        func.coalesce(func.sum(case(
+            ((Transaction.is_income == False) & (Transaction.is_transfer == False), func.abs(Transaction.amount)),  # noqa: E712
+            else_=0,
+        )), 0),
+    ).filter(
+        Transaction.user_id == user_id,
+        Transaction.date >= start_date,
+        Transaction.date <= end_date
+    ).one()
+    total_income, total_expenses = int(total_income), int(total_expenses)
     net_cashflow = total_income - total_expenses
 
+    lines = [
+        "SUMMARY:",
+        f"- Total Income: ¥{total_income:,}",
+        f"- Total Expenses: ¥{total_expenses:,}",
+        f"- Net Cashflow: ¥{net_cashflow:,}",
+        f"- Transaction Count: {count}",
+        ""
+    ]
+
     # Get top spending categories
     category_spending = db.query(
         Transaction.category,
         func.sum(func.abs(Transaction.amount)).label("total"),
         func.count(Transaction.id).label("count")
     ).filter(
-        Transaction.user_id == user_id,
-        Transaction.date >= start_date,
-        Transaction.date <= end_date,
-        Transaction.is_income == False,
-        Transaction.is_transfer == False
+        *_expense_filter(user_id, start_date, end_date)
     ).group_by(
         Transaction.category
     ).order_by(
         func.sum(func.abs(Transaction.amount)).desc()
-    ).limit(5).all()
+    ).limit(COMPACT_TOP_CATEGORIES if compact else 5).all()
+
+    if category_spending:
+        lines.append("TOP SPENDING CATEGORIES:")
+        for cat, total, cat_count in category_spending:
+            lines.append(f"- {cat}: ¥{int(total):,} ({cat_count} transactions)")
+        lines.append("")
+    return lines
 
-    # Get current budget
-    current_month = date.today().strftime("%Y-%m")
+
+def _budget_section(db: Session, user_id: int, today: date, days: int, compact: bool) -> list[str]:
+    """Current month's budget and spending per allocation."""
+    current_month = today.strftime("%Y-%m")
     budget = db.query(Budget).filter(
         Budget.user_id == user_id,
         Budget.month == current_month,
-        Budget.is_active == True
+        Budget.is_active == True  # noqa: E712
     ).first()
+    if not budget:
+        return []
 
-    # Get goals with progress
-    goals = db.query(Goal).filter(
-        Goal.user_id == user_id
-    ).order_by(Goal.years).all()
+    lines = ["BUDGET STATUS (Current Month):", f"- Monthly Income: ¥{budget.monthly_income:,}"]
+    if budget.savings_target:
+        lines.append(f"- Savings Target: ¥{budget.savings_target:,}")
+
+    # Spending per category this month, within the context window
+    start_date, end_date = _window(today, days)
+    allocation_spending = dict(db.query(
+        Transaction.category,
+        func.sum(func.abs(Transaction.amount)),
+    ).filter(
+        *_expense_filter(user_id, max(start_date, today.replace(day=1)), end_date)
+    ).group_by(Transaction.category).all())
+
+    hidden = 0
+    for alloc in budget.allocations:
+        spent = int(allocation_spending.get(alloc.category) or 0)
+        percentage = (spent / alloc.amount * 100) if alloc.amount > 0 else 0
+        if compact and percentage < COMPACT_BUDGET_ALERT_PCT:
+            hidden += 1
+            continue
+        status = "⚠️ OVER" if spent > alloc.amount else "✓"
+        lines.append(
+            f"  {status} {alloc.category}: ¥{spent:,} / ¥{alloc.amount:,} ({percentage:.0f}%)"
+        )
+    if hidden:
+        lines.append(f"  ✓ {hidden} other categories under {COMPACT_BUDGET_ALERT_PCT}%")
+    lines.append("")
+    return lines
 
-    goal_service = GoalService()
-    goals_progress = []
-    for goal in goals:
-        progress = goal_service.calculate_goal_progress(db, user_id, goal)
-        goals_progress.append(progress)
 
-    # Get accounts with balances
+def _accounts_section(db: Session, user_id: int, today: date, days: int, compact: bool) -> list[str]:
+    """Account balances and net worth."""
     account_service = AccountService()
     accounts = account_service.get_all_accounts(db, user_id, include_inactive=False)
     accounts_data = []
@@ -93,82 +151,146 @@ def build_financial_context(db: Session, user_id: int, days: int = 30) -> str:
         except ValueError:
             pass
 
-    # Build context string
-    context_parts = [
-        f"FINANCIAL CONTEXT (Last {days} days):",
-        "",
-        "SUMMARY:",
-        f"- Total Income: ¥{total_income:,}",
-        f"- Total Expenses: ¥{total_expenses:,}",
-        f"- Net Cashflow: ¥{net_cashflow:,}",
-        f"- Transaction Count: {len(transactions)}",
-        ""
-    ]
+    if not accounts_data:
+        return []
 
-    # Add top spending categories
-    if category_spending:
-        context_parts.append("TOP SPENDING CATEGORIES:")
-        for cat, total, count in category_spending:
-            context_parts.append(f"- {cat}: ¥{int(total):,} ({count} transactions)")
-        context_parts.append("")
-
-    # Add budget status
-    if budget:
-        context_parts.append("BUDGET STATUS (Current Month):")
-        context_parts.append(f"- Monthly Income: ¥{budget.monthly_income:,}")
-        if budget.savings_target:
-            context_parts.append(f"- Savings Target: ¥{budget.savings_target:,}")
-
-        # Get spending per allocation
-        allocation_spending = {}
-        for t in transactions:
-            if not t.is_income and not t.is_transfer and t.date.strftime("%Y-%m") == current_month:
-                category = t.category
-                allocation_spending[category] = allocation_spending.get(category, 0) + abs(t.amount)
-
-        for alloc in budget.allocations:
-            spent = allocation_spending.get(alloc.category, 0)
-            remaining = alloc.amount - spent
-            percentage = (spent / alloc.amount * 100) if alloc.amount > 0 else 0
-            status = "⚠️ OVER" if spent > alloc.amount else "✓"
-            context_parts.append(
-                f"  {status} {alloc.category}: ¥{spent:,} / ¥{alloc.amount:,} ({percentage:.0f}%)"
-            )
-        context_parts.append("")
-
-    # Add accounts and net worth
-    if accounts_data:
-        context_parts.append("ACCOUNTS & NET WORTH:")
-        context_parts.append(f"- Net Worth: ¥{net_worth:,}")
-        for acc in accounts_data:
-            context_parts.append(
-                f"  - {acc['name']} ({acc['type']}): ¥{acc['balance']:,}"
-            )
-        context_parts.append("")
-
-    # Add goals with progress
-    if goals_progress:
-        context_parts.append("FINANCIAL GOALS:")
-        for g in goals_progress:
-            status_emoji = "✓" if g["status"] == "on_track" else "⚠️" if g["status"] == "ahead" else "❌"
-            context_parts.append(
-                f"{status_emoji} {g['years']}-Year Goal: ¥{g['total_saved']:,} / ¥{g['target_amount']:,} "
-                f"({g['progress_percentage']:.1f}%) - {g['status'].replace('_', ' ').title()}"
-            )
-        context_parts.append("")
-
-    # Add recent transactions sample
-    if transactions:
-        context_parts.append("RECENT TRANSACTIONS (Last 10):")
-        for t in transactions[:10]:
-            amount_str = f"+¥{t.amount:,}" if t.is_income else f"-¥{abs(t.amount):,}"
-            context_parts.append(
-                f"- {t.date.isoformat()} | {amount_str} | {t.category} | {t.description}"
-            )
+    shown, rest = accounts_data, []
+    if compact and len(accounts_data) > COMPACT_ACCOUNTS:
+        by_size = sorted(accounts_data, key=lambda a: abs(a["balance"]), reverse=True)
+        shown, rest = by_size[:COMPACT_ACCOUNTS], by_size[COMPACT_ACCOUNTS:]
+
+    lines = ["ACCOUNTS & NET WORTH:", f"- Net Worth: ¥{net_worth:,}"]
+    for acc in shown:
+        lines.append(f"  - {acc['name']} ({acc['type']}): ¥{acc['balance']:,}")
+    if rest:
+        lines.append(f"  - {len(rest)} other accounts: ¥{sum(a['balance'] for a in rest):,}")
+    lines.append("")
+    return lines
+
+
+def _goals_section(db: Session, user_id: int, today: date, days: int, compact: bool) -> list[str]:
+    """Savings goals with progress."""
+    goals = db.query(Goal).filter(
+        Goal.user_id == user_id
+    ).order_by(Goal.years).all()
+    if not goals:
+        return []
+
+    goal_service = GoalService()
+    lines = ["FINANCIAL GOALS:"]
+    for goal in goals:
+        g = goal_service.calculate_goal_progress(db, user_id, goal)
+        status_emoji = "✓" if g["status"] == "on_track" else "⚠️" if g["status"] == "ahead" else "❌"
+        lines.append(
+            f"{status_emoji} {g['years']}-Year Goal: ¥{g['total_saved']:,} / ¥{g['target_amount']:,} "
+            f"({g['progress_percentage']:.1f}%) - {g['status'].replace('_', ' ').title()}"
+        )
+    lines.append("")
+    return lines
+
+
+def _recent_section(db: Session, user_id: int, today: date, days: int, compact: bool) -> list[str]:
+    """Latest transactions; the compact form summarizes older weeks instead."""
+    start_date, end_date = _window(today, days)
+    window = (
+        Transaction.user_id == user_id,
+        Transaction.date >= start_date,
+        Transaction.date <= end_date,
+    )
+    limit = COMPACT_RECENT_TRANSACTIONS if compact else 10
+    transactions = db.query(Transaction).filter(*window).order_by(
+        Transaction.date.desc()
+    ).limit(limit).all()
+    if not transactions:
+        return []
 
+    lines = [f"RECENT TRANSACTIONS (Last {limit}):"]
+    for t in transactions:
+        amount_str = f"+¥{t.amount:,}" if t.is_income else f"-¥{abs(t.amount):,}"
+        lines.append(f"- {t.date.isoformat()} | {amount_str} | {t.category} | {t.description}")
+
+    if compact and days > COMPACT_RECENT_DAYS:
+        # Weekly totals for everything older than the recent week
+        older = db.query(
+            Transaction.date, Transaction.amount, Transaction.is_income, Transaction.is_transfer
+        ).filter(*window, Transaction.date < end_date - timedelta(days=COMPACT_RECENT_DAYS - 1)).all()
+        weeks: dict[int, list[int]] = {}
+        for tx_date, amount, is_income, is_transfer in older:
+            week = weeks.setdefault((end_date - tx_date).days // 7, [0, 0])
+            if is_income:
+                week[0] += amount
+            elif not is_transfer:
+                week[1] += abs(amount)
+        if weeks:
+            lines.append("")
+            lines.append("EARLIER WEEKS (income / expenses):")
+            for week_index in sorted(weeks):
+                week_end = end_date - timedelta(days=week_index * 7)
+                week_start = max(start_date, week_end - timedelta(days=6))
+                income, expenses = weeks[week_index]
+                lines.append(f"- {week_start.isoformat()}..{week_end.isoformat()}: +¥{income:,} / -¥{expenses:,}")
+    return lines
+
+
+# Section name -> (data scopes it reads, builder), in context order
+_SECTIONS: dict[str, tuple[tuple[str, ...], Callable[..., list[str]]]] = {
+    "activity": (("transactions",), _activity_section),
+    "budget": (("budgets", "transactions"), _budget_section),
+    "accounts": (("accounts", "transactions"), _accounts_section),
+    "goals": (("goals", "transactions", "accounts"), _goals_section),
+    "recent": (("transactions",), _recent_section),
+}
+
+
+def _render(db: Session, user_id: int, today: date, days: int, compact: bool) -> str:
+    context_parts = [f"FINANCIAL CONTEXT (Last {days} days):", ""]
+    for name, (scopes, builder) in _SECTIONS.items():
+        context_parts.extend(chat_context_cache.get(
+            ("section", user_id, today, days, compact, name),
+            user_id,
+            scopes,
+            lambda builder=builder: builder(db, user_id, today, days, compact),
+        ))
     return "\n".join(context_parts)
 
 
+def build_financial_context(
+    db: Session,
+    user_id: int,
+    days: int = 30,
+    max_tokens: int | None = None
+) -> str:
+    """Build financial context summary for Claude AI.
+
+    Sections are served from the per-user cache while their data is
+    unchanged, so repeated calls do no database work.
+
+    Args:
+        db: Database session
+        user_id: User ID
+        days: Number of days to look back (default 30)
+        max_tokens: Token budget; a context estimated above it is rebuilt in
+            compact form (fewer details, older weeks summarized) and, if
+            still too long, truncated
+
+    Returns:
+        Formatted context string
+    """
+    today = date.today()
+    context = _render(db, user_id, today, days, compact=False)
+    if max_tokens is None or estimate_tokens(context) <= max_tokens:
+        return context
+
+    context = _render(db, user_id, today, days, compact=True)
+    if estimate_tokens(context) <= max_tokens:
+        return context
+
+    lines = context.split("\n")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop()
+    return "\n".join(lines)
+
+
 def get_available_categories(db: Session, user_id: int) -> list[str]:
     """Get list of available categories for the user.
 
@@ -179,8 +301,10 @@ def get_available_categories(db: Session, user_id: int) -> list[str]:
     Returns:
         List of category names
     """
-    categories = db.query(Transaction.category).filter(
-        Transaction.user_id == user_id
-    ).distinct().all()
+    def load() -> list[str]:
+        categories = db.query(Transaction.category).filter(
+            Transaction.user_id == user_id
+        ).distinct().all()
+        return [cat[0] for cat in categories if cat[0]]
 
-    return [cat[0] for cat in categories if cat[0]]
+    return list(chat_context_cache.get(("categories", user_id), user_id, ("transactions",), load))
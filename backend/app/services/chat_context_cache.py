@@ -0,0 +1,136 @@
+"""Per-user cache of chat context sections, invalidated by data version.
+
+Every user has an in-process version counter per data scope (transactions,
+budgets, accounts, goals). ORM inserts, updates and deletes of the matching
+models mark the scope dirty on their session, and the counter is bumped when
+that session commits. A cached section stores the versions of the scopes it
+was built from; it is served as long as they are unchanged, so a follow-up
+chat message touches the database only for sections whose data changed.
+
+Writes that bypass the ORM unit of work (bulk ``query.update``/``delete``)
+and writes made by other processes do not bump versions, so entries also
+expire after ``settings.chat_context_cache_seconds``.
+"""
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from ..config import settings
+from ..models.account import Account
+from ..models.budget import Budget, BudgetAllocation
+from ..models.goal import Goal
+from ..models.transaction import Transaction
+
+_DIRTY_KEY = "chat_context_dirty"
+
+# Model -> data scope it belongs to
+_MODEL_SCOPES: dict[type, str] = {
+    Transaction: "transactions",
+    Budget: "budgets",
+    BudgetAllocation: "budgets",
+    Account: "accounts",
+    Goal: "goals",
+}
+
+
+class ChatContextCache:
+    """Section cache keyed by arbitrary keys and validated by scope versions."""
+
+    def __init__(self, max_age: float, max_entries: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._clock = clock
+        self._versions: dict[tuple[int, str], int] = {}
+        self._entries: dict[Hashable, tuple[tuple[int, ...], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def versions(self, user_id: int, scopes: Iterable[str]) -> tuple[int, ...]:
+        """Current versions of a user's scopes."""
+        with self._lock:
+            return tuple(self._versions.get((user_id, scope), 0) for scope in scopes)
+
+    def bump(self, keys: Iterable[tuple[int, str]]) -> None:
+        """Advance the version of each (user_id, scope)."""
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get(
+        self,
+        key: Hashable,
+        user_id: int,
+        scopes: tuple[str, ...],
+        build: Callable[[], Any],
+    ) -> Any:
+        """Return the cached value for ``key`` or build and store it.
+
+        The scope versions are read before ``build`` runs, so a commit that
+        lands while building leaves the entry already out of date.
+        """
+        versions = self.versions(user_id, scopes)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == versions and now - entry[1] < self.max_age:
+            return entry[2]
+
+        value = build()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired(now)
+            self._entries[key] = (versions, now, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry[1] >= self.max_age]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+
+chat_context_cache = ChatContextCache(max_age=settings.chat_context_cache_seconds)
+
+
+def _owner_id(connection, target: Any) -> int | None:
+    if isinstance(target, BudgetAllocation):
+        budget = target.__dict__.get("budget")
+        if budget is not None:
+            return budget.user_id
+        return connection.execute(
+            select(Budget.user_id).where(Budget.id == target.budget_id)
+        ).scalar()
+    return target.user_id
+
+
+def _mark_dirty(mapper, connection, target: Any) -> None:
+    session = object_session(target)
+    user_id = _owner_id(connection, target)
+    if session is None or user_id is None:
+        return
+    session.info.setdefault(_DIRTY_KEY, set()).add((user_id, _MODEL_SCOPES[mapper.class_]))
+
+
+for _model in _MODEL_SCOPES:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_dirty)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_KEY, None)
+    if dirty:
+        chat_context_cache.bump(dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
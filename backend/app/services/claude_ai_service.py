@@ -1,10 +1,13 @@
 """Claude AI service for budget generation and chat assistant."""
+import asyncio
 import json
 import logging
+from collections.abc import AsyncIterator
 from typing import Any
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from ..config import settings
 from .budget_prompt_helpers import (
@@ -13,12 +16,23 @@ from .budget_prompt_helpers import (
     fetch_valid_categories as _fetch_valid_categories,
     parse_budget_response as _parse_budget_response,
 )
-from .chat_context_builder import build_financial_context, get_available_categories
+from .chat_context_builder import build_financial_context, estimate_tokens, get_available_categories
 from .tool_definitions import get_tool_definitions
 from .tool_executor import ToolExecutor
 
 logger = logging.getLogger(__name__)
 
+# Output token limit for each chat turn
+CHAT_MAX_TOKENS = 2048
+
+# Output token limit for each categorization call, and the budget per result
+CATEGORIZATION_MAX_TOKENS = 4096
+CATEGORIZATION_OUTPUT_TOKENS_PER_ITEM = 60
+
+
+def _categorization_line(tx: dict) -> str:
+    return f"  - ID: {tx['id']}, Description: {tx['description']}, Amount: ¥{abs(tx['amount']):,}"
+
 
 class ClaudeAIService:
     """Service for Claude AI integration."""
@@ -26,6 +40,7 @@ class ClaudeAIService:
     def __init__(self):
         """Initialize Claude AI client."""
         self.client = Anthropic(api_key=settings.anthropic_api_key)
+        self._async_client: AsyncAnthropic | None = None
         self.model = "claude-haiku-4-5-20251001"
         self.chat_model = "claude-sonnet-4-5-20250929"  # Sonnet for chat with tool calling
 
@@ -120,22 +135,12 @@ class ClaudeAIService:
         )
         return budget_data, usage
 
-    def categorize_transactions(
-        self,
+    @staticmethod
+    def _categorization_prompt(
         transactions: list[dict],
         available_categories: dict[str, list[str]],
-        language: str = "ja"
-    ) -> tuple[list[dict], dict[str, int]]:
-        """Categorize transactions using Claude AI.
-
-        Args:
-            transactions: List of {id, description, amount} dicts
-            available_categories: Dict of parent_category -> [child_categories]
-            language: Language code for response
-
-        Returns:
-            Tuple of (list of categorization results, usage dict)
-        """
+        language: str
+    ) -> str:
         language_map = {"ja": "Japanese", "en": "English", "vi": "Vietnamese"}
         language_name = language_map.get(language, "Japanese")
 
@@ -146,12 +151,9 @@ class ClaudeAIService:
         ])
 
         # Format transactions for prompt
-        tx_str = "\n".join([
-            f"  - ID: {tx['id']}, Description: {tx['description']}, Amount: ¥{abs(tx['amount']):,}"
-            for tx in transactions
-        ])
+        tx_str = "\n".join(_categorization_line(tx) for tx in transactions)
 
-        prompt = f"""IMPORTANT: You MUST respond entirely in {language_name} language for the "reason" field.
+        return f"""IMPORTANT: You MUST respond entirely in {language_name} language for the "reason" field.
 
 You are a financial transaction categorizer. Categorize the following transactions into the most appropriate category.
 
@@ -176,13 +178,8 @@ RULES:
 
 Categorize now:"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=4096,
-            temperature=0.3,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
+    @staticmethod
+    def _categorization_results(response) -> tuple[list[dict], dict[str, int]]:
         usage = {
             "input_tokens": response.usage.input_tokens,
             "output_tokens": response.usage.output_tokens
@@ -199,6 +196,128 @@ Categorize now:"""
         results = json.loads(response_text[start_idx:end_idx])
         return results, usage
 
+    def categorize_transactions(
+        self,
+        transactions: list[dict],
+        available_categories: dict[str, list[str]],
+        language: str = "ja"
+    ) -> tuple[list[dict], dict[str, int]]:
+        """Categorize transactions using Claude AI.
+
+        Args:
+            transactions: List of {id, description, amount} dicts
+            available_categories: Dict of parent_category -> [child_categories]
+            language: Language code for response
+
+        Returns:
+            Tuple of (list of categorization results, usage dict)
+        """
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=CATEGORIZATION_MAX_TOKENS,
+            temperature=0.3,
+            messages=[{"role": "user", "content": self._categorization_prompt(
+                transactions, available_categories, language
+            )}]
+        )
+        return self._categorization_results(response)
+
+    async def categorize_transactions_async(
+        self,
+        transactions: list[dict],
+        available_categories: dict[str, list[str]],
+        language: str = "ja"
+    ) -> tuple[list[dict], dict[str, int]]:
+        """``categorize_transactions`` on the async client."""
+        response = await self.async_client.messages.create(
+            model=self.model,
+            max_tokens=CATEGORIZATION_MAX_TOKENS,
+            temperature=0.3,
+            messages=[{"role": "user", "content": self._categorization_prompt(
+                transactions, available_categories, language
+            )}]
+        )
+        return self._categorization_results(response)
+
+    @staticmethod
+    def chunk_for_categorization(
+        transactions: list[dict],
+        chunk_tokens: int | None = None
+    ) -> list[list[dict]]:
+        """Split transactions into prompt-sized chunks, keeping their order.
+
+        A chunk holds at most ``chunk_tokens`` (estimated) tokens of
+        transaction lines, and no more items than the per-call output limit
+        can answer.
+        """
+        chunk_tokens = chunk_tokens or settings.ai_categorization_chunk_tokens
+        max_items = CATEGORIZATION_MAX_TOKENS // CATEGORIZATION_OUTPUT_TOKENS_PER_ITEM
+        chunks: list[list[dict]] = []
+        current: list[dict] = []
+        current_tokens = 0
+        for tx in transactions:
+            tokens = estimate_tokens(_categorization_line(tx))
+            if current and (current_tokens + tokens > chunk_tokens or len(current) >= max_items):
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(tx)
+            current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @classmethod
+    def estimate_categorization_usage(
+        cls,
+        chunks: list[list[dict]],
+        available_categories: dict[str, list[str]],
+        language: str = "ja"
+    ) -> dict[str, int]:
+        """Estimated token usage of categorizing ``chunks``, one call each."""
+        input_tokens = sum(
+            estimate_tokens(cls._categorization_prompt(chunk, available_categories, language))
+            for chunk in chunks
+        )
+        output_tokens = sum(len(chunk) for chunk in chunks) * CATEGORIZATION_OUTPUT_TOKENS_PER_ITEM
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+    async def stream_categorize_transactions(
+        self,
+        chunks: list[list[dict]],
+        available_categories: dict[str, list[str]],
+        language: str = "ja",
+        max_concurrency: int | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Categorize chunks concurrently, yielding each as it completes.
+
+        At most ``max_concurrency`` calls run at once. A failed chunk is
+        reported and does not stop the others.
+
+        Yields:
+            {"chunk", "transactions", "results", "usage"} for a completed chunk,
+            or {"chunk", "transactions", "error"} for a failed one
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.ai_categorization_concurrency)
+
+        async def run(index: int, chunk: list[dict]) -> dict[str, Any]:
+            async with semaphore:
+                try:
+                    results, usage = await self.categorize_transactions_async(
+                        chunk, available_categories, language
+                    )
+                except Exception as e:
+                    logger.warning(f"Categorization chunk {index} failed: {e}")
+                    return {"chunk": index, "transactions": chunk, "error": str(e)}
+            return {"chunk": index, "transactions": chunk, "results": results, "usage": usage}
+
+        tasks = [asyncio.create_task(run(index, chunk)) for index, chunk in enumerate(chunks)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+
     def categorize_single(
         self,
         description: str,
@@ -249,29 +368,25 @@ Return only JSON: {{"category": "child_name", "parent": "parent_name", "confiden
         result = json.loads(response_text[start_idx:end_idx])
         return result, usage
 
-    def chat_with_context(
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        """Async client for streaming chat, created on first use."""
+        if self._async_client is None:
+            self._async_client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        return self._async_client
+
+    def _chat_system_message(
         self,
         db: Session,
         user_id: int,
-        messages: list[dict[str, str]],
-        language: str = "ja",
-        current_page: str | None = None
-    ) -> tuple[dict[str, Any], dict[str, int]]:
-        """Chat with Claude AI about financial data with tool calling support.
-
-        Args:
-            db: Database session
-            user_id: User ID
-            messages: List of message dicts with role and content
-            language: Language code for response (ja, en, vi)
-            current_page: Current page/route user is viewing
-
-        Returns:
-            Tuple of (response_data dict, usage dict with token counts)
-            response_data contains: message, and optional action for confirmation
-        """
+        language: str,
+        current_page: str | None
+    ) -> str:
+        """Build the chat system prompt with the user's financial context."""
         # Build financial context
-        context = build_financial_context(db, user_id, days=30)
+        context = build_financial_context(
+            db, user_id, days=30, max_tokens=settings.chat_context_max_tokens
+        )
         categories = get_available_categories(db, user_id)
 
         # Build system message with context
@@ -282,7 +397,7 @@ Return only JSON: {{"category": "child_name", "parent": "parent_name", "confiden
         if current_page:
             page_context = f"\nCURRENT PAGE: User is currently viewing the '{current_page}' page. Provide context-aware responses related to this page when relevant.\n"
 
-        system_message = f"""You are a helpful financial assistant for SmartMoney app. You help users manage their finances by answering questions and performing actions.
+        return f"""You are a helpful financial assistant for SmartMoney app. You help users manage their finances by answering questions and performing actions.
 
 IMPORTANT: Respond entirely in {language_name}.
 {page_context}
@@ -300,6 +415,97 @@ INSTRUCTIONS:
 - When suggesting to create a transaction, ask if the user wants to proceed
 """
 
+    @staticmethod
+    def _run_tool(
+        executor: ToolExecutor,
+        tool_use_id: str,
+        tool_name: str,
+        tool_params: dict[str, Any]
+    ) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+        """Execute one tool call from Claude.
+
+        Returns:
+            Tuple of (tool_result block to send back to Claude, suggested action);
+            mutation tools produce only a suggested action, since they wait for
+            user confirmation
+        """
+        logger.info(f"Executing tool: {tool_name} with params: {tool_params}")
+
+        try:
+            result = executor.execute(tool_name, tool_params)
+        except Exception as e:
+            logger.error(f"Tool execution failed: {e}", exc_info=True)
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_use_id,
+                "content": json.dumps({
+                    "error": "execution",
+                    "message": str(e)
+                }),
+                "is_error": True
+            }, None
+
+        # Check if this is a mutation tool requiring confirmation
+        if result.get("requires_confirmation"):
+            # Don't send a tool result - we want user confirmation first
+            return None, {
+                "type": result["tool"],
+                "payload": result["payload"],
+                "description": f"Create transaction: {result['payload']['description']}"
+            }
+
+        # Add result to send back to Claude
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_use_id,
+            "content": json.dumps(result)
+        }, None
+
+    def _chat_response_data(
+        self,
+        assistant_message: str,
+        suggested_action: dict[str, Any] | None,
+        current_page: str | None,
+        language: str
+    ) -> dict[str, Any]:
+        """Assemble the chat response payload."""
+        response_data = {
+            "message": assistant_message or "I'm ready to help with your finances!"
+        }
+
+        if suggested_action:
+            response_data["action"] = suggested_action
+
+        # Generate quick actions based on current page and context
+        quick_actions = self._generate_quick_actions(current_page, language)
+        if quick_actions:
+            response_data["quick_actions"] = quick_actions
+
+        return response_data
+
+    def chat_with_context(
+        self,
+        db: Session,
+        user_id: int,
+        messages: list[dict[str, str]],
+        language: str = "ja",
+        current_page: str | None = None
+    ) -> tuple[dict[str, Any], dict[str, int]]:
+        """Chat with Claude AI about financial data with tool calling support.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            messages: List of message dicts with role and content
+            language: Language code for response (ja, en, vi)
+            current_page: Current page/route user is viewing
+
+        Returns:
+            Tuple of (response_data dict, usage dict with token counts)
+            response_data contains: message, and optional action for confirmation
+        """
+        system_message = self._chat_system_message(db, user_id, language, current_page)
+
         # Get tool definitions
         tools = get_tool_definitions()
 
@@ -313,7 +519,7 @@ INSTRUCTIONS:
         try:
             response = self.client.messages.create(
                 model=self.chat_model,
-                max_tokens=2048,
+                max_tokens=CHAT_MAX_TOKENS,
                 temperature=0.7,
                 system=system_message,
                 messages=api_messages,
@@ -335,41 +541,11 @@ INSTRUCTIONS:
                 if block.type == "text":
                     assistant_message += block.text
                 elif block.type == "tool_use":
-                    # Execute tool
-                    tool_name = block.name
-                    tool_params = block.input
-
-                    logger.info(f"Executing tool: {tool_name} with params: {tool_params}")
-
-                    try:
-                        result = executor.execute(tool_name, tool_params)
-
-                        # Check if this is a mutation tool requiring confirmation
-                        if result.get("requires_confirmation"):
-                            suggested_action = {
-                                "type": result["tool"],
-                                "payload": result["payload"],
-                                "description": f"Create transaction: {result['payload']['description']}"
-                            }
-                            # Don't add to tool_results - we want user confirmation first
-                        else:
-                            # Add result to send back to Claude
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": block.id,
-                                "content": json.dumps(result)
-                            })
-                    except Exception as e:
-                        logger.error(f"Tool execution failed: {e}", exc_info=True)
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": block.id,
-                            "content": json.dumps({
-                                "error": "execution",
-                                "message": str(e)
-                            }),
-                            "is_error": True
-                        })
+                    tool_result, action = self._run_tool(executor, block.id, block.name, block.input)
+                    if tool_result:
+                        tool_results.append(tool_result)
+                    if action:
+                        suggested_action = action
 
             # If we have tool results, make another API call to get final response
             if tool_results:
@@ -388,7 +564,7 @@ INSTRUCTIONS:
                 # Get final response from Claude
                 final_response = self.client.messages.create(
                     model=self.chat_model,
-                    max_tokens=2048,
+                    max_tokens=CHAT_MAX_TOKENS,
                     temperature=0.7,
                     system=system_message,
                     messages=api_messages
@@ -404,25 +580,107 @@ INSTRUCTIONS:
                     if block.type == "text":
                         assistant_message += block.text
 
-            # Build response
-            response_data = {
-                "message": assistant_message or "I'm ready to help with your finances!"
-            }
-
-            if suggested_action:
-                response_data["action"] = suggested_action
-
-            # Generate quick actions based on current page and context
-            quick_actions = self._generate_quick_actions(current_page, language)
-            if quick_actions:
-                response_data["quick_actions"] = quick_actions
-
+            response_data = self._chat_response_data(
+                assistant_message, suggested_action, current_page, language
+            )
             return response_data, usage
 
         except Exception as e:
             logger.error(f"Chat API error: {e}", exc_info=True)
             raise
 
+    async def stream_chat_with_context(
+        self,
+        db: Session,
+        user_id: int,
+        messages: list[dict[str, str]],
+        language: str = "ja",
+        current_page: str | None = None
+    ) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+        """Streaming variant of ``chat_with_context``.
+
+        Uses the async client's streaming API. Database work (context building
+        and tool calls) runs in the thread pool so the event loop stays free.
+
+        Yields:
+            (event, data) pairs:
+            - ("delta", {"text"}) for each text token delta
+            - ("tool_call", {"id", "name"}) when Claude starts a tool call
+            - ("tool_result", {"id", "name", "is_error"}) after a tool ran
+            - ("action", suggested_action) for a mutation awaiting confirmation
+            - ("reset", {}) when text streamed before tool calls is superseded
+              by the answer that follows them
+            - ("done", {"response", "usage"}) with the same response_data and
+              usage as ``chat_with_context``
+        """
+        system_message = await run_in_threadpool(
+            self._chat_system_message, db, user_id, language, current_page
+        )
+        api_messages = messages.copy()
+        executor = ToolExecutor(db, user_id)
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        suggested_action = None
+
+        # First turn may call tools; the follow-up turn answers with their results
+        for tools in (get_tool_definitions(), None):
+            request: dict[str, Any] = {
+                "model": self.chat_model,
+                "max_tokens": CHAT_MAX_TOKENS,
+                "temperature": 0.7,
+                "system": system_message,
+                "messages": api_messages,
+            }
+            if tools:
+                request["tools"] = tools
+
+            async with self.async_client.messages.stream(**request) as stream:
+                async for event in stream:
+                    if event.type == "text":
+                        yield "delta", {"text": event.text}
+                    elif event.type == "content_block_start" and event.content_block.type == "tool_use":
+                        yield "tool_call", {
+                            "id": event.content_block.id,
+                            "name": event.content_block.name,
+                        }
+                response = await stream.get_final_message()
+
+            usage["input_tokens"] += response.usage.input_tokens
+            usage["output_tokens"] += response.usage.output_tokens
+            assistant_message = "".join(
+                block.text for block in response.content if block.type == "text"
+            )
+
+            tool_results = []
+            for block in response.content:
+                if block.type != "tool_use":
+                    continue
+                tool_result, action = await run_in_threadpool(
+                    self._run_tool, executor, block.id, block.name, block.input
+                )
+                if tool_result:
+                    tool_results.append(tool_result)
+                    yield "tool_result", {
+                        "id": block.id,
+                        "name": block.name,
+                        "is_error": tool_result.get("is_error", False),
+                    }
+                if action:
+                    suggested_action = action
+                    yield "action", action
+
+            if not tool_results or not tools:
+                break
+
+            api_messages.append({"role": "assistant", "content": response.content})
+            api_messages.append({"role": "user", "content": tool_results})
+            if assistant_message:
+                yield "reset", {}
+
+        response_data = self._chat_response_data(
+            assistant_message, suggested_action, current_page, language
+        )
+        yield "done", {"response": response_data, "usage": usage}
+
     def _generate_quick_actions(
         self,
         current_page: str | None,
@@ -21,6 +21,7 @@ from ..schemas.crypto_wallet import (
     DefiPositionsResponse,
     DefiPosition,
 )
+from .provider_cache import provider_cache
 from .zerion_api_service import ZerionApiService
 
 logger = logging.getLogger(__name__)
@@ -306,10 +307,12 @@ class CryptoWalletService:
         db.commit()
 
         try:
-            # Fetch portfolio from Zerion
+            # Fetch portfolio from Zerion, dropping every cached response for the wallet
+            provider_cache.invalidate_wallet(wallet.wallet_address)
             portfolio_data = await ZerionApiService.get_portfolio(
                 wallet.wallet_address,
-                wallet.chains
+                wallet.chains,
+                force_refresh=True,
             )
 
             # Update sync states with results
@@ -362,7 +365,7 @@ class CryptoWalletService:
             return None
 
         try:
-            # Fetch fresh portfolio data from Zerion API
+            # Fetch portfolio data from Zerion API (cached)
             portfolio_data = await ZerionApiService.get_portfolio(
                 wallet.wallet_address,
                 wallet.chains
@@ -1,118 +1,279 @@
 """DeFi position snapshot service for historical tracking."""
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
+from itertools import groupby
 from typing import Optional
 
-from sqlalchemy import and_, func
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import and_, func, select
 from sqlalchemy.orm import Session
 
-from ..models.crypto_wallet import CryptoWallet, DefiPositionSnapshot
+from ..config import settings
+from ..models.crypto_wallet import CryptoWallet, DefiPositionRollup, DefiPositionSnapshot
 from ..schemas.crypto_wallet import (
     DefiPositionSnapshotResponse,
     PositionHistoryResponse,
     WalletPerformanceResponse,
 )
+from ..utils.db_bulk import bulk_insert_ignore, bulk_upsert
 from .zerion_api_service import ZerionApiService
-from .defillama_service import DeFiLlamaService
+from .defillama_service import CHAIN_MAP, DeFiLlamaService, PoolCatalog
 
 logger = logging.getLogger(__name__)
 
+# Time-series tiers: daily snapshots, then weekly and monthly rollups
+DAILY_RETENTION_DAYS = 90
+WEEKLY_RETENTION_DAYS = 730
+# Daily rows read for the 7d/30d change figures of long-range charts
+CHANGE_WINDOW_DAYS = 45
+
+
+def _position_apy(catalog: PoolCatalog | None, pos: dict) -> Optional[Decimal]:
+    """APY of the catalog pool matching a Zerion position, if any."""
+    if catalog is None:
+        return None
+    pool = catalog.match(
+        pos.get("protocol", ""),
+        pos.get("symbol", ""),
+        CHAIN_MAP.get(pos.get("chain_id", "").lower()),
+    )
+    if pool and pool.get("apy") is not None:
+        return Decimal(str(pool["apy"]))
+    return None
+
+
+def _snapshot_row(
+    user_id: int,
+    wallet_address: str,
+    pos: dict,
+    protocol_apy: Optional[Decimal],
+    snapshot_date: datetime,
+) -> dict:
+    """Column values of a defi_position_snapshots row for a Zerion position."""
+    return {
+        "user_id": user_id,
+        "wallet_address": wallet_address,
+        "position_id": pos.get("id", ""),
+        "protocol": pos.get("protocol", "Unknown"),
+        "chain_id": pos.get("chain_id", ""),
+        "position_type": pos.get("position_type", "deposit"),
+        "symbol": pos.get("symbol", ""),
+        "token_name": pos.get("token_name"),
+        "balance": Decimal(str(pos.get("balance", 0))),
+        "balance_usd": Decimal(str(pos.get("balance_usd", 0))),
+        "price_usd": Decimal(str(pos.get("price_usd", 0))) if pos.get("price_usd") else None,
+        "protocol_apy": protocol_apy,
+        "snapshot_date": snapshot_date,
+    }
+
+
+def _period_start(moment: datetime, resolution: str) -> datetime:
+    """Start (midnight) of the week (Monday) or month containing ``moment``."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _next_period(period_start: datetime, resolution: str) -> datetime:
+    """Start of the period following ``period_start``."""
+    if resolution == "week":
+        return period_start + timedelta(days=7)
+    if period_start.month == 12:
+        return period_start.replace(year=period_start.year + 1, month=1)
+    return period_start.replace(month=period_start.month + 1)
+
+
+def _new_rollup(snap: DefiPositionSnapshot, resolution: str, period_start: datetime) -> dict:
+    """Rollup row seeded from the first snapshot of a period."""
+    return {
+        "user_id": snap.user_id,
+        "wallet_address": snap.wallet_address,
+        "position_id": snap.position_id,
+        "protocol": snap.protocol,
+        "chain_id": snap.chain_id,
+        "position_type": snap.position_type,
+        "symbol": snap.symbol,
+        "token_name": snap.token_name,
+        "resolution": resolution,
+        "period_start": period_start,
+        "last_snapshot_date": snap.snapshot_date,
+        "sample_count": 1,
+        "balance_last": snap.balance,
+        "balance_usd_min": snap.balance_usd,
+        "balance_usd_max": snap.balance_usd,
+        "balance_usd_last": snap.balance_usd,
+        "price_usd_min": snap.price_usd,
+        "price_usd_max": snap.price_usd,
+        "price_usd_last": snap.price_usd,
+        "protocol_apy_min": snap.protocol_apy,
+        "protocol_apy_max": snap.protocol_apy,
+        "protocol_apy_last": snap.protocol_apy,
+    }
+
+
+def _extend_rollup(row: dict, snap: DefiPositionSnapshot) -> None:
+    """Fold a later snapshot of the same period into its rollup row."""
+    row["sample_count"] += 1
+    row["last_snapshot_date"] = snap.snapshot_date
+    row["wallet_address"] = snap.wallet_address
+    row["balance_last"] = snap.balance
+    for field, value in (
+        ("balance_usd", snap.balance_usd),
+        ("price_usd", snap.price_usd),
+        ("protocol_apy", snap.protocol_apy),
+    ):
+        row[f"{field}_last"] = value
+        if value is None:
+            continue
+        low, high = row[f"{field}_min"], row[f"{field}_max"]
+        row[f"{field}_min"] = value if low is None else min(low, value)
+        row[f"{field}_max"] = value if high is None else max(high, value)
+
+
+def _rollup_point(rollup: DefiPositionRollup) -> DefiPositionSnapshotResponse:
+    """Chart point for a rollup, carrying the period's last values."""
+    return DefiPositionSnapshotResponse(
+        id=rollup.id,
+        position_id=rollup.position_id,
+        protocol=rollup.protocol,
+        chain_id=rollup.chain_id,
+        position_type=rollup.position_type,
+        symbol=rollup.symbol,
+        token_name=rollup.token_name,
+        balance=rollup.balance_last,
+        balance_usd=rollup.balance_usd_last,
+        price_usd=rollup.price_usd_last,
+        protocol_apy=rollup.protocol_apy_last,
+        snapshot_date=rollup.last_snapshot_date,
+        resolution=rollup.resolution,
+        balance_usd_min=rollup.balance_usd_min,
+        balance_usd_max=rollup.balance_usd_max,
+    )
+
+
+def _history_response(
+    position_id: str,
+    points: list[DefiPositionSnapshotResponse],
+    daily: list[DefiPositionSnapshot],
+    now: datetime,
+) -> PositionHistoryResponse:
+    """History response for chart ``points`` (newest first).
+
+    7d/30d changes compare the latest value with the newest daily snapshot at
+    least 7/30 days old from ``daily`` (newest first).
+    """
+    latest = points[0]
+
+    # Calculate changes
+    change_7d: Optional[Decimal] = None
+    change_30d: Optional[Decimal] = None
+    pct_7d: Optional[float] = None
+    pct_30d: Optional[float] = None
+
+    for snap in daily:
+        days_ago = (now - snap.snapshot_date).days
+        if days_ago >= 7 and change_7d is None:
+            change_7d = latest.balance_usd - snap.balance_usd
+            if snap.balance_usd > 0:
+                pct_7d = float(change_7d / snap.balance_usd * 100)
+        if days_ago >= 30 and change_30d is None:
+            change_30d = latest.balance_usd - snap.balance_usd
+            if snap.balance_usd > 0:
+                pct_30d = float(change_30d / snap.balance_usd * 100)
+
+    return PositionHistoryResponse(
+        position_id=position_id,
+        protocol=latest.protocol,
+        symbol=latest.symbol,
+        current_value_usd=latest.balance_usd,
+        snapshots=points,
+        change_7d_usd=change_7d,
+        change_7d_pct=pct_7d,
+        change_30d_usd=change_30d,
+        change_30d_pct=pct_30d,
+    )
+
 
 class DefiSnapshotService:
     """Service for DeFi position snapshots and historical tracking."""
 
     @staticmethod
-    async def capture_all_snapshots(db: Session) -> dict:
+    async def capture_all_snapshots(db: Session, concurrency: int | None = None) -> dict:
         """Capture snapshots for all users with active crypto wallets.
 
+        Wallets are fetched concurrently (bounded by ``concurrency`` and the
+        shared Zerion rate limiter) through the provider cache, so a wallet
+        viewed within the cache TTL is not fetched again. APYs are matched
+        against the indexed pool catalog, and the run's snapshots are upserted
+        in chunked statements on (user_id, position_id, snapshot_date), so
+        re-running a day refreshes its values instead of duplicating them.
+
         Returns:
             dict with counts: {users, wallets, positions, errors}
         """
-        stats = {"users": 0, "wallets": 0, "positions": 0, "errors": 0}
         today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
 
-        # Get all active wallets
-        wallets = db.query(CryptoWallet).filter(
+        wallets = db.query(
+            CryptoWallet.user_id, CryptoWallet.wallet_address, CryptoWallet.chains
+        ).filter(
             CryptoWallet.is_active == True  # noqa: E712
         ).all()
-
-        user_ids = set()
-        for wallet in wallets:
-            user_ids.add(wallet.user_id)
-            stats["wallets"] += 1
-
-            try:
-                positions = await ZerionApiService.get_defi_positions(
-                    wallet.wallet_address,
-                    wallet.chains
+        stats = {
+            "users": len({wallet.user_id for wallet in wallets}),
+            "wallets": len(wallets),
+            "positions": 0,
+            "errors": 0,
+        }
+
+        semaphore = asyncio.Semaphore(concurrency or settings.defi_snapshot_concurrency)
+
+        async def fetch(wallet) -> list[dict]:
+            async with semaphore:
+                return await ZerionApiService.get_defi_positions(
+                    wallet.wallet_address, wallet.chains, allow_stale=False
                 )
 
-                # Deduplicate positions by ID - aggregate balances for same position
-                position_map: dict = {}
-                for pos in positions:
-                    pos_id = pos.get("id", "")
-                    if pos_id in position_map:
-                        # Aggregate balances for duplicate position IDs
-                        position_map[pos_id]["balance"] = float(position_map[pos_id].get("balance", 0)) + float(pos.get("balance", 0))
-                        position_map[pos_id]["balance_usd"] = float(position_map[pos_id].get("balance_usd", 0)) + float(pos.get("balance_usd", 0))
-                    else:
-                        position_map[pos_id] = pos.copy()
-
-                for pos in position_map.values():
-                    # Try to get APY from DeFiLlama
-                    protocol_apy = None
-                    try:
-                        apy_data = await DeFiLlamaService.match_position_to_pool(
-                            pos.get("protocol", ""),
-                            pos.get("symbol", ""),
-                            pos.get("chain_id", "")
-                        )
-                        if apy_data and apy_data.get("apy") is not None:
-                            protocol_apy = Decimal(str(apy_data["apy"]))
-                    except Exception as e:
-                        logger.debug(f"APY lookup failed for {pos.get('symbol')}: {e}")
-
-                    snapshot_data = {
-                        "user_id": wallet.user_id,
-                        "wallet_address": wallet.wallet_address,
-                        "position_id": pos.get("id", ""),
-                        "protocol": pos.get("protocol", "Unknown"),
-                        "chain_id": pos.get("chain_id", ""),
-                        "position_type": pos.get("position_type", "deposit"),
-                        "symbol": pos.get("symbol", ""),
-                        "token_name": pos.get("token_name"),
-                        "balance": Decimal(str(pos.get("balance", 0))),
-                        "balance_usd": Decimal(str(pos.get("balance_usd", 0))),
-                        "price_usd": Decimal(str(pos.get("price_usd", 0))) if pos.get("price_usd") else None,
-                        "protocol_apy": protocol_apy,
-                        "snapshot_date": today,
-                    }
-
-                    # Check if snapshot already exists for today
-                    existing = db.query(DefiPositionSnapshot).filter(
-                        and_(
-                            DefiPositionSnapshot.user_id == wallet.user_id,
-                            DefiPositionSnapshot.position_id == pos.get("id", ""),
-                            DefiPositionSnapshot.snapshot_date == today
-                        )
-                    ).first()
-
-                    if not existing:
-                        snapshot = DefiPositionSnapshot(**snapshot_data)
-                        db.add(snapshot)
-                        stats["positions"] += 1
-
-                db.commit()
-
-            except Exception as e:
-                logger.error(f"Snapshot failed for wallet {wallet.wallet_address}: {e}")
+        results = await asyncio.gather(
+            *(fetch(wallet) for wallet in wallets), return_exceptions=True
+        )
+
+        # Deduplicate positions by (user, position ID) - aggregate balances for duplicates
+        position_map: dict[tuple[int, str], tuple[str, dict]] = {}
+        for wallet, positions in zip(wallets, results):
+            if isinstance(positions, BaseException):
+                logger.error(f"Snapshot failed for wallet {wallet.wallet_address}: {positions}")
                 stats["errors"] += 1
-                db.rollback()
+                continue
+            for pos in positions:
+                key = (wallet.user_id, pos.get("id", ""))
+                if key in position_map:
+                    existing = position_map[key][1]
+                    existing["balance"] = float(existing.get("balance", 0)) + float(pos.get("balance", 0))
+                    existing["balance_usd"] = float(existing.get("balance_usd", 0)) + float(pos.get("balance_usd", 0))
+                else:
+                    position_map[key] = (wallet.wallet_address, pos.copy())
+
+        if not position_map:
+            logger.info(f"Snapshot capture complete: {stats}")
+            return stats
+
+        catalog = await DeFiLlamaService.get_catalog()
+        rows = [
+            _snapshot_row(user_id, wallet_address, pos, _position_apy(catalog, pos), today)
+            for (user_id, _), (wallet_address, pos) in position_map.items()
+        ]
+
+        try:
+            stats["positions"] = bulk_upsert(
+                db, DefiPositionSnapshot, rows, ["user_id", "position_id", "snapshot_date"]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
-        stats["users"] = len(user_ids)
         logger.info(f"Snapshot capture complete: {stats}")
         return stats
 
@@ -142,49 +303,25 @@ class DefiSnapshotService:
                 wallet.chains
             )
 
+            existing_ids = {
+                position_id
+                for (position_id,) in db.query(DefiPositionSnapshot.position_id).filter(
+                    DefiPositionSnapshot.user_id == user_id,
+                    DefiPositionSnapshot.snapshot_date == today,
+                )
+            }
+            catalog = await DeFiLlamaService.get_catalog() if positions else None
+
             for pos in positions:
-                # Check if snapshot already exists
-                existing = db.query(DefiPositionSnapshot).filter(
-                    and_(
-                        DefiPositionSnapshot.user_id == user_id,
-                        DefiPositionSnapshot.position_id == pos.get("id", ""),
-                        DefiPositionSnapshot.snapshot_date == today
-                    )
-                ).first()
-
-                if existing:
+                if pos.get("id", "") in existing_ids:
                     stats["skipped"] += 1
                     continue
+                existing_ids.add(pos.get("id", ""))
 
-                # Try to get APY from DeFiLlama
-                protocol_apy = None
-                try:
-                    apy_data = await DeFiLlamaService.match_position_to_pool(
-                        pos.get("protocol", ""),
-                        pos.get("symbol", ""),
-                        pos.get("chain_id", "")
-                    )
-                    if apy_data and apy_data.get("apy") is not None:
-                        protocol_apy = Decimal(str(apy_data["apy"]))
-                except Exception as e:
-                    logger.debug(f"APY lookup failed for {pos.get('symbol')}: {e}")
-
-                snapshot = DefiPositionSnapshot(
-                    user_id=user_id,
-                    wallet_address=wallet.wallet_address,
-                    position_id=pos.get("id", ""),
-                    protocol=pos.get("protocol", "Unknown"),
-                    chain_id=pos.get("chain_id", ""),
-                    position_type=pos.get("position_type", "deposit"),
-                    symbol=pos.get("symbol", ""),
-                    token_name=pos.get("token_name"),
-                    balance=Decimal(str(pos.get("balance", 0))),
-                    balance_usd=Decimal(str(pos.get("balance_usd", 0))),
-                    price_usd=Decimal(str(pos.get("price_usd", 0))) if pos.get("price_usd") else None,
-                    protocol_apy=protocol_apy,
-                    snapshot_date=today,
+                row = _snapshot_row(
+                    user_id, wallet.wallet_address, pos, _position_apy(catalog, pos), today
                 )
-                db.add(snapshot)
+                db.add(DefiPositionSnapshot(**row))
                 stats["positions"] += 1
 
             db.commit()
@@ -203,50 +340,101 @@ class DefiSnapshotService:
         position_id: str,
         days: int = 30
     ) -> Optional[PositionHistoryResponse]:
-        """Get historical snapshots for a specific position."""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        """Get historical snapshots for a specific position.
 
-        snapshots = db.query(DefiPositionSnapshot).filter(
+        Ranges within the daily tier return daily snapshots. Longer ranges
+        return weekly (or, past the weekly tier, monthly) rollup points plus
+        the daily snapshots newer than the last rolled-up period.
+        """
+        now = datetime.utcnow()
+        cutoff_date = now - timedelta(days=days)
+
+        if days <= DAILY_RETENTION_DAYS:
+            daily = db.query(DefiPositionSnapshot).filter(
+                and_(
+                    DefiPositionSnapshot.user_id == user_id,
+                    DefiPositionSnapshot.position_id == position_id,
+                    DefiPositionSnapshot.snapshot_date >= cutoff_date
+                )
+            ).order_by(DefiPositionSnapshot.snapshot_date.desc()).all()
+            if not daily:
+                return None
+            return _history_response(
+                position_id, [DefiPositionSnapshotResponse.model_validate(s) for s in daily], daily, now
+            )
+
+        resolution = "week" if days <= WEEKLY_RETENTION_DAYS else "month"
+        rollups = db.query(DefiPositionRollup).filter(
+            DefiPositionRollup.user_id == user_id,
+            DefiPositionRollup.position_id == position_id,
+            DefiPositionRollup.resolution == resolution,
+            DefiPositionRollup.period_start >= cutoff_date,
+        ).order_by(DefiPositionRollup.period_start.desc()).all()
+
+        boundary = _next_period(rollups[0].period_start, resolution) if rollups else cutoff_date
+        # Daily rows for the chart tail and for the 7d/30d changes
+        daily = db.query(DefiPositionSnapshot).filter(
             and_(
                 DefiPositionSnapshot.user_id == user_id,
                 DefiPositionSnapshot.position_id == position_id,
-                DefiPositionSnapshot.snapshot_date >= cutoff_date
+                DefiPositionSnapshot.snapshot_date >= min(boundary, now - timedelta(days=CHANGE_WINDOW_DAYS))
             )
         ).order_by(DefiPositionSnapshot.snapshot_date.desc()).all()
 
-        if not snapshots:
+        points = [
+            DefiPositionSnapshotResponse.model_validate(s)
+            for s in daily
+            if s.snapshot_date >= boundary
+        ] + [_rollup_point(r) for r in rollups]
+        if not points:
             return None
+        return _history_response(position_id, points, daily, now)
 
-        latest = snapshots[0]
-
-        # Calculate changes
-        change_7d: Optional[Decimal] = None
-        change_30d: Optional[Decimal] = None
-        pct_7d: Optional[float] = None
-        pct_30d: Optional[float] = None
+    @staticmethod
+    def get_position_series(
+        db: Session,
+        user_id: int,
+        position_ids: list[str]
+    ) -> list[DefiPositionSnapshotResponse]:
+        """Full history of positions, oldest first, at the finest stored resolution.
 
-        for snap in snapshots:
-            days_ago = (datetime.utcnow() - snap.snapshot_date).days
-            if days_ago >= 7 and change_7d is None:
-                change_7d = latest.balance_usd - snap.balance_usd
-                if snap.balance_usd > 0:
-                    pct_7d = float(change_7d / snap.balance_usd * 100)
-            if days_ago >= 30 and change_30d is None:
-                change_30d = latest.balance_usd - snap.balance_usd
-                if snap.balance_usd > 0:
-                    pct_30d = float(change_30d / snap.balance_usd * 100)
-
-        return PositionHistoryResponse(
-            position_id=position_id,
-            protocol=latest.protocol,
-            symbol=latest.symbol,
-            current_value_usd=latest.balance_usd,
-            snapshots=[DefiPositionSnapshotResponse.model_validate(s) for s in snapshots],
-            change_7d_usd=change_7d,
-            change_7d_pct=pct_7d,
-            change_30d_usd=change_30d,
-            change_30d_pct=pct_30d,
-        )
+        Daily snapshots are extended backwards with weekly rollups, and those
+        with monthly rollups, so callers comparing first and latest values
+        still see the position's entry after daily rows are rolled up.
+        """
+        if not position_ids:
+            return []
+
+        daily = db.query(DefiPositionSnapshot).filter(
+            DefiPositionSnapshot.user_id == user_id,
+            DefiPositionSnapshot.position_id.in_(position_ids),
+        ).order_by(DefiPositionSnapshot.snapshot_date.asc()).all()
+        rollups = db.query(DefiPositionRollup).filter(
+            DefiPositionRollup.user_id == user_id,
+            DefiPositionRollup.position_id.in_(position_ids),
+        ).order_by(DefiPositionRollup.period_start.asc()).all()
+
+        # Earliest date already covered per position, walking from finest to coarsest tier
+        covered_from: dict[str, datetime] = {}
+        for snap in daily:
+            covered_from.setdefault(snap.position_id, snap.snapshot_date)
+
+        points = [DefiPositionSnapshotResponse.model_validate(s) for s in daily]
+        for resolution in ("week", "month"):
+            tier = [
+                r for r in rollups
+                if r.resolution == resolution
+                and (r.position_id not in covered_from or r.last_snapshot_date < covered_from[r.position_id])
+            ]
+            for rollup in tier:
+                points.append(_rollup_point(rollup))
+            for rollup in tier:
+                earliest = covered_from.get(rollup.position_id)
+                if earliest is None or rollup.period_start < earliest:
+                    covered_from[rollup.position_id] = rollup.period_start
+
+        points.sort(key=lambda p: p.snapshot_date)
+        return points
 
     @staticmethod
     def get_wallet_performance(
@@ -254,35 +442,51 @@ class DefiSnapshotService:
         user_id: int,
         wallet_id: int
     ) -> Optional[WalletPerformanceResponse]:
-        """Get aggregated performance for a wallet."""
+        """Get aggregated performance for a wallet.
+
+        Reads the recent daily snapshots of every position of the wallet in
+        one query and groups them in memory; positions report their last 30
+        days.
+        """
         from .crypto_wallet_service import CryptoWalletService
 
         wallet = CryptoWalletService.get_wallet(db, user_id, wallet_id)
         if not wallet:
             return None
 
-        # Get distinct position IDs for this wallet
-        position_ids = db.query(DefiPositionSnapshot.position_id).filter(
+        now = datetime.utcnow()
+        window_start = now - timedelta(days=30)
+        daily = db.query(DefiPositionSnapshot).filter(
             and_(
                 DefiPositionSnapshot.user_id == user_id,
-                DefiPositionSnapshot.wallet_address == wallet.wallet_address
+                DefiPositionSnapshot.wallet_address == wallet.wallet_address,
+                DefiPositionSnapshot.snapshot_date >= now - timedelta(days=CHANGE_WINDOW_DAYS)
             )
-        ).distinct().all()
+        ).order_by(
+            DefiPositionSnapshot.position_id, DefiPositionSnapshot.snapshot_date.desc()
+        ).all()
 
         positions = []
         total_value = Decimal("0")
         total_change_7d = Decimal("0")
         total_change_30d = Decimal("0")
 
-        for (pos_id,) in position_ids:
-            history = DefiSnapshotService.get_position_history(db, user_id, pos_id, 30)
-            if history:
-                positions.append(history)
-                total_value += history.current_value_usd
-                if history.change_7d_usd:
-                    total_change_7d += history.change_7d_usd
-                if history.change_30d_usd:
-                    total_change_30d += history.change_30d_usd
+        for pos_id, group in groupby(daily, key=lambda s: s.position_id):
+            rows = list(group)
+            points = [
+                DefiPositionSnapshotResponse.model_validate(s)
+                for s in rows
+                if s.snapshot_date >= window_start
+            ]
+            if not points:
+                continue
+            history = _history_response(pos_id, points, rows, now)
+            positions.append(history)
+            total_value += history.current_value_usd
+            if history.change_7d_usd:
+                total_change_7d += history.change_7d_usd
+            if history.change_30d_usd:
+                total_change_30d += history.change_30d_usd
 
         # Get snapshot stats
         snapshot_stats = db.query(
@@ -294,6 +498,11 @@ class DefiSnapshotService:
                 DefiPositionSnapshot.wallet_address == wallet.wallet_address
             )
         ).first()
+        first_rollup = db.query(func.min(DefiPositionRollup.period_start)).filter(
+            DefiPositionRollup.user_id == user_id,
+            DefiPositionRollup.wallet_address == wallet.wallet_address,
+        ).scalar()
+        first_dates = [d for d in (snapshot_stats[1], first_rollup) if d is not None]
 
         return WalletPerformanceResponse(
             wallet_address=wallet.wallet_address,
@@ -302,22 +511,70 @@ class DefiSnapshotService:
             total_change_30d_usd=total_change_30d if total_change_30d != 0 else None,
             positions=positions,
             snapshot_count=snapshot_stats[0] or 0,
-            first_snapshot_date=snapshot_stats[1],
+            first_snapshot_date=min(first_dates) if first_dates else None,
         )
 
     @staticmethod
-    def cleanup_old_snapshots(db: Session, retention_days: int = 365) -> int:
-        """Delete snapshots older than retention period.
+    def rollup_snapshots(db: Session, now: datetime | None = None) -> dict:
+        """Roll daily snapshots into weekly/monthly aggregates and trim the tiers.
+
+        Every complete week and month still covered by daily rows is
+        recomputed and upserted. Periods that began before the daily cutoff
+        lose daily rows once the cutoff passes them, so their stored rollups
+        are final and only inserted if missing. Daily rows older than
+        ``DAILY_RETENTION_DAYS`` and weekly rollups older than
+        ``WEEKLY_RETENTION_DAYS`` are then deleted; monthly rollups are kept.
 
         Returns:
-            Number of deleted rows
+            dict with counts: {weekly, monthly, deleted_daily, deleted_weekly}
         """
-        cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
-
-        deleted = db.query(DefiPositionSnapshot).filter(
-            DefiPositionSnapshot.snapshot_date < cutoff_date
+        today = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        daily_cutoff = today - timedelta(days=DAILY_RETENTION_DAYS)
+        boundaries = {
+            "week": _period_start(today, "week"),
+            "month": _period_start(today, "month"),
+        }
+
+        aggregates: dict[tuple, dict] = {}
+        snapshots = db.scalars(
+            select(DefiPositionSnapshot)
+            .where(DefiPositionSnapshot.snapshot_date < max(boundaries.values()))
+            .order_by(
+                DefiPositionSnapshot.user_id,
+                DefiPositionSnapshot.position_id,
+                DefiPositionSnapshot.snapshot_date,
+            )
+            .execution_options(yield_per=1000)
+        )
+        for snap in snapshots:
+            for resolution, boundary in boundaries.items():
+                if snap.snapshot_date >= boundary:
+                    continue
+                period_start = _period_start(snap.snapshot_date, resolution)
+                key = (snap.user_id, snap.position_id, resolution, period_start)
+                aggregate = aggregates.get(key)
+                if aggregate is None:
+                    aggregates[key] = _new_rollup(snap, resolution, period_start)
+                else:
+                    _extend_rollup(aggregate, snap)
+
+        stats = {"weekly": 0, "monthly": 0, "deleted_daily": 0, "deleted_weekly": 0}
+        final = [row for row in aggregates.values() if row["period_start"] < daily_cutoff]
+        current = [row for row in aggregates.values() if row["period_start"] >= daily_cutoff]
+        conflict_columns = ["user_id", "position_id", "resolution", "period_start"]
+        bulk_insert_ignore(db, DefiPositionRollup, final, conflict_columns)
+        bulk_upsert(db, DefiPositionRollup, current, conflict_columns)
+        for row in aggregates.values():
+            stats["weekly" if row["resolution"] == "week" else "monthly"] += 1
+
+        stats["deleted_daily"] = db.query(DefiPositionSnapshot).filter(
+            DefiPositionSnapshot.snapshot_date < daily_cutoff
+        ).delete(synchronize_session=False)
+        stats["deleted_weekly"] = db.query(DefiPositionRollup).filter(
+            DefiPositionRollup.resolution == "week",
+            DefiPositionRollup.period_start < today - timedelta(days=WEEKLY_RETENTION_DAYS),
         ).delete(synchronize_session=False)
-
         db.commit()
-        logger.info(f"Cleaned up {deleted} old snapshots (older than {retention_days} days)")
-        return deleted
+
+        logger.info(f"Snapshot rollup complete: {stats}")
+        return stats
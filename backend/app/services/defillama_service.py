@@ -1,16 +1,229 @@
-"""DeFiLlama API service for protocol APY data."""
+"""DeFiLlama API service for protocol APY data.
+
+The full ``/pools`` response (tens of thousands of pools) is stored in the
+``defillama_pools`` table and refreshed in the background with conditional
+requests (ETag / Last-Modified).
+
+Single lookups from request handlers (``match_position_to_pool``) are indexed
+queries on that table, run in the thread pool, so API processes never hold a
+copy of the catalog. Batch matching (snapshot capture in the job worker)
+loads a :class:`PoolCatalog` of hash indexes once per catalog version instead,
+also off the event loop.
+"""
 import logging
-from datetime import datetime, timedelta
-from decimal import Decimal
+import threading
+import time
+from datetime import datetime
 from typing import Optional
 
 import httpx
+from sqlalchemy import literal, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal
+from ..models.defi_pool import DefiLlamaCatalogState, DefiLlamaPool
+from ..utils.db_bulk import bulk_upsert
+from .http_client import ProviderClient, http_clients
 
 logger = logging.getLogger(__name__)
 
-# Cache for pools data (refreshed hourly)
-_pools_cache: dict = {"data": [], "last_updated": None}
-CACHE_TTL_SECONDS = 3600  # 1 hour
+CATALOG_NAME = "pools"
+# How often a process checks whether the stored catalog has a newer version
+CATALOG_CHECK_INTERVAL_SECONDS = 60
+
+# Map our chain IDs to DeFiLlama chain names
+CHAIN_MAP = {
+    "eth": "Ethereum",
+    "polygon": "Polygon",
+    "bsc": "BSC",
+    "arbitrum": "Arbitrum",
+    "optimism": "Optimism",
+    "base": "Base",
+    "avalanche": "Avalanche",
+}
+
+
+def _normalize_project(project: str) -> str:
+    return project.lower().replace(" ", "-").replace("_", "-")
+
+
+class PoolCatalog:
+    """Hash indexes over the pool catalog.
+
+    Matching follows the original scan semantics: the project matches if either
+    name contains the other, the chain must match when given, an exact symbol
+    beats a partial (substring) one, and ties go to the earliest pool in the
+    upstream response. Resolved lookups are memoized.
+    """
+
+    def __init__(self, pools: list[dict], version: int = 0):
+        self.version = version
+        self.pools = pools
+        self._symbols: list[str] = []
+        # (project, chain or None, symbol) -> index of first pool
+        self._exact: dict[tuple[str, str | None, str], int] = {}
+        # (project, chain or None) -> pool indexes, for partial symbol matches
+        self._buckets: dict[tuple[str, str | None], list[int]] = {}
+        for i, pool in enumerate(pools):
+            project = pool.get("project", "").lower()
+            chain = pool.get("chain", "").lower()
+            symbol = pool.get("symbol", "").upper()
+            self._symbols.append(symbol)
+            for chain_key in (chain, None):
+                self._exact.setdefault((project, chain_key, symbol), i)
+                self._buckets.setdefault((project, chain_key), []).append(i)
+        self._projects = {project for project, _ in self._buckets}
+        self._project_matches: dict[str, list[str]] = {}
+        self._matches: dict[tuple[str, str | None, str], Optional[dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self.pools)
+
+    def matching_projects(self, project: str) -> list[str]:
+        """Catalog project names that contain, or are contained in, ``project``."""
+        key = _normalize_project(project)
+        matches = self._project_matches.get(key)
+        if matches is None:
+            matches = [p for p in self._projects if key in p or p in key]
+            self._project_matches[key] = matches
+        return matches
+
+    def match(self, project: str, symbol: str, chain: str | None = None) -> Optional[dict]:
+        """Best pool for ``project``/``symbol``, optionally restricted to ``chain``."""
+        chain_key = chain.lower() if chain else None
+        symbol_key = symbol.upper()
+        key = (_normalize_project(project), chain_key, symbol_key)
+        if key in self._matches:
+            return self._matches[key]
+
+        projects = self.matching_projects(project)
+        exact = [
+            self._exact[(p, chain_key, symbol_key)]
+            for p in projects
+            if (p, chain_key, symbol_key) in self._exact
+        ]
+        best = min(exact, default=None)
+        if best is None:
+            partial = [
+                i
+                for p in projects
+                for i in self._buckets.get((p, chain_key), ())
+                if symbol_key in self._symbols[i] or self._symbols[i] in symbol_key
+            ]
+            best = min(partial, default=None)
+
+        result = self.pools[best] if best is not None else None
+        self._matches[key] = result
+        return result
+
+    def protocol_pools(self, project: str, chain: str | None = None) -> list[dict]:
+        """All pools of ``project`` (optionally on ``chain``) in upstream order."""
+        chain_key = chain.lower() if chain else None
+        indexes = sorted(
+            i
+            for p in self.matching_projects(project)
+            for i in self._buckets.get((p, chain_key), ())
+        )
+        return [self.pools[i] for i in indexes]
+
+
+_catalog = PoolCatalog([])
+_catalog_checked_at = 0.0
+_catalog_lock = threading.Lock()
+# Distinct project keys of the stored catalog, for substring project matching
+_projects: tuple[int, list[str]] = (0, [])
+_projects_checked_at = 0.0
+
+
+def _catalog_version(db: Session) -> int | None:
+    return db.scalar(
+        select(DefiLlamaCatalogState.version).where(DefiLlamaCatalogState.name == CATALOG_NAME)
+    )
+
+
+def load_catalog(db: Session) -> PoolCatalog:
+    """Return the process-wide catalog, rebuilding it if the stored version changed."""
+    global _catalog, _catalog_checked_at
+
+    with _catalog_lock:
+        version = _catalog_version(db)
+        if version is not None and version != _catalog.version:
+            pools = list(
+                db.scalars(select(DefiLlamaPool.data).order_by(DefiLlamaPool.position))
+            )
+            _catalog = PoolCatalog(pools, version)
+            logger.info(f"Loaded DeFiLlama pool catalog v{version} ({len(pools)} pools)")
+        _catalog_checked_at = time.monotonic()
+        return _catalog
+
+
+def _matching_projects(db: Session, project: str) -> list[str]:
+    """Stored project keys that contain, or are contained in, ``project``."""
+    global _projects, _projects_checked_at
+
+    with _catalog_lock:
+        if time.monotonic() - _projects_checked_at >= CATALOG_CHECK_INTERVAL_SECONDS:
+            version = _catalog_version(db)
+            if version is not None and version != _projects[0]:
+                _projects = (
+                    version,
+                    list(db.scalars(select(DefiLlamaPool.project_key).distinct())),
+                )
+            _projects_checked_at = time.monotonic()
+        projects = _projects[1]
+    key = _normalize_project(project)
+    return [p for p in projects if key in p or p in key]
+
+
+def find_pool(db: Session, project: str, symbol: str, chain: str | None = None) -> Optional[dict]:
+    """Best stored pool for ``project``/``symbol`` using indexed queries.
+
+    Same semantics as :meth:`PoolCatalog.match`.
+    """
+    projects = _matching_projects(db, project)
+    if not projects:
+        return None
+    symbol_key = symbol.upper()
+    query = (
+        select(DefiLlamaPool.data)
+        .where(DefiLlamaPool.project_key.in_(projects))
+        .order_by(DefiLlamaPool.position)
+        .limit(1)
+    )
+    if chain:
+        query = query.where(DefiLlamaPool.chain_key == chain.lower())
+
+    exact = db.scalar(query.where(DefiLlamaPool.symbol_key == symbol_key))
+    if exact is not None:
+        return exact
+    return db.scalar(query.where(
+        DefiLlamaPool.symbol_key.contains(symbol_key, autoescape=True)
+        | literal(symbol_key).contains(DefiLlamaPool.symbol_key)
+    ))
+
+
+def find_protocol_pools(db: Session, project: str, chain: str | None = None) -> list[dict]:
+    """All stored pools of ``project`` (optionally on ``chain``) in upstream order."""
+    projects = _matching_projects(db, project)
+    if not projects:
+        return []
+    query = (
+        select(DefiLlamaPool.data)
+        .where(DefiLlamaPool.project_key.in_(projects))
+        .order_by(DefiLlamaPool.position)
+    )
+    if chain:
+        query = query.where(DefiLlamaPool.chain_key == chain.lower())
+    return list(db.scalars(query))
+
+
+def _in_session(lookup, *args):
+    db = SessionLocal()
+    try:
+        return lookup(db, *args)
+    finally:
+        db.close()
 
 
 class DeFiLlamaService:
@@ -19,47 +232,123 @@ class DeFiLlamaService:
     BASE_URL = "https://yields.llama.fi"
 
     @staticmethod
-    async def get_pools(force_refresh: bool = False) -> list[dict]:
-        """Fetch all yield pools from DeFiLlama.
-
-        Returns cached data if available and not expired.
+    async def refresh_catalog(db: Session, client: ProviderClient | None = None) -> dict:
+        """Fetch ``/pools`` if it changed and store it as the pool catalog.
 
-        Args:
-            force_refresh: Force refresh cache
+        Sends the stored ETag / Last-Modified validators, so an unchanged
+        upstream response costs a 304 and no writes.
 
         Returns:
-            List of pool data dicts with APY info
+            dict with 'status' ('updated' or 'not_modified') and 'pools' count
         """
-        global _pools_cache
+        state = await run_in_threadpool(db.get, DefiLlamaCatalogState, CATALOG_NAME)
+        headers = {}
+        if state and state.etag:
+            headers["If-None-Match"] = state.etag
+        if state and state.last_modified:
+            headers["If-Modified-Since"] = state.last_modified
+
+        client = client or http_clients.get("defillama")
+        response = await client.get(
+            f"{DeFiLlamaService.BASE_URL}/pools", endpoint="pools", headers=headers
+        )
+
+        if response.status_code == 304 and state is not None:
+            return await run_in_threadpool(DeFiLlamaService._mark_not_modified, db, state)
+        response.raise_for_status()
+        # Parsing and storing tens of thousands of pools stays off the event loop
+        return await run_in_threadpool(DeFiLlamaService._store_catalog, db, state, response)
 
-        # Check cache
-        if not force_refresh and _pools_cache["last_updated"]:
-            age = (datetime.utcnow() - _pools_cache["last_updated"]).total_seconds()
-            if age < CACHE_TTL_SECONDS and _pools_cache["data"]:
-                logger.debug("Using cached DeFiLlama pools data")
-                return _pools_cache["data"]
+    @staticmethod
+    def _mark_not_modified(db: Session, state: DefiLlamaCatalogState) -> dict:
+        state.fetched_at = datetime.utcnow()
+        db.commit()
+        return {"status": "not_modified", "pools": state.pool_count}
 
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(f"{DeFiLlamaService.BASE_URL}/pools")
-                response.raise_for_status()
+    @staticmethod
+    def _store_catalog(
+        db: Session, state: DefiLlamaCatalogState | None, response: httpx.Response
+    ) -> dict:
+        """Replace the stored catalog with a ``/pools`` response and bump its version."""
+        now = datetime.utcnow()
+        pools = [pool for pool in response.json().get("data", []) if pool.get("pool")]
+        if not pools:
+            # Never replace a good catalog with an empty response
+            logger.warning("DeFiLlama returned no pools; keeping the stored catalog")
+            return {"status": "not_modified", "pools": state.pool_count if state else 0}
+
+        rows = [
+            {
+                "pool_id": pool["pool"],
+                "project_key": pool.get("project", "").lower()[:100],
+                "chain_key": pool.get("chain", "").lower()[:50],
+                "symbol_key": pool.get("symbol", "").upper()[:200],
+                "position": position,
+                "data": pool,
+                "refreshed_at": now,
+            }
+            for position, pool in enumerate(pools)
+        ]
+        bulk_upsert(db, DefiLlamaPool, rows, ["pool_id"])
+        db.query(DefiLlamaPool).filter(DefiLlamaPool.refreshed_at < now).delete(
+            synchronize_session=False
+        )
+
+        if state is None:
+            state = DefiLlamaCatalogState(name=CATALOG_NAME, version=0)
+            db.add(state)
+        state.etag = response.headers.get("etag")
+        state.last_modified = response.headers.get("last-modified")
+        state.version = (state.version or 0) + 1
+        state.pool_count = len(rows)
+        state.fetched_at = now
+        db.commit()
+
+        logger.info(f"Stored {len(rows)} pools from DeFiLlama (catalog v{state.version})")
+        return {"status": "updated", "pools": len(rows)}
 
-                data = response.json()
-                pools = data.get("data", [])
+    @staticmethod
+    async def get_catalog(force_refresh: bool = False) -> PoolCatalog:
+        """Return the in-memory pool catalog, for matching many positions at once.
 
-                # Update cache
-                _pools_cache["data"] = pools
-                _pools_cache["last_updated"] = datetime.utcnow()
+        The catalog is normally refreshed by the background job; it is only
+        fetched inline when forced or when nothing has been stored yet. Request
+        handlers should use :meth:`get_pool_apy` instead.
+        """
+        if (
+            not force_refresh
+            and _catalog_checked_at
+            and time.monotonic() - _catalog_checked_at < CATALOG_CHECK_INTERVAL_SECONDS
+        ):
+            return _catalog
+
+        db = SessionLocal()
+        try:
+            stored = await run_in_threadpool(db.get, DefiLlamaCatalogState, CATALOG_NAME)
+            if force_refresh or stored is None:
+                try:
+                    await DeFiLlamaService.refresh_catalog(db)
+                except httpx.HTTPStatusError as e:
+                    db.rollback()
+                    logger.error(f"DeFiLlama API error: {e.response.status_code}")
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"DeFiLlama API request failed: {e}")
+            return await run_in_threadpool(load_catalog, db)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def get_pools(force_refresh: bool = False) -> list[dict]:
+        """Fetch all yield pools from DeFiLlama.
 
-                logger.info(f"Fetched {len(pools)} pools from DeFiLlama")
-                return pools
+        Args:
+            force_refresh: Refresh the stored catalog first
 
-        except httpx.HTTPStatusError as e:
-            logger.error(f"DeFiLlama API error: {e.response.status_code}")
-            return _pools_cache.get("data", [])
-        except Exception as e:
-            logger.error(f"DeFiLlama API request failed: {e}")
-            return _pools_cache.get("data", [])
+        Returns:
+            List of pool data dicts with APY info
+        """
+        return (await DeFiLlamaService.get_catalog(force_refresh)).pools
 
     @staticmethod
     async def get_pool_apy(
@@ -77,40 +366,7 @@ class DeFiLlamaService:
         Returns:
             Pool data dict with APY info, or None if not found
         """
-        pools = await DeFiLlamaService.get_pools()
-
-        # Normalize for comparison
-        project_lower = project.lower().replace(" ", "-").replace("_", "-")
-        symbol_upper = symbol.upper()
-
-        best_match = None
-        best_score = 0
-
-        for pool in pools:
-            pool_project = pool.get("project", "").lower()
-            pool_symbol = pool.get("symbol", "").upper()
-            pool_chain = pool.get("chain", "")
-
-            # Check project match
-            if project_lower not in pool_project and pool_project not in project_lower:
-                continue
-
-            # Check chain if specified
-            if chain and chain.lower() != pool_chain.lower():
-                continue
-
-            # Score symbol match
-            score = 0
-            if pool_symbol == symbol_upper:
-                score = 100  # Exact match
-            elif symbol_upper in pool_symbol or pool_symbol in symbol_upper:
-                score = 50  # Partial match
-
-            if score > best_score:
-                best_score = score
-                best_match = pool
-
-        return best_match
+        return await run_in_threadpool(_in_session, find_pool, project, symbol, chain)
 
     @staticmethod
     async def get_protocol_pools(project: str, chain: str | None = None) -> list[dict]:
@@ -123,20 +379,7 @@ class DeFiLlamaService:
         Returns:
             List of pool data for the protocol
         """
-        pools = await DeFiLlamaService.get_pools()
-
-        project_lower = project.lower().replace(" ", "-").replace("_", "-")
-
-        result = []
-        for pool in pools:
-            pool_project = pool.get("project", "").lower()
-            pool_chain = pool.get("chain", "")
-
-            if project_lower in pool_project or pool_project in project_lower:
-                if chain is None or chain.lower() == pool_chain.lower():
-                    result.append(pool)
-
-        return result
+        return await run_in_threadpool(_in_session, find_protocol_pools, project, chain)
 
     @staticmethod
     def extract_apy_data(pool: dict) -> dict:
@@ -180,18 +423,7 @@ class DeFiLlamaService:
         Returns:
             APY data dict or None if no match
         """
-        # Map our chain IDs to DeFiLlama chain names
-        chain_map = {
-            "eth": "Ethereum",
-            "polygon": "Polygon",
-            "bsc": "BSC",
-            "arbitrum": "Arbitrum",
-            "optimism": "Optimism",
-            "base": "Base",
-            "avalanche": "Avalanche",
-        }
-
-        chain_name = chain_map.get(chain_id.lower())
+        chain_name = CHAIN_MAP.get(chain_id.lower())
 
         pool = await DeFiLlamaService.get_pool_apy(protocol, symbol, chain_name)
 
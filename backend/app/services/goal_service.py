@@ -1,14 +1,17 @@
 """Goal service for financial goal tracking and progress calculations."""
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import case, func
+from sqlalchemy import and_, case, func, or_, update
 from sqlalchemy.orm import Session
 
 from ..models.goal import Goal
 from ..models.transaction import Transaction
 
+# Progress percentages that trigger a goal milestone notification
+MILESTONE_THRESHOLDS = [25, 50, 75, 90, 100]
+
 
 class GoalService:
     """Service for goal operations."""
@@ -381,55 +384,96 @@ class GoalService:
 
         Returns list of milestones reached.
         """
-        from ..models.notification import InAppNotification
+        return GoalService.check_all_milestones(db, [user_id])
 
-        goals = GoalService.get_all_goals(db, user_id)
-        milestones_reached = []
-        milestone_thresholds = [25, 50, 75, 90, 100]
+    @staticmethod
+    def check_all_milestones(db: Session, user_ids: Optional[list[int]] = None) -> list[dict]:
+        """Check milestones for every goal (optionally limited to ``user_ids``).
 
-        for goal in goals:
-            # Determine start date
-            if goal.start_date:
-                start_date = goal.start_date
-            else:
-                first_tx = (
-                    db.query(func.min(Transaction.date))
-                    .filter(Transaction.user_id == user_id, ~Transaction.is_transfer)
-                    .scalar()
-                )
-                start_date = first_tx or date.today()
+        Net savings since each goal's start are computed for all goals in one
+        aggregate query; thresholds are compared in memory, and notifications
+        and ``last_milestone_pct`` updates are written in bulk.
 
-            total_saved = GoalService._calculate_net_savings(db, user_id, start_date)
-            if goal.target_amount <= 0:
-                continue
+        Returns:
+            List of milestones reached (one entry per goal and threshold)
+        """
+        from ..models.notification import InAppNotification
+        from .notification_service import (
+            publish_in_app_notifications,
+            serialize_in_app_notification,
+        )
 
-            current_pct = (total_saved / goal.target_amount) * 100
-            last_pct = goal.last_milestone_pct or 0
+        # A goal without a start date counts from the user's first transaction,
+        # which is the same as counting every non-transfer transaction.
+        totals = (
+            db.query(
+                Goal.id,
+                Goal.user_id,
+                Goal.years,
+                Goal.target_amount,
+                Goal.last_milestone_pct,
+                func.sum(case((Transaction.is_income, Transaction.amount), else_=0)).label("income"),
+                func.sum(case((~Transaction.is_income, Transaction.amount), else_=0)).label("expenses"),
+            )
+            .join(
+                Transaction,
+                and_(
+                    Transaction.user_id == Goal.user_id,
+                    ~Transaction.is_transfer,
+                    or_(Goal.start_date.is_(None), Transaction.date >= Goal.start_date),
+                ),
+            )
+            .filter(
+                Goal.target_amount > 0,
+                func.coalesce(Goal.last_milestone_pct, 0) < MILESTONE_THRESHOLDS[-1],
+            )
+            .group_by(
+                Goal.id, Goal.user_id, Goal.years, Goal.target_amount, Goal.last_milestone_pct
+            )
+        )
+        if user_ids is not None:
+            totals = totals.filter(Goal.user_id.in_(user_ids))
 
-            for threshold in milestone_thresholds:
-                if current_pct >= threshold and last_pct < threshold:
-                    # Create notification
-                    notification = InAppNotification(
-                        user_id=user_id,
+        milestones_reached = []
+        notifications = []
+        goal_updates = []
+        created_at = datetime.now()
+        for row in totals:
+            total_saved = (row.income or 0) - abs(row.expenses or 0)
+            current_pct = (total_saved / row.target_amount) * 100
+            last_pct = row.last_milestone_pct or 0
+
+            reached = [t for t in MILESTONE_THRESHOLDS if last_pct < t <= current_pct]
+            for threshold in reached:
+                notifications.append(
+                    InAppNotification(
+                        user_id=row.user_id,
                         type="goal_milestone",
                         title=f"Goal Milestone: {threshold}%",
-                        message=f"{threshold}% of your {goal.years}-year goal reached!",
-                        data={"goal_id": goal.id, "milestone_pct": threshold, "years": goal.years},
+                        message=f"{threshold}% of your {row.years}-year goal reached!",
+                        data={"goal_id": row.id, "milestone_pct": threshold, "years": row.years},
                         priority=2 if threshold >= 75 else 3,
                         action_url="/goals",
                         action_label="View Goals",
+                        created_at=created_at,
                     )
-                    db.add(notification)
-
-                    goal.last_milestone_pct = threshold
-                    milestones_reached.append({
-                        "goal_id": goal.id,
-                        "years": goal.years,
-                        "milestone_pct": threshold,
-                    })
-
-        if milestones_reached:
+                )
+                milestones_reached.append({
+                    "user_id": row.user_id,
+                    "goal_id": row.id,
+                    "years": row.years,
+                    "milestone_pct": threshold,
+                })
+            if reached:
+                goal_updates.append({"id": row.id, "last_milestone_pct": reached[-1]})
+
+        if goal_updates:
+            db.add_all(notifications)
+            db.execute(update(Goal), goal_updates)
+            db.flush()  # assign ids for the stream payloads
+            published = [(n.user_id, serialize_in_app_notification(n)) for n in notifications]
             db.commit()
+            publish_in_app_notifications(published)
 
         return milestones_reached
 
@@ -8,14 +8,12 @@ Calculates "what if" scenarios for LP positions:
 """
 import logging
 import re
-from decimal import Decimal
 from typing import Optional
-from datetime import datetime
 
-from sqlalchemy import and_
+import numpy as np
 from sqlalchemy.orm import Session
 
-from ..models.crypto_wallet import DefiPositionSnapshot
+from .scenario_engine import ScenarioEngine
 
 logger = logging.getLogger(__name__)
 
@@ -64,95 +62,32 @@ class HodlScenarioService:
         if not position_ids:
             return None
 
-        # Get all snapshots for these positions
-        snapshots = db.query(DefiPositionSnapshot).filter(
-            and_(
-                DefiPositionSnapshot.user_id == user_id,
-                DefiPositionSnapshot.position_id.in_(position_ids)
-            )
-        ).order_by(DefiPositionSnapshot.snapshot_date.asc()).all()
+        from .defi_snapshot_service import DefiSnapshotService
 
-        if len(snapshots) < 2:
-            return None
-
-        # Group snapshots by date
-        snapshots_by_date: dict[datetime, list[DefiPositionSnapshot]] = {}
-        for snap in snapshots:
-            date_key = snap.snapshot_date
-            if date_key not in snapshots_by_date:
-                snapshots_by_date[date_key] = []
-            snapshots_by_date[date_key].append(snap)
+        # Get all snapshots for these positions, including rolled-up history
+        snapshots = DefiSnapshotService.get_position_series(db, user_id, position_ids)
 
-        if len(snapshots_by_date) < 2:
+        aligned = ScenarioEngine.token_matrix(snapshots)
+        if aligned is None:
             return None
+        dates, tokens, balances, values_usd, prices = aligned
 
-        # Get earliest and latest dates
-        dates = sorted(snapshots_by_date.keys())
-        earliest_date = dates[0]
-        latest_date = dates[-1]
-
-        earliest_snapshots = snapshots_by_date[earliest_date]
-        latest_snapshots = snapshots_by_date[latest_date]
-
-        # Need at least 2 tokens for meaningful comparison
-        if len(earliest_snapshots) < 2 or len(latest_snapshots) < 2:
-            return None
-
-        # Build token data
-        initial_tokens: dict[str, dict] = {}
-        current_tokens: dict[str, dict] = {}
-
-        for snap in earliest_snapshots:
-            initial_tokens[snap.symbol] = {
-                'symbol': snap.symbol,
-                'balance': float(snap.balance),
-                'balance_usd': float(snap.balance_usd),
-                'price_usd': float(snap.price_usd) if snap.price_usd else (
-                    float(snap.balance_usd) / float(snap.balance) if snap.balance > 0 else 0
-                )
-            }
-
-        for snap in latest_snapshots:
-            current_tokens[snap.symbol] = {
-                'symbol': snap.symbol,
-                'balance': float(snap.balance),
-                'balance_usd': float(snap.balance_usd),
-                'price_usd': float(snap.price_usd) if snap.price_usd else (
-                    float(snap.balance_usd) / float(snap.balance) if snap.balance > 0 else 0
-                )
-            }
-
-        # Calculate totals
-        initial_total_usd = sum(t['balance_usd'] for t in initial_tokens.values())
-        current_lp_value = sum(t['balance_usd'] for t in current_tokens.values())
-
+        series = ScenarioEngine.hodl_series(balances, values_usd, prices)
+        initial_total_usd = float(series["initial_value"])
         if initial_total_usd <= 0:
             return None
 
+        current_lp_value = float(series["lp"][-1])
+        hodl_value = float(series["hodl"][-1])
+
         # Calculate scenarios
         scenarios = []
-        tokens = list(initial_tokens.keys())
-
-        # Sort tokens alphabetically for consistent ordering
-        tokens.sort()
-
-        for token_symbol in tokens:
-            if token_symbol not in initial_tokens or token_symbol not in current_tokens:
-                continue
-
-            initial_data = initial_tokens[token_symbol]
-            current_data = current_tokens[token_symbol]
-
-            initial_price = initial_data['price_usd']
-            current_price = current_data['price_usd']
-
-            if initial_price <= 0:
-                continue
-
+        for index, token_symbol in enumerate(tokens):
             # 100% this token scenario
             # If we put all initial USD into this token at initial price
-            equivalent_qty = initial_total_usd / initial_price
-            scenario_value = equivalent_qty * current_price
+            scenario_value = float(series["single_token"][-1, index])
+            if np.isnan(scenario_value):
+                continue
             scenario_return_pct = ((scenario_value / initial_total_usd) - 1) * 100
 
             scenarios.append({
@@ -165,16 +100,7 @@ class HodlScenarioService:
             })
 
         # 50/50 HODL scenario (hold original token quantities)
-        hodl_value = 0
-        for token_symbol in tokens:
-            if token_symbol not in initial_tokens or token_symbol not in current_tokens:
-                continue
-
-            initial_qty = initial_tokens[token_symbol]['balance']
-            current_price = current_tokens[token_symbol]['price_usd']
-            hodl_value += initial_qty * current_price
-
-        hodl_return_pct = ((hodl_value / initial_total_usd) - 1) * 100 if initial_total_usd > 0 else 0
+        hodl_return_pct = ((hodl_value / initial_total_usd) - 1) * 100
 
         scenarios.append({
             'name': '50/50 HODL',
@@ -186,7 +112,7 @@ class HodlScenarioService:
         })
 
         # Current LP scenario
-        lp_return_pct = ((current_lp_value / initial_total_usd) - 1) * 100 if initial_total_usd > 0 else 0
+        lp_return_pct = ((current_lp_value / initial_total_usd) - 1) * 100
 
         scenarios.append({
             'name': 'Current LP',
@@ -203,7 +129,22 @@ class HodlScenarioService:
         # Determine winner
         winner = scenarios[0] if scenarios else None
 
+        # Value of each strategy at every aligned date, for charting
+        lp_history = series["lp"].round(2)
+        hodl_history = series["hodl"].round(2)
+        token_history = np.nan_to_num(series["single_token"]).round(2)
+        history = [
+            {
+                'date': date.isoformat(),
+                'lp_value_usd': float(lp_history[i]),
+                'hodl_value_usd': float(hodl_history[i]),
+                'token_values_usd': dict(zip(tokens, token_history[i].tolist())),
+            }
+            for i, date in enumerate(dates)
+        ]
+
         # Calculate days held
+        earliest_date, latest_date = dates[0], dates[-1]
         days_held = (latest_date - earliest_date).days
 
         return {
@@ -215,4 +156,5 @@ class HodlScenarioService:
             'scenarios': scenarios,
             'winner': winner['name'] if winner else None,
             'winner_vs_lp_usd': round(winner['value_usd'] - current_lp_value, 2) if winner and winner['type'] != 'lp' else 0,
+            'history': history,
         }
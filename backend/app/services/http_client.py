@@ -0,0 +1,250 @@
+"""Shared outbound HTTP clients for third-party crypto data providers.
+
+Each provider (Zerion, Etherscan/Polygonscan, Merkl, DeFiLlama) gets one
+long-lived pooled ``httpx.AsyncClient`` per event loop, so connections and
+TLS sessions are reused across requests. Every request goes through the
+provider's concurrency limit and token bucket, is retried with jittered
+exponential backoff on 429/5xx and transport errors, and is timed per
+endpoint in ``http_metrics``.
+
+The API process opens its clients at startup and closes them at shutdown.
+Background jobs run async work in a fresh loop via ``run_with_clients``,
+which closes that loop's clients when the coroutine finishes.
+"""
+import asyncio
+import importlib.util
+import logging
+import random
+import threading
+import time
+import weakref
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import httpx
+
+from ..config import settings
+from ..utils.rate_limit import AsyncTokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Cap on how long a Retry-After header may make us wait
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """Connection and rate limits for one provider."""
+
+    name: str
+    max_concurrency: int
+    requests_per_second: float
+    timeout: float = 30.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    http2: bool = False
+
+
+PROVIDERS = {
+    "zerion": ProviderConfig(
+        "zerion", max_concurrency=8,
+        requests_per_second=settings.zerion_requests_per_second, http2=True,
+    ),
+    "polygonscan": ProviderConfig(
+        "polygonscan", max_concurrency=4,
+        requests_per_second=settings.polygonscan_requests_per_second, http2=True,
+    ),
+    "merkl": ProviderConfig("merkl", max_concurrency=8, requests_per_second=10.0, http2=True),
+    "defillama": ProviderConfig(
+        "defillama", max_concurrency=4, requests_per_second=5.0, timeout=60.0, http2=True,
+    ),
+}
+
+# Token buckets are process-wide so limits hold across event loops
+_buckets = {
+    name: AsyncTokenBucket(config.requests_per_second) for name, config in PROVIDERS.items()
+}
+
+
+class HttpMetrics:
+    """Request counts and latencies per (provider, endpoint)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], dict[str, float]] = {}
+
+    def record(self, provider: str, endpoint: str, elapsed: float, status: int | None) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                (provider, endpoint),
+                {"requests": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            elapsed_ms = elapsed * 1000
+            stats["requests"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if status is None or status >= 400:
+                stats["errors"] += 1
+
+    def record_retry(self, provider: str, endpoint: str) -> None:
+        with self._lock:
+            if (provider, endpoint) in self._stats:
+                self._stats[(provider, endpoint)]["retries"] += 1
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Current stats as {provider: {endpoint: stats}} with average latency."""
+        with self._lock:
+            result: dict[str, dict[str, dict[str, float]]] = {}
+            for (provider, endpoint), stats in self._stats.items():
+                entry = dict(stats)
+                entry["avg_ms"] = round(stats["total_ms"] / stats["requests"], 2)
+                result.setdefault(provider, {})[endpoint] = entry
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+http_metrics = HttpMetrics()
+
+
+class ProviderClient:
+    """Pooled client for one provider, bound to the event loop that created it."""
+
+    def __init__(
+        self,
+        config: ProviderConfig,
+        transport: httpx.AsyncBaseTransport | None = None,
+        bucket: AsyncTokenBucket | None = None,
+    ):
+        self.config = config
+        self.bucket = bucket or _buckets.get(config.name) or AsyncTokenBucket(
+            config.requests_per_second
+        )
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_concurrency,
+                max_keepalive_connections=config.max_concurrency,
+            ),
+            http2=config.http2 and HTTP2_AVAILABLE and transport is None,
+            transport=transport,
+        )
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        """Full-jitter exponential backoff, honouring a numeric Retry-After."""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), MAX_RETRY_AFTER_SECONDS)
+        return random.uniform(0, self.config.backoff_base * (2 ** attempt))
+
+    async def request(
+        self, method: str, url: str, endpoint: str | None = None, **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, retrying 429/5xx responses and transport errors.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            endpoint: Metrics label; defaults to the URL path. Pass a fixed
+                name when the path contains identifiers such as addresses.
+
+        Returns:
+            The final response (callers still call ``raise_for_status``)
+        """
+        endpoint = endpoint or httpx.URL(url).path
+        for attempt in range(self.config.max_retries + 1):
+            response = None
+            async with self._semaphore:
+                await self.bucket.acquire()
+                started = time.perf_counter()
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    http_metrics.record(
+                        self.config.name, endpoint, time.perf_counter() - started, None
+                    )
+                    if attempt == self.config.max_retries:
+                        raise
+                    logger.warning(f"{self.config.name} {endpoint} failed ({e}); retrying")
+                else:
+                    http_metrics.record(
+                        self.config.name, endpoint,
+                        time.perf_counter() - started, response.status_code,
+                    )
+                    if (
+                        response.status_code not in RETRY_STATUSES
+                        or attempt == self.config.max_retries
+                    ):
+                        return response
+                    logger.warning(
+                        f"{self.config.name} {endpoint} returned {response.status_code}; retrying"
+                    )
+            http_metrics.record_retry(self.config.name, endpoint)
+            await asyncio.sleep(self._retry_delay(attempt, response))
+        raise RuntimeError("unreachable")
+
+    async def get(self, url: str, endpoint: str | None = None, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class HttpClientRegistry:
+    """Provider clients per running event loop."""
+
+    def __init__(self):
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, ProviderClient]
+        ] = weakref.WeakKeyDictionary()
+        # Test hook: route every new client through this transport
+        self.transport: httpx.AsyncBaseTransport | None = None
+
+    def get(self, provider: str) -> ProviderClient:
+        """Client for ``provider`` on the running loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.setdefault(loop, {})
+        client = clients.get(provider)
+        if client is None:
+            client = ProviderClient(PROVIDERS[provider], transport=self.transport)
+            clients[provider] = client
+        return client
+
+    async def start(self) -> None:
+        """Open every provider's client on the running loop."""
+        for provider in PROVIDERS:
+            self.get(provider)
+
+    async def close(self) -> None:
+        """Close the running loop's clients."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close {client.config.name} HTTP client: {e}")
+
+
+http_clients = HttpClientRegistry()
+
+
+def run_with_clients(coro: Awaitable[T]) -> T:
+    """``asyncio.run`` a coroutine and close the provider clients it opened."""
+
+    async def runner() -> T:
+        try:
+            return await coro
+        finally:
+            await http_clients.close()
+
+    return asyncio.run(runner())
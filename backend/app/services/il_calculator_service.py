@@ -5,11 +5,11 @@ Uses simplified formula for 50/50 pools: IL = 2*sqrt(r)/(1+r) - 1
 Where r = price_ratio (new_price / old_price)
 """
 import logging
-import math
-from decimal import Decimal
+from collections.abc import Sequence
 from typing import Optional
 
 from ..schemas.crypto_wallet import DefiPositionSnapshotResponse
+from .scenario_engine import DEFAULT_PRICE_RATIOS, ScenarioEngine
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +30,7 @@ class ILCalculatorService:
         Returns:
             IL as a negative percentage (e.g., -0.057 for 5.7% loss)
         """
-        if price_ratio <= 0:
-            return 0.0
-
-        sqrt_r = math.sqrt(price_ratio)
-        il = (2 * sqrt_r / (1 + price_ratio)) - 1
-        return il
+        return float(ScenarioEngine.il(price_ratio))
 
     @staticmethod
     def calculate_il_from_snapshots(
@@ -137,6 +132,7 @@ class ILCalculatorService:
 
         # Calculate IL if price data available
         il_metrics = ILCalculatorService.calculate_il_from_snapshots(earliest, latest)
+        series = ScenarioEngine.il_series(snapshots[::-1]) if il_metrics else None
 
         # Estimate yield earned (total return + IL recovery)
         estimated_yield_usd = None
@@ -174,6 +170,8 @@ class ILCalculatorService:
                 "lp_vs_hodl_usd": round(end_value - il_metrics["hodl_value_usd"], 2),
                 "lp_outperformed_hodl": il_metrics["lp_outperformed"],
             })
+        if series is not None:
+            result["max_il_percentage"] = round(float(series["il"].min()) * 100, 2)
 
         # Add yield estimate if available
         if estimated_yield_usd is not None:
@@ -185,25 +183,72 @@ class ILCalculatorService:
         return result
 
     @staticmethod
-    def get_il_scenarios(current_price_ratio: float = 1.0) -> list[dict]:
+    def calculate_il_series(snapshots: list[DefiPositionSnapshotResponse]) -> list[dict]:
+        """IL and LP-vs-HODL at every snapshot relative to the first.
+
+        Args:
+            snapshots: Snapshots of one position ordered by date (oldest first)
+
+        Returns:
+            One dict per snapshot, empty if the first snapshot has no price
+        """
+        series = ScenarioEngine.il_series(snapshots)
+        if series is None:
+            return []
+
+        il_pct = (series["il"] * 100).round(2)
+        ratios = series["price_ratio"].round(4)
+        lp_value = series["lp_value"].round(2)
+        hodl_value = series["hodl_value"].round(2)
+        lp_vs_hodl = series["lp_vs_hodl"].round(2)
+        return [
+            {
+                "snapshot_date": series["dates"][i],
+                "price_ratio": float(ratios[i]),
+                "il_percentage": float(il_pct[i]),
+                "lp_value_usd": float(lp_value[i]),
+                "hodl_value_usd": float(hodl_value[i]),
+                "lp_vs_hodl_usd": float(lp_vs_hodl[i]),
+            }
+            for i in range(len(ratios))
+        ]
+
+    @staticmethod
+    def get_il_scenarios(
+        current_price_ratio: float = 1.0,
+        price_ratios: Optional[Sequence[float]] = None,
+        apy: Optional[float] = None,
+        days: int = 365,
+    ) -> list[dict]:
         """Generate IL scenarios for educational purposes.
 
         Args:
             current_price_ratio: Current price ratio (default 1.0 = no change)
+            price_ratios: Ratios to evaluate; defaults to a few educational steps
+            apy: Pool APY in percent, to show how fees offset IL
+            days: Holding period for the APY offset
 
         Returns:
             List of scenario dicts showing IL at various price changes
         """
-        scenarios = []
-        price_changes = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+        curve = ScenarioEngine.scenario_curve(
+            DEFAULT_PRICE_RATIOS if price_ratios is None else price_ratios, apy, days
+        )
+        ratios = curve["price_ratio"]
+        il_pct = (curve["il"] * 100).round(2)
+        net_pct = (curve["lp_vs_hodl"] * 100).round(2)
 
-        for ratio in price_changes:
-            il = ILCalculatorService.calculate_il_percentage(ratio)
-            scenarios.append({
+        scenarios = []
+        for i, ratio in enumerate(ratios.tolist()):
+            scenario = {
                 "price_change": f"{(ratio - 1) * 100:+.0f}%",
-                "price_ratio": ratio,
-                "il_percentage": round(il * 100, 2),
-                "vs_hodl": "LP loses" if il < 0 else "LP wins",
-            })
+                "price_ratio": round(ratio, 4),
+                "il_percentage": float(il_pct[i]),
+                "vs_hodl": "LP loses" if il_pct[i] < 0 else "LP wins",
+            }
+            if apy is not None:
+                scenario["lp_vs_hodl_pct"] = float(net_pct[i])
+                scenario["vs_hodl"] = "LP loses" if net_pct[i] < 0 else "LP wins"
+            scenarios.append(scenario)
 
         return scenarios
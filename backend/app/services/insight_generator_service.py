@@ -1,17 +1,44 @@
-"""Insight Generator Service - Generate proactive spending insights."""
+"""Insight Generator Service - Generate proactive spending insights.
 
+Insights are generated for a page of users at a time: the analyzer inputs
+(category spending per month, income, active budget totals and goals) are
+prefetched for the whole page in a few set-based queries, the analyzers run
+over that in-memory data, and the resulting insight cards and notifications
+are written back in bulk.
+"""
+
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import TYPE_CHECKING, Any
+from typing import Any
+import logging
 import statistics
 
-from sqlalchemy import and_, func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, insert
+from sqlalchemy.orm import Session
 
 from ..models import InsightCard, Transaction, Goal, Budget, BudgetAllocation
+from ..models.notification import QueuedNotification
+
+logger = logging.getLogger(__name__)
+
+FORECAST_MONTHS = 6
+# Insights at or above this priority (1-2) are also sent as notifications
+NOTIFY_MAX_PRIORITY = 2
+
+
+@dataclass
+class InsightInputs:
+    """Prefetched analyzer inputs for one user."""
 
-if TYPE_CHECKING:
-    from ..models.user import User
+    # month_key -> category -> total spending
+    spending: dict[str, dict[str, int]] = field(default_factory=dict)
+    # month_key -> total income
+    income: dict[str, int] = field(default_factory=dict)
+    budget_total: int | None = None
+    goals: list[Goal] = field(default_factory=list)
+
+    def month_spending(self, month: str) -> int:
+        return sum(self.spending.get(month, {}).values())
 
 
 class InsightGeneratorService:
@@ -21,37 +48,159 @@ class InsightGeneratorService:
         self, db: Session, user_id: int, limit: int = 10
     ) -> list[dict[str, Any]]:
         """Generate all insights for dashboard display."""
-        insights = []
-
-        # Each section is wrapped in try/except so one failure doesn't break the whole endpoint
+        return self.generate_batch(db, [user_id], limit)[user_id]
+
+    def generate_batch(
+        self, db: Session, user_ids: list[int], limit: int = 10
+    ) -> dict[int, list[dict[str, Any]]]:
+        """Generate insights for a page of users from one set of prefetched inputs."""
+        now = datetime.now()
+        inputs = self._prefetch_inputs(db, user_ids, now)
         analyzers = [
             self._analyze_spending_trends,
             self._analyze_budget_burn,
             self._analyze_goal_progress,
             self._generate_forecasts,
         ]
-        for analyzer in analyzers:
-            try:
-                result = await analyzer(db, user_id)
-                insights.extend(result)
-            except Exception:
-                pass
-
-        # Sort by priority and return top N
-        insights.sort(key=lambda x: x.get("priority", 5))
-        return insights[:limit]
-
-    async def _analyze_spending_trends(self, db: Session, user_id: int) -> list[dict[str, Any]]:
-        """Analyze spending trends and identify notable changes."""
-        current_month = datetime.now().strftime("%Y-%m")
-        last_month = (datetime.now() - timedelta(days=30)).strftime("%Y-%m")
-        two_months_ago = (datetime.now() - timedelta(days=60)).strftime("%Y-%m")
-
-        current_spending = await self._get_monthly_spending_by_category(db, user_id, current_month)
-        last_spending = await self._get_monthly_spending_by_category(db, user_id, last_month)
-        previous_spending = await self._get_monthly_spending_by_category(
-            db, user_id, two_months_ago
+
+        results: dict[int, list[dict[str, Any]]] = {}
+        for user_id in user_ids:
+            insights = []
+            # Each analyzer is isolated so one failure doesn't drop the user's other insights
+            for analyzer in analyzers:
+                try:
+                    insights.extend(analyzer(inputs[user_id], now))
+                except Exception as e:
+                    logger.warning(f"Insight analyzer {analyzer.__name__} failed for user {user_id}: {e}")
+
+            # Sort by priority and return top N
+            insights.sort(key=lambda x: x.get("priority", 5))
+            results[user_id] = insights[:limit]
+        return results
+
+    def run_batch(self, db: Session, user_ids: list[int]) -> dict[str, int]:
+        """Generate, save and queue notifications for a page of users.
+
+        Warning-level insights are queued as notifications and delivered by the
+        queued-notification job, which resolves preferences, quiet hours and rate
+        limits for the whole batch.
+
+        Returns:
+            dict with 'users', 'insights' and 'notifications' counts
+        """
+        insights_by_user = self.generate_batch(db, user_ids)
+        saved = self._save_batch(db, insights_by_user)
+
+        now = datetime.now()
+        notifications = [
+            {
+                "user_id": user_id,
+                "notification_type": "spending_insight",
+                "title": insight["title"],
+                "message": insight["message"],
+                "data": insight.get("data") or {},
+                "priority": insight.get("priority", 3),
+                "action_url": insight.get("action_url"),
+                "action_label": insight.get("action_label"),
+                "attempts": 0,
+                "max_attempts": 3,
+                "next_attempt_at": now,
+            }
+            for user_id, insights in insights_by_user.items()
+            for insight in insights
+            if insight.get("priority", 5) <= NOTIFY_MAX_PRIORITY
+        ]
+        if notifications:
+            db.execute(insert(QueuedNotification), notifications)
+        db.commit()
+
+        return {
+            "users": len(user_ids),
+            "insights": saved,
+            "notifications": len(notifications),
+        }
+
+    @staticmethod
+    def _month_keys(now: datetime) -> dict[str, Any]:
+        """Month keys used by the analyzers, relative to ``now``."""
+        return {
+            "current": now.strftime("%Y-%m"),
+            "last": (now - timedelta(days=30)).strftime("%Y-%m"),
+            "two_ago": (now - timedelta(days=60)).strftime("%Y-%m"),
+            "forecast": [
+                (now - timedelta(days=30 * i)).strftime("%Y-%m") for i in range(FORECAST_MONTHS)
+            ],
+        }
+
+    def _prefetch_inputs(
+        self, db: Session, user_ids: list[int], now: datetime
+    ) -> dict[int, InsightInputs]:
+        """Load every analyzer input for ``user_ids`` in four queries."""
+        inputs = {user_id: InsightInputs() for user_id in user_ids}
+        if not user_ids:
+            return inputs
+
+        months = self._month_keys(now)
+        month_keys = {months["current"], months["last"], months["two_ago"], *months["forecast"]}
+
+        rows = (
+            db.query(
+                Transaction.user_id,
+                Transaction.month_key,
+                Transaction.category,
+                Transaction.is_income,
+                func.sum(Transaction.amount).label("total"),
+            )
+            .filter(
+                Transaction.user_id.in_(user_ids),
+                Transaction.month_key.in_(month_keys),
+                Transaction.is_transfer == False,
+            )
+            .group_by(
+                Transaction.user_id,
+                Transaction.month_key,
+                Transaction.category,
+                Transaction.is_income,
+            )
         )
+        for row in rows:
+            user_inputs = inputs[row.user_id]
+            if row.is_income:
+                user_inputs.income[row.month_key] = (
+                    user_inputs.income.get(row.month_key, 0) + int(row.total)
+                )
+            else:
+                user_inputs.spending.setdefault(row.month_key, {})[row.category] = int(row.total)
+
+        # One active budget per user (the oldest, if several are active)
+        budget_ids: dict[int, int] = {}
+        for user_id, budget_id in (
+            db.query(Budget.user_id, Budget.id)
+            .filter(Budget.user_id.in_(user_ids), Budget.is_active == True)
+            .order_by(Budget.id)
+        ):
+            budget_ids.setdefault(user_id, budget_id)
+        if budget_ids:
+            totals = dict(
+                db.query(BudgetAllocation.budget_id, func.sum(BudgetAllocation.amount))
+                .filter(BudgetAllocation.budget_id.in_(budget_ids.values()))
+                .group_by(BudgetAllocation.budget_id)
+                .all()
+            )
+            for user_id, budget_id in budget_ids.items():
+                inputs[user_id].budget_total = int(totals.get(budget_id) or 0)
+
+        for goal in db.query(Goal).filter(Goal.user_id.in_(user_ids)):
+            inputs[goal.user_id].goals.append(goal)
+
+        return inputs
+
+    def _analyze_spending_trends(self, inputs: InsightInputs, now: datetime) -> list[dict[str, Any]]:
+        """Analyze spending trends and identify notable changes."""
+        months = self._month_keys(now)
+        current_spending = inputs.spending.get(months["current"], {})
+        last_spending = inputs.spending.get(months["last"], {})
+        previous_spending = inputs.spending.get(months["two_ago"], {})
 
         insights = []
 
@@ -116,51 +265,21 @@ class InsightGeneratorService:
 
         return insights
 
-    async def _analyze_budget_burn(self, db: Session, user_id: int) -> list[dict[str, Any]]:
+    def _analyze_budget_burn(self, inputs: InsightInputs, now: datetime) -> list[dict[str, Any]]:
         """Analyze budget burn rate and forecast overage."""
-        current_month_start = datetime.now().replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
+        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         current_month_end = (current_month_start + timedelta(days=32)).replace(day=1) - timedelta(
             days=1
         )
 
-        budget = (
-            db.query(Budget)
-            .filter(and_(Budget.user_id == user_id, Budget.is_active == True))
-            .first()
-        )
-
-        if not budget:
-            return []
-
-        # Compute total budget from allocations (Budget has no total_amount field)
-        total_budget_amount = (
-            db.query(func.sum(BudgetAllocation.amount))
-            .filter(BudgetAllocation.budget_id == budget.id)
-            .scalar()
-            or 0
-        )
-
-        if total_budget_amount <= 0:
+        # Budget has no total_amount field; the total is the sum of its allocations
+        total_budget_amount = inputs.budget_total
+        if not total_budget_amount or total_budget_amount <= 0:
             return []
 
-        current_spending = (
-            db.query(func.sum(Transaction.amount))
-            .filter(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.is_income == False,
-                    Transaction.is_transfer == False,
-                    Transaction.date >= current_month_start,
-                    Transaction.date <= current_month_end,
-                )
-            )
-            .scalar()
-            or 0
-        )
+        current_spending = inputs.month_spending(now.strftime("%Y-%m"))
 
-        day_of_month = datetime.now().day
+        day_of_month = now.day
         days_in_month = (current_month_end - current_month_start).days + 1
         days_remaining = max(1, days_in_month - day_of_month + 1)
 
@@ -226,9 +345,9 @@ class InsightGeneratorService:
 
         return insights
 
-    async def _analyze_goal_progress(self, db: Session, user_id: int) -> list[dict[str, Any]]:
+    def _analyze_goal_progress(self, inputs: InsightInputs, now: datetime) -> list[dict[str, Any]]:
         """Analyze goal progress and provide insights."""
-        goals = db.query(Goal).filter(Goal.user_id == user_id).all()
+        goals = inputs.goals
 
         if not goals:
             return []
@@ -238,10 +357,10 @@ class InsightGeneratorService:
         for goal in goals:
             if goal.target_amount and goal.target_amount > 0:
                 goal_name = f"{goal.years}-year goal"
-                start_date = goal.start_date or datetime.now().date()
+                start_date = goal.start_date or now.date()
                 end_date = start_date + timedelta(days=365 * goal.years)
                 total_days = max(1, (end_date - start_date).days)
-                today = datetime.now().date()
+                today = now.date()
                 elapsed_days = max(1, (today - start_date).days)
                 expected_progress = min(100, (elapsed_days / total_days) * 100)
 
@@ -266,34 +385,11 @@ class InsightGeneratorService:
 
         return insights
 
-    async def _generate_forecasts(self, db: Session, user_id: int) -> list[dict[str, Any]]:
+    def _generate_forecasts(self, inputs: InsightInputs, now: datetime) -> list[dict[str, Any]]:
         """Generate spending forecasts using historical data."""
-        months_back = 6
-        monthly_totals = []
-
-        for i in range(months_back):
-            month_start = (datetime.now() - timedelta(days=30 * i)).replace(
-                day=1, hour=0, minute=0, second=0, microsecond=0
-            )
-            month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-            total = (
-                db.query(func.sum(Transaction.amount))
-                .filter(
-                    and_(
-                        Transaction.user_id == user_id,
-                        Transaction.is_income == False,
-                        Transaction.is_transfer == False,
-                        Transaction.date >= month_start,
-                        Transaction.date <= month_end,
-                    )
-                )
-                .scalar()
-                or 0
-            )
-
-            monthly_totals.append(total)
-
+        monthly_totals = [
+            inputs.month_spending(month) for month in self._month_keys(now)["forecast"]
+        ]
         if len(monthly_totals) < 3:
             return []
 
@@ -312,7 +408,7 @@ class InsightGeneratorService:
             trend = "stable"
             forecast = recent_avg
 
-        next_month = (datetime.now() + timedelta(days=32)).replace(day=1)
+        next_month = (now + timedelta(days=32)).replace(day=1)
         next_month_name = next_month.strftime("%B")
 
         if trend != "stable":
@@ -332,7 +428,7 @@ class InsightGeneratorService:
                 }
             )
 
-        savings_rate = await self._calculate_savings_rate(db, user_id)
+        savings_rate = self._calculate_savings_rate(inputs, now)
         if savings_rate < 10 and savings_rate > 0:
             insights.append(
                 {
@@ -358,106 +454,71 @@ class InsightGeneratorService:
 
         return insights
 
-    async def _calculate_savings_rate(self, db: Session, user_id: int) -> float:
+    def _calculate_savings_rate(self, inputs: InsightInputs, now: datetime) -> float:
         """Calculate current month savings rate."""
-        current_month_start = datetime.now().replace(
-            day=1, hour=0, minute=0, second=0, microsecond=0
-        )
-        current_month_end = (current_month_start + timedelta(days=32)).replace(day=1) - timedelta(
-            days=1
-        )
-
-        income = (
-            db.query(func.sum(Transaction.amount))
-            .filter(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.is_income == True,
-                    Transaction.is_transfer == False,
-                    Transaction.date >= current_month_start,
-                    Transaction.date <= current_month_end,
-                )
-            )
-            .scalar()
-            or 0
-        )
-
-        expenses = (
-            db.query(func.sum(Transaction.amount))
-            .filter(
-                and_(
-                    Transaction.user_id == user_id,
-                    Transaction.is_income == False,
-                    Transaction.is_transfer == False,
-                    Transaction.date >= current_month_start,
-                    Transaction.date <= current_month_end,
-                )
-            )
-            .scalar()
-            or 0
-        )
+        current_month = now.strftime("%Y-%m")
+        income = inputs.income.get(current_month, 0)
+        expenses = inputs.month_spending(current_month)
 
         if income <= 0:
             return 0
 
         return ((income - abs(expenses)) / income) * 100
 
-    async def _get_monthly_spending_by_category(
-        self, db: Session, user_id: int, month: str
-    ) -> dict[str, int]:
-        """Get spending by category for a specific month."""
-        month_start = datetime.strptime(f"{month}-01", "%Y-%m-%d")
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    async def save_insights_to_db(
+        self, db: Session, user_id: int, insights: list[dict[str, Any]]
+    ) -> None:
+        """Save generated insights to database."""
+        self._save_batch(db, {user_id: insights})
+        db.commit()
 
-        result = (
-            db.query(Transaction.category, func.sum(Transaction.amount).label("total"))
+    def _save_batch(self, db: Session, insights_by_user: dict[int, list[dict[str, Any]]]) -> int:
+        """Bulk-insert insight cards, skipping ones the user already has unread.
+
+        The caller commits.
+
+        Returns:
+            Number of insight cards inserted
+        """
+        user_ids = [user_id for user_id, insights in insights_by_user.items() if insights]
+        if not user_ids:
+            return 0
+
+        existing = set(
+            db.query(InsightCard.user_id, InsightCard.type, InsightCard.title)
             .filter(
                 and_(
-                    Transaction.user_id == user_id,
-                    Transaction.is_income == False,
-                    Transaction.is_transfer == False,
-                    Transaction.date >= month_start,
-                    Transaction.date <= month_end,
+                    InsightCard.user_id.in_(user_ids),
+                    InsightCard.is_read == False,
                 )
             )
-            .group_by(Transaction.category)
             .all()
         )
 
-        return {row.category: int(row.total) for row in result}
-
-    async def save_insights_to_db(
-        self, db: Session, user_id: int, insights: list[dict[str, Any]]
-    ) -> None:
-        """Save generated insights to database."""
-        for insight in insights:
-            existing = (
-                db.query(InsightCard)
-                .filter(
-                    and_(
-                        InsightCard.user_id == user_id,
-                        InsightCard.type == insight["type"],
-                        InsightCard.title == insight["title"],
-                        InsightCard.is_read == False,
-                    )
+        rows = []
+        for user_id in user_ids:
+            for insight in insights_by_user[user_id]:
+                key = (user_id, insight.get("type", "general"), insight["title"])
+                if key in existing:
+                    continue
+                existing.add(key)
+                rows.append(
+                    {
+                        "user_id": user_id,
+                        "type": key[1],
+                        "title": insight["title"],
+                        "message": insight["message"],
+                        "priority": insight.get("priority", 3),
+                        "data": insight.get("data", {}),
+                        "action_url": insight.get("action_url"),
+                        "action_label": insight.get("action_label"),
+                        "is_read": False,
+                    }
                 )
-                .first()
-            )
-
-            if not existing:
-                new_insight = InsightCard(
-                    user_id=user_id,
-                    type=insight.get("type", "general"),
-                    title=insight["title"],
-                    message=insight["message"],
-                    priority=insight.get("priority", 3),
-                    data=insight.get("data", {}),
-                    action_url=insight.get("action_url"),
-                    action_label=insight.get("action_label"),
-                )
-                db.add(new_insight)
 
-        db.commit()
+        if rows:
+            db.execute(insert(InsightCard), rows)
+        return len(rows)
 
     async def get_user_insights(
         self,
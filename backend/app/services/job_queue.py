@@ -0,0 +1,248 @@
+"""Durable, database-backed background job queue.
+
+Jobs are rows in ``background_jobs``. Workers claim due jobs by setting a
+visibility timeout (``locked_until``) and renew it on a heartbeat while the
+handler runs; a job whose worker dies becomes claimable again once that
+timeout passes, and failures are retried with backoff up to ``max_attempts``. ``dedupe_key`` makes enqueueing idempotent,
+so a cron run or per-user fan-out task is never queued twice.
+
+Cron triggers are fired only by the holder of the ``cron`` lease in
+``scheduler_leases`` (leader election), and their dedupe keys include the
+fire time, so a lease hand-over cannot double-enqueue a run either.
+"""
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models.background_job import BackgroundJob, SchedulerLease
+from ..utils.db_bulk import DEFAULT_CHUNK_SIZE, bulk_insert_ignore, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VISIBILITY_TIMEOUT = timedelta(minutes=15)
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = timedelta(minutes=1)
+FINISHED_JOB_RETENTION = timedelta(days=7)
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    """A registered task handler and its queue settings."""
+
+    name: str
+    handler: Callable[[Session, dict[str, Any]], Any]
+    visibility_timeout: timedelta
+    max_attempts: int
+
+
+TASKS: dict[str, TaskSpec] = {}
+
+
+def task(
+    name: str,
+    visibility_timeout: timedelta = DEFAULT_VISIBILITY_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+):
+    """Register ``handler(db, payload)`` as the task ``name``."""
+
+    def decorator(handler):
+        TASKS[name] = TaskSpec(name, handler, visibility_timeout, max_attempts)
+        return handler
+
+    return decorator
+
+
+class JobQueue:
+    """Queue operations on ``background_jobs`` and ``scheduler_leases``."""
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        task_name: str,
+        payload: dict[str, Any] | None = None,
+        dedupe_key: str | None = None,
+        run_at: datetime | None = None,
+    ) -> bool:
+        """Queue one job; returns False if ``dedupe_key`` was already queued."""
+        return JobQueue.enqueue_many(db, task_name, [(payload, dedupe_key)], run_at) == 1
+
+    @staticmethod
+    def enqueue_many(
+        db: Session,
+        task_name: str,
+        items: list[tuple[dict[str, Any] | None, str | None]],
+        run_at: datetime | None = None,
+    ) -> int:
+        """Queue (payload, dedupe_key) pairs for one task in bulk and commit.
+
+        Returns:
+            Number of jobs actually queued (duplicates are skipped)
+        """
+        spec = TASKS.get(task_name)
+        if spec is None:
+            raise ValueError(f"Unknown task: {task_name}")
+        run_at = run_at or datetime.now()
+        rows = [
+            {
+                "task": task_name,
+                "payload": payload or {},
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": spec.max_attempts,
+                "run_at": run_at,
+                "dedupe_key": dedupe_key,
+            }
+            for payload, dedupe_key in items
+        ]
+        queued = bulk_insert_ignore(db, BackgroundJob, rows, ["dedupe_key"], DEFAULT_CHUNK_SIZE)
+        db.commit()
+        return queued
+
+    @staticmethod
+    def claim(
+        db: Session, worker_id: str, limit: int, now: datetime | None = None
+    ) -> list[BackgroundJob]:
+        """Lock up to ``limit`` due jobs for ``worker_id``.
+
+        Claimable jobs are queued jobs whose ``run_at`` has passed and running
+        jobs whose visibility timeout expired. Uses ``SKIP LOCKED`` where
+        supported so concurrent workers never claim the same row.
+        """
+        now = now or datetime.now()
+        due = or_(
+            and_(BackgroundJob.status == "queued", BackgroundJob.run_at <= now),
+            and_(BackgroundJob.status == "running", BackgroundJob.locked_until < now),
+        )
+        JobQueue._fail_exhausted(db, now)
+
+        jobs = list(db.scalars(
+            select(BackgroundJob)
+            .where(due, BackgroundJob.attempts < BackgroundJob.max_attempts)
+            .order_by(BackgroundJob.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ))
+        for job in jobs:
+            spec = TASKS.get(job.task)
+            timeout = spec.visibility_timeout if spec else DEFAULT_VISIBILITY_TIMEOUT
+            job.status = "running"
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timeout
+        db.commit()
+        return jobs
+
+    @staticmethod
+    def renew(
+        db: Session, job_id: int, worker_id: str, timeout: timedelta,
+        now: datetime | None = None,
+    ) -> bool:
+        """Extend a running job's visibility timeout; returns False if the lock was lost."""
+        now = now or datetime.now()
+        result = db.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.locked_by == worker_id,
+                BackgroundJob.status == "running",
+            )
+            .values(locked_until=now + timeout)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def complete(db: Session, job_id: int, worker_id: str) -> None:
+        """Mark a job succeeded (ignored if another worker has since reclaimed it)."""
+        db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.locked_by == worker_id)
+            .values(
+                status="succeeded",
+                locked_until=None,
+                finished_at=datetime.now(),
+                last_error=None,
+            )
+        )
+        db.commit()
+
+    @staticmethod
+    def fail(db: Session, job_id: int, worker_id: str, error: str) -> None:
+        """Schedule a retry with exponential backoff, or mark the job failed."""
+        job = db.get(BackgroundJob, job_id)
+        if job is None or job.locked_by != worker_id:
+            return
+        now = datetime.now()
+        job.last_error = error[:2000]
+        job.locked_until = None
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.finished_at = now
+        else:
+            job.status = "queued"
+            job.run_at = now + RETRY_BASE_DELAY * (2 ** (job.attempts - 1))
+        db.commit()
+
+    @staticmethod
+    def acquire_lease(
+        db: Session, name: str, holder: str, ttl: timedelta, now: datetime | None = None
+    ) -> bool:
+        """Take or renew the lease ``name``; returns True if ``holder`` owns it."""
+        now = now or datetime.now()
+        stmt = dialect_insert(db, SchedulerLease).values(
+            name=name, holder=holder, expires_at=now + ttl
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+            where=or_(SchedulerLease.expires_at < now, SchedulerLease.holder == holder),
+        )
+        db.execute(stmt)
+        db.commit()
+        return db.scalar(select(SchedulerLease.holder).where(SchedulerLease.name == name)) == holder
+
+    @staticmethod
+    def release_lease(db: Session, name: str, holder: str) -> None:
+        """Give up the lease so another process can take over immediately."""
+        db.query(SchedulerLease).filter(
+            SchedulerLease.name == name, SchedulerLease.holder == holder
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def purge_finished(db: Session, older_than: timedelta = FINISHED_JOB_RETENTION) -> int:
+        """Delete succeeded and failed jobs finished before the retention window."""
+        deleted = (
+            db.query(BackgroundJob)
+            .filter(
+                BackgroundJob.status.in_(["succeeded", "failed"]),
+                BackgroundJob.finished_at < datetime.now() - older_than,
+            )
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def _fail_exhausted(db: Session, now: datetime) -> None:
+        """Fail running jobs that timed out on their last attempt."""
+        db.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.status == "running",
+                BackgroundJob.locked_until < now,
+                BackgroundJob.attempts >= BackgroundJob.max_attempts,
+            )
+            .values(
+                status="failed",
+                locked_until=None,
+                finished_at=now,
+                last_error="Visibility timeout expired",
+            )
+        )
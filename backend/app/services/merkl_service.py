@@ -1,10 +1,15 @@
 """Merkl protocol service for reward tracking."""
 import logging
 from decimal import Decimal
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import httpx
 
+from .http_client import http_clients
+
+if TYPE_CHECKING:
+    from .reward_matching_service import PositionAttributionIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,14 +29,14 @@ class MerklService:
         chain_id = MerklService.CHAIN_IDS.get(chain, 137)
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{MerklService.BASE_URL}/users/{wallet_address}/rewards"
-                params = {"chainId": chain_id}
+            client = http_clients.get("merkl")
+            url = f"{MerklService.BASE_URL}/users/{wallet_address}/rewards"
+            params = {"chainId": chain_id}
 
-                response = await client.get(url, params=params)
-                response.raise_for_status()
+            response = await client.get(url, endpoint="user_rewards", params=params)
+            response.raise_for_status()
 
-                return MerklService._parse_rewards_response(response.json())
+            return MerklService._parse_rewards_response(response.json())
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Merkl API error: {e.response.status_code}")
@@ -104,31 +109,22 @@ class MerklService:
     @staticmethod
     def match_campaign_to_position(
         campaign_reason: str,
-        positions: list[dict]
+        positions: list[dict],
+        index: Optional["PositionAttributionIndex"] = None,
     ) -> Optional[str]:
         """Try to match a Merkl campaign to a Zerion position.
 
         Args:
             campaign_reason: The 'reason' field from Merkl breakdown
             positions: List of Zerion positions
+            index: Attribution index over ``positions``; pass one when matching
+                many breakdowns so it is built only once
 
         Returns:
             position_id if matched, None otherwise
         """
-        campaign_reason_lower = campaign_reason.lower()
-
-        for pos in positions:
-            # Match by pool address in reason
-            if pos.get("protocol_id", "").lower() in campaign_reason_lower:
-                return pos["id"]
-
-            # Match by pool name/symbol
-            pos_name = pos.get("name", "").lower()
-            pos_symbol = pos.get("symbol", "").lower()
-
-            if pos_name and pos_name in campaign_reason_lower:
-                return pos["id"]
-            if pos_symbol and pos_symbol in campaign_reason_lower:
-                return pos["id"]
+        from .reward_matching_service import PositionAttributionIndex
 
-        return None
+        if index is None:
+            index = PositionAttributionIndex(positions)
+        return index.match_campaign(campaign_reason)
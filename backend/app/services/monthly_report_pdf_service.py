@@ -19,9 +19,6 @@ from reportlab.platypus import (
 
 from ..schemas.report import MonthlyUsageReportData
 
-# Register CID font for Japanese text
-pdfmetrics.registerFont(UnicodeCIDFont("HeiseiKakuGo-W5"))
-
 _FONT = "HeiseiKakuGo-W5"
 _HEADER_BG = colors.HexColor("#2563EB")
 _SECTION_BG = colors.HexColor("#EFF6FF")
@@ -30,10 +27,17 @@ _OK_COLOR = colors.HexColor("#16A34A")
 _WARN_COLOR = colors.HexColor("#D97706")
 
 
+def register_report_fonts() -> None:
+    """Register the CID font for Japanese text (once per process)."""
+    if _FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(_FONT))
+
+
 class MonthlyReportPDFService:
     """Generate comprehensive monthly usage report PDFs."""
 
     def __init__(self):
+        register_report_fonts()
         self.styles = getSampleStyleSheet()
         self._create_custom_styles()
 
@@ -243,9 +247,12 @@ class MonthlyReportPDFService:
         ))
 
 
-# Singleton
-_service = MonthlyReportPDFService()
+# Singleton, created on first use (in render workers, not the API process)
+_service: MonthlyReportPDFService | None = None
 
 
 def get_monthly_report_pdf_service() -> MonthlyReportPDFService:
+    global _service
+    if _service is None:
+        _service = MonthlyReportPDFService()
     return _service
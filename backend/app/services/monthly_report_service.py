@@ -1,10 +1,15 @@
 """Monthly usage report service — aggregates data from existing services."""
 import calendar
+import logging
 from datetime import UTC, date, datetime
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from ..models.monthly_report_snapshot import MonthlyReportSnapshot
+from ..models.user import User
+from ..utils.db_bulk import dialect_insert
+
 from ..schemas.report import (
     BudgetAdherence, BudgetCategoryStatus,
     GoalProgressItem, MonthlyUsageReportData,
@@ -17,10 +22,108 @@ from ..services.goal_service import GoalService
 from ..services.report_account_helpers import get_account_summary
 from ..services.report_focus_helpers import build_focus_areas, prev_month_key
 
+logger = logging.getLogger(__name__)
+
 
 class MonthlyReportService:
     """Orchestrates data from multiple services into a monthly report."""
 
+    @staticmethod
+    def get_report(
+        db: Session, user_id: int, year: int, month: int
+    ) -> MonthlyUsageReportData:
+        """Get the monthly report, served from a snapshot once the month is closed.
+
+        Snapshots are written by the month-end job (or on first read) and
+        deleted whenever a transaction in that month changes.
+        """
+        if not MonthlyReportService.is_closed_month(year, month):
+            return MonthlyReportService.generate_report(db, user_id, year, month)
+
+        snapshot = (
+            db.query(MonthlyReportSnapshot)
+            .filter(
+                MonthlyReportSnapshot.user_id == user_id,
+                MonthlyReportSnapshot.year == year,
+                MonthlyReportSnapshot.month == month,
+            )
+            .first()
+        )
+        if snapshot:
+            return MonthlyUsageReportData.model_validate(snapshot.data)
+
+        report = MonthlyReportService.generate_report(db, user_id, year, month)
+        try:
+            MonthlyReportService.save_snapshot(db, user_id, report)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to store report snapshot for user {user_id}: {e}")
+            db.rollback()
+        return report
+
+    @staticmethod
+    def is_closed_month(year: int, month: int, today: Optional[date] = None) -> bool:
+        """Whether the month has ended."""
+        today = today or date.today()
+        return (year, month) < (today.year, today.month)
+
+    @staticmethod
+    def save_snapshot(
+        db: Session, user_id: int, report: MonthlyUsageReportData
+    ) -> None:
+        """Insert or replace the snapshot for the report's month (caller commits)."""
+        stmt = dialect_insert(db, MonthlyReportSnapshot).values(
+            user_id=user_id,
+            year=report.year,
+            month=report.month,
+            data=report.model_dump(mode="json"),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "year", "month"],
+            set_={"data": stmt.excluded.data, "created_at": datetime.now()},
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def snapshot_closed_month(
+        db: Session, year: Optional[int] = None, month: Optional[int] = None
+    ) -> int:
+        """Snapshot a closed month (default: the previous one) for all active users.
+
+        Users that already have a snapshot for the month are skipped.
+
+        Returns:
+            Number of snapshots written
+        """
+        if year is None or month is None:
+            today = date.today()
+            year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+        if not MonthlyReportService.is_closed_month(year, month):
+            raise ValueError(f"{year}-{month:02d} is not closed yet")
+
+        existing = (
+            db.query(MonthlyReportSnapshot.user_id)
+            .filter(MonthlyReportSnapshot.year == year, MonthlyReportSnapshot.month == month)
+        )
+        user_ids = [
+            user_id for (user_id,) in db.query(User.id).filter(
+                User.is_active == True,
+                User.id.notin_(existing),
+            )
+        ]
+
+        written = 0
+        for user_id in user_ids:
+            try:
+                report = MonthlyReportService.generate_report(db, user_id, year, month)
+                MonthlyReportService.save_snapshot(db, user_id, report)
+                db.commit()
+                written += 1
+            except Exception as e:
+                logger.error(f"Report snapshot failed for user {user_id} ({year}-{month:02d}): {e}")
+                db.rollback()
+        return written
+
     @staticmethod
     def generate_report(
         db: Session, user_id: int, year: int, month: int
@@ -0,0 +1,197 @@
+"""In-process pub/sub for in-app notification events.
+
+Feeds the ``/api/notifications/stream`` Server-Sent Events endpoint. Each
+user has a short replay buffer so reconnecting clients can resume from their
+``Last-Event-ID``. Also caches per-user unread counts so the stream and the
+unread-count endpoint do not hit ``in_app_notifications`` on every request.
+
+Subscribers and caches are per process. When the cross-process relay is
+enabled (see ``notification_relay``), events published here are also queued
+in an outbox that the relay writes to the database, and events written by
+other processes (API workers, the job worker) are applied locally through
+:meth:`NotificationEventBroker.apply_relayed`. Cached counts additionally fall
+back to the database after ``UNREAD_COUNT_TTL_SECONDS``.
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+REPLAY_BUFFER_SIZE = 50
+SUBSCRIBER_QUEUE_SIZE = 100
+UNREAD_COUNT_TTL_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class NotificationEvent:
+    """A single event delivered to stream subscribers."""
+
+    id: int
+    event: str
+    data: dict[str, Any]
+
+
+@dataclass
+class _Subscriber:
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+
+
+class NotificationEventBroker:
+    """Per-user fan-out of notification events with replay and unread-count cache."""
+
+    def __init__(self):
+        # Ids keep increasing across restarts so stale Last-Event-IDs are detectable
+        self._first_id = int(time.time() * 1000)
+        self._ids = itertools.count(self._first_id)
+        self._subscribers: dict[int, list[_Subscriber]] = {}
+        self._history: dict[int, deque[NotificationEvent]] = {}
+        self._unread_counts: dict[int, tuple[int, float]] = {}
+        # (user_id, event, data) awaiting the relay; None while relaying is off
+        self._outbox: list[tuple[int, str, dict[str, Any]]] | None = None
+        self._lock = threading.Lock()
+
+    def enable_relay(self) -> None:
+        """Start queueing published events for the cross-process relay."""
+        with self._lock:
+            if self._outbox is None:
+                self._outbox = []
+
+    def drain_outbox(self) -> list[tuple[int, str, dict[str, Any]]]:
+        """Take the events queued for the relay since the last drain."""
+        with self._lock:
+            if not self._outbox:
+                return []
+            drained, self._outbox = self._outbox, []
+        return drained
+
+    def requeue_outbox(self, events: list[tuple[int, str, dict[str, Any]]]) -> None:
+        """Put back drained events that could not be written."""
+        with self._lock:
+            if self._outbox is not None:
+                self._outbox[:0] = events
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Register a subscriber on the running event loop and return its queue."""
+        subscriber = _Subscriber(
+            queue=asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE),
+            loop=asyncio.get_running_loop(),
+        )
+        with self._lock:
+            self._subscribers.setdefault(user_id, []).append(subscriber)
+        return subscriber.queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        with self._lock:
+            remaining = [s for s in self._subscribers.get(user_id, []) if s.queue is not queue]
+            if remaining:
+                self._subscribers[user_id] = remaining
+            else:
+                self._subscribers.pop(user_id, None)
+
+    def replay(self, user_id: int, last_event_id: str | None) -> list[NotificationEvent] | None:
+        """Return buffered events after ``last_event_id``.
+
+        Returns None when the id is unknown or older than the buffer, meaning
+        the client must resync from the REST endpoints.
+        """
+        if not last_event_id:
+            return []
+        try:
+            last_id = int(last_event_id)
+        except ValueError:
+            return None
+        with self._lock:
+            history = list(self._history.get(user_id, ()))
+        # Client last saw an event from a previous process, or the buffer overflowed
+        oldest = history[0].id if history else self._first_id
+        if last_id < oldest - 1:
+            return None
+        return [event for event in history if event.id > last_id]
+
+    def publish(
+        self, user_id: int, event: str, data: dict[str, Any], relay: bool = True
+    ) -> NotificationEvent:
+        """Publish an event to all of a user's subscribers (thread-safe).
+
+        Pass ``relay=False`` for events other processes derive themselves,
+        such as unread counts computed from a local cache.
+        """
+        with self._lock:
+            item = NotificationEvent(id=next(self._ids), event=event, data=data)
+            self._history.setdefault(user_id, deque(maxlen=REPLAY_BUFFER_SIZE)).append(item)
+            subscribers = list(self._subscribers.get(user_id, ()))
+            if relay and self._outbox is not None:
+                self._outbox.append((user_id, event, data))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(_offer, subscriber.queue, item)
+            except RuntimeError:
+                # Subscriber's loop already closed; it will unsubscribe itself
+                pass
+        return item
+
+    def apply_relayed(self, user_id: int, event: str, data: dict[str, Any]) -> None:
+        """Publish an event received from another process and update the count cache."""
+        if event == "unread_count":
+            self.set_unread_count(user_id, data["count"])
+        self.publish(user_id, event, data, relay=False)
+        if event == "notification":
+            count = self.adjust_unread_count(user_id, 1)
+            if count is not None:
+                self.publish(user_id, "unread_count", {"count": count}, relay=False)
+
+    def get_cached_unread_count(self, user_id: int) -> int | None:
+        """Return the cached unread count, or None if missing or expired."""
+        with self._lock:
+            entry = self._unread_counts.get(user_id)
+        if entry is None or time.monotonic() - entry[1] > UNREAD_COUNT_TTL_SECONDS:
+            return None
+        return entry[0]
+
+    def set_unread_count(self, user_id: int, count: int) -> None:
+        """Cache a freshly computed unread count."""
+        with self._lock:
+            self._unread_counts[user_id] = (count, time.monotonic())
+
+    def adjust_unread_count(self, user_id: int, delta: int) -> int | None:
+        """Apply ``delta`` to a cached count; returns the new count if cached.
+
+        Expired entries are adjusted too (keeping their timestamp) so stream
+        subscribers still get a best-effort count.
+        """
+        with self._lock:
+            entry = self._unread_counts.get(user_id)
+            if entry is None:
+                return None
+            count = max(0, entry[0] + delta)
+            self._unread_counts[user_id] = (count, entry[1])
+        return count
+
+    def invalidate_unread_count(self, user_id: int) -> None:
+        """Drop a user's cached unread count."""
+        with self._lock:
+            self._unread_counts.pop(user_id, None)
+
+
+def _offer(queue: asyncio.Queue, item: NotificationEvent) -> None:
+    """Enqueue without blocking; a full queue means the client is too slow."""
+    try:
+        queue.put_nowait(item)
+    except asyncio.QueueFull:
+        pass
+
+
+def format_sse(event: NotificationEvent) -> str:
+    """Serialize an event in text/event-stream format."""
+    return f"id: {event.id}\nevent: {event.event}\ndata: {json.dumps(event.data, default=str)}\n\n"
+
+
+# Process-wide broker shared by NotificationService and the stream route
+notification_events = NotificationEventBroker()
@@ -0,0 +1,239 @@
+"""Sliding-window rate limiter for notification delivery.
+
+Counts are kept in memory per (user, channel) using the sliding-window
+counter approximation: the current fixed window's count plus the previous
+window's count weighted by how much of it still overlaps the sliding window.
+Checks are O(1) dictionary lookups.
+
+For consistency across workers, local increments are flushed in batches to
+the compact ``notification_rate_counters`` table (at most two rows per key),
+and each key's in-memory state is re-synced from that table once it is older
+than ``sync_interval`` seconds. Batches triggered by :meth:`record` are written
+through the limiter's own session so the caller's transaction is never
+committed or rolled back underneath it.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.notification import NotificationRateCounter
+from ..utils.db_bulk import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_CHANNEL = "*"
+GLOBAL_HOURLY_LIMIT = 10
+CHANNEL_HOURLY_LIMIT = 3
+
+DEFAULT_WINDOW = timedelta(hours=1)
+DEFAULT_SYNC_INTERVAL_SECONDS = 30.0
+DEFAULT_FLUSH_BATCH_SIZE = 100
+
+# Fixed windows are aligned to this instant
+_WINDOW_ANCHOR = datetime(2000, 1, 1)
+
+
+@dataclass
+class _WindowState:
+    """In-memory counter state for one (user, channel) key."""
+
+    window_start: datetime
+    count: int = 0
+    prev_count: int = 0
+    synced_at: float = 0.0
+
+
+class NotificationRateLimiter:
+    """In-memory sliding-window counters with a persistent backing table."""
+
+    def __init__(
+        self,
+        window: timedelta = DEFAULT_WINDOW,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL_SECONDS,
+        flush_batch_size: int = DEFAULT_FLUSH_BATCH_SIZE,
+        session_factory: Callable[[], Session] | None = None,
+    ):
+        self.window = window
+        self.sync_interval = sync_interval
+        self.flush_batch_size = flush_batch_size
+        # Without a factory, pending increments wait for an explicit flush()
+        self.session_factory = session_factory
+        self._states: dict[tuple[int, str], _WindowState] = {}
+        # Unflushed local increments: (user_id, channel, window_start) -> count
+        self._pending: dict[tuple[int, str, datetime], int] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(
+        self,
+        db: Session,
+        user_id: int,
+        channel: str,
+        limit: int,
+        now: datetime | None = None,
+    ) -> bool:
+        """Return True if another send fits under ``limit`` for the sliding window."""
+        now = now or datetime.now()
+        state = self._get_state(db, user_id, channel, now)
+        elapsed = (now - state.window_start) / self.window
+        estimate = state.count + state.prev_count * max(0.0, 1.0 - elapsed)
+        return estimate < limit
+
+    def record(
+        self,
+        user_id: int,
+        channel: str,
+        count: int = 1,
+        now: datetime | None = None,
+        defer_flush: bool = False,
+    ) -> None:
+        """Record ``count`` sends on ``channel`` (also counted toward the global limit).
+
+        When a batch is due it is flushed through a fresh session from
+        ``session_factory``. Pass ``defer_flush=True`` when the caller will
+        call :meth:`flush` itself once its own work is committed.
+        """
+        if count <= 0:
+            return
+        now = now or datetime.now()
+        window_start = self._window_start(now)
+
+        with self._lock:
+            for key in ((user_id, channel), (user_id, GLOBAL_CHANNEL)):
+                state = self._roll(self._states.get(key), window_start)
+                if state is None:
+                    # Unknown key: force a sync on the next check
+                    state = _WindowState(window_start=window_start)
+                self._states[key] = state
+                state.count += count
+                pending_key = (*key, window_start)
+                self._pending[pending_key] = self._pending.get(pending_key, 0) + count
+            should_flush = (
+                sum(self._pending.values()) >= self.flush_batch_size
+                or time.monotonic() - self._last_flush >= self.sync_interval
+            )
+
+        if should_flush and not defer_flush and self.session_factory is not None:
+            db = self.session_factory()
+            try:
+                self.flush(db)
+            finally:
+                db.close()
+
+    def flush(self, db: Session) -> int:
+        """Write pending increments to the counters table in one statement.
+
+        Returns:
+            Number of counter rows upserted
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        rows = [
+            {"user_id": user_id, "channel": channel, "window_start": window_start, "count": n}
+            for (user_id, channel, window_start), n in pending.items()
+        ]
+        stmt = dialect_insert(db, NotificationRateCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "channel", "window_start"],
+            set_={
+                "count": NotificationRateCounter.count + stmt.excluded.count,
+                "updated_at": func.now(),
+            },
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush notification rate counters: {e}")
+            db.rollback()
+            # Keep increments so they are retried on the next flush
+            with self._lock:
+                for key, n in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + n
+            return 0
+        return len(rows)
+
+    def purge_expired(self, db: Session, now: datetime | None = None) -> int:
+        """Delete counter rows that can no longer affect the sliding window."""
+        now = now or datetime.now()
+        cutoff = self._window_start(now) - self.window
+        deleted = (
+            db.query(NotificationRateCounter)
+            .filter(NotificationRateCounter.window_start < cutoff)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        with self._lock:
+            self._states = {
+                key: state for key, state in self._states.items()
+                if state.window_start >= cutoff
+            }
+        return deleted
+
+    def _window_start(self, now: datetime) -> datetime:
+        """Align ``now`` to the start of its fixed window."""
+        elapsed = (now - _WINDOW_ANCHOR) // self.window
+        return _WINDOW_ANCHOR + elapsed * self.window
+
+    def _roll(self, state: _WindowState | None, window_start: datetime) -> _WindowState | None:
+        """Advance a state to ``window_start``, carrying the count into prev_count."""
+        if state is None or state.window_start == window_start:
+            return state
+        prev = state.count if state.window_start == window_start - self.window else 0
+        return _WindowState(
+            window_start=window_start,
+            count=0,
+            prev_count=prev,
+            synced_at=state.synced_at,
+        )
+
+    def _get_state(self, db: Session, user_id: int, channel: str, now: datetime) -> _WindowState:
+        """Return the current state for a key, re-syncing from the table when stale."""
+        key = (user_id, channel)
+        window_start = self._window_start(now)
+
+        with self._lock:
+            state = self._roll(self._states.get(key), window_start)
+            if state is not None:
+                self._states[key] = state
+                if time.monotonic() - state.synced_at < self.sync_interval:
+                    return state
+
+        prev_start = window_start - self.window
+        persisted = dict(
+            db.query(NotificationRateCounter.window_start, NotificationRateCounter.count)
+            .filter(
+                NotificationRateCounter.user_id == user_id,
+                NotificationRateCounter.channel == channel,
+                NotificationRateCounter.window_start.in_([prev_start, window_start]),
+            )
+            .all()
+        )
+
+        with self._lock:
+            state = _WindowState(
+                window_start=window_start,
+                count=persisted.get(window_start, 0)
+                + self._pending.get((user_id, channel, window_start), 0),
+                prev_count=persisted.get(prev_start, 0)
+                + self._pending.get((user_id, channel, prev_start), 0),
+                synced_at=time.monotonic(),
+            )
+            self._states[key] = state
+        return state
+
+
+# Process-wide limiter shared by all NotificationService instances
+rate_limiter = NotificationRateLimiter(session_factory=SessionLocal)
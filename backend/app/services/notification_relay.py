@@ -0,0 +1,165 @@
+"""Cross-process relay for in-app notification stream events.
+
+Notifications are often created in the job worker while SSE clients are
+connected to API processes, and each process has its own
+:class:`NotificationEventBroker`. The relay runs on a background thread in
+every process: it writes the events its broker published to
+``notification_stream_events`` and polls the rows other processes wrote,
+applying them to the local broker (which also keeps the cached unread
+counts in step).
+
+Ids from concurrent writers can commit out of order, so each poll re-reads a
+short window of ids behind the newest one seen and skips rows already applied.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.notification import NotificationStreamEvent
+from .notification_events import NotificationEventBroker, notification_events
+
+logger = logging.getLogger(__name__)
+
+LATE_COMMIT_WINDOW = 200
+EVENT_RETENTION = timedelta(minutes=10)
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class NotificationEventRelay:
+    """Moves stream events between this process's broker and the database."""
+
+    def __init__(
+        self,
+        broker: NotificationEventBroker = notification_events,
+        session_factory=SessionLocal,
+        origin: str | None = None,
+        interval: float | None = None,
+    ):
+        self.broker = broker
+        self.session_factory = session_factory
+        self.origin = origin or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.interval = interval or settings.notification_relay_interval_seconds
+        self._last_id: int | None = None
+        self._applied: set[int] = set()
+        self._last_purge = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sync_once(self, db: Session) -> int:
+        """Write queued local events and apply new events from other processes.
+
+        Returns:
+            Number of remote events applied
+        """
+        self._write_outbox(db)
+        if self._last_id is None:
+            # Only events published after this process joined are relevant
+            self._last_id = db.scalar(select(func.max(NotificationStreamEvent.id))) or 0
+            return 0
+
+        floor = self._last_id - LATE_COMMIT_WINDOW
+        rows = db.execute(
+            select(
+                NotificationStreamEvent.id,
+                NotificationStreamEvent.user_id,
+                NotificationStreamEvent.event,
+                NotificationStreamEvent.data,
+            )
+            .where(
+                NotificationStreamEvent.id > floor,
+                NotificationStreamEvent.origin != self.origin,
+            )
+            .order_by(NotificationStreamEvent.id)
+        ).all()
+
+        applied = 0
+        for row_id, user_id, event, data in rows:
+            if row_id in self._applied:
+                continue
+            self._applied.add(row_id)
+            self.broker.apply_relayed(user_id, event, data)
+            applied += 1
+        if rows:
+            self._last_id = max(self._last_id, rows[-1][0])
+        self._applied = {i for i in self._applied if i > self._last_id - LATE_COMMIT_WINDOW}
+        return applied
+
+    def purge_expired(self, db: Session, now: datetime | None = None) -> int:
+        """Delete relayed events older than ``EVENT_RETENTION``."""
+        now = now or datetime.now()
+        result = db.execute(
+            delete(NotificationStreamEvent).where(
+                NotificationStreamEvent.created_at < now - EVENT_RETENTION
+            )
+        )
+        db.commit()
+        return result.rowcount
+
+    def run_forever(self) -> None:
+        """Sync until :meth:`stop` is called."""
+        while not self._stop.is_set():
+            db = self.session_factory()
+            try:
+                self.sync_once(db)
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self._last_purge = time.monotonic()
+                    self.purge_expired(db)
+            except Exception as e:
+                logger.error(f"Notification event relay failed: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Enable the broker outbox and run the relay on a daemon thread."""
+        self.broker.enable_relay()
+        self._thread = threading.Thread(
+            target=self.run_forever, name="notification-relay", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the relay thread after a final sync of queued events."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+        db = self.session_factory()
+        try:
+            self._write_outbox(db)
+        except Exception as e:
+            logger.error(f"Could not flush notification events on shutdown: {e}")
+        finally:
+            db.close()
+
+    def _write_outbox(self, db: Session) -> None:
+        events = self.broker.drain_outbox()
+        if not events:
+            return
+        now = datetime.now()
+        try:
+            db.execute(insert(NotificationStreamEvent), [
+                {
+                    "origin": self.origin,
+                    "user_id": user_id,
+                    "event": event,
+                    "data": data,
+                    "created_at": now,
+                }
+                for user_id, event, data in events
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.broker.requeue_outbox(events)
+            raise
@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime
 from typing import Any
 
@@ -15,6 +16,13 @@ from ..models import (
     PushSubscription,
     User,
 )
+from .notification_events import notification_events
+from .notification_rate_limiter import (
+    CHANNEL_HOURLY_LIMIT,
+    GLOBAL_CHANNEL,
+    GLOBAL_HOURLY_LIMIT,
+    rate_limiter,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,13 +74,7 @@ class NotificationService:
             )
             return [{"channel": "rate_limit", "status": "skipped", "reason": "rate_limit_exceeded"}]
 
-        channels = []
-        if preferences.get("push", True):
-            channels.append("push")
-        if preferences.get("email", False):
-            channels.append("email")
-        if preferences.get("in_app", True):
-            channels.append("in_app")
+        channels = self._enabled_channels(preferences)
 
         # Quiet hours check
         if self._is_quiet_hours(preferences):
@@ -128,6 +130,7 @@ class NotificationService:
                     )
                 else:
                     result = {"channel": channel, "status": "unknown"}
+                self._record_delivery(user_id, result)
                 results.append(result)
             except Exception as e:
                 logger.error(f"Failed to send {channel} notification: {e}")
@@ -135,18 +138,48 @@ class NotificationService:
 
         return results
 
-    def _get_user_preferences(self, db: Session, user_id: int) -> dict[str, bool]:
+    def _get_user_preferences(self, db: Session, user_id: int) -> dict[str, Any]:
         """Get user's notification channel preferences."""
+        return self._get_preferences_bulk(db, [user_id])[user_id]
+
+    def _get_preferences_bulk(
+        self, db: Session, user_ids: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        """Get channel preferences for many users in one query.
+
+        Channel settings (e.g. quiet_hours) are merged into a single
+        ``settings`` dict per user.
+        """
+        result: dict[int, dict[str, Any]] = {
+            user_id: {"push": True, "email": False, "in_app": True, "settings": {}}
+            for user_id in user_ids
+        }
+        if not user_ids:
+            return result
+
         prefs = (
-            db.query(NotificationPreference).filter(NotificationPreference.user_id == user_id).all()
+            db.query(NotificationPreference)
+            .filter(NotificationPreference.user_id.in_(user_ids))
+            .all()
         )
-
-        result = {"push": True, "email": False, "in_app": True}
         for pref in prefs:
-            result[pref.channel] = pref.enabled
+            entry = result[pref.user_id]
+            entry[pref.channel] = pref.enabled
+            entry["settings"].update(pref.settings or {})
 
         return result
 
+    def _enabled_channels(self, preferences: dict[str, Any]) -> list[str]:
+        """List enabled delivery channels in send order."""
+        channels = []
+        if preferences.get("push", True):
+            channels.append("push")
+        if preferences.get("email", False):
+            channels.append("email")
+        if preferences.get("in_app", True):
+            channels.append("in_app")
+        return channels
+
     def _is_quiet_hours(self, preferences: dict[str, Any]) -> bool:
         """Check if current time is within user's quiet hours."""
         settings_data = preferences.get("settings", {})
@@ -181,41 +214,23 @@ class NotificationService:
 
         Default: Max 10 notifications per hour total
         """
-        from ..models.notification import NotificationLog
-        from datetime import timedelta
-
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        count = (
-            db.query(NotificationLog)
-            .filter(
-                NotificationLog.user_id == user_id,
-                NotificationLog.created_at >= one_hour_ago,
-            )
-            .count()
-        )
-
-        return count < 10
+        return rate_limiter.allow(db, user_id, GLOBAL_CHANNEL, GLOBAL_HOURLY_LIMIT)
 
     def _check_channel_rate_limit(self, db: Session, user_id: int, channel: str) -> bool:
         """Check if user has exceeded channel-specific rate limit.
 
         Default: Max 3 notifications per hour per channel
         """
-        from ..models.notification import NotificationLog
-        from datetime import timedelta
-
-        one_hour_ago = datetime.now() - timedelta(hours=1)
-        count = (
-            db.query(NotificationLog)
-            .filter(
-                NotificationLog.user_id == user_id,
-                NotificationLog.channel == channel,
-                NotificationLog.created_at >= one_hour_ago,
-            )
-            .count()
-        )
+        return rate_limiter.allow(db, user_id, channel, CHANNEL_HOURLY_LIMIT)
 
-        return count < 3
+    def _record_delivery(self, user_id: int, result: dict[str, Any]) -> None:
+        """Count a successful channel delivery toward the user's rate limits."""
+        status = result.get("status")
+        if status not in ("sent", "created"):
+            return
+        # Push logs one delivery per subscription
+        count = result.get("recipients", 1) if result.get("channel") == "push" else 1
+        rate_limiter.record(user_id, result["channel"], count)
 
     def _queue_notification(
         self,
@@ -271,6 +286,37 @@ class NotificationService:
         if not subscriptions:
             return {"channel": "push", "status": "no_subscriptions"}
 
+        result = await self._deliver_push(subscriptions, title, body, data, notification_type)
+
+        for sub in subscriptions:
+            log = NotificationLog(
+                user_id=user_id,
+                channel="push",
+                notification_type=notification_type,
+                title=title,
+                message=body,
+                status="sent",
+                extra_data={"subscription_id": sub.id},
+                sent_at=datetime.now(),
+            )
+            db.add(log)
+
+        db.commit()
+
+        return result
+
+    async def _deliver_push(
+        self,
+        subscriptions: list[PushSubscription],
+        title: str,
+        body: str,
+        data: dict[str, Any] | None,
+        notification_type: str,
+    ) -> dict[str, Any]:
+        """Deliver a push message to each subscription via FCM.
+
+        Performs no database access so callers can run deliveries concurrently.
+        """
         fcm_messages = []
         for sub in subscriptions:
             message = {
@@ -293,21 +339,6 @@ class NotificationService:
 
         # In production, this would make actual FCM API calls
         # For now, we'll simulate successful push
-        for sub in subscriptions:
-            log = NotificationLog(
-                user_id=user_id,
-                channel="push",
-                notification_type=notification_type,
-                title=title,
-                message=body,
-                status="sent",
-                metadata={"subscription_id": sub.id},
-                sent_at=datetime.now(),
-            )
-            db.add(log)
-
-        db.commit()
-
         return {
             "channel": "push",
             "status": "sent",
@@ -329,8 +360,8 @@ class NotificationService:
         if not user:
             return {"channel": "email", "status": "user_not_found"}
 
-        # In production, this would use SendGrid API
-        # For now, we'll simulate email sending
+        result = await self._deliver_email(user.email, title, body, data, notification_type)
+
         log = NotificationLog(
             user_id=user_id,
             channel="email",
@@ -338,16 +369,32 @@ class NotificationService:
             title=title,
             message=body,
             status="sent",
-            metadata={"email": user.email},
+            extra_data={"email": user.email},
             sent_at=datetime.now(),
         )
         db.add(log)
         db.commit()
 
+        return result
+
+    async def _deliver_email(
+        self,
+        email: str,
+        title: str,
+        body: str,
+        data: dict[str, Any] | None,
+        notification_type: str,
+    ) -> dict[str, Any]:
+        """Deliver an email notification via SendGrid.
+
+        Performs no database access so callers can run deliveries concurrently.
+        """
+        # In production, this would use SendGrid API
+        # For now, we'll simulate email sending
         return {
             "channel": "email",
             "status": "sent",
-            "recipient": user.email,
+            "recipient": email,
         }
 
     async def _create_in_app_notification(
@@ -389,6 +436,7 @@ class NotificationService:
 
         db.commit()
         db.refresh(notification)
+        self._publish_in_app(notification)
 
         return {
             "channel": "in_app",
@@ -396,6 +444,25 @@ class NotificationService:
             "notification_id": notification.id,
         }
 
+    def _publish_in_app(self, notification: InAppNotification) -> None:
+        """Push a new in-app notification and the updated unread count to stream subscribers."""
+        notification_events.publish(
+            notification.user_id, "notification", serialize_in_app_notification(notification)
+        )
+        count = notification_events.adjust_unread_count(notification.user_id, 1)
+        if count is not None:
+            notification_events.publish(
+                notification.user_id, "unread_count", {"count": count}, relay=False
+            )
+
+    def _refresh_unread_count(self, db: Session, user_id: int) -> int:
+        """Recompute a user's unread count, cache it and notify stream subscribers."""
+        notification_events.invalidate_unread_count(user_id)
+        count = self._query_unread_count(db, user_id)
+        notification_events.set_unread_count(user_id, count)
+        notification_events.publish(user_id, "unread_count", {"count": count})
+        return count
+
     async def get_user_notifications(
         self,
         db: Session,
@@ -423,9 +490,12 @@ class NotificationService:
         )
 
         if notification:
+            was_unread = not notification.is_read
             notification.is_read = True
             notification.read_at = datetime.now()
             db.commit()
+            if was_unread:
+                self._refresh_unread_count(db, user_id)
             return True
 
         return False
@@ -441,10 +511,21 @@ class NotificationService:
             .update({"is_read": True, "read_at": datetime.now()})
         )
         db.commit()
+        notification_events.set_unread_count(user_id, 0)
+        notification_events.publish(user_id, "unread_count", {"count": 0})
         return count
 
     async def get_unread_count(self, db: Session, user_id: int) -> int:
-        """Get count of unread notifications."""
+        """Get count of unread notifications (served from cache when fresh)."""
+        cached = notification_events.get_cached_unread_count(user_id)
+        if cached is not None:
+            return cached
+        count = self._query_unread_count(db, user_id)
+        notification_events.set_unread_count(user_id, count)
+        return count
+
+    def _query_unread_count(self, db: Session, user_id: int) -> int:
+        """Count unread notifications in the database."""
         return (
             db.query(InAppNotification)
             .filter(
@@ -466,8 +547,11 @@ class NotificationService:
         )
 
         if notification:
+            was_unread = not notification.is_read
             db.delete(notification)
             db.commit()
+            if was_unread:
+                self._refresh_unread_count(db, user_id)
             return True
 
         return False
@@ -490,6 +574,39 @@ class NotificationService:
         return count
 
 
+def serialize_in_app_notification(notification: InAppNotification) -> dict[str, Any]:
+    """Serialize an in-app notification for stream events."""
+    return {
+        "id": notification.id,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "data": notification.data or {},
+        "priority": notification.priority,
+        "is_read": notification.is_read,
+        "action_url": notification.action_url,
+        "action_label": notification.action_label,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def publish_in_app_notifications(notifications: list[tuple[int, dict[str, Any]]]) -> None:
+    """Push committed in-app notifications and unread counts to stream subscribers.
+
+    Args:
+        notifications: (user_id, serialized notification) pairs
+    """
+    added: dict[int, int] = defaultdict(int)
+    for user_id, payload in notifications:
+        notification_events.publish(user_id, "notification", payload)
+        added[user_id] += 1
+    for user_id, n in added.items():
+        count = notification_events.adjust_unread_count(user_id, n)
+        if count is not None:
+            # Other processes derive the count from the relayed notifications
+            notification_events.publish(user_id, "unread_count", {"count": count}, relay=False)
+
+
 class NotificationPreferenceService:
     """Service for managing user notification preferences."""
 
@@ -1,11 +1,11 @@
 """Multi-chain blockchain scanning service via Etherscan V2 API."""
+import asyncio
 import logging
 from datetime import datetime
 from typing import Optional
 
-import httpx
-
 from ..config import settings
+from .http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +29,18 @@ SYMBIOTIC_DISTRIBUTOR = "0x04c74E8A11c669AcFb7Ee01012BBf5CF1e57A10d"
 # keccak256("Claimed(address,address,uint256)")
 CLAIMED_TOPIC = "0x4ec90e965519d92681267467f775ada5bd214aa92c0dc93d90a5e880ce9ed026"
 
+# tokentx pagination: Etherscan returns at most 10,000 rows per query window
+PAGE_SIZE = 1000
+MAX_PAGES = 10
+# Block ranges are split into windows that are fetched concurrently
+BLOCK_WINDOW = 1_000_000
+# status "0" messages that mean an empty result rather than an error
+_EMPTY_RESULT_MESSAGES = ("No transactions found", "No records found")
+
+# Block numbers for past timestamps never change: {(chainid, timestamp): block}
+_block_cache: dict[tuple[str, int], int] = {}
+_BLOCK_CACHE_MAX = 4096
+
 
 class PolygonscanService:
     """Service for scanning blockchains via Etherscan V2 API (supports multiple chains)."""
@@ -45,11 +57,131 @@ class PolygonscanService:
             raise ValueError("POLYGONSCAN_API_KEY not configured")
         return api_key
 
+    @staticmethod
+    async def _query(params: dict) -> dict:
+        """Run one Etherscan V2 query and return the decoded response."""
+        client = http_clients.get("polygonscan")
+        response = await client.get(
+            PolygonscanService.BASE_URL,
+            endpoint=params["action"],
+            params={**params, "apikey": PolygonscanService._get_api_key()},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    async def _token_transfer_page(
+        chainid: str, wallet_address: str, from_block: int, to_block: int, page: int
+    ) -> list[dict]:
+        data = await PolygonscanService._query({
+            "chainid": chainid,
+            "module": "account",
+            "action": "tokentx",
+            "address": wallet_address.lower(),
+            "startblock": from_block,
+            "endblock": to_block,
+            "page": page,
+            "offset": PAGE_SIZE,
+            "sort": "asc",
+        })
+        if data.get("status") != "1":
+            message = data.get("message", "")
+            if any(empty in message for empty in _EMPTY_RESULT_MESSAGES):
+                return []
+            # Never treat an error as "no transfers": the caller would skip the range
+            raise RuntimeError(f"Etherscan tokentx failed: {data.get('message')}")
+        return data.get("result", [])
+
+    @staticmethod
+    async def _token_transfers_in_window(
+        chainid: str, wallet_address: str, from_block: int, to_block: int
+    ) -> list[dict]:
+        """All token transfers in one block window, splitting it if it is too busy."""
+        transfers: list[dict] = []
+        for page in range(1, MAX_PAGES + 1):
+            batch = await PolygonscanService._token_transfer_page(
+                chainid, wallet_address, from_block, to_block, page
+            )
+            transfers.extend(batch)
+            if len(batch) < PAGE_SIZE:
+                return transfers
+
+        if from_block >= to_block:
+            logger.warning(f"More than {len(transfers)} transfers in block {from_block}; truncated")
+            return transfers
+        middle = (from_block + to_block) // 2
+        left, right = await asyncio.gather(
+            PolygonscanService._token_transfers_in_window(
+                chainid, wallet_address, from_block, middle
+            ),
+            PolygonscanService._token_transfers_in_window(
+                chainid, wallet_address, middle + 1, to_block
+            ),
+        )
+        return left + right
+
+    @staticmethod
+    async def get_token_transfers(
+        chainid: str, wallet_address: str, from_block: int, to_block: int
+    ) -> list[dict]:
+        """Fetch every token transfer of a wallet in an inclusive block range.
+
+        The range is split into ``BLOCK_WINDOW``-sized windows fetched
+        concurrently (the shared client enforces Etherscan's rate limit), each
+        paginated until a short page.
+        """
+        if to_block < from_block:
+            return []
+        windows = [
+            (start, min(start + BLOCK_WINDOW - 1, to_block))
+            for start in range(from_block, to_block + 1, BLOCK_WINDOW)
+        ]
+        results = await asyncio.gather(*(
+            PolygonscanService._token_transfers_in_window(chainid, wallet_address, start, end)
+            for start, end in windows
+        ))
+        return [transfer for window in results for transfer in window]
+
+    @staticmethod
+    async def get_latest_block(chainid: str) -> int:
+        """Current head block number of a chain."""
+        data = await PolygonscanService._query({
+            "chainid": chainid,
+            "module": "proxy",
+            "action": "eth_blockNumber",
+        })
+        return int(data["result"], 16)
+
+    @staticmethod
+    async def block_by_timestamp(chainid: str, timestamp: int) -> int:
+        """Block number closest before ``timestamp`` (cached; 0 on failure)."""
+        key = (chainid, timestamp)
+        if key in _block_cache:
+            return _block_cache[key]
+        try:
+            data = await PolygonscanService._query({
+                "chainid": chainid,
+                "module": "block",
+                "action": "getblocknobytime",
+                "timestamp": timestamp,
+                "closest": "before",
+            })
+            block = int(data.get("result", 0))
+        except Exception as e:
+            logger.error(f"Failed to get block by timestamp on chain {chainid}: {e}")
+            return 0
+
+        if block:
+            if len(_block_cache) >= _BLOCK_CACHE_MAX:
+                _block_cache.pop(next(iter(_block_cache)))
+            _block_cache[key] = block
+        return block
+
     @staticmethod
     async def get_merkl_claims(
         wallet_address: str,
         from_block: int = 0,
-        to_block: str = "latest"
+        to_block: int | str = "latest"
     ) -> list[dict]:
         """Fetch Merkl claim events for a wallet using token transfers.
 
@@ -65,36 +197,14 @@ class PolygonscanService:
             List of claim events
         """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                params = {
-                    "chainid": PolygonscanService.POLYGON_CHAIN_ID,
-                    "module": "account",
-                    "action": "tokentx",
-                    "address": wallet_address.lower(),
-                    "startblock": from_block,
-                    "endblock": 99999999 if to_block == "latest" else to_block,
-                    "sort": "desc",
-                    "apikey": PolygonscanService._get_api_key(),
-                }
-
-                response = await client.get(
-                    PolygonscanService.BASE_URL,
-                    params=params
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                if data.get("status") != "1":
-                    if "No records found" in data.get("message", ""):
-                        return []
-                    logger.warning(f"Polygonscan: {data.get('message')}")
-                    return []
-
-                # Filter for transfers FROM Merkl Distributor
-                return PolygonscanService._parse_token_transfers(
-                    data.get("result", []),
-                    wallet_address.lower()
-                )
+            chainid = PolygonscanService.POLYGON_CHAIN_ID
+            if to_block == "latest":
+                to_block = await PolygonscanService.get_latest_block(chainid)
+            transfers = await PolygonscanService.get_token_transfers(
+                chainid, wallet_address, from_block, int(to_block)
+            )
+            # Filter for transfers FROM Merkl Distributor
+            return PolygonscanService._parse_token_transfers(transfers, wallet_address.lower())
 
         except Exception as e:
             logger.error(f"Polygonscan API error: {e}")
@@ -136,29 +246,9 @@ class PolygonscanService:
     @staticmethod
     async def get_block_by_timestamp(timestamp: int) -> int:
         """Get block number closest to a timestamp."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                params = {
-                    "chainid": PolygonscanService.POLYGON_CHAIN_ID,
-                    "module": "block",
-                    "action": "getblocknobytime",
-                    "timestamp": timestamp,
-                    "closest": "before",
-                    "apikey": PolygonscanService._get_api_key(),
-                }
-
-                response = await client.get(
-                    PolygonscanService.BASE_URL,
-                    params=params
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                return int(data.get("result", 0))
-
-        except Exception as e:
-            logger.error(f"Failed to get block by timestamp: {e}")
-            return 0
+        return await PolygonscanService.block_by_timestamp(
+            PolygonscanService.POLYGON_CHAIN_ID, timestamp
+        )
 
     @staticmethod
     async def get_token_info(token_address: str) -> dict:
@@ -179,7 +269,7 @@ class PolygonscanService:
     async def get_symbiotic_claims(
         wallet_address: str,
         from_block: int = 0,
-        to_block: str = "latest"
+        to_block: int | str = "latest"
     ) -> list[dict]:
         """Fetch Symbiotic staking reward claims for a wallet on Ethereum.
 
@@ -194,36 +284,16 @@ class PolygonscanService:
             List of claim events
         """
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                params = {
-                    "chainid": PolygonscanService.ETHEREUM_CHAIN_ID,
-                    "module": "account",
-                    "action": "tokentx",
-                    "address": wallet_address.lower(),
-                    "startblock": from_block,
-                    "endblock": 99999999 if to_block == "latest" else to_block,
-                    "sort": "desc",
-                    "apikey": PolygonscanService._get_api_key(),
-                }
-
-                response = await client.get(
-                    PolygonscanService.BASE_URL,
-                    params=params
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                if data.get("status") != "1":
-                    if "No records found" in data.get("message", ""):
-                        return []
-                    logger.warning(f"Etherscan: {data.get('message')}")
-                    return []
-
-                # Filter for transfers FROM Symbiotic Distributor
-                return PolygonscanService._parse_symbiotic_transfers(
-                    data.get("result", []),
-                    wallet_address.lower()
-                )
+            chainid = PolygonscanService.ETHEREUM_CHAIN_ID
+            if to_block == "latest":
+                to_block = await PolygonscanService.get_latest_block(chainid)
+            transfers = await PolygonscanService.get_token_transfers(
+                chainid, wallet_address, from_block, int(to_block)
+            )
+            # Filter for transfers FROM Symbiotic Distributor
+            return PolygonscanService._parse_symbiotic_transfers(
+                transfers, wallet_address.lower()
+            )
 
         except Exception as e:
             logger.error(f"Etherscan API error: {e}")
@@ -264,26 +334,6 @@ class PolygonscanService:
     @staticmethod
     async def get_block_by_timestamp_eth(timestamp: int) -> int:
         """Get Ethereum block number closest to a timestamp."""
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                params = {
-                    "chainid": PolygonscanService.ETHEREUM_CHAIN_ID,
-                    "module": "block",
-                    "action": "getblocknobytime",
-                    "timestamp": timestamp,
-                    "closest": "before",
-                    "apikey": PolygonscanService._get_api_key(),
-                }
-
-                response = await client.get(
-                    PolygonscanService.BASE_URL,
-                    params=params
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                return int(data.get("result", 0))
-
-        except Exception as e:
-            logger.error(f"Failed to get ETH block by timestamp: {e}")
-            return 0
+        return await PolygonscanService.block_by_timestamp(
+            PolygonscanService.ETHEREUM_CHAIN_ID, timestamp
+        )
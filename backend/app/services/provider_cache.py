@@ -0,0 +1,323 @@
+"""Shared cache for third-party provider responses.
+
+Wallet portfolio and position lookups are keyed by
+``(wallet_address, chains, endpoint)``. A fresh entry (younger than the TTL)
+is returned as is. A stale entry (within the stale window after the TTL) is
+returned immediately while a background task refreshes it. Anything older is
+fetched inline. Concurrent misses for one key on the same event loop share a
+single upstream call.
+
+Entries live in the ``provider_responses`` table (:class:`DatabaseResponseStore`)
+so the API processes and the job worker, which captures DeFi snapshots, share
+upstream calls, and ``invalidate_wallet`` takes effect in every process.
+Without a store (``provider_cache_shared`` off) entries are kept in process
+memory instead, evicted least-recently-used once their estimated size exceeds
+the memory bound.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.provider_response import ProviderResponse
+from ..utils.db_bulk import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+
+def wallet_cache_key(
+    wallet_address: str, chains: list[str] | None, endpoint: str
+) -> tuple[str, tuple[str, ...] | None, str]:
+    """Cache key for a wallet-scoped provider response."""
+    return (
+        wallet_address.lower(),
+        tuple(sorted(chains)) if chains else None,
+        endpoint,
+    )
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough in-memory size of a JSON-like value (its serialized length)."""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    return str(value)
+
+
+def _decode_object(obj: dict) -> Any:
+    if obj.keys() == {"__decimal__"}:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def encode_value(value: Any) -> str:
+    """Serialize a provider response for the shared store, keeping Decimals."""
+    return json.dumps(value, default=_encode_default)
+
+
+def decode_value(text: str) -> Any:
+    """Inverse of :func:`encode_value`."""
+    return json.loads(text, object_hook=_decode_object)
+
+
+class DatabaseResponseStore:
+    """``provider_responses`` rows backing the cache across processes.
+
+    Methods open their own short-lived sessions; the cache calls them on a
+    worker thread so the event loop is not blocked.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def load(self, key: Hashable) -> tuple[Any, float] | None:
+        """Return ``(value, fetched_at)`` for ``key``, or None on a miss."""
+        db = self.session_factory()
+        try:
+            row = db.execute(
+                select(ProviderResponse.value, ProviderResponse.fetched_at)
+                .where(ProviderResponse.cache_key == _store_key(key))
+            ).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        return decode_value(row.value), row.fetched_at.timestamp()
+
+    def save(self, key: Hashable, value: Any, fetched_at: float) -> None:
+        """Insert or replace the response stored for ``key``."""
+        row = {
+            "cache_key": _store_key(key),
+            "wallet_address": key[0] if isinstance(key, tuple) else None,
+            "value": encode_value(value),
+            "fetched_at": datetime.fromtimestamp(fetched_at),
+        }
+        db = self.session_factory()
+        try:
+            stmt = dialect_insert(db, ProviderResponse).values(row)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_={"value": stmt.excluded.value, "fetched_at": stmt.excluded.fetched_at},
+            )
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+
+    def delete_wallet(self, wallet_address: str) -> int:
+        """Delete every stored response for ``wallet_address`` (lower-cased)."""
+        db = self.session_factory()
+        try:
+            result = db.execute(
+                delete(ProviderResponse).where(
+                    ProviderResponse.wallet_address == wallet_address
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+        return result.rowcount
+
+    @staticmethod
+    def purge_expired(db: Session, max_age: float, now: float | None = None) -> int:
+        """Delete responses older than ``max_age`` seconds (caller's session, committed)."""
+        cutoff = datetime.fromtimestamp((now or time.time()) - max_age)
+        result = db.execute(
+            delete(ProviderResponse).where(ProviderResponse.fetched_at < cutoff)
+        )
+        db.commit()
+        return result.rowcount
+
+
+def _store_key(key: Hashable) -> str:
+    return json.dumps(key)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+    size: int
+
+
+class ProviderResponseCache:
+    """TTL cache with stale-while-revalidate over a shared store or bounded memory.
+
+    Cached values are shared between callers and must be treated as read-only.
+    ``clock`` must be wall-clock time when a store is shared between processes.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float,
+        max_bytes: int,
+        clock: Callable[[], float] = time.time,
+        store: DatabaseResponseStore | None = None,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.store = store
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # key -> (loop, task) of the fetch currently running for it
+        self._inflight: dict[Hashable, tuple[asyncio.AbstractEventLoop, asyncio.Task]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False,
+        allow_stale: bool = True,
+    ) -> Any:
+        """Return the cached value for ``key``, calling ``fetch`` when needed.
+
+        Args:
+            key: Cache key (see ``wallet_cache_key``)
+            fetch: Zero-argument coroutine factory that calls the provider
+            force_refresh: Skip the cache and store a fresh response
+            allow_stale: Serve a stale entry while refreshing in the background;
+                when False a stale entry is refetched inline
+        """
+        if not force_refresh:
+            entry = await self._lookup(key)
+            if entry is not None:
+                age = self._clock() - entry.fetched_at
+                if age < self.ttl:
+                    return entry.value
+                if allow_stale and age < self.ttl + self.stale_ttl:
+                    self._refresh_in_background(key, fetch)
+                    return entry.value
+
+        return await self._fetch(key, fetch, join_inflight=not force_refresh)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every in-memory entry whose key matches ``predicate``; returns the count."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key).size
+        return len(keys)
+
+    def invalidate_wallet(self, wallet_address: str) -> int:
+        """Drop every cached response for ``wallet_address``, in every process."""
+        address = wallet_address.lower()
+        dropped = self.invalidate(lambda key: isinstance(key, tuple) and key[:1] == (address,))
+        if self.store is not None:
+            dropped += self.store.delete_wallet(address)
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    async def _lookup(self, key: Hashable) -> _Entry | None:
+        if self.store is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+            return entry
+        try:
+            found = await asyncio.to_thread(self.store.load, key)
+        except Exception as e:
+            logger.warning(f"Shared provider cache read failed for {key}: {e}")
+            return None
+        return None if found is None else _Entry(found[0], found[1], 0)
+
+    async def _save(self, key: Hashable, value: Any) -> None:
+        if self.store is None:
+            self._store(key, value)
+            return
+        try:
+            await asyncio.to_thread(self.store.save, key, value, self._clock())
+        except Exception as e:
+            logger.warning(f"Shared provider cache write failed for {key}: {e}")
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        entry = _Entry(value, self._clock(), _estimate_size(value))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    async def _fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]], join_inflight: bool
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        running = self._inflight.get(key)
+        if join_inflight and running is not None and running[0] is loop:
+            return await asyncio.shield(running[1])
+
+        task = loop.create_task(self._fetch_and_store(key, fetch))
+        self._inflight[key] = (loop, task)
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            await self._save(key, value)
+            return value
+        finally:
+            current = self._inflight.get(key)
+            if current is not None and current[1] is asyncio.current_task():
+                del self._inflight[key]
+
+    def _refresh_in_background(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        loop = asyncio.get_running_loop()
+        running = self._inflight.get(key)
+        if running is not None and running[0] is loop:
+            return
+
+        task = loop.create_task(self._fetch_and_store(key, fetch))
+        self._inflight[key] = (loop, task)
+
+        def log_failure(done: asyncio.Task) -> None:
+            if not done.cancelled() and done.exception() is not None:
+                logger.warning(f"Background refresh failed for {key}: {done.exception()}")
+
+        task.add_done_callback(log_failure)
+
+
+provider_cache = ProviderResponseCache(
+    ttl=settings.provider_cache_ttl_seconds,
+    stale_ttl=settings.provider_cache_stale_seconds,
+    max_bytes=settings.provider_cache_max_bytes,
+    store=DatabaseResponseStore() if settings.provider_cache_shared else None,
+)
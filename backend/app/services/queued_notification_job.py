@@ -1,92 +1,330 @@
 """Background job for processing queued notifications."""
 
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Any
 
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
-from .notification_service import NotificationService
+from ..models.notification import (
+    InAppNotification,
+    NotificationLog,
+    PushSubscription,
+    QueuedNotification,
+)
+from ..models.user import User
+from .notification_rate_limiter import (
+    CHANNEL_HOURLY_LIMIT,
+    GLOBAL_CHANNEL,
+    GLOBAL_HOURLY_LIMIT,
+    rate_limiter,
+)
+from .notification_service import (
+    NotificationService,
+    publish_in_app_notifications,
+    serialize_in_app_notification,
+)
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CONCURRENCY = 50
+# Items deferred by quiet hours or rate limits are re-checked after this delay
+DEFER_RECHECK = timedelta(minutes=15)
+
 
 class QueuedNotificationJob:
-    """Job to process queued notifications after quiet hours or rate limits."""
+    """Job to process queued notifications after quiet hours or rate limits.
+
+    Items are grouped by user; preferences, quiet hours, push subscriptions and
+    email addresses are resolved once per batch. Push and email deliveries run
+    concurrently under a semaphore, and all logs, in-app rows and queue state
+    updates are written back in bulk.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ):
         self.notification_service = NotificationService()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
 
     def process_queue(self, db: Session) -> dict:
         """Process pending queued notifications.
 
         Returns:
-            dict with 'processed' and 'failed' counts
+            dict with 'processed', 'failed', 'deferred' and 'remaining' counts
         """
-        from ..models.notification import QueuedNotification
+        return asyncio.run(self.process_queue_async(db))
+
+    async def process_queue_async(self, db: Session) -> dict:
+        """Async variant of process_queue for callers already in an event loop."""
+        now = datetime.now()
 
         # Get notifications ready for processing
         queued = (
             db.query(QueuedNotification)
             .filter(
                 QueuedNotification.completed_at == None,
-                QueuedNotification.next_attempt_at <= datetime.now(),
+                QueuedNotification.next_attempt_at <= now,
                 QueuedNotification.attempts < QueuedNotification.max_attempts,
             )
             .order_by(QueuedNotification.priority.asc(), QueuedNotification.next_attempt_at.asc())
-            .limit(100)  # Process up to 100 at a time
+            .limit(self.batch_size)
             .all()
         )
+        if not queued:
+            return {"processed": 0, "failed": 0, "deferred": 0, "remaining": 0}
 
-        processed = 0
-        failed = 0
-
+        by_user: dict[int, list[QueuedNotification]] = defaultdict(list)
         for item in queued:
-            try:
-                results = self.notification_service.send_notification(
-                    db=db,
-                    user_id=item.user_id,
-                    notification_type=item.notification_type,
-                    title=item.title,
-                    message=item.message,
-                    data=item.data,
-                    priority=item.priority,
-                    action_url=item.action_url,
-                    action_label=item.action_label,
-                )
+            by_user[item.user_id].append(item)
+        user_ids = list(by_user)
 
-                # Check if all channels succeeded
-                sent_channels = [r for r in results if r.get("status") in ("sent", "created")]
-
-                if sent_channels:
-                    item.completed_at = datetime.now()
-                    processed += 1
-                else:
-                    # Schedule retry
-                    item.attempts += 1
-                    item.next_attempt_at = datetime.now() + timedelta(
-                        minutes=15 * (item.attempts**2)
-                    )
-                    item.error_message = "All channels failed"
-
-                    if item.attempts >= item.max_attempts:
-                        item.completed_at = datetime.now()
-                        item.error_message = "Max attempts reached"
-                        failed += 1
+        # Resolve per-user state once for the whole batch
+        preferences = self.notification_service._get_preferences_bulk(db, user_ids)
+        subscriptions: dict[int, list[PushSubscription]] = defaultdict(list)
+        for sub in db.query(PushSubscription).filter(
+            PushSubscription.user_id.in_(user_ids),
+            PushSubscription.is_active == True,
+        ):
+            subscriptions[sub.user_id].append(sub)
+        emails = dict(db.query(User.id, User.email).filter(User.id.in_(user_ids)).all())
 
-            except Exception as e:
-                logger.error(f"Failed to process queued notification {item.id}: {e}")
-                item.attempts += 1
-                item.error_message = str(e)
-                item.next_attempt_at = datetime.now() + timedelta(minutes=15 * (item.attempts**2))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        deliveries: list = []
+        delivered: set[int] = set()
+        deferred: list[QueuedNotification] = []
+        in_app_items: list[QueuedNotification] = []
 
-                if item.attempts >= item.max_attempts:
-                    item.completed_at = datetime.now()
-                    failed += 1
+        for user_id, items in by_user.items():
+            prefs = preferences[user_id]
+            channels = self.notification_service._enabled_channels(prefs)
+            quiet = self.notification_service._is_quiet_hours(prefs)
 
+            for item in items:
+                item_channels = channels
+                if quiet:
+                    if item.priority <= 2:
+                        deferred.append(item)
+                        continue
+                    item_channels = ["in_app"]
+
+                if not rate_limiter.allow(db, user_id, GLOBAL_CHANNEL, GLOBAL_HOURLY_LIMIT):
+                    deferred.append(item)
+                    continue
+
+                attempted = False
+                rate_limited = False
+                for channel in item_channels:
+                    if not rate_limiter.allow(db, user_id, channel, CHANNEL_HOURLY_LIMIT):
+                        rate_limited = True
+                        continue
+                    # Rate-limit capacity is reserved before the concurrent send;
+                    # counters are flushed once after the batch is committed.
+                    if channel == "in_app":
+                        attempted = True
+                        in_app_items.append(item)
+                        delivered.add(item.id)
+                        rate_limiter.record(user_id, channel, defer_flush=True)
+                    elif channel == "push" and subscriptions.get(user_id):
+                        attempted = True
+                        rate_limiter.record(
+                            user_id, channel, len(subscriptions[user_id]), defer_flush=True
+                        )
+                        deliveries.append(self._deliver(
+                            semaphore,
+                            item,
+                            channel,
+                            self.notification_service._deliver_push(
+                                subscriptions[user_id],
+                                item.title,
+                                item.message,
+                                item.data,
+                                item.notification_type,
+                            ),
+                        ))
+                    elif channel == "email" and emails.get(user_id):
+                        attempted = True
+                        rate_limiter.record(user_id, channel, defer_flush=True)
+                        deliveries.append(self._deliver(
+                            semaphore,
+                            item,
+                            channel,
+                            self.notification_service._deliver_email(
+                                emails[user_id],
+                                item.title,
+                                item.message,
+                                item.data,
+                                item.notification_type,
+                            ),
+                        ))
+
+                if rate_limited and not attempted:
+                    deferred.append(item)
+
+        log_rows: list[dict[str, Any]] = []
+        for item, channel, result in await asyncio.gather(*deliveries):
+            if result.get("status") != "sent":
+                continue
+            delivered.add(item.id)
+            sent_at = datetime.now()
+            if channel == "push":
+                log_rows.extend(
+                    self._log_row(item, channel, "sent", {"subscription_id": sub.id}, sent_at)
+                    for sub in subscriptions[item.user_id]
+                )
+            else:
+                log_rows.append(
+                    self._log_row(item, channel, "sent", {"email": result.get("recipient")}, sent_at)
+                )
+
+        in_app_notifications = self._write_in_app(db, in_app_items, log_rows)
+        if log_rows:
+            db.execute(insert(NotificationLog), log_rows)
+
+        processed, failed = self._write_back(db, queued, delivered, deferred)
         db.commit()
+        rate_limiter.flush(db)
+        publish_in_app_notifications(in_app_notifications)
 
         return {
             "processed": processed,
             "failed": failed,
+            "deferred": len(deferred),
             "remaining": len(queued) - processed - failed,
         }
+
+    async def _deliver(
+        self,
+        semaphore: asyncio.Semaphore,
+        item: QueuedNotification,
+        channel: str,
+        send,
+    ) -> tuple[QueuedNotification, str, dict[str, Any]]:
+        """Run one channel delivery under the concurrency cap."""
+        async with semaphore:
+            try:
+                return item, channel, await send
+            except Exception as e:
+                logger.error(f"Failed to send {channel} for queued notification {item.id}: {e}")
+                return item, channel, {"channel": channel, "status": "failed", "error": str(e)}
+
+    @staticmethod
+    def _log_row(
+        item: QueuedNotification,
+        channel: str,
+        status: str,
+        extra_data: dict[str, Any],
+        sent_at: datetime | None,
+        notification_id: int | None = None,
+    ) -> dict[str, Any]:
+        """Build a notification_logs row for a queued item."""
+        return {
+            "user_id": item.user_id,
+            "notification_id": notification_id,
+            "channel": channel,
+            "notification_type": item.notification_type,
+            "title": item.title,
+            "message": item.message,
+            "status": status,
+            "extra_data": extra_data,
+            "sent_at": sent_at,
+        }
+
+    def _write_in_app(
+        self,
+        db: Session,
+        items: list[QueuedNotification],
+        log_rows: list[dict[str, Any]],
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Insert in-app notifications for ``items`` and append their log rows.
+
+        Returns:
+            (user_id, serialized notification) pairs to publish after commit
+        """
+        if not items:
+            return []
+        created_at = datetime.now()
+        notifications = [
+            InAppNotification(
+                user_id=item.user_id,
+                type=item.notification_type,
+                title=item.title,
+                message=item.message,
+                data=item.data or {},
+                priority=item.priority,
+                action_url=item.action_url,
+                action_label=item.action_label,
+                created_at=created_at,
+            )
+            for item in items
+        ]
+        db.add_all(notifications)
+        db.flush()  # assign ids for the log rows
+        log_rows.extend(
+            self._log_row(item, "in_app", "created", {}, None, notification.id)
+            for item, notification in zip(items, notifications)
+        )
+        return [(n.user_id, serialize_in_app_notification(n)) for n in notifications]
+
+    @staticmethod
+    def _write_back(
+        db: Session,
+        queued: list[QueuedNotification],
+        delivered: set[int],
+        deferred: list[QueuedNotification],
+    ) -> tuple[int, int]:
+        """Persist completion, retry and deferral state in one bulk UPDATE.
+
+        Returns:
+            (processed, failed) counts
+        """
+        now = datetime.now()
+        deferred_ids = {item.id for item in deferred}
+        processed = 0
+        failed = 0
+        updates = []
+
+        for item in queued:
+            if item.id in deferred_ids:
+                updates.append({
+                    "id": item.id,
+                    "attempts": item.attempts,
+                    "last_attempt_at": item.last_attempt_at,
+                    "next_attempt_at": now + DEFER_RECHECK,
+                    "completed_at": None,
+                    "error_message": item.error_message,
+                })
+            elif item.id in delivered:
+                processed += 1
+                updates.append({
+                    "id": item.id,
+                    "attempts": item.attempts,
+                    "last_attempt_at": now,
+                    "next_attempt_at": item.next_attempt_at,
+                    "completed_at": now,
+                    "error_message": None,
+                })
+            else:
+                # Schedule retry
+                attempts = (item.attempts or 0) + 1
+                exhausted = attempts >= item.max_attempts
+                if exhausted:
+                    failed += 1
+                updates.append({
+                    "id": item.id,
+                    "attempts": attempts,
+                    "last_attempt_at": now,
+                    "next_attempt_at": now + timedelta(minutes=15 * (attempts**2)),
+                    "completed_at": now if exhausted else None,
+                    "error_message": "Max attempts reached" if exhausted else "All channels failed",
+                })
+
+        db.execute(update(QueuedNotification), updates)
+        return processed, failed
@@ -1,17 +1,29 @@
 """Service for recurring transaction operations."""
 import hashlib
+import logging
 from calendar import monthrange
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import Optional
-from uuid import uuid4
+from uuid import UUID, uuid5
 
 from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
+from ..models.monthly_report_snapshot import invalidate_report_snapshots
 from ..models.recurring_transaction import RecurringTransaction
 from ..models.transaction import Transaction
+from ..utils.db_bulk import bulk_insert_ignore, chunked
 from ..utils.transaction_hasher import generate_tx_hash
 
+logger = logging.getLogger(__name__)
+
+BULK_INSERT_CHUNK_SIZE = 500
+# Safety cap on occurrences expanded per item in one run (e.g. daily for a year)
+MAX_CATCHUP_OCCURRENCES = 366
+
+# Namespace for deterministic transfer ids of recurring occurrences
+_RECURRING_TRANSFER_NAMESPACE = UUID("6f1c2e9a-4b7d-4e8a-9c3f-2d5b8a7e1f04")
+
 
 class RecurringTransactionService:
     """Service for recurring transaction CRUD and scheduling."""
@@ -271,6 +283,12 @@ class RecurringTransactionService:
     def process_due_recurring(db: Session, target_date: Optional[date] = None) -> int:
         """Process all due recurring transactions and create actual transactions.
 
+        Every missed occurrence up to ``target_date`` is expanded in memory,
+        inserted with chunked bulk statements (skipping rows whose ``tx_hash``
+        already exists) and all schedules are advanced in the same database
+        transaction. Hashes are deterministic per (recurring, run date), so
+        running the job twice never duplicates transactions.
+
         Args:
             db: Database session
             target_date: Date to check against (defaults to today)
@@ -282,160 +300,225 @@ class RecurringTransactionService:
             target_date = date.today()
 
         # Get all active recurring transactions due on or before target_date
-        due_recurring = db.query(RecurringTransaction).filter(
-            and_(
-                RecurringTransaction.is_active == True,
-                RecurringTransaction.next_run_date <= target_date,
+        due_recurring = (
+            db.query(RecurringTransaction)
+            .options(
+                selectinload(RecurringTransaction.account),
+                selectinload(RecurringTransaction.to_account),
             )
-        ).all()
-
-        created_count = 0
+            .filter(
+                and_(
+                    RecurringTransaction.is_active == True,
+                    RecurringTransaction.next_run_date <= target_date,
+                )
+            )
+            .all()
+        )
+        if not due_recurring:
+            return 0
 
+        rows: list[dict] = []
         for recurring in due_recurring:
             try:
-                if recurring.is_transfer:
-                    count = RecurringTransactionService._create_transfer_transactions(
-                        db, recurring
-                    )
-                    created_count += count
-                else:
-                    RecurringTransactionService._create_single_transaction(
-                        db, recurring
-                    )
-                    created_count += 1
-
-                # Update recurring: set last_run_date and calculate next_run_date
-                recurring.last_run_date = recurring.next_run_date
-                recurring.next_run_date = RecurringTransactionService.calculate_next_run_date(
-                    frequency=recurring.frequency,
-                    current_date=recurring.next_run_date,
-                    interval_days=recurring.interval_days,
-                    day_of_week=recurring.day_of_week,
-                    day_of_month=recurring.day_of_month,
+                item_rows, last_run, next_run = (
+                    RecurringTransactionService._expand_occurrences(recurring, target_date)
                 )
-
             except Exception as e:
                 # Log error but continue processing other recurring transactions
-                print(f"Error processing recurring {recurring.id}: {e}")
+                logger.error(f"Error processing recurring {recurring.id}: {e}")
                 continue
 
-        db.commit()
+            rows.extend(item_rows)
+            recurring.last_run_date = last_run
+            recurring.next_run_date = next_run
+
+        # Drop rows already materialized (e.g. by create_recurring or a prior run)
+        seen: set[str] = set()
+        hashes = [row["tx_hash"] for row in rows]
+        for chunk in chunked(hashes, BULK_INSERT_CHUNK_SIZE):
+            seen.update(
+                h for (h,) in db.query(Transaction.tx_hash).filter(
+                    Transaction.tx_hash.in_(chunk)
+                )
+            )
+        new_rows = []
+        for row in rows:
+            if row["tx_hash"] not in seen:
+                seen.add(row["tx_hash"])
+                new_rows.append(row)
+
+        try:
+            created_count = bulk_insert_ignore(
+                db, Transaction, new_rows, ["tx_hash"], BULK_INSERT_CHUNK_SIZE
+            )
+            # Core inserts bypass ORM hooks; catch-up runs may backfill closed months
+            invalidate_report_snapshots(
+                db.connection(), {(row["user_id"], row["month_key"]) for row in new_rows}
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
         return created_count
 
     @staticmethod
-    def _create_single_transaction(db: Session, recurring: RecurringTransaction) -> None:
-        """Create a single (non-transfer) transaction from a recurring record."""
-        tx_hash = generate_tx_hash(
-            str(recurring.next_run_date),
-            recurring.amount if recurring.is_income else -recurring.amount,
-            recurring.description,
-            f"recurring_{recurring.id}",
-            recurring.user_id,
-        )
+    def _expand_occurrences(
+        recurring: RecurringTransaction, target_date: date
+    ) -> tuple[list[dict], Optional[date], date]:
+        """Expand every due occurrence of a recurring item up to target_date.
 
+        Returns:
+            (transaction rows, last run date, next run date)
+        """
+        rows: list[dict] = []
+        run_date = recurring.next_run_date
+        last_run = recurring.last_run_date
+        occurrences = 0
+
+        while run_date <= target_date and occurrences < MAX_CATCHUP_OCCURRENCES:
+            if recurring.end_date is None or run_date <= recurring.end_date:
+                if recurring.is_transfer:
+                    rows.extend(
+                        RecurringTransactionService._build_transfer_rows(recurring, run_date)
+                    )
+                else:
+                    rows.append(
+                        RecurringTransactionService._build_single_row(recurring, run_date)
+                    )
+            last_run = run_date
+            occurrences += 1
+            run_date = RecurringTransactionService.calculate_next_run_date(
+                frequency=recurring.frequency,
+                current_date=run_date,
+                interval_days=recurring.interval_days,
+                day_of_week=recurring.day_of_week,
+                day_of_month=recurring.day_of_month,
+                month_of_year=recurring.month_of_year,
+            )
+
+        return rows, last_run, run_date
+
+    @staticmethod
+    def _build_single_row(recurring: RecurringTransaction, run_date: date) -> dict:
+        """Build column values for a single (non-transfer) transaction."""
+        amount = recurring.amount if recurring.is_income else -recurring.amount
         source = "Recurring"
         if recurring.account:
             source = recurring.account.name
 
-        transaction = Transaction(
-            user_id=recurring.user_id,
-            date=recurring.next_run_date,
-            description=recurring.description,
-            amount=recurring.amount if recurring.is_income else -recurring.amount,
-            currency=recurring.account.currency if recurring.account else "JPY",
-            category=recurring.category,
-            source=source,
-            is_income=recurring.is_income,
-            is_transfer=False,
-            is_adjustment=False,
-            month_key=recurring.next_run_date.strftime("%Y-%m"),
-            tx_hash=tx_hash,
-            account_id=recurring.account_id,
-        )
-        db.add(transaction)
+        return {
+            "user_id": recurring.user_id,
+            "account_id": recurring.account_id,
+            "date": run_date,
+            "description": recurring.description,
+            "amount": amount,
+            "currency": recurring.account.currency if recurring.account else "JPY",
+            "category": recurring.category,
+            "source": source,
+            "is_income": recurring.is_income,
+            "is_transfer": False,
+            "is_adjustment": False,
+            "transfer_id": None,
+            "transfer_type": None,
+            "month_key": run_date.strftime("%Y-%m"),
+            "tx_hash": generate_tx_hash(
+                str(run_date),
+                amount,
+                recurring.description,
+                f"recurring_{recurring.id}",
+                recurring.user_id,
+            ),
+        }
 
     @staticmethod
-    def _create_transfer_transactions(
-        db: Session, recurring: RecurringTransaction
-    ) -> int:
-        """Create paired transfer transactions (outgoing + incoming + optional fee)."""
-        transfer_id = str(uuid4())
-        month_key = recurring.next_run_date.strftime("%Y-%m")
-        timestamp = datetime.now().timestamp()
+    def _build_transfer_rows(recurring: RecurringTransaction, run_date: date) -> list[dict]:
+        """Build column values for a transfer pair (outgoing + incoming + optional fee).
+
+        The transfer_id and hashes are derived from (recurring id, run date) so
+        the same occurrence always maps to the same rows.
+        """
+        transfer_id = str(uuid5(_RECURRING_TRANSFER_NAMESPACE, f"{recurring.id}|{run_date}"))
+        month_key = run_date.strftime("%Y-%m")
 
         from_name = recurring.account.name if recurring.account else "Unknown"
         to_name = recurring.to_account.name if recurring.to_account else "Unknown"
         from_currency = recurring.account.currency if recurring.account else "JPY"
         to_currency = recurring.to_account.currency if recurring.to_account else "JPY"
 
-        # Outgoing transaction (negative amount from source)
-        out_hash = hashlib.sha256(
-            f"{transfer_id}|out|{timestamp}".encode()
-        ).hexdigest()
-        out_tx = Transaction(
-            user_id=recurring.user_id,
-            account_id=recurring.account_id,
-            date=recurring.next_run_date,
-            description=recurring.description or f"Transfer to {to_name}",
-            amount=-recurring.amount,
-            currency=from_currency,
-            category="Transfer",
-            source=from_name,
-            is_income=False,
-            is_transfer=True,
-            transfer_id=transfer_id,
-            transfer_type="outgoing",
-            month_key=month_key,
-            tx_hash=out_hash,
-        )
-        db.add(out_tx)
-
-        # Incoming transaction (positive amount to destination)
-        in_hash = hashlib.sha256(
-            f"{transfer_id}|in|{timestamp}".encode()
-        ).hexdigest()
-        in_tx = Transaction(
-            user_id=recurring.user_id,
-            account_id=recurring.to_account_id,
-            date=recurring.next_run_date,
-            description=recurring.description or f"Transfer from {from_name}",
-            amount=recurring.amount,
-            currency=to_currency,
-            category="Transfer",
-            source=to_name,
-            is_income=True,
-            is_transfer=True,
-            transfer_id=transfer_id,
-            transfer_type="incoming",
-            month_key=month_key,
-            tx_hash=in_hash,
-        )
-        db.add(in_tx)
-
-        created = 2
+        def _hash(kind: str) -> str:
+            return hashlib.sha256(f"{transfer_id}|{kind}".encode()).hexdigest()
+
+        common = {
+            "user_id": recurring.user_id,
+            "date": run_date,
+            "is_adjustment": False,
+            "transfer_id": transfer_id,
+            "month_key": month_key,
+        }
+        rows = [
+            # Outgoing transaction (negative amount from source)
+            {
+                **common,
+                "account_id": recurring.account_id,
+                "description": recurring.description or f"Transfer to {to_name}",
+                "amount": -recurring.amount,
+                "currency": from_currency,
+                "category": "Transfer",
+                "source": from_name,
+                "is_income": False,
+                "is_transfer": True,
+                "transfer_type": "outgoing",
+                "tx_hash": _hash("out"),
+            },
+            # Incoming transaction (positive amount to destination)
+            {
+                **common,
+                "account_id": recurring.to_account_id,
+                "description": recurring.description or f"Transfer from {from_name}",
+                "amount": recurring.amount,
+                "currency": to_currency,
+                "category": "Transfer",
+                "source": to_name,
+                "is_income": True,
+                "is_transfer": True,
+                "transfer_type": "incoming",
+                "tx_hash": _hash("in"),
+            },
+        ]
 
         # Optional fee transaction
         if recurring.transfer_fee_amount and recurring.transfer_fee_amount > 0:
-            fee_hash = hashlib.sha256(
-                f"{transfer_id}|fee|{timestamp}".encode()
-            ).hexdigest()
-            fee_tx = Transaction(
-                user_id=recurring.user_id,
-                account_id=recurring.account_id,
-                date=recurring.next_run_date,
-                description="Transfer fee",
-                amount=-recurring.transfer_fee_amount,
-                currency=from_currency,
-                category="Bank Fees",
-                source=from_name,
-                is_income=False,
-                is_transfer=False,
-                transfer_id=transfer_id,
-                transfer_type="fee",
-                month_key=month_key,
-                tx_hash=fee_hash,
-            )
-            db.add(fee_tx)
-            created += 1
+            rows.append({
+                **common,
+                "account_id": recurring.account_id,
+                "description": "Transfer fee",
+                "amount": -recurring.transfer_fee_amount,
+                "currency": from_currency,
+                "category": "Bank Fees",
+                "source": from_name,
+                "is_income": False,
+                "is_transfer": False,
+                "transfer_type": "fee",
+                "tx_hash": _hash("fee"),
+            })
+
+        return rows
+
+    @staticmethod
+    def _create_single_transaction(db: Session, recurring: RecurringTransaction) -> None:
+        """Create a single (non-transfer) transaction from a recurring record."""
+        db.add(Transaction(
+            **RecurringTransactionService._build_single_row(recurring, recurring.next_run_date)
+        ))
 
-        return created
+    @staticmethod
+    def _create_transfer_transactions(
+        db: Session, recurring: RecurringTransaction
+    ) -> int:
+        """Create paired transfer transactions (outgoing + incoming + optional fee)."""
+        rows = RecurringTransactionService._build_transfer_rows(
+            recurring, recurring.next_run_date
+        )
+        db.add_all([Transaction(**row) for row in rows])
+        return len(rows)
@@ -1,17 +1,63 @@
 """Service for detecting and managing recurring transaction suggestions."""
 import hashlib
 import re
-from collections import defaultdict
 from datetime import date, timedelta
-from statistics import mean, stdev
+from functools import lru_cache
 from typing import Optional
 
+import numpy as np
 from sqlalchemy.orm import Session
 
 from ..models.dismissed_suggestion import DismissedSuggestion
 from ..models.recurring_transaction import RecurringTransaction
 from ..models.transaction import Transaction
 
+_ISO_DATE_RE = re.compile(r'\d{4}[-/]\d{2}[-/]\d{2}')  # YYYY-MM-DD
+_DMY_DATE_RE = re.compile(r'\d{2}[-/]\d{2}[-/]\d{4}')  # DD-MM-YYYY
+_MONTH_YEAR_RE = re.compile(
+    r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s*\d{4}', re.I
+)
+_TRAILING_NUMBER_RE = re.compile(r'\s+\d+$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Periodicity bands: (frequency, period_days, tolerance_days)
+_PERIODS = (
+    ("weekly", 7.0, 2.0),
+    ("biweekly", 14.0, 3.0),
+    ("monthly", 30.44, 10.0),
+    ("yearly", 365.25, 20.0),
+)
+# Yearly charges cannot reach min_occurrences inside a one-year lookback, so
+# the yearly band looks further back and accepts fewer occurrences.
+_YEARLY_LOOKBACK_DAYS = 800
+_YEARLY_MIN_OCCURRENCES = 2
+
+_PERIOD_DAYS = np.array([p[1] for p in _PERIODS])
+_PERIOD_TOLERANCE = np.array([p[2] for p in _PERIODS])
+
+# Analysis cache: (user_id, normalized_description) -> (group signature, analysis)
+# A group is only re-analyzed when its signature changes (new/edited/aged-out rows).
+_group_cache: dict[tuple[int, str], tuple[tuple, Optional[dict]]] = {}
+_GROUP_CACHE_MAX = 50_000
+
+
+@lru_cache(maxsize=16_384)
+def _normalize_cached(description: str) -> str:
+    """Normalize description for grouping (memoized)."""
+    # Lowercase
+    norm = description.lower().strip()
+
+    # Remove common date patterns
+    norm = _ISO_DATE_RE.sub('', norm)
+    norm = _DMY_DATE_RE.sub('', norm)
+    norm = _MONTH_YEAR_RE.sub('', norm)
+
+    # Remove trailing numbers (often reference IDs)
+    norm = _TRAILING_NUMBER_RE.sub('', norm)
+
+    # Normalize whitespace
+    return _WHITESPACE_RE.sub(' ', norm).strip()
+
 
 class RecurringSuggestionService:
     """Service for detecting recurring patterns in transactions."""
@@ -25,6 +71,12 @@ class RecurringSuggestionService:
     ) -> list[dict]:
         """Detect recurring transaction patterns.
 
+        Transactions are grouped by normalized description and each group is
+        analyzed on sorted NumPy arrays. Per-group results are cached and only
+        recomputed when the group's contents change. Groups too sparse for
+        ``min_occurrences`` within ``lookback_days`` are checked for a yearly
+        pattern over ``_YEARLY_LOOKBACK_DAYS`` with at least two occurrences.
+
         Args:
             db: Database session
             user_id: User ID
@@ -34,72 +86,139 @@ class RecurringSuggestionService:
         Returns:
             List of suggestion dictionaries sorted by confidence
         """
-        # Get transactions from lookback period
+        # Get only the columns the detector needs from the (yearly) lookback period
         start_date = date.today() - timedelta(days=lookback_days)
-        transactions = (
-            db.query(Transaction)
+        fetch_start = date.today() - timedelta(days=max(lookback_days, _YEARLY_LOOKBACK_DAYS))
+        rows = (
+            db.query(
+                Transaction.id,
+                Transaction.date,
+                Transaction.description,
+                Transaction.amount,
+                Transaction.category,
+                Transaction.is_income,
+            )
             .filter(
                 Transaction.user_id == user_id,
-                Transaction.date >= start_date,
+                Transaction.date >= fetch_start,
                 ~Transaction.is_transfer,
                 ~Transaction.is_adjustment,
             )
-            .order_by(Transaction.date)
+            .order_by(Transaction.date, Transaction.id)
             .all()
         )
 
-        if not transactions:
+        if not rows:
             return []
 
         # Get existing recurring descriptions (to filter out)
-        existing_recurring = db.query(RecurringTransaction).filter(
-            RecurringTransaction.user_id == user_id,
-            RecurringTransaction.is_active == True,
-        ).all()
         existing_descriptions = {
-            RecurringSuggestionService._normalize_description(r.description)
-            for r in existing_recurring
+            _normalize_cached(desc)
+            for (desc,) in db.query(RecurringTransaction.description).filter(
+                RecurringTransaction.user_id == user_id,
+                RecurringTransaction.is_active == True,
+            )
         }
 
         # Get dismissed suggestions
-        dismissed = db.query(DismissedSuggestion).filter(
-            DismissedSuggestion.user_id == user_id
-        ).all()
-        dismissed_hashes = {d.suggestion_hash for d in dismissed}
-
-        # Group transactions by normalized description
-        groups: dict[str, list[Transaction]] = defaultdict(list)
-        for txn in transactions:
-            norm_desc = RecurringSuggestionService._normalize_description(txn.description)
-            groups[norm_desc].append(txn)
-
-        # Analyze each group
+        dismissed_hashes = {
+            h for (h,) in db.query(DismissedSuggestion.suggestion_hash).filter(
+                DismissedSuggestion.user_id == user_id
+            )
+        }
+
+        # Assign an integer group code per normalized description
+        group_names: list[str] = []
+        group_index: dict[str, int] = {}
+        codes = np.empty(len(rows), dtype=np.int64)
+        for i, row in enumerate(rows):
+            norm_desc = _normalize_cached(row.description)
+            code = group_index.get(norm_desc)
+            if code is None:
+                code = group_index[norm_desc] = len(group_names)
+                group_names.append(norm_desc)
+            codes[i] = code
+
+        n = len(rows)
+        ids = np.fromiter((r.id for r in rows), dtype=np.int64, count=n)
+        ordinals = np.fromiter((r.date.toordinal() for r in rows), dtype=np.int64, count=n)
+        amounts = np.abs(np.fromiter((r.amount for r in rows), dtype=np.int64, count=n))
+
+        # Stable sort keeps date order inside each group
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(group_names))
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+
+        today = date.today()
+        start_ordinal = start_date.toordinal()
         suggestions = []
-        for norm_desc, txns in groups.items():
+        for code, norm_desc in enumerate(group_names):
             # Skip if already exists as recurring
             if norm_desc in existing_descriptions:
                 continue
 
             # Skip if not enough occurrences
-            if len(txns) < min_occurrences:
+            if counts[code] < min(min_occurrences, _YEARLY_MIN_OCCURRENCES):
                 continue
 
-            # Analyze pattern
-            suggestion = RecurringSuggestionService._analyze_group(txns, norm_desc)
-            if suggestion is None:
+            sel = order[bounds[code]:bounds[code + 1]]
+            recent = sel[ordinals[sel] >= start_ordinal]
+            yearly_only = recent.size < min_occurrences
+            if not yearly_only:
+                sel = recent
+            elif recent.size == 0 or sel.size < _YEARLY_MIN_OCCURRENCES:
                 continue
+            signature = (
+                int(counts[code]),
+                int(ids[sel].sum()),
+                int(amounts[sel].sum()),
+                int(ordinals[sel].sum()),
+            )
+            cache_key = (user_id, norm_desc)
+            cached = _group_cache.get(cache_key)
+            if cached is not None and cached[0] == signature:
+                analysis = cached[1]
+            else:
+                analysis = RecurringSuggestionService._analyze_group(
+                    ordinals[sel], amounts[sel]
+                )
+                if len(_group_cache) >= _GROUP_CACHE_MAX:
+                    _group_cache.pop(next(iter(_group_cache)))
+                _group_cache[cache_key] = (signature, analysis)
+
+            if analysis is None or (yearly_only and analysis["frequency"] != "yearly"):
+                continue
+
+            # Textual fields come from the current rows so edits are reflected
+            # even when the cached interval/amount analysis is reused.
+            categories = [rows[i].category for i in sel]
+            last_row = rows[sel[-1]]
+            analysis = {
+                **analysis,
+                "description": last_row.description,
+                "normalized_description": norm_desc,
+                "category": max(set(categories), key=categories.count),
+                "is_income": last_row.is_income,
+            }
 
             # Generate hash for this suggestion
             suggestion_hash = RecurringSuggestionService._generate_hash(
-                suggestion["description"],
-                suggestion["amount"],
-                suggestion["frequency"]
+                analysis["description"],
+                analysis["amount"],
+                analysis["frequency"]
             )
 
             # Skip if dismissed
             if suggestion_hash in dismissed_hashes:
                 continue
 
+            suggestion = {k: v for k, v in analysis.items() if not k.startswith("_")}
+            suggestion["confidence"] = RecurringSuggestionService._calculate_confidence(
+                occurrences=analysis["occurrences"],
+                interval_std=analysis["_interval_std"],
+                amount_range_pct=analysis["_amount_range_pct"],
+                recency_days=(today - date.fromisoformat(analysis["last_date"])).days,
+            )
             suggestion["hash"] = suggestion_hash
             suggestions.append(suggestion)
 
@@ -112,112 +231,100 @@ class RecurringSuggestionService:
 
         Removes dates, numbers, and normalizes whitespace.
         """
-        # Lowercase
-        norm = description.lower().strip()
-
-        # Remove common date patterns
-        norm = re.sub(r'\d{4}[-/]\d{2}[-/]\d{2}', '', norm)  # YYYY-MM-DD
-        norm = re.sub(r'\d{2}[-/]\d{2}[-/]\d{4}', '', norm)  # DD-MM-YYYY
-        norm = re.sub(r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s*\d{4}', '', norm, flags=re.I)
-
-        # Remove trailing numbers (often reference IDs)
-        norm = re.sub(r'\s+\d+$', '', norm)
+        return _normalize_cached(description)
 
-        # Normalize whitespace
-        norm = re.sub(r'\s+', ' ', norm).strip()
+    @staticmethod
+    def _periodicity_scores(intervals: np.ndarray) -> dict[str, float]:
+        """Score how well intervals fit each known period (0.0-1.0).
 
-        return norm
+        The score is the fraction of intervals within tolerance of the period.
+        """
+        hits = np.abs(intervals[None, :] - _PERIOD_DAYS[:, None]) <= _PERIOD_TOLERANCE[:, None]
+        scores = hits.mean(axis=1)
+        return {name: float(score) for (name, _, _), score in zip(_PERIODS, scores)}
 
     @staticmethod
-    def _analyze_group(txns: list[Transaction], norm_desc: str) -> Optional[dict]:
+    def _analyze_group(ordinals: np.ndarray, amounts: np.ndarray) -> Optional[dict]:
         """Analyze a group of transactions for recurring pattern.
 
-        Returns suggestion dict if pattern detected, None otherwise.
-        """
-        # Sort by date
-        sorted_txns = sorted(txns, key=lambda t: t.date)
+        Args:
+            ordinals: Date ordinals of the group, sorted ascending
+            amounts: Absolute amounts of the group, in the same order
 
+        Returns pattern dict if pattern detected, None otherwise.
+        """
         # Calculate intervals between consecutive transactions
-        intervals = []
-        for i in range(len(sorted_txns) - 1):
-            interval = (sorted_txns[i + 1].date - sorted_txns[i].date).days
-            intervals.append(interval)
-
-        if not intervals:
+        intervals = np.diff(ordinals)
+        if intervals.size == 0:
             return None
 
-        avg_interval = mean(intervals)
-        interval_std = stdev(intervals) if len(intervals) > 1 else 0
+        avg_interval = float(intervals.mean())
+        interval_std = float(intervals.std(ddof=1)) if intervals.size > 1 else 0.0
+        scores = RecurringSuggestionService._periodicity_scores(intervals)
 
         # Detect frequency
         frequency = None
         day_of_month = None
         day_of_week = None
+        month_of_year = None
+        period = None
 
         # Monthly pattern: ~30 days ±10, low variance
         if 20 <= avg_interval <= 40 and interval_std < 10:
-            frequency = "monthly"
-            # Calculate most common day of month
-            days = [t.date.day for t in sorted_txns]
-            day_of_month = max(set(days), key=days.count)
+            frequency = period = "monthly"
+            # Most common day of month
+            days = np.fromiter(
+                (date.fromordinal(o).day for o in ordinals.tolist()),
+                dtype=np.int64,
+                count=ordinals.size,
+            )
+            day_of_month = int(np.bincount(days, minlength=32).argmax())
 
         # Weekly pattern: ~7 days ±2
         elif 5 <= avg_interval <= 9 and interval_std < 3:
-            frequency = "weekly"
-            # Calculate most common day of week
-            weekdays = [t.date.weekday() for t in sorted_txns]
-            day_of_week = max(set(weekdays), key=weekdays.count)
+            frequency = period = "weekly"
+            # Most common day of week (ordinal 1 is a Monday)
+            weekdays = (ordinals - 1) % 7
+            day_of_week = int(np.bincount(weekdays, minlength=7).argmax())
 
         # Bi-weekly pattern: ~14 days ±3
         elif 11 <= avg_interval <= 17 and interval_std < 5:
             frequency = "custom"
+            period = "biweekly"
             # Will use interval_days = 14
 
+        # Yearly pattern: ~365 days ±20
+        elif 330 <= avg_interval <= 400 and interval_std < 20:
+            frequency = period = "yearly"
+            last = date.fromordinal(int(ordinals[-1]))
+            day_of_month = last.day
+            month_of_year = last.month
+
         if frequency is None:
             return None
 
         # Check amount consistency (within 15%)
-        amounts = [abs(t.amount) for t in sorted_txns]
-        avg_amount = mean(amounts)
+        avg_amount = float(amounts.mean())
         if avg_amount == 0:
             return None
 
-        amount_range = max(amounts) - min(amounts)
+        amount_range = float(amounts.max() - amounts.min())
         if amount_range / avg_amount > 0.15:
             return None  # Amounts vary too much
 
-        # Calculate confidence score (0-100)
-        confidence = RecurringSuggestionService._calculate_confidence(
-            occurrences=len(sorted_txns),
-            interval_std=interval_std,
-            amount_range_pct=amount_range / avg_amount if avg_amount > 0 else 1,
-            recency_days=(date.today() - sorted_txns[-1].date).days
-        )
-
-        # Get most common category
-        categories = [t.category for t in sorted_txns]
-        most_common_category = max(set(categories), key=categories.count)
-
-        # Get most representative description (most recent)
-        representative_desc = sorted_txns[-1].description
-
-        # Determine if income or expense
-        is_income = sorted_txns[-1].is_income
-
         return {
-            "description": representative_desc,
-            "normalized_description": norm_desc,
             "amount": round(avg_amount),
-            "category": most_common_category,
             "frequency": frequency,
             "day_of_month": day_of_month,
             "day_of_week": day_of_week,
+            "month_of_year": month_of_year,
             "interval_days": 14 if frequency == "custom" else None,
-            "is_income": is_income,
-            "occurrences": len(sorted_txns),
-            "last_date": sorted_txns[-1].date.isoformat(),
+            "occurrences": int(ordinals.size),
+            "last_date": date.fromordinal(int(ordinals[-1])).isoformat(),
             "avg_interval": round(avg_interval, 1),
-            "confidence": confidence,
+            "periodicity_score": round(scores[period], 2),
+            "_interval_std": interval_std,
+            "_amount_range_pct": amount_range / avg_amount,
         }
 
     @staticmethod
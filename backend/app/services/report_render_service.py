@@ -0,0 +1,248 @@
+"""Background PDF rendering with a content-addressed artifact cache.
+
+ReportLab rendering is CPU-bound, so PDFs are rendered in a process pool
+instead of on the API worker. Each rendered file is stored under a key
+derived from ``(user, report type, period, data version)``. Callers pass a
+cheap data version (e.g. row count and latest ``updated_at`` of the source
+rows) so a repeat download of unchanged data is a file read without building
+the payload; ``payload_version`` digests a built payload for reports that have
+no cheaper version. Any change to the data yields a new key.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "report_cache"
+)
+REPORT_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+REPORT_TYPES = ("monthly_usage", "yearly", "deductible")
+
+# Payload keys that change on every build without changing the report content
+_VOLATILE_KEYS = frozenset({"generated_at"})
+
+
+def _init_worker() -> None:
+    """Per-process setup for render workers."""
+    from .monthly_report_pdf_service import register_report_fonts
+
+    register_report_fonts()
+
+
+def _render_to_file(report_type: str, payload: dict[str, Any], path: str) -> str:
+    """Render a report PDF and write it to ``path`` (runs in a worker process)."""
+    from ..schemas.report import MonthlyUsageReportData
+    from .monthly_report_pdf_service import get_monthly_report_pdf_service
+    from .report_service import get_pdf_service
+
+    if report_type == "monthly_usage":
+        pdf_bytes = get_monthly_report_pdf_service().generate_monthly_usage_pdf(
+            MonthlyUsageReportData.model_validate(payload)
+        )
+    elif report_type == "deductible":
+        pdf_bytes = get_pdf_service().generate_deductible_report(**payload)
+    else:
+        pdf_bytes = get_pdf_service().generate_yearly_report(**payload)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(tmp_path, path)
+    return path
+
+
+@dataclass
+class RenderJob:
+    """A PDF render request and its cached artifact."""
+
+    job_id: str
+    user_id: int
+    report_type: str
+    period: str
+    path: str
+    future: Future | None = field(default=None, repr=False)
+
+    @property
+    def status(self) -> str:
+        if self.future is None or (self.future.done() and self.future.exception() is None):
+            return "done" if os.path.isfile(self.path) else "failed"
+        return "failed" if self.future.done() else "pending"
+
+    @property
+    def error(self) -> str | None:
+        if self.future is not None and self.future.done() and self.future.exception():
+            return str(self.future.exception())
+        return None
+
+
+class ReportRenderService:
+    """Renders report PDFs in a process pool and caches them on disk."""
+
+    def __init__(self, cache_dir: str = REPORT_CACHE_DIR, max_workers: int | None = None):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or settings.pdf_render_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._jobs: dict[str, RenderJob] = {}
+        # Re-entrant: a done callback may run inline while submit() holds the lock
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def payload_version(payload: dict[str, Any]) -> str:
+        """Data version of an already built payload: a digest of its content."""
+        content = {k: v for k, v in payload.items() if k not in _VOLATILE_KEYS}
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    @staticmethod
+    def cache_key(user_id: int, report_type: str, period: str, data_version: str) -> str:
+        """Content address for a report: hash of user, type, period and data version."""
+        return hashlib.sha256(
+            f"{user_id}|{report_type}|{period}|{data_version}".encode()
+        ).hexdigest()[:32]
+
+    def cache_path(self, user_id: int, job_id: str) -> str:
+        return os.path.join(self.cache_dir, str(user_id), f"{job_id}.pdf")
+
+    def cached_job(
+        self, user_id: int, report_type: str, period: str, data_version: str
+    ) -> RenderJob | None:
+        """Return the pending or finished job for this data version, if any.
+
+        Lets callers skip building the payload when the report is already
+        rendered (or rendering) for unchanged data.
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+
+        job_id = self.cache_key(user_id, report_type, period, data_version)
+        with self._lock:
+            return self._reuse(job_id, user_id, report_type, period)
+
+    def submit(
+        self,
+        user_id: int,
+        report_type: str,
+        period: str,
+        data_version: str,
+        payload: dict[str, Any],
+    ) -> RenderJob:
+        """Return a job for the report, rendering it only if not already cached."""
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unknown report type: {report_type}")
+
+        job_id = self.cache_key(user_id, report_type, period, data_version)
+        with self._lock:
+            job = self._reuse(job_id, user_id, report_type, period)
+            if job is not None:
+                return job
+            job = RenderJob(job_id, user_id, report_type, period, self.cache_path(user_id, job_id))
+            job.future = self._get_executor().submit(
+                _render_to_file, report_type, payload, job.path
+            )
+            job.future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, f))
+            self._jobs[job_id] = job
+        return job
+
+    async def render(
+        self,
+        user_id: int,
+        report_type: str,
+        period: str,
+        data_version: str,
+        payload: dict[str, Any],
+    ) -> str:
+        """Render (or reuse) a report and return the path of the PDF file."""
+        return await self.wait(self.submit(user_id, report_type, period, data_version, payload))
+
+    @staticmethod
+    async def wait(job: RenderJob) -> str:
+        """Wait for a job to finish rendering and return the path of the PDF file."""
+        if job.future is not None:
+            await asyncio.wrap_future(job.future)
+        return job.path
+
+    def get_job(self, user_id: int, job_id: str) -> RenderJob | None:
+        """Look up a job owned by ``user_id``, including artifacts from earlier runs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job if job.user_id == user_id else None
+        path = self.cache_path(user_id, job_id)
+        if os.path.isfile(path):
+            return RenderJob(job_id, user_id, "", "", path)
+        return None
+
+    def purge_cache(self, max_age_seconds: int = REPORT_CACHE_MAX_AGE_SECONDS) -> int:
+        """Delete cached PDFs that have not been used for ``max_age_seconds``."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        deleted += 1
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker
+            )
+        return self._executor
+
+    def _reuse(
+        self, job_id: str, user_id: int, report_type: str, period: str
+    ) -> RenderJob | None:
+        """Existing job or cached file for ``job_id`` (caller holds the lock)."""
+        job = self._jobs.get(job_id)
+        if job is not None and job.status != "failed":
+            return job
+        path = self.cache_path(user_id, job_id)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)  # mark as recently used for purge_cache
+        job = RenderJob(job_id, user_id, report_type, period, path)
+        self._jobs[job_id] = job
+        return job
+
+    def _finished(self, job_id: str, future: Future) -> None:
+        """Drop finished jobs from memory; the cached file is the durable result."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"PDF render job {job_id} failed: {error}")
+            return  # keep the failed job so its status can be reported
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+# Process-wide renderer shared by the report routes
+report_renderer = ReportRenderService()
@@ -1,7 +1,10 @@
 """Smart matching service for linking rewards to positions."""
 import logging
+import re
+from collections.abc import Iterable
 from typing import Optional
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
 from ..models.crypto_wallet import PositionReward
@@ -17,63 +20,183 @@ PROTOCOL_REWARD_TOKENS = {
     "retro": ["retro", "oretro"],
 }
 
+_ADDRESS_RE = re.compile(r"0x[0-9a-f]{40}")
+
+
+class PositionAttributionIndex:
+    """Lookup tables from reward/campaign attributes to a wallet's positions.
+
+    Built once from the wallet's position list; every lookup is then a dict
+    access instead of a scan over the positions. Substring rules (token in a
+    position name, position name in a Merkl reason) are resolved once per
+    distinct symbol or reason and memoized.
+
+    When several positions match, the strongest rule wins (pool address,
+    then protocol reward token, then name), and within a rule the first
+    position in the provider's order.
+    """
+
+    def __init__(self, positions: list[dict]):
+        self._by_address: dict[str, str] = {}
+        self._by_protocol_token: dict[str, str] = {}
+        self._by_protocol_id: dict[str, str] = {}
+        self._names: list[tuple[str, str]] = []
+        self._symbols: list[tuple[str, str]] = []
+        self._name_memo: dict[str, Optional[str]] = {}
+        self._reason_memo: dict[str, Optional[str]] = {}
+
+        for pos in positions:
+            position_id = pos.get("id")
+            if not position_id:
+                continue
+            address = position_id.split("-")[0].lower()
+            if address:
+                self._by_address.setdefault(address, position_id)
+
+            protocol = (pos.get("protocol") or "").lower()
+            for proto_key, tokens in PROTOCOL_REWARD_TOKENS.items():
+                if proto_key in protocol:
+                    for token in tokens:
+                        self._by_protocol_token.setdefault(token, position_id)
+
+            protocol_id = (pos.get("protocol_id") or "").lower()
+            if protocol_id:
+                self._by_protocol_id.setdefault(protocol_id, position_id)
+            name = (pos.get("name") or "").lower()
+            if name:
+                self._names.append((name, position_id))
+            symbol = (pos.get("symbol") or "").lower()
+            if symbol:
+                self._symbols.append((symbol, position_id))
+
+    def __len__(self) -> int:
+        return len(self._by_address)
+
+    def match_reward(self, token_symbol: Optional[str], campaign_id: Optional[str]) -> Optional[str]:
+        """Position id for a claimed reward, or None."""
+        campaign = (campaign_id or "").lower()
+        if campaign:
+            # Strategy 1: Campaign contains pool address
+            if campaign in self._by_address:
+                return self._by_address[campaign]
+            for address in _ADDRESS_RE.findall(campaign):
+                if address in self._by_address:
+                    return self._by_address[address]
+
+        symbol = (token_symbol or "").lower()
+        if not symbol:
+            return None
+
+        # Strategy 2: Known protocol → token mapping
+        if symbol in self._by_protocol_token:
+            return self._by_protocol_token[symbol]
+
+        # Strategy 3: Token in position name
+        if symbol not in self._name_memo:
+            self._name_memo[symbol] = next(
+                (position_id for name, position_id in self._names if symbol in name), None
+            )
+        return self._name_memo[symbol]
+
+    def match_campaign(self, campaign_reason: str) -> Optional[str]:
+        """Position id for a Merkl campaign breakdown reason, or None."""
+        reason = campaign_reason.lower()
+        if reason not in self._reason_memo:
+            self._reason_memo[reason] = self._match_reason(reason)
+        return self._reason_memo[reason]
+
+    def _match_reason(self, reason: str) -> Optional[str]:
+        # Match by pool address in reason
+        for address in _ADDRESS_RE.findall(reason):
+            if address in self._by_protocol_id:
+                return self._by_protocol_id[address]
+        for protocol_id, position_id in self._by_protocol_id.items():
+            if protocol_id in reason:
+                return position_id
+
+        # Match by pool name/symbol
+        for candidates in (self._names, self._symbols):
+            for value, position_id in candidates:
+                if value in reason:
+                    return position_id
+        return None
+
 
 class RewardMatchingService:
     """Service for matching rewards to LP positions."""
 
     @staticmethod
-    async def match_rewards_to_positions(
-        db: Session, user_id: int, wallet_address: str, chain: str = "polygon"
-    ) -> dict:
-        """Match unattributed rewards to user's positions."""
+    async def build_index(wallet_address: str, chain: str = "polygon") -> PositionAttributionIndex:
+        """Attribution index over the wallet's current positions on ``chain``."""
         positions = await ZerionApiService.get_defi_positions(wallet_address, chains=[chain])
+        return PositionAttributionIndex(positions)
 
-        unattributed = db.query(PositionReward).filter(
-            PositionReward.user_id == user_id,
-            PositionReward.is_attributed == False,  # noqa: E712
-            PositionReward.chain_id == chain
+    @staticmethod
+    async def match_rewards_to_positions(
+        db: Session,
+        user_id: int,
+        wallet_address: str,
+        chain: str = "polygon",
+        index: Optional[PositionAttributionIndex] = None,
+    ) -> dict:
+        """Match unattributed rewards to user's positions.
+
+        All pending rewards are matched in one pass over a single index and
+        written back with one bulk UPDATE.
+        """
+        if index is None:
+            index = await RewardMatchingService.build_index(wallet_address, chain)
+
+        pending = db.execute(
+            select(
+                PositionReward.id,
+                PositionReward.reward_token_symbol,
+                PositionReward.merkl_campaign_id,
+            ).where(
+                PositionReward.user_id == user_id,
+                PositionReward.is_attributed == False,  # noqa: E712
+                PositionReward.chain_id == chain,
+            )
         ).all()
 
-        matched, unmatched = 0, 0
-
-        for reward in unattributed:
-            position_id = RewardMatchingService._find_matching_position(reward, positions)
+        updates = []
+        for reward_id, token_symbol, campaign_id in pending:
+            position_id = index.match_reward(token_symbol, campaign_id)
             if position_id:
-                reward.position_id = position_id
-                reward.is_attributed = True
-                matched += 1
-            else:
-                unmatched += 1
+                updates.append({"id": reward_id, "position_id": position_id, "is_attributed": True})
 
-        db.commit()
-        return {"matched": matched, "unmatched": unmatched}
+        if updates:
+            db.execute(update(PositionReward), updates)
+            db.commit()
+        return {"matched": len(updates), "unmatched": len(pending) - len(updates)}
 
     @staticmethod
     def _find_matching_position(reward: PositionReward, positions: list[dict]) -> Optional[str]:
         """Match reward to position by token/protocol."""
-        reward_symbol = (reward.reward_token_symbol or "").lower()
-        campaign_id = (reward.merkl_campaign_id or "").lower()
-
-        for pos in positions:
-            protocol = pos.get("protocol", "").lower()
-            pos_name = pos.get("name", "").lower()
-
-            # Strategy 1: Campaign contains pool address
-            if campaign_id:
-                pos_address = pos.get("id", "").split("-")[0].lower()
-                if pos_address in campaign_id:
-                    return pos["id"]
-
-            # Strategy 2: Known protocol → token mapping
-            for proto_key, tokens in PROTOCOL_REWARD_TOKENS.items():
-                if proto_key in protocol and reward_symbol in tokens:
-                    return pos["id"]
-
-            # Strategy 3: Token in position name
-            if reward_symbol and reward_symbol in pos_name:
-                return pos["id"]
+        return PositionAttributionIndex(positions).match_reward(
+            reward.reward_token_symbol, reward.merkl_campaign_id
+        )
 
-        return None
+    @staticmethod
+    def bulk_attribute_rewards(
+        db: Session, user_id: int, reward_ids: Iterable[int], position_id: str
+    ) -> int:
+        """Attribute the user's rewards to a position in one UPDATE.
+
+        Returns:
+            Number of rewards attributed (ids not owned by the user are skipped)
+        """
+        ids = set(reward_ids)
+        if not ids:
+            return 0
+        result = db.execute(
+            update(PositionReward)
+            .where(PositionReward.id.in_(ids), PositionReward.user_id == user_id)
+            .values(position_id=position_id, is_attributed=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
 
     @staticmethod
     def manually_attribute_reward(db: Session, user_id: int, reward_id: int, position_id: str) -> bool:
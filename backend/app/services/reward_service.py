@@ -1,7 +1,7 @@
 """Reward scanning and management service."""
 import hashlib
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
@@ -10,7 +10,7 @@ from sqlalchemy.orm import Session
 
 from ..models.crypto_wallet import PositionReward, PositionCostBasis
 from ..models.transaction import Transaction
-from .polygonscan_service import PolygonscanService
+from .reward_sync_service import RewardSyncService
 
 logger = logging.getLogger(__name__)
 
@@ -83,63 +83,11 @@ class RewardService:
         """
         stats = {"scanned": 0, "new": 0, "matched": 0, "unmatched": 0}
 
-        # Calculate start block from days ago
-        start_timestamp = int((datetime.utcnow() - timedelta(days=days)).timestamp())
-        from_block = await PolygonscanService.get_block_by_timestamp(start_timestamp)
-
-        # Fetch claim events
-        claims = await PolygonscanService.get_merkl_claims(
-            wallet_address, from_block=from_block
-        )
-        stats["scanned"] = len(claims)
-
-        # Get all existing tx_hashes for this user to avoid duplicates
-        existing_hashes = set(
-            row[0] for row in db.query(PositionReward.tx_hash).filter(
-                PositionReward.user_id == user_id
-            ).all()
+        result = await RewardSyncService.sync_claims(
+            db, user_id, wallet_address, "merkl", days=days
         )
-
-        # Track tx_hashes we're adding in this batch to avoid duplicates within the batch
-        batch_hashes = set()
-
-        for claim in claims:
-            tx_hash = claim["tx_hash"]
-
-            # Skip if already in database or already in this batch
-            if tx_hash in existing_hashes or tx_hash in batch_hashes:
-                continue
-
-            # Use token info from tokentx response, fallback to lookup
-            token_symbol = claim.get("token_symbol")
-            decimals = claim.get("token_decimals", 18)
-            if not token_symbol:
-                token_info = await PolygonscanService.get_token_info(claim["token_address"])
-                token_symbol = token_info.get("symbol")
-                decimals = token_info.get("decimals", 18)
-
-            # Calculate human-readable amount
-            amount = Decimal(claim["amount_raw"]) / (Decimal(10) ** decimals)
-
-            # Create reward record
-            reward = PositionReward(
-                user_id=user_id,
-                wallet_address=wallet_address.lower(),
-                chain_id="polygon",
-                reward_token_address=claim["token_address"],
-                reward_token_symbol=token_symbol,
-                reward_amount=amount,
-                claimed_at=claim["timestamp"],
-                tx_hash=tx_hash,
-                block_number=claim["block_number"],
-                source="merkl",
-                is_attributed=False,
-            )
-            db.add(reward)
-            batch_hashes.add(tx_hash)
-            stats["new"] += 1
-
-        db.commit()
+        stats["scanned"] = result["scanned"]
+        stats["new"] = result["new"]
 
         # Run matching on new rewards if any
         if stats["new"] > 0:
@@ -165,66 +113,10 @@ class RewardService:
         Returns:
             dict with scanned, new counts
         """
-        stats = {"scanned": 0, "new": 0}
-
-        # Calculate start block from days ago
-        start_timestamp = int((datetime.utcnow() - timedelta(days=days)).timestamp())
-        from_block = await PolygonscanService.get_block_by_timestamp_eth(start_timestamp)
-
-        # Fetch claim events from Ethereum
-        claims = await PolygonscanService.get_symbiotic_claims(
-            wallet_address, from_block=from_block
+        result = await RewardSyncService.sync_claims(
+            db, user_id, wallet_address, "symbiotic", days=days
         )
-        stats["scanned"] = len(claims)
-
-        # Get all existing tx_hashes for this user to avoid duplicates
-        existing_hashes = set(
-            row[0] for row in db.query(PositionReward.tx_hash).filter(
-                PositionReward.user_id == user_id
-            ).all()
-        )
-
-        # Track tx_hashes we're adding in this batch
-        batch_hashes = set()
-
-        for claim in claims:
-            tx_hash = claim["tx_hash"]
-
-            # Skip if already in database or already in this batch
-            if tx_hash in existing_hashes or tx_hash in batch_hashes:
-                continue
-
-            # Use token info from tokentx response
-            token_symbol = claim.get("token_symbol")
-            decimals = claim.get("token_decimals", 18)
-            if not token_symbol:
-                token_info = await PolygonscanService.get_token_info(claim["token_address"])
-                token_symbol = token_info.get("symbol")
-                decimals = token_info.get("decimals", 18)
-
-            # Calculate human-readable amount
-            amount = Decimal(claim["amount_raw"]) / (Decimal(10) ** decimals)
-
-            # Create reward record - auto-attribute to wallet (staking rewards)
-            reward = PositionReward(
-                user_id=user_id,
-                wallet_address=wallet_address.lower(),
-                chain_id="eth",
-                reward_token_address=claim["token_address"],
-                reward_token_symbol=token_symbol,
-                reward_amount=amount,
-                claimed_at=claim["timestamp"],
-                tx_hash=tx_hash,
-                block_number=claim["block_number"],
-                source="symbiotic",
-                is_attributed=True,  # Auto-attribute staking rewards
-            )
-            db.add(reward)
-            batch_hashes.add(tx_hash)
-            stats["new"] += 1
-
-        db.commit()
-        return stats
+        return {"scanned": result["scanned"], "new": result["new"]}
 
     @staticmethod
     def get_all_rewards(db: Session, user_id: int) -> list[PositionReward]:
@@ -472,19 +364,44 @@ class RewardService:
 
         if not reward:
             raise ValueError(f"Reward {reward_id} not found")
+        RewardService._check_reward_linkable(reward)
+
+        # Get or create account and category
+        account = AccountService.get_or_create_crypto_income_account(db, user_id)
+        category = CategoryService.get_or_create_crypto_rewards_category(db, user_id)
+
+        transaction = RewardService._reward_transaction(reward, user_id, account.id, category.name)
+        db.add(transaction)
+        db.flush()  # Get transaction.id before commit
+
+        # Link reward to transaction
+        reward.transaction_id = transaction.id
+
+        db.commit()
+        db.refresh(transaction)
+
+        return {
+            "transaction_id": transaction.id,
+            "amount_usd": float(reward.reward_usd),
+            "message": "Transaction created successfully"
+        }
 
+    @staticmethod
+    def _check_reward_linkable(reward: PositionReward) -> None:
+        """Raise ValueError if the reward cannot become a transaction."""
         # Check if already linked
         if reward.transaction_id is not None:
-            raise ValueError(f"Reward {reward_id} already linked to transaction {reward.transaction_id}")
+            raise ValueError(f"Reward {reward.id} already linked to transaction {reward.transaction_id}")
 
         # Validate USD value exists
         if reward.reward_usd is None or reward.reward_usd <= 0:
-            raise ValueError(f"Reward {reward_id} has no USD value")
-
-        # Get or create account and category
-        account = AccountService.get_or_create_crypto_income_account(db, user_id)
-        category = CategoryService.get_or_create_crypto_rewards_category(db, user_id)
+            raise ValueError(f"Reward {reward.id} has no USD value")
 
+    @staticmethod
+    def _reward_transaction(
+        reward: PositionReward, user_id: int, account_id: int, category_name: str
+    ) -> Transaction:
+        """Income transaction for a reward (not yet added to the session)."""
         # Format transaction notes
         price_per_token = (
             float(reward.reward_usd) / float(reward.reward_amount)
@@ -503,17 +420,17 @@ class RewardService:
         month_key = tx_date.strftime("%Y-%m")
 
         # Generate unique tx_hash from reward data
-        hash_input = f"reward|{reward_id}|{reward.tx_hash}|{user_id}|{datetime.utcnow().timestamp()}"
+        hash_input = f"reward|{reward.id}|{reward.tx_hash}|{user_id}|{datetime.utcnow().timestamp()}"
         tx_hash = hashlib.sha256(hash_input.encode()).hexdigest()
 
         transaction = Transaction(
             user_id=user_id,
-            account_id=account.id,
+            account_id=account_id,
             date=tx_date,
             description=f"LP Reward: {reward.reward_token_symbol or 'Token'}",
             amount=int(float(reward.reward_usd) * 100),  # Convert to cents
             currency="USD",
-            category=category.name,
+            category=category_name,
             subcategory=None,
             source=reward.source,  # 'merkl', 'symbiotic', etc.
             payment_method=None,
@@ -525,17 +442,72 @@ class RewardService:
             tx_hash=tx_hash,
         )
 
-        db.add(transaction)
-        db.flush()  # Get transaction.id before commit
+        return transaction
 
-        # Link reward to transaction
-        reward.transaction_id = transaction.id
+    @staticmethod
+    def create_transactions_from_rewards(
+        db: Session,
+        user_id: int,
+        reward_ids: list[int]
+    ) -> dict:
+        """Create income transactions for many rewards in one commit.
 
-        db.commit()
-        db.refresh(transaction)
+        Rewards are loaded with one query and the income account and category
+        are resolved once, instead of per reward. Each reward is written in
+        its own savepoint, so one that fails is counted and the rest are kept.
 
-        return {
-            "transaction_id": transaction.id,
-            "amount_usd": float(reward.reward_usd),
-            "message": "Transaction created successfully"
+        Returns:
+            dict with created, skipped (already linked or no USD value),
+            failed (not found or could not be written) and total_usd
+        """
+        from .account_service import AccountService
+        from .category_service import CategoryService
+
+        stats = {"created": 0, "skipped": 0, "failed": 0, "total_usd": 0.0}
+        ids = list(dict.fromkeys(reward_ids))
+        rewards = {
+            reward.id: reward
+            for reward in db.query(PositionReward).filter(
+                PositionReward.id.in_(ids),
+                PositionReward.user_id == user_id
+            ).all()
         }
+        stats["failed"] = len(ids) - len(rewards)
+
+        linkable = []
+        for reward_id in ids:
+            reward = rewards.get(reward_id)
+            if reward is None:
+                continue
+            try:
+                RewardService._check_reward_linkable(reward)
+            except ValueError:
+                stats["skipped"] += 1
+                continue
+            linkable.append(reward)
+
+        if not linkable:
+            return stats
+
+        account = AccountService.get_or_create_crypto_income_account(db, user_id)
+        category = CategoryService.get_or_create_crypto_rewards_category(db, user_id)
+
+        for reward in linkable:
+            reward_id, reward_usd = reward.id, float(reward.reward_usd)
+            try:
+                with db.begin_nested():
+                    transaction = RewardService._reward_transaction(
+                        reward, user_id, account.id, category.name
+                    )
+                    db.add(transaction)
+                    db.flush()  # Assign transaction id
+                    reward.transaction_id = transaction.id
+            except Exception as e:
+                logger.warning(f"Failed to create transaction for reward {reward_id}: {e}")
+                stats["failed"] += 1
+                continue
+            stats["created"] += 1
+            stats["total_usd"] += reward_usd
+        db.commit()
+
+        return stats
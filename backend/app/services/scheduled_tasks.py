@@ -0,0 +1,421 @@
+"""Scheduled background tasks and their cron triggers.
+
+Cron triggers only enqueue work on the durable job queue (see
+``job_queue``); task handlers run in queue workers. Nightly per-user work is
+fanned out into one job per user (or per page of users, for batch engines
+such as insight generation) so it parallelizes across workers and a failure
+only retries that slice.
+
+A few jobs maintain per-process state or local files and are registered with
+``register_local_jobs`` to run in every API process instead.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from apscheduler.schedulers.base import BaseScheduler
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.transaction import Transaction
+from ..models.user import User
+from .http_client import run_with_clients
+from .job_queue import JobQueue, task
+
+logger = logging.getLogger(__name__)
+
+CRON_LEASE = "cron"
+CRON_LEASE_TTL = timedelta(seconds=90)
+CRON_LEASE_RENEW_SECONDS = 30
+
+EXPORTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "exports"
+)
+EXPORT_FILE_MAX_AGE_SECONDS = 600
+
+# Users per insight-generation job; pages run concurrently across queue workers
+INSIGHT_PAGE_SIZE = 200
+
+# (task, APScheduler cron fields); all times UTC
+CRON_TASKS: list[tuple[str, dict[str, Any]]] = [
+    ("exchange_rate_update", {"hour": 4, "minute": 0}),
+    # 00:05 JST (15:05 UTC previous day)
+    ("recurring_transactions", {"hour": 15, "minute": 5}),
+    ("defillama_pool_refresh", {"minute": 15}),
+    ("defi_snapshots", {"hour": 0, "minute": 30}),
+    ("snapshot_cleanup", {"day_of_week": "sun", "hour": 3, "minute": 0}),
+    ("anomaly_scan", {"hour": 2, "minute": 0}),
+    ("budget_monitoring", {"minute": "*/15"}),
+    ("queued_notifications", {"minute": "*/10"}),
+    ("bill_reminders", {"minute": 0}),
+    # 1st of the month at noon JST, after month close
+    ("monthly_report_snapshots", {"day": 1, "hour": 3, "minute": 0}),
+    ("insight_generation", {"hour": 7, "minute": 0}),
+    ("goal_milestones", {"hour": 9, "minute": 0}),
+    ("action_generation", {"hour": 2, "minute": 30}),
+    ("job_queue_cleanup", {"hour": 4, "minute": 30}),
+    ("provider_cache_cleanup", {"minute": 45}),
+]
+
+
+def _active_user_ids(db: Session) -> list[int]:
+    return [user_id for (user_id,) in db.query(User.id).filter(User.is_active == True)]
+
+
+def _fan_out(db: Session, task_name: str, user_ids: list[int], payload: dict[str, Any]) -> int:
+    """Queue one ``task_name`` job per user, deduplicated per parent run."""
+    run_key = payload.get("fired_at") or datetime.now().strftime("%Y%m%dT%H%M")
+    return JobQueue.enqueue_many(
+        db,
+        task_name,
+        [({"user_id": user_id}, f"{task_name}:{user_id}:{run_key}") for user_id in user_ids],
+    )
+
+
+# ── queued tasks ─────────────────────────────────────────────
+@task("exchange_rate_update")
+def exchange_rate_update(db: Session, payload: dict[str, Any]):
+    """Update exchange rates daily."""
+    from .exchange_rate_service import ExchangeRateService
+
+    result = ExchangeRateService.fetch_and_update_rates(db)
+    logger.info(f"Scheduled rate update: {result}")
+    return result
+
+
+@task("recurring_transactions", visibility_timeout=timedelta(minutes=30))
+def recurring_transactions(db: Session, payload: dict[str, Any]):
+    """Process due recurring transactions daily."""
+    from .recurring_service import RecurringTransactionService
+
+    created = RecurringTransactionService.process_due_recurring(db)
+    logger.info(f"Scheduled recurring processing: created {created} transactions")
+    return created
+
+
+@task("defillama_pool_refresh")
+def defillama_pool_refresh(db: Session, payload: dict[str, Any]):
+    """Refresh the stored DeFiLlama pool catalog hourly (conditional request)."""
+    from .defillama_service import DeFiLlamaService
+
+    result = run_with_clients(DeFiLlamaService.refresh_catalog(db))
+    logger.info(f"DeFiLlama pool refresh: {result}")
+    return result
+
+
+@task("defi_snapshots", visibility_timeout=timedelta(hours=1))
+def defi_snapshots(db: Session, payload: dict[str, Any]):
+    """Capture DeFi position snapshots daily."""
+    from .defi_snapshot_service import DefiSnapshotService
+
+    stats = run_with_clients(DefiSnapshotService.capture_all_snapshots(db))
+    logger.info(f"DeFi snapshots captured: {stats}")
+    return stats
+
+
+@task("snapshot_cleanup")
+def snapshot_cleanup(db: Session, payload: dict[str, Any]):
+    """Weekly rollup of DeFi snapshots into weekly/monthly aggregates.
+
+    Daily rows past the daily tier are deleted only after being rolled up.
+    """
+    from .defi_snapshot_service import DefiSnapshotService
+
+    return DefiSnapshotService.rollup_snapshots(db)
+
+
+@task("anomaly_scan")
+def anomaly_scan(db: Session, payload: dict[str, Any]):
+    """Fan out the daily anomaly scan to one job per active user."""
+    return _fan_out(db, "anomaly_scan_user", _active_user_ids(db), payload)
+
+
+@task("anomaly_scan_user", visibility_timeout=timedelta(minutes=10))
+def anomaly_scan_user(db: Session, payload: dict[str, Any]):
+    """Scan one user's last 90 days of transactions for anomalies."""
+    from .anomaly_detection_service import AnomalyDetectionService
+
+    user_id = payload["user_id"]
+    service = AnomalyDetectionService(db)
+    transactions = (
+        db.query(Transaction)
+        .filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= (datetime.utcnow() - timedelta(days=90)).date(),
+        )
+        .all()
+    )
+    tx_dicts = [
+        {
+            "id": tx.id,
+            "date": tx.date.isoformat(),
+            "description": tx.description,
+            "amount": tx.amount,
+            "category": tx.category,
+        }
+        for tx in transactions
+    ]
+    anomalies = service.detect_user_anomalies(user_id, tx_dicts)
+    if anomalies:
+        service.save_anomalies(user_id, anomalies)
+        logger.info(f"Anomaly scan for user {user_id}: {len(anomalies)} anomalies detected")
+    return len(anomalies)
+
+
+# Alert sends are not idempotent, so a failed run waits for the next trigger
+@task("budget_monitoring", max_attempts=1)
+def budget_monitoring(db: Session, payload: dict[str, Any]):
+    """Monitor budget thresholds."""
+    from .budget_monitoring_job import BudgetMonitoringJob
+
+    result = BudgetMonitoringJob().check_all_budgets(db)
+    logger.info(f"Budget monitoring: {result}")
+    return result
+
+
+@task("queued_notifications")
+def queued_notifications(db: Session, payload: dict[str, Any]):
+    """Process queued notifications."""
+    from .queued_notification_job import QueuedNotificationJob
+
+    result = QueuedNotificationJob().process_queue(db)
+    if result["processed"] > 0 or result["failed"] > 0:
+        logger.info(f"Queued notifications: {result}")
+    return result
+
+
+@task("bill_reminders", max_attempts=1)
+def bill_reminders(db: Session, payload: dict[str, Any]):
+    """Process bill reminder notifications hourly."""
+    from .bill_reminder_job import BillReminderJob
+
+    result = BillReminderJob().process_reminders(db)
+    if result["notified"] > 0 or result["errors"] > 0:
+        logger.info(f"Bill reminders: {result}")
+    return result
+
+
+@task("monthly_report_snapshots", visibility_timeout=timedelta(hours=2))
+def monthly_report_snapshots(db: Session, payload: dict[str, Any]):
+    """Snapshot last month's usage report for every user after month close."""
+    from .monthly_report_service import MonthlyReportService
+
+    written = MonthlyReportService.snapshot_closed_month(db)
+    logger.info(f"Monthly report snapshots: wrote {written} snapshots")
+    return written
+
+
+@task("insight_generation")
+def insight_generation(db: Session, payload: dict[str, Any]):
+    """Fan out daily insight generation to one job per page of active users."""
+    user_ids = _active_user_ids(db)
+    run_key = payload.get("fired_at") or datetime.now().strftime("%Y%m%dT%H%M")
+    pages = [
+        user_ids[i : i + INSIGHT_PAGE_SIZE] for i in range(0, len(user_ids), INSIGHT_PAGE_SIZE)
+    ]
+    return JobQueue.enqueue_many(
+        db,
+        "insight_generation_page",
+        [
+            ({"user_ids": page}, f"insight_generation_page:{index}:{run_key}")
+            for index, page in enumerate(pages)
+        ],
+    )
+
+
+@task("insight_generation_page", visibility_timeout=timedelta(minutes=15))
+def insight_generation_page(db: Session, payload: dict[str, Any]):
+    """Generate and save insights, and queue notifications, for a page of users."""
+    from .insight_generator_service import InsightGeneratorService
+
+    result = InsightGeneratorService().run_batch(db, payload["user_ids"])
+    logger.info(f"Insight generation: {result}")
+    return result
+
+
+@task("goal_milestones", visibility_timeout=timedelta(minutes=30))
+def goal_milestones(db: Session, payload: dict[str, Any]):
+    """Check every goal for newly reached milestones."""
+    from .goal_service import GoalService
+
+    milestones = GoalService.check_all_milestones(db)
+    logger.info(f"Goal milestones: {len(milestones)} reached")
+    return len(milestones)
+
+
+@task("action_generation", visibility_timeout=timedelta(hours=1))
+def action_generation(db: Session, payload: dict[str, Any]):
+    """Generate pending actions daily."""
+    from .action_generation_job import ActionGenerationJob
+
+    result = ActionGenerationJob().run(db)
+    logger.info(f"Action generation: {result}")
+    return result
+
+
+@task("job_queue_cleanup")
+def job_queue_cleanup(db: Session, payload: dict[str, Any]):
+    """Delete finished background jobs past the retention window."""
+    deleted = JobQueue.purge_finished(db)
+    if deleted:
+        logger.info(f"Job queue cleanup: deleted {deleted} finished jobs")
+    return deleted
+
+
+@task("provider_cache_cleanup")
+def provider_cache_cleanup(db: Session, payload: dict[str, Any]):
+    """Delete shared provider responses that are past their stale window."""
+    from .provider_cache import DatabaseResponseStore, provider_cache
+
+    deleted = DatabaseResponseStore.purge_expired(
+        db, provider_cache.ttl + provider_cache.stale_ttl
+    )
+    if deleted:
+        logger.info(f"Provider cache cleanup: deleted {deleted} responses")
+    return deleted
+
+
+# ── cron triggering ──────────────────────────────────────────
+def fire_cron_task(task_name: str, holder: str, session_factory=SessionLocal) -> bool:
+    """Enqueue a cron run if this process holds the cron lease.
+
+    Returns:
+        True if the run was queued by this call
+    """
+    db = session_factory()
+    try:
+        if not JobQueue.acquire_lease(db, CRON_LEASE, holder, CRON_LEASE_TTL):
+            return False
+        fired_at = datetime.utcnow().strftime("%Y%m%dT%H%M")
+        return JobQueue.enqueue(
+            db, task_name, {"fired_at": fired_at}, dedupe_key=f"cron:{task_name}:{fired_at}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to enqueue cron task {task_name}: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def renew_cron_lease(holder: str, session_factory=SessionLocal) -> bool:
+    """Keep the cron lease with the current leader between triggers."""
+    db = session_factory()
+    try:
+        return JobQueue.acquire_lease(db, CRON_LEASE, holder, CRON_LEASE_TTL)
+    except Exception as e:
+        logger.error(f"Cron lease renewal failed: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def release_cron_lease(holder: str, session_factory=SessionLocal) -> None:
+    db = session_factory()
+    try:
+        JobQueue.release_lease(db, CRON_LEASE, holder)
+    except Exception as e:
+        logger.error(f"Cron lease release failed: {e}")
+    finally:
+        db.close()
+
+
+def register_cron_triggers(scheduler: BaseScheduler, holder: str) -> None:
+    """Add the leader-elected cron triggers to ``scheduler``."""
+    for task_name, fields in CRON_TASKS:
+        scheduler.add_job(
+            fire_cron_task,
+            trigger="cron",
+            args=[task_name, holder],
+            id=f"cron_{task_name}",
+            replace_existing=True,
+            **fields,
+        )
+    scheduler.add_job(
+        renew_cron_lease,
+        trigger="interval",
+        seconds=CRON_LEASE_RENEW_SECONDS,
+        args=[holder],
+        id="cron_lease_renewal",
+        replace_existing=True,
+    )
+    logger.info(f"Cron triggers registered for {len(CRON_TASKS)} tasks")
+
+
+# ── per-process jobs ─────────────────────────────────────────
+def rate_counter_maintenance():
+    """Flush pending notification rate counters and purge expired windows."""
+    db = SessionLocal()
+    try:
+        from .notification_rate_limiter import rate_limiter
+
+        rate_limiter.flush(db)
+        rate_limiter.purge_expired(db)
+    except Exception as e:
+        logger.error(f"Rate counter maintenance failed: {e}")
+    finally:
+        db.close()
+
+
+def export_cleanup():
+    """Clean up expired export files (older than 10 minutes)."""
+    if not os.path.isdir(EXPORTS_DIR):
+        return
+    now = time.time()
+    deleted = 0
+    for filename in os.listdir(EXPORTS_DIR):
+        if not filename.endswith((".json", ".json.part")):
+            continue
+        filepath = os.path.join(EXPORTS_DIR, filename)
+        try:
+            if now - os.path.getmtime(filepath) > EXPORT_FILE_MAX_AGE_SECONDS:
+                os.remove(filepath)
+                deleted += 1
+        except FileNotFoundError:
+            pass
+    if deleted:
+        logger.info(f"Export cleanup: deleted {deleted} expired files")
+
+
+def report_cache_cleanup():
+    """Delete rendered report PDFs that have not been used for a week."""
+    try:
+        from .report_render_service import report_renderer
+
+        deleted = report_renderer.purge_cache()
+        if deleted:
+            logger.info(f"Report cache cleanup: deleted {deleted} files")
+    except Exception as e:
+        logger.error(f"Report cache cleanup failed: {e}")
+
+
+def register_local_jobs(scheduler: BaseScheduler) -> None:
+    """Add jobs that act on this process's memory or local files."""
+    # Rate counters are buffered in memory, so every process flushes its own
+    scheduler.add_job(
+        rate_counter_maintenance,
+        trigger="cron",
+        minute="5-59/10",
+        id="rate_counter_maintenance",
+        replace_existing=True,
+    )
+    # Export links and rendered PDFs live on this process's filesystem
+    scheduler.add_job(
+        export_cleanup,
+        trigger="cron",
+        minute="*/5",
+        id="export_cleanup",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        report_cache_cleanup,
+        trigger="cron",
+        hour=3,
+        minute=15,
+        id="report_cache_cleanup",
+        replace_existing=True,
+    )
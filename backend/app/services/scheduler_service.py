@@ -88,18 +88,14 @@ class SchedulerService:
     def _check_goal_milestones(self):
         """Internal method called by scheduler to check goal milestones."""
         from ..database import SessionLocal
-        from ..models.user import User
 
         db = SessionLocal()
         try:
-            users = db.query(User).all()
-            for user in users:
-                try:
-                    milestones = GoalService.check_milestones(db, user.id)
-                    if milestones:
-                        logger.info(f"User {user.id}: {len(milestones)} goal milestone(s) reached")
-                except Exception as e:
-                    logger.error(f"Error checking milestones for user {user.id}: {e}")
+            milestones = GoalService.check_all_milestones(db)
+            if milestones:
+                logger.info(f"{len(milestones)} goal milestone(s) reached")
+        except Exception as e:
+            logger.error(f"Error checking goal milestones: {e}")
         finally:
             db.close()
 
@@ -1,6 +1,7 @@
 """User category service."""
 from sqlalchemy.orm import Session
 
+from ..models.monthly_report_snapshot import invalidate_report_snapshots_for
 from ..models.user_category import UserCategory
 from ..models.transaction import Transaction
 
@@ -62,10 +63,15 @@ class UserCategoryService:
 
         # Cascade name change to transactions if name was updated
         if cascade_to_transactions and data.get('name') and data['name'] != old_name:
-            affected_count = db.query(Transaction).filter(
+            criteria = (
                 Transaction.user_id == user_id,
-                Transaction.category == old_name
-            ).update({'category': data['name']}, synchronize_session='fetch')
+                Transaction.category == old_name,
+            )
+            # Bulk updates skip the ORM hooks that drop stale report snapshots
+            invalidate_report_snapshots_for(db, *criteria)
+            affected_count = db.query(Transaction).filter(*criteria).update(
+                {'category': data['name']}, synchronize_session='fetch'
+            )
 
         db.commit()
         db.refresh(category)
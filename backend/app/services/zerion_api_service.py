@@ -7,6 +7,8 @@ from typing import Optional
 import httpx
 
 from ..config import settings
+from .http_client import http_clients
+from .provider_cache import provider_cache, wallet_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -48,36 +50,51 @@ class ZerionApiService:
     @staticmethod
     async def get_portfolio(
         wallet_address: str,
-        chains: list[str] | None = None
+        chains: list[str] | None = None,
+        force_refresh: bool = False,
+        allow_stale: bool = True,
     ) -> dict:
-        """Fetch portfolio data for a wallet.
+        """Fetch portfolio data for a wallet, served from the provider cache.
 
         Args:
             wallet_address: EVM wallet address (0x...)
             chains: Optional list of chain IDs to filter (eth, bsc, polygon)
+            force_refresh: Bypass the cache and refetch from Zerion
+            allow_stale: Accept a stale cached response (refreshed in the background)
 
         Returns:
             Portfolio data with balances per chain
         """
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Build chain filter
-                chain_filter = ""
-                if chains:
-                    zerion_chains = [CHAIN_MAPPING.get(c, c) for c in chains if c in CHAIN_MAPPING]
-                    if zerion_chains:
-                        chain_filter = f"&filter[chain_ids]={','.join(zerion_chains)}"
-
-                url = f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/positions/?currency=usd{chain_filter}"
-
-                response = await client.get(
-                    url,
-                    headers=ZerionApiService._get_headers(),
-                )
-                response.raise_for_status()
+        return await provider_cache.get(
+            wallet_cache_key(wallet_address, chains, "portfolio"),
+            lambda: ZerionApiService._fetch_portfolio(wallet_address, chains),
+            force_refresh=force_refresh,
+            allow_stale=allow_stale,
+        )
 
-                data = response.json()
-                return ZerionApiService._parse_portfolio(wallet_address, data, chains)
+    @staticmethod
+    async def _fetch_portfolio(wallet_address: str, chains: list[str] | None) -> dict:
+        """Fetch portfolio data for a wallet from Zerion."""
+        try:
+            client = http_clients.get("zerion")
+            # Build chain filter
+            chain_filter = ""
+            if chains:
+                zerion_chains = [CHAIN_MAPPING.get(c, c) for c in chains if c in CHAIN_MAPPING]
+                if zerion_chains:
+                    chain_filter = f"&filter[chain_ids]={','.join(zerion_chains)}"
+
+            url = f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/positions/?currency=usd{chain_filter}"
+
+            response = await client.get(
+                url,
+                endpoint="wallet_positions",
+                headers=ZerionApiService._get_headers(),
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            return ZerionApiService._parse_portfolio(wallet_address, data, chains)
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Zerion API error: {e.response.status_code} - {e.response.text}")
@@ -157,41 +174,56 @@ class ZerionApiService:
     @staticmethod
     async def get_defi_positions(
         wallet_address: str,
-        chains: list[str] | None = None
+        chains: list[str] | None = None,
+        force_refresh: bool = False,
+        allow_stale: bool = True,
     ) -> list[dict]:
-        """Fetch DeFi/LP positions for a wallet.
+        """Fetch DeFi/LP positions for a wallet, served from the provider cache.
 
         Args:
             wallet_address: EVM wallet address (0x...)
             chains: Optional list of chain IDs to filter
+            force_refresh: Bypass the cache and refetch from Zerion
+            allow_stale: Accept a stale cached response (refreshed in the background)
 
         Returns:
             List of DeFi positions (staking, LP, lending)
         """
+        return await provider_cache.get(
+            wallet_cache_key(wallet_address, chains, "defi_positions"),
+            lambda: ZerionApiService._fetch_defi_positions(wallet_address, chains),
+            force_refresh=force_refresh,
+            allow_stale=allow_stale,
+        )
+
+    @staticmethod
+    async def _fetch_defi_positions(wallet_address: str, chains: list[str] | None) -> list[dict]:
+        """Fetch DeFi/LP positions for a wallet from Zerion."""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Build chain filter
-                chain_filter = ""
-                if chains:
-                    zerion_chains = [CHAIN_MAPPING.get(c, c) for c in chains if c in CHAIN_MAPPING]
-                    if zerion_chains:
-                        chain_filter = f"&filter[chain_ids]={','.join(zerion_chains)}"
-
-                # Use only_complex filter to get DeFi positions only (excludes simple token balances)
-                url = (
-                    f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/positions/"
-                    f"?currency=usd&filter[positions]=only_complex&filter[trash]=only_non_trash"
-                    f"&sort=value{chain_filter}"
-                )
-
-                response = await client.get(
-                    url,
-                    headers=ZerionApiService._get_headers(),
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                return ZerionApiService._parse_defi_positions(wallet_address, data, chains)
+            client = http_clients.get("zerion")
+            # Build chain filter
+            chain_filter = ""
+            if chains:
+                zerion_chains = [CHAIN_MAPPING.get(c, c) for c in chains if c in CHAIN_MAPPING]
+                if zerion_chains:
+                    chain_filter = f"&filter[chain_ids]={','.join(zerion_chains)}"
+
+            # Use only_complex filter to get DeFi positions only (excludes simple token balances)
+            url = (
+                f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/positions/"
+                f"?currency=usd&filter[positions]=only_complex&filter[trash]=only_non_trash"
+                f"&sort=value{chain_filter}"
+            )
+
+            response = await client.get(
+                url,
+                endpoint="wallet_defi_positions",
+                headers=ZerionApiService._get_headers(),
+            )
+            response.raise_for_status()
+
+            data = response.json()
+            return ZerionApiService._parse_defi_positions(wallet_address, data, chains)
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Zerion DeFi API error: {e.response.status_code} - {e.response.text}")
@@ -286,24 +318,25 @@ class ZerionApiService:
             if not zerion_chain:
                 raise ValueError(f"Unsupported chain: {chain}")
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/transactions/"
-                params = {
-                    "currency": "usd",
-                    "filter[chain_ids]": zerion_chain,
-                    "filter[operation_types]": "receive",
-                    "page[size]": 100,
-                }
+            client = http_clients.get("zerion")
+            url = f"{ZerionApiService.BASE_URL}/wallets/{wallet_address}/transactions/"
+            params = {
+                "currency": "usd",
+                "filter[chain_ids]": zerion_chain,
+                "filter[operation_types]": "receive",
+                "page[size]": 100,
+            }
 
-                response = await client.get(
-                    url,
-                    headers=ZerionApiService._get_headers(),
-                    params=params,
-                )
-                response.raise_for_status()
+            response = await client.get(
+                url,
+                endpoint="wallet_transactions",
+                headers=ZerionApiService._get_headers(),
+                params=params,
+            )
+            response.raise_for_status()
 
-                data = response.json()
-                return ZerionApiService._parse_transfers(data, from_block)
+            data = response.json()
+            return ZerionApiService._parse_transfers(data, from_block)
 
         except httpx.HTTPStatusError as e:
             logger.error(f"Zerion transfers API error: {e.response.status_code}")
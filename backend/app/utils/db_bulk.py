@@ -0,0 +1,108 @@
+"""Dialect-aware bulk insert helpers.
+
+PostgreSQL is used in production and SQLite in development/tests; both
+support ``INSERT ... ON CONFLICT``, so bulk writes go through the matching
+dialect's ``insert`` construct.
+"""
+from collections.abc import Iterator, Sequence
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+DEFAULT_CHUNK_SIZE = 500
+
+# SQLite caps bound parameters per statement (32766 since 3.32)
+_SQLITE_MAX_PARAMS = 32000
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Yield successive slices of ``items`` with at most ``size`` elements."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def dialect_insert(db: Session, model):
+    """Return an ``insert`` construct for ``model`` matching the session's dialect."""
+    if db.get_bind().dialect.name == "postgresql":
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+
+def _effective_chunk_size(db: Session, rows: Sequence[dict], chunk_size: int) -> int:
+    """Shrink chunk size on SQLite so a statement stays under the parameter cap."""
+    if not rows or db.get_bind().dialect.name == "postgresql":
+        return chunk_size
+    return max(1, min(chunk_size, _SQLITE_MAX_PARAMS // len(rows[0])))
+
+
+def bulk_insert_ignore(
+    db: Session,
+    model,
+    rows: Sequence[dict],
+    conflict_columns: list[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Insert rows in chunked multi-row statements, skipping conflicting rows.
+
+    All row dicts must share the same keys. Runs inside the session's current
+    transaction; the caller commits.
+
+    Args:
+        db: Database session
+        model: ORM model class
+        rows: Column-value dicts to insert
+        conflict_columns: Columns of the unique index used to detect duplicates
+        chunk_size: Maximum rows per statement
+
+    Returns:
+        Number of rows actually inserted
+    """
+    inserted = 0
+    for chunk in chunked(rows, _effective_chunk_size(db, rows, chunk_size)):
+        stmt = (
+            dialect_insert(db, model)
+            .values(list(chunk))
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+        )
+        result = db.execute(stmt)
+        inserted += max(result.rowcount or 0, 0)
+    return inserted
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Sequence[dict],
+    conflict_columns: list[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Insert rows in chunked multi-row statements, updating conflicting rows.
+
+    Every non-conflict column present in the rows is overwritten with the new
+    value. All row dicts must share the same keys. Runs inside the session's
+    current transaction; the caller commits.
+
+    Args:
+        db: Database session
+        model: ORM model class
+        rows: Column-value dicts to insert or update
+        conflict_columns: Columns of the unique index used to detect existing rows
+        chunk_size: Maximum rows per statement
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    update_columns = [key for key in rows[0] if key not in conflict_columns]
+    written = 0
+    for chunk in chunked(rows, _effective_chunk_size(db, rows, chunk_size)):
+        stmt = dialect_insert(db, model).values(list(chunk))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=conflict_columns,
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+        db.execute(stmt)
+        written += len(chunk)
+    return written
@@ -0,0 +1,191 @@
+"""Background job worker.
+
+Run as a separate process with ``python -m app.worker``. Each worker claims
+jobs from the durable queue, runs up to ``job_worker_concurrency`` of them in
+parallel (each on its own session, with a heartbeat renewing its lock so long
+jobs are not reclaimed mid-run), and takes part in leader election for
+firing cron triggers. When ``embedded_job_worker`` is enabled the API
+process starts the same worker on a background thread instead.
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from .config import settings
+from .database import SessionLocal, init_db
+from .services import scheduled_tasks  # noqa: F401  (registers task handlers)
+from .services.job_queue import TASKS, JobQueue
+from .services.notification_relay import NotificationEventRelay
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL_SECONDS = 5.0
+# Renewals per visibility timeout, so a missed heartbeat or two is tolerated
+HEARTBEATS_PER_TIMEOUT = 3
+
+
+class JobWorker:
+    """Claims queued jobs and executes them on a thread pool."""
+
+    def __init__(
+        self,
+        worker_id: str | None = None,
+        concurrency: int | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        session_factory=SessionLocal,
+    ):
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        )
+        self.concurrency = concurrency or settings.job_worker_concurrency
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="job-worker"
+        )
+        self._slots = threading.Semaphore(self.concurrency)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them.
+
+        Returns:
+            Number of jobs started
+        """
+        free = 0
+        while free < self.concurrency and self._slots.acquire(blocking=False):
+            free += 1
+        if not free:
+            return 0
+
+        db = self.session_factory()
+        try:
+            jobs = [
+                (job.id, job.task, dict(job.payload or {}))
+                for job in JobQueue.claim(db, self.worker_id, free)
+            ]
+        except Exception as e:
+            logger.error(f"Job claim failed: {e}")
+            db.rollback()
+            jobs = []
+        finally:
+            db.close()
+
+        for _ in range(free - len(jobs)):
+            self._slots.release()
+        for job in jobs:
+            self._executor.submit(self._execute, *job)
+        return len(jobs)
+
+    def run_forever(self) -> None:
+        """Poll for jobs until :meth:`stop` is called."""
+        logger.info(f"Job worker {self.worker_id} started (concurrency={self.concurrency})")
+        while not self._stop.is_set():
+            if self.run_once() == 0:
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Run the worker loop on a daemon thread."""
+        self._thread = threading.Thread(
+            target=self.run_forever, name="job-worker-loop", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop claiming jobs; optionally wait for running ones to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+        self._executor.shutdown(wait=wait)
+
+    def _heartbeat(self, job_id: int, timeout: timedelta, done: threading.Event) -> None:
+        """Keep renewing a running job's lock until ``done`` is set."""
+        interval = timeout.total_seconds() / HEARTBEATS_PER_TIMEOUT
+        while not done.wait(interval):
+            db = self.session_factory()
+            try:
+                if not JobQueue.renew(db, job_id, self.worker_id, timeout):
+                    logger.warning(f"Job {job_id} lock was taken over by another worker")
+                    return
+            except Exception as e:
+                logger.error(f"Could not renew lock of job {job_id}: {e}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def _execute(self, job_id: int, task_name: str, payload: dict) -> None:
+        db = self.session_factory()
+        done = threading.Event()
+        try:
+            spec = TASKS.get(task_name)
+            if spec is None:
+                raise LookupError(f"No handler registered for task {task_name}")
+            threading.Thread(
+                target=self._heartbeat,
+                args=(job_id, spec.visibility_timeout, done),
+                name=f"job-heartbeat-{job_id}",
+                daemon=True,
+            ).start()
+            spec.handler(db, payload)
+            db.commit()
+            JobQueue.complete(db, job_id, self.worker_id)
+        except Exception as e:
+            logger.error(f"Job {job_id} ({task_name}) failed: {e}")
+            db.rollback()
+            try:
+                JobQueue.fail(db, job_id, self.worker_id, str(e))
+            except Exception as fail_error:
+                # The visibility timeout will make the job claimable again
+                logger.error(f"Could not record failure of job {job_id}: {fail_error}")
+        finally:
+            done.set()
+            db.close()
+            self._slots.release()
+
+
+def main() -> None:
+    """Entry point for a standalone worker process."""
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    init_db()
+
+    worker = JobWorker()
+    scheduler = BackgroundScheduler()
+    scheduled_tasks.register_cron_triggers(scheduler, worker.worker_id)
+    scheduled_tasks.register_local_jobs(scheduler)
+    scheduler.start()
+    # Notifications created here are streamed to clients by the API processes
+    relay = NotificationEventRelay() if settings.notification_relay_enabled else None
+    if relay is not None:
+        relay.start()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Job worker {worker.worker_id} stopping (signal {signum})")
+        worker._stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    try:
+        worker.run_forever()
+    finally:
+        scheduler.shutdown(wait=False)
+        scheduled_tasks.release_cron_lease(worker.worker_id)
+        scheduled_tasks.rate_counter_maintenance()
+        worker.stop(wait=True)
+        if relay is not None:
+            relay.stop()
+
+
+if __name__ == "__main__":
+    main()
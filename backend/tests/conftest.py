@@ -6,7 +6,8 @@ import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.models.transaction import Base
+from app.models.transaction import Base, Transaction
+from app.models.user import User
 
 
 @pytest.fixture(scope="function")
@@ -29,6 +30,43 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def create_test_user(db_session):
+    """Factory that adds a committed, active user to ``db_session``."""
+
+    def create(email: str = "test@example.com") -> User:
+        user = User(email=email, hashed_password="fake_hash", is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        db_session.refresh(user)
+        return user
+
+    return create
+
+
+@pytest.fixture
+def add_transactions(db_session):
+    """Factory that adds ``count`` committed January 2026 expenses for a user."""
+
+    def add(user_id: int, count: int) -> None:
+        for i in range(count):
+            db_session.add(Transaction(
+                user_id=user_id,
+                date=date(2026, 1, 1 + i % 28),
+                description=f"Shop {i}",
+                amount=-100 * (i + 1),
+                category="Food",
+                source="Card",
+                is_income=False,
+                is_transfer=False,
+                month_key="2026-01",
+                tx_hash=f"hash-{i}",
+            ))
+        db_session.commit()
+
+    return add
+
+
 @pytest.fixture
 def sample_transaction_data():
     """Sample transaction data for testing."""
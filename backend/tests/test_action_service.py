@@ -331,3 +331,53 @@ class TestActionService:
 
         assert created is False
         assert count == 0
+
+
+class TestBatchActionGeneration:
+    def test_batch_generates_and_respects_guards(self, db_session, monkeypatch):
+        """Candidates are found for all users at once; guarded users are skipped."""
+        from datetime import date
+
+        from app.models.transaction import Transaction
+        from app.services.action_generation_job import ActionGenerationJob
+
+        freeze_action_generator_now(monkeypatch, datetime(2026, 4, 10, 9, 0, 0))
+        monkeypatch.setattr(
+            "app.services.action_generators.generate_action_copy",
+            lambda action_type, params: (action_type, ""),
+        )
+        monkeypatch.setattr(
+            "app.services.action_generators_budget.generate_action_copy",
+            lambda action_type, params: (action_type, ""),
+        )
+        backlog = create_test_user(db_session)
+        dismissed = User(email="dismissed@example.com", hashed_password="fake_hash", is_active=True)
+        db_session.add(dismissed)
+        db_session.commit()
+        for user in (backlog, dismissed):
+            for i in range(6):
+                db_session.add(Transaction(
+                    date=date(2026, 4, 1 + i), description="Unknown", amount=-1000,
+                    category="Other", source="Bank", month_key="2026-04",
+                    tx_hash=f"{user.id}-{i}", user_id=user.id,
+                ))
+        create_test_action(db_session, dismissed.id, status="dismissed",
+                           dismissed_at=datetime.utcnow() - timedelta(days=2))
+        create_test_action(db_session, backlog.id, type="copy_or_create_budget")
+        db_session.commit()
+
+        result = ActionGenerationJob(page_size=1).run(db_session)
+
+        types = {
+            (a.user_id, a.type)
+            for a in db_session.query(PendingAction).filter(PendingAction.status == "pending")
+        }
+        assert (backlog.id, "review_uncategorized") in types
+        # Cooldown blocks the dismissed type; the active budget action is not duplicated
+        assert (dismissed.id, "review_uncategorized") not in types
+        assert (dismissed.id, "copy_or_create_budget") in types
+        assert db_session.query(PendingAction).filter_by(
+            user_id=backlog.id, type="copy_or_create_budget"
+        ).count() == 1
+        assert result["users"] == 2
+        assert result["errors"] == 0
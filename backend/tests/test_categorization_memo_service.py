@@ -0,0 +1,231 @@
+"""Tests for merchant-level memoization and chunked AI categorization."""
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.categorization_memo import CategorizationMemo
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.routes import ai_categorization
+from app.routes.ai_categorization import (
+    CategorizeSuggestionsRequest,
+    get_categorization_suggestions,
+    stream_categorization_suggestions,
+)
+from app.services.categorization_memo_service import CategorizationMemoService, merchant_key
+from app.services.claude_ai_service import ClaudeAIService
+from app.services.credit_service import CreditService
+
+
+def add_other(db, user_id, n, description):
+    tx = Transaction(
+        user_id=user_id,
+        date=date(2026, 10, 1) + timedelta(days=n),
+        description=description,
+        amount=-1000 - n,
+        category="Other",
+        source="Card",
+        is_income=False,
+        is_transfer=False,
+        month_key="2026-10",
+        tx_hash=f"memo-{n}",
+    )
+    db.add(tx)
+    return tx
+
+
+def seed_categories(db):
+    food = Category(name="Food", type="expense", is_system=True)
+    db.add(food)
+    db.flush()
+    db.add(Category(name="Groceries", type="expense", is_system=True, parent_id=food.id))
+    db.add(Category(name="Cafe", type="expense", is_system=True, parent_id=food.id))
+
+
+class FakeAI:
+    """Stands in for the async categorization call of ``ClaudeAIService``."""
+
+    def __init__(self):
+        self.calls: list[list[dict]] = []
+        self.fail_with: str | None = None
+
+    async def categorize(self, transactions, available_categories, language="ja"):
+        self.calls.append(transactions)
+        if self.fail_with and any(self.fail_with in tx["description"] for tx in transactions):
+            raise RuntimeError("overloaded")
+        results = [
+            {"id": tx["id"], "category": "Cafe" if "STARBUCKS" in tx["description"].upper() else "NEW:Pets",
+             "confidence": 0.9, "reason": "test"}
+            for tx in transactions
+        ]
+        return results, {"input_tokens": 1000, "output_tokens": 100}
+
+
+async def inline_threadpool(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    fake = FakeAI()
+    monkeypatch.setattr(ClaudeAIService, "categorize_transactions_async", fake.categorize)
+    # In-memory SQLite connections are per thread
+    monkeypatch.setattr(ai_categorization, "run_in_threadpool", inline_threadpool)
+    return fake
+
+
+def suggest(db, user, request=None):
+    return asyncio.run(get_categorization_suggestions(request or CategorizeSuggestionsRequest(), db, user))
+
+
+async def read_events(response) -> list[tuple[str, dict]]:
+    events = []
+    async for chunk in response.body_iterator:
+        event, data = chunk.strip().split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+class TestMerchantKey:
+    def test_branches_share_a_key(self):
+        assert merchant_key("スターバックス 渋谷店") == merchant_key("スターバックス 新宿西口店")
+        assert merchant_key("PayPay *LAWSON") == merchant_key("LAWSON SHIBUYA-123")
+        assert merchant_key("  ") == ""
+
+
+class TestMemoizedSuggestions:
+    def test_dedup_fan_out_and_memo_hits(self, db_session, create_test_user, fake_ai):
+        user = create_test_user()
+        seed_categories(db_session)
+        CreditService(db_session).add_credits(user.id, Decimal("5"), "purchase")
+        descriptions = ["STARBUCKS SHIBUYA", "STARBUCKS GINZA", "STARBUCKS #123", "PET SHOP", "PET SHOP 4567"]
+        for n, description in enumerate(descriptions):
+            add_other(db_session, user.id, n, description)
+        db_session.commit()
+        request = CategorizeSuggestionsRequest(limit=50, language="en")
+
+        first = suggest(db_session, user, request)
+
+        assert len(fake_ai.calls) == 1
+        assert sorted(tx["description"] for tx in fake_ai.calls[0]) == ["PET SHOP 4567", "STARBUCKS #123"]
+        assert len(first.suggestions) == 5
+        by_description = {s.description: s for s in first.suggestions}
+        assert by_description["STARBUCKS GINZA"].suggested_category == "Cafe"
+        assert by_description["PET SHOP"].is_new_category is True
+        assert first.new_categories_suggested == ["Pets"]
+        assert first.credits_used == pytest.approx(0.12)
+        assert first.cached_merchants == 0
+        assert db_session.query(CategorizationMemo).count() == 2
+
+        # A new branch of a known merchant is answered from the memo
+        add_other(db_session, user.id, 10, "STARBUCKS ROPPONGI")
+        db_session.commit()
+        second = suggest(db_session, user, request)
+
+        assert len(fake_ai.calls) == 1
+        assert len(second.suggestions) == 6
+        assert second.credits_used == 0
+        assert second.cached_merchants == 2
+
+    def test_memo_requires_no_credits(self, db_session, create_test_user, fake_ai):
+        user = create_test_user()
+        seed_categories(db_session)
+        add_other(db_session, user.id, 0, "STARBUCKS SHIBUYA")
+        CategorizationMemoService.save(db_session, user.id, {
+            "STARBUCKS": {"category": "Cafe", "is_new_category": False, "confidence": 0.8, "reason": "memo"},
+        })
+        db_session.commit()
+
+        response = suggest(db_session, user)
+        assert [s.suggested_category for s in response.suggestions] == ["Cafe"]
+        assert fake_ai.calls == []
+
+        # Uncached merchants still need credits
+        add_other(db_session, user.id, 1, "UNKNOWN MERCHANT")
+        db_session.commit()
+        with pytest.raises(HTTPException) as exc:
+            suggest(db_session, user)
+        assert exc.value.status_code == 402
+
+    def test_stale_and_invalid_memos_are_ignored(self, db_session, create_test_user):
+        user = create_test_user()
+        now = datetime(2026, 10, 19)
+        CategorizationMemoService.save(db_session, user.id, {
+            "OLD": {"category": "Cafe", "is_new_category": False, "confidence": 0.8, "reason": ""},
+        }, now=now - timedelta(days=365))
+        CategorizationMemoService.save(db_session, user.id, {
+            "GONE": {"category": "Deleted", "is_new_category": False, "confidence": 0.8, "reason": ""},
+            "PETS": {"category": "Pets", "is_new_category": True, "confidence": 0.8, "reason": ""},
+        }, now=now)
+        db_session.commit()
+
+        cached = CategorizationMemoService.get_cached(
+            db_session, user.id, ["OLD", "GONE", "PETS"], {"Cafe", "Pets"}, now=now
+        )
+        assert list(cached) == ["PETS"]
+        # The suggested category has since been created
+        assert cached["PETS"]["is_new_category"] is False
+
+
+class TestChunkedCategorization:
+    def test_chunks_are_token_and_output_bounded(self):
+        transactions = [{"id": n, "description": "X" * 30, "amount": -100} for n in range(200)]
+        chunks = ClaudeAIService.chunk_for_categorization(transactions, chunk_tokens=100)
+        assert [tx["id"] for chunk in chunks for tx in chunk] == list(range(200))
+        assert all(len(chunk) <= 5 for chunk in chunks)
+
+        # The output limit caps items even with a large token budget
+        chunks = ClaudeAIService.chunk_for_categorization(transactions, chunk_tokens=100_000)
+        assert max(len(chunk) for chunk in chunks) == 68
+
+    def test_failed_chunk_keeps_other_results(self, db_session, create_test_user, fake_ai, monkeypatch):
+        monkeypatch.setattr("app.config.settings.ai_categorization_chunk_tokens", 1)
+        user = create_test_user()
+        seed_categories(db_session)
+        CreditService(db_session).add_credits(user.id, Decimal("5"), "purchase")
+        for n, description in enumerate(["STARBUCKS SHIBUYA", "PET SHOP", "BROKEN MERCHANT", "BROKEN MERCHANT 999"]):
+            add_other(db_session, user.id, n, description)
+        db_session.commit()
+        fake_ai.fail_with = "BROKEN"
+
+        response = suggest(db_session, user)
+
+        # One chunk per merchant, all called
+        assert len(fake_ai.calls) == 3
+        assert sorted(s.description for s in response.suggestions) == ["PET SHOP", "STARBUCKS SHIBUYA"]
+        assert len(response.failed_transaction_ids) == 2
+        # Only completed chunks are charged and memoized
+        assert response.credits_used == pytest.approx(0.24)
+        assert db_session.query(CategorizationMemo).count() == 2
+
+    def test_stream_events(self, db_session, create_test_user, fake_ai, monkeypatch):
+        monkeypatch.setattr("app.config.settings.ai_categorization_chunk_tokens", 1)
+        user = create_test_user()
+        seed_categories(db_session)
+        CreditService(db_session).add_credits(user.id, Decimal("5"), "purchase")
+        add_other(db_session, user.id, 0, "STARBUCKS SHIBUYA")
+        add_other(db_session, user.id, 1, "PET SHOP")
+        CategorizationMemoService.save(db_session, user.id, {
+            "LAWSON": {"category": "Groceries", "is_new_category": False, "confidence": 0.8, "reason": "memo"},
+        })
+        add_other(db_session, user.id, 2, "LAWSON SHIBUYA-123")
+        db_session.commit()
+
+        async def run():
+            response = await stream_categorization_suggestions(
+                CategorizeSuggestionsRequest(), db_session, user
+            )
+            return await read_events(response)
+
+        events = asyncio.run(run())
+
+        assert [event for event, _ in events] == ["cached", "chunk", "chunk", "done"]
+        assert events[0][1]["suggestions"][0]["suggested_category"] == "Groceries"
+        done = events[-1][1]
+        assert done["cached_merchants"] == 1
+        assert done["new_categories_suggested"] == ["Pets"]
+        assert done["credits_used"] == pytest.approx(0.24)
@@ -1,9 +1,11 @@
 """Tests for chat service with tool calling."""
+import asyncio
 from datetime import date, timedelta
 from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 import pytest
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app.models.account import Account
@@ -11,12 +13,36 @@ from app.models.budget import Budget, BudgetAllocation
 from app.models.goal import Goal
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.services.chat_context_builder import build_financial_context, get_available_categories
+from app.services.chat_context_builder import (
+    build_financial_context,
+    estimate_tokens,
+    get_available_categories,
+)
+from app.services.chat_context_cache import chat_context_cache
 from app.services.claude_ai_service import ClaudeAIService
 from app.services.tool_executor import ToolExecutor
 from app.utils.transaction_hasher import generate_tx_hash
 
 
+@pytest.fixture(autouse=True)
+def clear_chat_context_cache():
+    """Every test uses a fresh in-memory database, so cached sections must go."""
+    chat_context_cache.clear()
+    yield
+    chat_context_cache.clear()
+
+
+def count_queries(db_session: Session) -> list[str]:
+    """Collect SQL statements issued on the session's engine."""
+    statements: list[str] = []
+
+    @event.listens_for(db_session.get_bind(), "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
 @pytest.fixture
 def sample_user(db_session: Session):
     """Create a sample user for testing."""
@@ -213,6 +239,68 @@ class TestChatContextBuilder:
         assert "Food" in context
         assert "Transportation" in context
 
+    def test_follow_up_skips_database_until_data_changes(
+        self,
+        db_session: Session,
+        sample_user: User,
+        sample_transactions,
+        sample_budget,
+        sample_goals
+    ):
+        """Unchanged data is served from cache; a commit rebuilds affected sections."""
+        first = build_financial_context(db_session, sample_user.id, days=30)
+        get_available_categories(db_session, sample_user.id)
+
+        statements = count_queries(db_session)
+        assert build_financial_context(db_session, sample_user.id, days=30) == first
+        get_available_categories(db_session, sample_user.id)
+        assert statements == []
+
+        # A goal edit only rebuilds the goals section
+        sample_goals[0].target_amount += 1
+        db_session.commit()
+        statements.clear()
+        build_financial_context(db_session, sample_user.id, days=30)
+        assert statements
+        assert not any("FROM transactions" in s and "count(" in s for s in statements)
+
+        # A new transaction invalidates the sections built from transactions
+        today = date.today()
+        db_session.add(Transaction(
+            user_id=sample_user.id,
+            date=today,
+            description="Bonus",
+            amount=123456,
+            category="Income",
+            source="Bank",
+            is_income=True,
+            is_transfer=False,
+            currency="JPY",
+            month_key=today.strftime("%Y-%m"),
+            tx_hash=generate_tx_hash(today.isoformat(), 123456, "Bonus", "Bank")
+        ))
+        db_session.commit()
+        assert "¥423,456" in build_financial_context(db_session, sample_user.id, days=30)
+
+    def test_compacts_context_to_token_budget(
+        self,
+        db_session: Session,
+        sample_user: User,
+        sample_transactions,
+        sample_budget,
+        sample_goals
+    ):
+        """A tight budget switches to the compact rendering with older weeks summarized."""
+        full = build_financial_context(db_session, sample_user.id, days=30)
+        budget = estimate_tokens(full) - 1
+
+        compact = build_financial_context(db_session, sample_user.id, days=30, max_tokens=budget)
+
+        assert estimate_tokens(compact) <= budget
+        assert "RECENT TRANSACTIONS (Last 5):" in compact
+        assert "EARLIER WEEKS" in compact
+        assert "Total Income: ¥300,000" in compact
+
     def test_get_available_categories(
         self,
         db_session: Session,
@@ -811,3 +899,94 @@ class TestClaudeAIServiceChat:
         assert response_data["action"]["type"] == "create_transaction"
         assert response_data["action"]["payload"]["amount"] == -580
         assert response_data["action"]["payload"]["category"] == "Food"
+
+
+class FakeStream:
+    """Async context manager mimicking ``AsyncAnthropic.messages.stream``."""
+
+    def __init__(self, events, final_message):
+        self.events = events
+        self.final_message = final_message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for stream_event in self.events:
+            yield stream_event
+
+    async def get_final_message(self):
+        return self.final_message
+
+
+async def inline_threadpool(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+class TestClaudeAIServiceStream:
+    """Tests for ClaudeAIService.stream_chat_with_context."""
+
+    @patch("app.services.claude_ai_service.run_in_threadpool", inline_threadpool)
+    @patch("app.services.claude_ai_service.Anthropic")
+    def test_streams_deltas_and_tool_events(
+        self,
+        mock_anthropic,
+        db_session: Session,
+        sample_user: User,
+        sample_transactions
+    ):
+        """Text deltas and tool events are forwarded, then a done event."""
+        tool_use = MagicMock(type="tool_use", id="tool_1", input={"days": 30})
+        tool_use.name = "get_transactions"
+        first = FakeStream(
+            [
+                MagicMock(type="text", text="Let me check."),
+                MagicMock(type="content_block_start", content_block=tool_use),
+            ],
+            MagicMock(
+                content=[MagicMock(type="text", text="Let me check."), tool_use],
+                usage=MagicMock(input_tokens=100, output_tokens=20),
+            ),
+        )
+        second = FakeStream(
+            [MagicMock(type="text", text="You have "), MagicMock(type="text", text="11 transactions.")],
+            MagicMock(
+                content=[MagicMock(type="text", text="You have 11 transactions.")],
+                usage=MagicMock(input_tokens=200, output_tokens=10),
+            ),
+        )
+        async_client = MagicMock()
+        async_client.messages.stream.side_effect = [first, second]
+
+        service = ClaudeAIService()
+        service._async_client = async_client
+
+        async def collect():
+            return [
+                event async for event in service.stream_chat_with_context(
+                    db=db_session,
+                    user_id=sample_user.id,
+                    messages=[{"role": "user", "content": "Show my recent transactions"}],
+                    language="en"
+                )
+            ]
+
+        events = asyncio.run(collect())
+
+        assert [name for name, _ in events] == [
+            "delta", "tool_call", "tool_result", "reset", "delta", "delta", "done"
+        ]
+        assert events[2][1] == {"id": "tool_1", "name": "get_transactions", "is_error": False}
+        done = events[-1][1]
+        assert done["response"]["message"] == "You have 11 transactions."
+        assert done["usage"] == {"input_tokens": 300, "output_tokens": 30}
+        # The follow-up turn carries the tool result and no tools
+        follow_up = async_client.messages.stream.call_args_list[1].kwargs
+        assert "tools" not in follow_up
+        assert follow_up["messages"][-1]["content"][0]["tool_use_id"] == "tool_1"
@@ -0,0 +1,162 @@
+"""Tests for DeFi snapshot capture."""
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.crypto_wallet import CryptoWallet, DefiPositionRollup, DefiPositionSnapshot
+from app.services.defi_snapshot_service import DefiSnapshotService
+from app.services.defillama_service import DeFiLlamaService, PoolCatalog
+from app.services.zerion_api_service import ZerionApiService
+from app.utils.rate_limit import AsyncTokenBucket
+
+
+def position(position_id, balance_usd, symbol="USDC"):
+    return {
+        "id": position_id,
+        "chain_id": "eth",
+        "protocol": "Aave V3",
+        "position_type": "deposit",
+        "symbol": symbol,
+        "token_name": symbol,
+        "balance": Decimal(balance_usd),
+        "balance_usd": Decimal(balance_usd),
+        "price_usd": Decimal("1"),
+    }
+
+
+class TestCaptureAllSnapshots:
+    def test_concurrent_capture_upserts_snapshots(self, db_session, create_test_user, monkeypatch):
+        user = create_test_user()
+        addresses = [f"0x{i:040x}" for i in range(4)]
+        for address in addresses:
+            db_session.add(CryptoWallet(user_id=user.id, wallet_address=address, chains=["eth"]))
+        db_session.commit()
+
+        balances = {"value": "100"}
+        in_flight = {"now": 0, "max": 0}
+
+        async def fake_positions(wallet_address, chains=None, **kwargs):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            if wallet_address == addresses[3]:
+                raise RuntimeError("provider down")
+            return [position(f"pos-{wallet_address[-1]}", balances["value"])]
+
+        async def fake_catalog(force_refresh=False):
+            return PoolCatalog([
+                {"pool": "p1", "project": "aave-v3", "symbol": "USDC", "chain": "Ethereum", "apy": 4.2}
+            ])
+
+        monkeypatch.setattr(ZerionApiService, "get_defi_positions", staticmethod(fake_positions))
+        monkeypatch.setattr(DeFiLlamaService, "get_catalog", staticmethod(fake_catalog))
+
+        stats = asyncio.run(DefiSnapshotService.capture_all_snapshots(db_session, concurrency=2))
+
+        assert stats == {"users": 1, "wallets": 4, "positions": 3, "errors": 1}
+        assert in_flight["max"] == 2
+        snapshots = db_session.query(DefiPositionSnapshot).all()
+        assert len(snapshots) == 3
+        assert all(s.protocol_apy == Decimal("4.2") for s in snapshots)
+
+        # A second run on the same day updates the rows instead of duplicating them
+        balances["value"] = "250"
+        asyncio.run(DefiSnapshotService.capture_all_snapshots(db_session, concurrency=2))
+        db_session.expire_all()
+        snapshots = db_session.query(DefiPositionSnapshot).all()
+        assert len(snapshots) == 3
+        assert {s.balance_usd for s in snapshots} == {Decimal("250")}
+
+
+def add_daily_snapshots(db, user_id, position_id, today, days, wallet="0xabc"):
+    """One snapshot per day for ``days`` days up to ``today``; balance = days ago."""
+    for days_ago in range(days):
+        db.add(DefiPositionSnapshot(
+            user_id=user_id,
+            wallet_address=wallet,
+            position_id=position_id,
+            protocol="Aave V3",
+            chain_id="eth",
+            position_type="deposit",
+            symbol="USDC",
+            balance=Decimal(days_ago),
+            balance_usd=Decimal(days_ago),
+            price_usd=Decimal("1"),
+            snapshot_date=today - timedelta(days=days_ago),
+        ))
+    db.commit()
+
+
+class TestSnapshotRollups:
+    def test_rollup_keeps_aggregates_and_trims_daily_rows(self, db_session, create_test_user):
+        user = create_test_user()
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        add_daily_snapshots(db_session, user.id, "pos-1", today, 400)
+
+        stats = DefiSnapshotService.rollup_snapshots(db_session, now=today)
+
+        cutoff = today - timedelta(days=90)
+        assert stats["deleted_daily"] == 309
+        remaining = db_session.query(DefiPositionSnapshot).all()
+        assert len(remaining) == 91
+        assert min(s.snapshot_date for s in remaining) >= cutoff
+
+        weeks = db_session.query(DefiPositionRollup).filter_by(resolution="week").all()
+        assert len(weeks) == stats["weekly"]
+        full_week = next(r for r in weeks if r.sample_count == 7)
+        assert full_week.balance_usd_max - full_week.balance_usd_min == 6
+        # Balances fall over time here, so the period's last value is its minimum
+        assert full_week.balance_usd_last == full_week.balance_usd_min
+        assert db_session.query(DefiPositionRollup).filter_by(resolution="month").count() >= 13
+
+        # A second run is a no-op for finished periods
+        again = DefiSnapshotService.rollup_snapshots(db_session, now=today)
+        assert again["deleted_daily"] == 0
+        assert db_session.query(DefiPositionRollup).filter_by(resolution="week").count() == len(weeks)
+
+    def test_year_history_reads_weekly_points(self, db_session, create_test_user):
+        user = create_test_user()
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        add_daily_snapshots(db_session, user.id, "pos-1", today, 365)
+        DefiSnapshotService.rollup_snapshots(db_session, now=today)
+
+        history = DefiSnapshotService.get_position_history(db_session, user.id, "pos-1", 365)
+
+        assert len(history.snapshots) <= 60
+        resolutions = {p.resolution for p in history.snapshots}
+        assert resolutions == {"week", "day"}
+        dates = [p.snapshot_date for p in history.snapshots]
+        assert dates == sorted(dates, reverse=True)
+        assert history.current_value_usd == Decimal("0")
+        assert history.change_30d_usd == Decimal("-30")
+
+        series = DefiSnapshotService.get_position_series(db_session, user.id, ["pos-1"])
+        assert series[0].resolution == "week"
+        assert series[0].balance_usd_max == Decimal("364")
+        assert series[-1].balance_usd == Decimal("0")
+
+    def test_wallet_performance_groups_positions(self, db_session, create_test_user):
+        user = create_test_user()
+        wallet = CryptoWallet(user_id=user.id, wallet_address="0xabc", chains=["eth"])
+        db_session.add(wallet)
+        db_session.commit()
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        add_daily_snapshots(db_session, user.id, "pos-1", today, 40)
+        add_daily_snapshots(db_session, user.id, "pos-2", today, 10)
+
+        performance = DefiSnapshotService.get_wallet_performance(db_session, user.id, wallet.id)
+
+        assert {p.position_id for p in performance.positions} == {"pos-1", "pos-2"}
+        assert performance.total_change_7d_usd == Decimal("-14")
+        assert performance.total_change_30d_usd == Decimal("-30")
+        assert performance.snapshot_count == 50
+
+
+class TestAsyncTokenBucket:
+    def test_reserve_spaces_out_requests_beyond_burst(self):
+        bucket = AsyncTokenBucket(rate=10, capacity=2)
+        delays = [bucket.reserve() for _ in range(4)]
+        assert delays[:2] == [0.0, 0.0]
+        assert 0.05 < delays[2] <= 0.1
+        assert 0.15 < delays[3] <= 0.2
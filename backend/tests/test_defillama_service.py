@@ -0,0 +1,152 @@
+"""Tests for the DeFiLlama pool catalog."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.models.defi_pool import DefiLlamaCatalogState, DefiLlamaPool
+from app.services import defillama_service
+from app.services.defillama_service import (
+    DeFiLlamaService,
+    PoolCatalog,
+    find_pool,
+    find_protocol_pools,
+)
+from app.services.http_client import PROVIDERS, ProviderClient
+
+
+def pool(pool_id, project, symbol, chain="Ethereum", apy=1.0):
+    return {"pool": pool_id, "project": project, "symbol": symbol, "chain": chain, "apy": apy}
+
+
+async def inline_threadpool(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog_state(monkeypatch):
+    monkeypatch.setattr(defillama_service, "_catalog", PoolCatalog([]))
+    monkeypatch.setattr(defillama_service, "_catalog_checked_at", 0.0)
+    monkeypatch.setattr(defillama_service, "_projects", (0, []))
+    monkeypatch.setattr(defillama_service, "_projects_checked_at", 0.0)
+    # In-memory SQLite connections are per thread
+    monkeypatch.setattr(defillama_service, "run_in_threadpool", inline_threadpool)
+
+
+def store_pools(db, pools):
+    response = httpx.Response(200, json={"data": pools})
+    DeFiLlamaService._store_catalog(db, None, response)
+
+
+class TestPoolCatalog:
+    def test_exact_symbol_beats_earlier_partial(self):
+        catalog = PoolCatalog([
+            pool("a", "uniswap-v3", "WETH-USDC-DAI"),
+            pool("b", "uniswap-v3", "WETH-USDC"),
+        ])
+        assert catalog.match("Uniswap V3", "weth-usdc", "Ethereum")["pool"] == "b"
+
+    def test_earliest_pool_wins_ties(self):
+        catalog = PoolCatalog([
+            pool("a", "aave-v3", "USDC", chain="Polygon"),
+            pool("b", "aave-v3", "USDC"),
+            pool("c", "aave-v2", "USDC"),
+        ])
+        assert catalog.match("aave", "USDC")["pool"] == "a"
+        assert catalog.match("aave", "USDC", "ethereum")["pool"] == "b"
+        assert catalog.match("Aave V2", "USDC", "Ethereum")["pool"] == "c"
+
+    def test_partial_symbol_and_misses(self):
+        catalog = PoolCatalog([pool("a", "lido", "STETH")])
+        assert catalog.match("Lido", "ETH")["pool"] == "a"
+        assert catalog.match("Lido", "USDC") is None
+        assert catalog.match("curve", "STETH") is None
+        assert catalog.match("Lido", "STETH", "Polygon") is None
+
+    def test_protocol_pools_keeps_upstream_order(self):
+        catalog = PoolCatalog([
+            pool("a", "aave-v3", "USDC"),
+            pool("b", "curve", "3CRV"),
+            pool("c", "aave-v2", "DAI", chain="Polygon"),
+        ])
+        assert [p["pool"] for p in catalog.protocol_pools("aave")] == ["a", "c"]
+        assert [p["pool"] for p in catalog.protocol_pools("aave", "Polygon")] == ["c"]
+
+
+class TestFindPool:
+    """Indexed lookups on the stored catalog match PoolCatalog semantics."""
+
+    def test_exact_symbol_beats_earlier_partial(self, db_session):
+        store_pools(db_session, [
+            pool("a", "uniswap-v3", "WETH-USDC-DAI"),
+            pool("b", "uniswap-v3", "WETH-USDC"),
+        ])
+        assert find_pool(db_session, "Uniswap V3", "weth-usdc", "Ethereum")["pool"] == "b"
+
+    def test_earliest_pool_wins_ties(self, db_session):
+        store_pools(db_session, [
+            pool("a", "aave-v3", "USDC", chain="Polygon"),
+            pool("b", "aave-v3", "USDC"),
+            pool("c", "aave-v2", "USDC"),
+        ])
+        assert find_pool(db_session, "aave", "USDC")["pool"] == "a"
+        assert find_pool(db_session, "aave", "USDC", "ethereum")["pool"] == "b"
+        assert find_pool(db_session, "Aave V2", "USDC", "Ethereum")["pool"] == "c"
+
+    def test_partial_symbol_and_misses(self, db_session):
+        store_pools(db_session, [pool("a", "lido", "STETH")])
+        assert find_pool(db_session, "Lido", "ETH")["pool"] == "a"
+        assert find_pool(db_session, "Lido", "USDC") is None
+        assert find_pool(db_session, "curve", "STETH") is None
+        assert find_pool(db_session, "Lido", "STETH", "Polygon") is None
+
+    def test_protocol_pools_keeps_upstream_order(self, db_session):
+        store_pools(db_session, [
+            pool("a", "aave-v3", "USDC"),
+            pool("b", "curve", "3CRV"),
+            pool("c", "aave-v2", "DAI", chain="Polygon"),
+        ])
+        assert [p["pool"] for p in find_protocol_pools(db_session, "aave")] == ["a", "c"]
+        assert [p["pool"] for p in find_protocol_pools(db_session, "aave", "Polygon")] == ["c"]
+
+
+class TestRefreshCatalog:
+    def test_conditional_refresh(self, db_session, monkeypatch):
+        responses = [
+            httpx.Response(
+                200,
+                json={"data": [pool("a", "aave-v3", "USDC"), pool("b", "lido", "STETH")]},
+                headers={"ETag": '"v1"'},
+            ),
+            httpx.Response(304),
+            httpx.Response(200, json={"data": [pool("b", "lido", "STETH", apy=3.5)]}),
+        ]
+        seen_etags = []
+
+        def handler(request):
+            seen_etags.append(request.headers.get("if-none-match"))
+            return responses.pop(0)
+
+        async def scenario():
+            client = ProviderClient(PROVIDERS["defillama"], transport=httpx.MockTransport(handler))
+            try:
+                first = await DeFiLlamaService.refresh_catalog(db_session, client)
+                second = await DeFiLlamaService.refresh_catalog(db_session, client)
+                third = await DeFiLlamaService.refresh_catalog(db_session, client)
+            finally:
+                await client.aclose()
+            return first, second, third
+
+        first, second, third = asyncio.run(scenario())
+
+        assert first == {"status": "updated", "pools": 2}
+        assert second == {"status": "not_modified", "pools": 2}
+        assert third == {"status": "updated", "pools": 1}
+        assert seen_etags == [None, '"v1"', '"v1"']
+        assert db_session.get(DefiLlamaCatalogState, "pools").version == 2
+
+        stored = db_session.query(DefiLlamaPool).one()
+        assert stored.pool_id == "b"
+        catalog = defillama_service.load_catalog(db_session)
+        assert catalog.version == 2
+        assert catalog.match("Lido", "STETH")["apy"] == 3.5
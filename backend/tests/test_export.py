@@ -0,0 +1,56 @@
+"""Tests for the streaming iOS JSON and delta exports."""
+import json
+from datetime import datetime, timedelta
+
+from app.models.transaction import Transaction
+from app.routes import export
+from app.routes.export import _decode_sync_token, _iter_delta_ndjson, _iter_export_json
+
+
+def read_ndjson(chunks) -> list[dict]:
+    return [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+
+
+class TestIosExport:
+    def test_full_json_export_is_valid_and_has_sync_token(self, db_session, create_test_user, add_transactions, monkeypatch):
+        monkeypatch.setattr(export, "EXPORT_BATCH_ROWS", 2)
+        user = create_test_user()
+        add_transactions(user.id, 5)
+
+        document = json.loads("".join(_iter_export_json(db_session.get_bind(), user.id)))
+
+        assert document["version"] == "1.0"
+        assert len(document["data"]["transactions"]) == 5
+        assert document["data"]["accounts"] == []
+        assert document["data"]["settings"]["currency"] == "JPY"
+        assert isinstance(_decode_sync_token(document["syncToken"]), datetime)
+
+    def test_delta_reports_changes_and_deletions(self, db_session, create_test_user, add_transactions, monkeypatch):
+        monkeypatch.setattr(export, "SYNC_TOKEN_OVERLAP", timedelta(0))
+        user = create_test_user()
+        add_transactions(user.id, 3)
+        old = datetime(2000, 1, 1)
+        db_session.query(Transaction).update({Transaction.updated_at: old})
+        db_session.commit()
+
+        changed, removed = db_session.query(Transaction).order_by(Transaction.id).limit(2).all()
+        changed.description = "Edited"
+        db_session.delete(removed)
+        db_session.commit()
+
+        lines = read_ndjson(_iter_delta_ndjson(db_session.get_bind(), user.id, old))
+
+        assert lines[0]["type"] == "meta" and lines[0]["full"] is False
+        assert [line["data"]["description"] for line in lines if line["type"] == "transaction"] == ["Edited"]
+        assert [line["id"] for line in lines if line["type"] == "deleted"] == [removed.id]
+        assert lines[-1] == {"type": "end", "transactions": 1, "deleted": 1}
+
+    def test_delta_without_token_is_full_snapshot(self, db_session, create_test_user, add_transactions):
+        user = create_test_user()
+        add_transactions(user.id, 3)
+
+        lines = read_ndjson(_iter_delta_ndjson(db_session.get_bind(), user.id, None))
+
+        assert lines[0]["full"] is True
+        assert {line["name"] for line in lines if line["type"] == "section"} >= {"accounts", "tags"}
+        assert lines[-1]["transactions"] == 3
@@ -0,0 +1,39 @@
+"""Tests for the streaming CSV export."""
+import csv
+import gzip
+import io
+from datetime import date
+
+from app.routes import export
+from app.routes.export import _gzip_chunks, _iter_csv_chunks
+
+
+def read_csv(data: bytes) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+
+
+class TestStreamingCsvExport:
+    def test_streams_rows_in_chunks(self, db_session, create_test_user, add_transactions, monkeypatch):
+        monkeypatch.setattr(export, "CSV_CHUNK_ROWS", 2)
+        user = create_test_user()
+        add_transactions(user.id, 5)
+
+        chunks = list(_iter_csv_chunks(db_session.get_bind(), user.id, None, None, None, None))
+
+        assert len(chunks) == 3
+        assert chunks[0].startswith("﻿".encode("utf-8"))
+        rows = read_csv(b"".join(chunks))
+        assert rows[0] == export.CSV_HEADER
+        assert len(rows) == 6
+        assert rows[1][4] == "expense"
+
+    def test_filters_and_gzip(self, db_session, create_test_user, add_transactions):
+        user = create_test_user()
+        add_transactions(user.id, 5)
+
+        chunks = _iter_csv_chunks(
+            db_session.get_bind(), user.id, date(2026, 1, 4), None, None, None
+        )
+        rows = read_csv(gzip.decompress(b"".join(_gzip_chunks(chunks))))
+
+        assert [r[1] for r in rows[1:]] == ["Shop 4", "Shop 3"]
@@ -317,3 +317,55 @@ class TestGoalService:
         assert progress["total_saved"] == 300000
         assert progress["needed_remaining"] == 900000
         assert progress["needed_per_month"] == 150000
+
+
+class TestCheckMilestones:
+    """Tests for the set-based milestone checker."""
+
+    @staticmethod
+    def _user(db_session: Session, email: str):
+        from app.models.user import User
+
+        user = User(email=email, hashed_password="fake_hash", is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    @staticmethod
+    def _income(db_session: Session, user_id: int, tx_date: date, amount: int):
+        db_session.add(Transaction(
+            date=tx_date,
+            description="Salary",
+            amount=amount,
+            category="Income",
+            source="Bank",
+            is_income=True,
+            month_key=tx_date.strftime("%Y-%m"),
+            tx_hash=generate_tx_hash(str(tx_date), amount, f"Salary-{user_id}", "Bank"),
+            user_id=user_id,
+        ))
+
+    def test_milestones_for_all_users(self, db_session: Session):
+        from app.models.notification import InAppNotification
+
+        saver = self._user(db_session, "saver@example.com")
+        other = self._user(db_session, "other@example.com")
+        goal = Goal(user_id=saver.id, years=1, target_amount=1000000, start_date=date(2024, 1, 1))
+        # Savings before the start date do not count
+        self._income(db_session, saver.id, date(2023, 12, 1), 900000)
+        self._income(db_session, saver.id, date(2024, 2, 1), 600000)
+        other_goal = Goal(user_id=other.id, years=3, target_amount=1000000, last_milestone_pct=25)
+        self._income(db_session, other.id, date(2024, 2, 1), 200000)
+        db_session.add_all([goal, other_goal])
+        db_session.commit()
+
+        reached = GoalService.check_all_milestones(db_session)
+
+        assert [(m["goal_id"], m["milestone_pct"]) for m in reached] == [(goal.id, 25), (goal.id, 50)]
+        db_session.refresh(goal)
+        assert goal.last_milestone_pct == 50
+        assert db_session.query(InAppNotification).filter_by(user_id=saver.id).count() == 2
+        assert db_session.query(InAppNotification).filter_by(user_id=other.id).count() == 0
+
+        # Already-notified thresholds are not repeated
+        assert GoalService.check_milestones(db_session, saver.id) == []
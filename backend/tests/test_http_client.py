@@ -0,0 +1,141 @@
+"""Tests for the shared provider HTTP clients."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.http_client import (
+    HttpClientRegistry,
+    ProviderClient,
+    ProviderConfig,
+    http_metrics,
+    run_with_clients,
+)
+from app.utils.rate_limit import AsyncTokenBucket
+
+
+def make_client(handler, **overrides):
+    config = ProviderConfig(
+        "stub", max_concurrency=overrides.pop("max_concurrency", 4),
+        requests_per_second=1000, backoff_base=0, **overrides,
+    )
+    return ProviderClient(
+        config, transport=httpx.MockTransport(handler), bucket=AsyncTokenBucket(1000, 1000)
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    http_metrics.reset()
+    yield
+    http_metrics.reset()
+
+
+class TestProviderClient:
+    def test_retries_429_and_5xx_then_succeeds(self):
+        statuses = [429, 503, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), json={"ok": True})
+
+        async def scenario():
+            client = make_client(handler)
+            try:
+                return await client.get("https://stub.test/v1/items", endpoint="items")
+            finally:
+                await client.aclose()
+
+        response = asyncio.run(scenario())
+
+        assert response.status_code == 200
+        stats = http_metrics.snapshot()["stub"]["items"]
+        assert stats["requests"] == 3
+        assert stats["errors"] == 2
+        assert stats["retries"] == 2
+
+    def test_gives_up_after_max_retries(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(500)
+
+        async def scenario():
+            client = make_client(handler, max_retries=2)
+            try:
+                return await client.get("https://stub.test/v1/items")
+            finally:
+                await client.aclose()
+
+        response = asyncio.run(scenario())
+
+        assert response.status_code == 500
+        assert len(calls) == 3
+        assert http_metrics.snapshot()["stub"]["/v1/items"]["requests"] == 3
+
+    def test_retries_transport_errors_and_reraises_last(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        async def scenario():
+            client = make_client(handler, max_retries=1)
+            try:
+                await client.get("https://stub.test/v1/items")
+            finally:
+                await client.aclose()
+
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(scenario())
+        assert http_metrics.snapshot()["stub"]["/v1/items"]["errors"] == 2
+
+    def test_concurrency_limit(self):
+        in_flight = {"now": 0, "max": 0}
+
+        async def handler(request):
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            await asyncio.sleep(0.01)
+            in_flight["now"] -= 1
+            return httpx.Response(200)
+
+        async def scenario():
+            client = make_client(handler, max_concurrency=2)
+            try:
+                await asyncio.gather(
+                    *(client.get(f"https://stub.test/v1/items/{i}") for i in range(6))
+                )
+            finally:
+                await client.aclose()
+
+        asyncio.run(scenario())
+        assert in_flight["max"] == 2
+
+
+class TestHttpClientRegistry:
+    def test_clients_are_reused_within_a_loop_and_closed_after_run(self):
+        registry = HttpClientRegistry()
+        registry.transport = httpx.MockTransport(lambda request: httpx.Response(200))
+
+        async def scenario():
+            first = registry.get("merkl")
+            assert registry.get("merkl") is first
+            await registry.close()
+            return first
+
+        client = asyncio.run(scenario())
+        assert client.client.is_closed
+
+    def test_run_with_clients_closes_loop_clients(self, monkeypatch):
+        from app.services import http_client
+
+        registry = HttpClientRegistry()
+        registry.transport = httpx.MockTransport(lambda request: httpx.Response(200))
+        monkeypatch.setattr(http_client, "http_clients", registry)
+
+        async def fetch():
+            client = registry.get("defillama")
+            await client.get("https://stub.test/pools")
+            return client
+
+        client = run_with_clients(fetch())
+        assert client.client.is_closed
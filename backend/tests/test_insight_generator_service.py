@@ -0,0 +1,63 @@
+"""Tests for batch insight generation."""
+import asyncio
+from datetime import date
+
+from app.models.budget import Budget, BudgetAllocation
+from app.models.insight import InsightCard
+from app.models.notification import QueuedNotification
+from app.models.transaction import Transaction
+from app.services.insight_generator_service import InsightGeneratorService
+from app.utils.transaction_hasher import generate_tx_hash
+
+
+def add_overspent_budget(db, user_id):
+    """An active budget far below this month's spending."""
+    today = date.today()
+    budget = Budget(user_id=user_id, month=today.strftime("%Y-%m"), monthly_income=300000)
+    db.add(budget)
+    db.flush()
+    db.add(BudgetAllocation(budget_id=budget.id, category="Food", amount=1000))
+    db.add(
+        Transaction(
+            date=today,
+            description="Groceries",
+            amount=500000,
+            category="Food",
+            source="TestSource",
+            month_key=today.strftime("%Y-%m"),
+            tx_hash=generate_tx_hash(str(today), 500000, f"Groceries-{user_id}", "TestSource"),
+            user_id=user_id,
+        )
+    )
+    db.commit()
+
+
+class TestBatchInsights:
+    def test_generate_batch_matches_single_user(self, db_session, create_test_user):
+        overspent = create_test_user()
+        quiet = create_test_user("quiet@example.com")
+        add_overspent_budget(db_session, overspent.id)
+        service = InsightGeneratorService()
+
+        batch = service.generate_batch(db_session, [overspent.id, quiet.id])
+
+        assert batch[quiet.id] == []
+        assert [i["type"] for i in batch[overspent.id]] == ["budget_warning", "forecast"]
+        assert batch[overspent.id][0]["priority"] == 1
+        single = asyncio.run(service.generate_dashboard_insights(db_session, overspent.id))
+        assert single == batch[overspent.id]
+
+    def test_run_batch_writes_cards_and_queues_notifications(self, db_session, create_test_user):
+        user = create_test_user()
+        add_overspent_budget(db_session, user.id)
+        service = InsightGeneratorService()
+
+        result = service.run_batch(db_session, [user.id])
+        assert result == {"users": 1, "insights": 2, "notifications": 1}
+        queued = db_session.query(QueuedNotification).one()
+        assert queued.notification_type == "spending_insight"
+        assert queued.title == "Budget alert"
+
+        # Unread cards are not duplicated on the next run
+        assert service.run_batch(db_session, [user.id])["insights"] == 0
+        assert db_session.query(InsightCard).count() == 2
@@ -0,0 +1,160 @@
+"""Tests for the durable background job queue and worker."""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.background_job import BackgroundJob
+from app.models.transaction import Base
+from app.services import job_queue
+from app.services.job_queue import JobQueue, task
+from app.worker import JobWorker
+
+calls: list[dict] = []
+
+
+@pytest.fixture(autouse=True)
+def test_tasks():
+    calls.clear()
+
+    @task("test_ok")
+    def ok(db, payload):
+        calls.append(payload)
+
+    @task("test_boom", max_attempts=2)
+    def boom(db, payload):
+        raise RuntimeError("boom")
+
+    @task("test_slow", visibility_timeout=timedelta(seconds=0.3))
+    def slow(db, payload):
+        time.sleep(1)
+        calls.append(payload)
+
+    yield
+    job_queue.TASKS.pop("test_ok", None)
+    job_queue.TASKS.pop("test_boom", None)
+    job_queue.TASKS.pop("test_slow", None)
+
+
+class TestJobQueue:
+    def test_enqueue_is_idempotent_per_dedupe_key(self, db_session):
+        assert JobQueue.enqueue(db_session, "test_ok", {"n": 1}, dedupe_key="k1")
+        assert not JobQueue.enqueue(db_session, "test_ok", {"n": 2}, dedupe_key="k1")
+        assert db_session.query(BackgroundJob).count() == 1
+
+    def test_unknown_task_rejected(self, db_session):
+        with pytest.raises(ValueError):
+            JobQueue.enqueue(db_session, "nope")
+
+    def test_claim_locks_jobs(self, db_session):
+        JobQueue.enqueue(db_session, "test_ok")
+
+        jobs = JobQueue.claim(db_session, "w1", 10)
+
+        assert len(jobs) == 1
+        assert jobs[0].status == "running" and jobs[0].attempts == 1
+        assert JobQueue.claim(db_session, "w2", 10) == []
+
+    def test_expired_visibility_timeout_allows_reclaim(self, db_session):
+        JobQueue.enqueue(db_session, "test_ok")
+        JobQueue.claim(db_session, "w1", 10)
+
+        later = datetime.now() + timedelta(hours=1)
+        jobs = JobQueue.claim(db_session, "w2", 10, now=later)
+
+        assert [job.locked_by for job in jobs] == ["w2"]
+        # The original worker can no longer complete it
+        JobQueue.complete(db_session, jobs[0].id, "w1")
+        db_session.refresh(jobs[0])
+        assert jobs[0].status == "running"
+
+    def test_failures_retry_then_fail(self, db_session):
+        JobQueue.enqueue(db_session, "test_boom")
+        job = JobQueue.claim(db_session, "w1", 1)[0]
+
+        JobQueue.fail(db_session, job.id, "w1", "boom")
+        db_session.refresh(job)
+        assert job.status == "queued" and job.run_at > datetime.now()
+
+        job = JobQueue.claim(db_session, "w1", 1, now=job.run_at)[0]
+        JobQueue.fail(db_session, job.id, "w1", "boom")
+        db_session.refresh(job)
+        assert job.status == "failed" and job.last_error == "boom"
+
+    def test_renew_extends_lock_for_owner_only(self, db_session):
+        JobQueue.enqueue(db_session, "test_ok")
+        job = JobQueue.claim(db_session, "w1", 1)[0]
+        later = datetime.now() + timedelta(hours=1)
+
+        assert JobQueue.renew(db_session, job.id, "w1", timedelta(minutes=15), now=later)
+        assert JobQueue.claim(db_session, "w2", 1, now=later + timedelta(minutes=5)) == []
+        assert not JobQueue.renew(db_session, job.id, "w2", timedelta(minutes=15))
+
+    def test_lease_has_single_holder(self, db_session):
+        ttl = timedelta(seconds=60)
+        assert JobQueue.acquire_lease(db_session, "cron", "a", ttl)
+        assert not JobQueue.acquire_lease(db_session, "cron", "b", ttl)
+        assert JobQueue.acquire_lease(db_session, "cron", "a", ttl)
+        assert JobQueue.acquire_lease(
+            db_session, "cron", "b", ttl, now=datetime.now() + timedelta(minutes=5)
+        )
+
+
+@pytest.fixture
+def shared_session_factory(tmp_path):
+    # Worker threads need their own connections to one database; a shared
+    # in-memory connection would interleave their transactions.
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestJobWorker:
+    def test_worker_runs_and_records_jobs(self, shared_session_factory):
+        factory = shared_session_factory
+        db_session = factory()
+        JobQueue.enqueue(db_session, "test_ok", {"n": 1})
+        JobQueue.enqueue(db_session, "test_boom")
+
+        worker = JobWorker("w1", concurrency=2, session_factory=factory)
+        assert worker.run_once() == 2
+        worker.stop(wait=True)
+
+        statuses = {job.task: job.status for job in db_session.query(BackgroundJob)}
+        assert calls == [{"n": 1}]
+        assert statuses == {"test_ok": "succeeded", "test_boom": "queued"}
+
+    def test_heartbeat_keeps_long_job_locked(self, shared_session_factory):
+        factory = shared_session_factory
+        db_session = factory()
+        JobQueue.enqueue(db_session, "test_slow", {"n": 1})
+
+        worker = JobWorker("w1", concurrency=1, session_factory=factory)
+        assert worker.run_once() == 1
+        time.sleep(0.6)
+        # Past the original visibility timeout, but the heartbeat renewed it
+        other = JobWorker("w2", concurrency=1, session_factory=factory)
+        assert other.run_once() == 0
+        worker.stop(wait=True)
+        other.stop(wait=True)
+
+        job = db_session.query(BackgroundJob).one()
+        assert calls == [{"n": 1}]
+        assert job.status == "succeeded" and job.attempts == 1
+
+
+class TestCronTriggers:
+    def test_only_leader_enqueues_cron_run(self, db_session):
+        from app.services.scheduled_tasks import fire_cron_task
+
+        factory = sessionmaker(bind=db_session.get_bind())
+
+        assert fire_cron_task("test_ok", "leader", factory)
+        assert not fire_cron_task("test_ok", "follower", factory)
+        assert not fire_cron_task("test_ok", "leader", factory)  # same minute: deduplicated
+        assert db_session.query(BackgroundJob).count() == 1
@@ -11,7 +11,10 @@ from app.models.account import Account
 from app.models.goal import Goal
 from app.models.budget import Budget, BudgetAllocation
 from app.models.exchange_rate import ExchangeRate
+from app.models.monthly_report_snapshot import MonthlyReportSnapshot
+from app.models.user_category import UserCategory
 from app.services.monthly_report_service import MonthlyReportService
+from app.services.user_category_service import UserCategoryService
 from app.utils.transaction_hasher import generate_tx_hash
 
 
@@ -261,3 +264,77 @@ class TestSavingsRate:
         db.commit()
         report = MonthlyReportService.generate_report(db, user.id, 2026, 4)
         assert report.summary.savings_rate == -50.0
+
+
+class TestReportSnapshots:
+    """Tests for closed-month report snapshots."""
+
+    def test_closed_month_served_from_snapshot(self, db, user):
+        """First read stores a snapshot that later reads reuse."""
+        _seed_jan2026(db, user.id)
+        first = MonthlyReportService.get_report(db, user.id, 2026, 1)
+
+        snapshot = db.query(MonthlyReportSnapshot).one()
+        snapshot.data = {**snapshot.data, "month_label": "Snapshot"}
+        db.commit()
+
+        assert MonthlyReportService.get_report(db, user.id, 2026, 1).month_label == "Snapshot"
+        assert first.summary.total_income == 500000
+
+    def test_transaction_edit_invalidates_snapshot(self, db, user):
+        """Changing a transaction in the month drops its snapshot."""
+        _seed_jan2026(db, user.id)
+        MonthlyReportService.snapshot_closed_month(db, 2026, 1)
+        MonthlyReportService.snapshot_closed_month(db, 2025, 12)
+        assert db.query(MonthlyReportSnapshot).count() == 2
+
+        tx = db.query(Transaction).filter(Transaction.category == "Food", Transaction.month_key == "2026-01").one()
+        tx.amount = -60000
+        db.commit()
+
+        assert [(s.year, s.month) for s in db.query(MonthlyReportSnapshot)] == [(2025, 12)]
+        report = MonthlyReportService.get_report(db, user.id, 2026, 1)
+        assert report.summary.total_expense == 195000
+
+    def test_transaction_edit_invalidates_dependent_months(self, db, user):
+        """Reports that compare against or trend over the month are dropped too."""
+        _seed_jan2026(db, user.id)
+        for month in (12, 1, 2, 3):
+            MonthlyReportService.snapshot_closed_month(db, 2025 if month == 12 else 2026, month)
+        assert db.query(MonthlyReportSnapshot).count() == 4
+
+        tx = db.query(Transaction).filter(Transaction.category == "Food", Transaction.month_key == "2025-12").one()
+        tx.amount = -55000
+        db.commit()
+
+        assert [(s.year, s.month) for s in db.query(MonthlyReportSnapshot)] == [(2026, 3)]
+
+    def test_category_rename_invalidates_snapshot(self, db, user):
+        """Bulk category renames drop snapshots of the months they touch."""
+        _seed_jan2026(db, user.id)
+        category = UserCategory(user_id=user.id, name="Food", type="expense")
+        db.add(category)
+        db.commit()
+        MonthlyReportService.snapshot_closed_month(db, 2026, 1)
+        MonthlyReportService.snapshot_closed_month(db, 2025, 11)
+
+        _, affected = UserCategoryService.update(db, user.id, category.id, {"name": "Groceries"})
+
+        assert affected == 2
+        assert [(s.year, s.month) for s in db.query(MonthlyReportSnapshot)] == [(2025, 11)]
+
+    def test_snapshot_job_skips_existing(self, db, user, other_user):
+        """The month-end job writes one snapshot per active user."""
+        _seed_jan2026(db, user.id)
+
+        assert MonthlyReportService.snapshot_closed_month(db, 2026, 1) == 2
+        assert MonthlyReportService.snapshot_closed_month(db, 2026, 1) == 0
+
+    def test_open_month_is_not_snapshotted(self, db, user):
+        """The current month is always generated live."""
+        today = date.today()
+        MonthlyReportService.get_report(db, user.id, today.year, today.month)
+
+        assert db.query(MonthlyReportSnapshot).count() == 0
+        with pytest.raises(ValueError):
+            MonthlyReportService.snapshot_closed_month(db, today.year, today.month)
@@ -0,0 +1,72 @@
+"""Tests for the in-app notification event broker and unread-count cache."""
+import asyncio
+
+from app.models.notification import InAppNotification
+from app.services.notification_events import NotificationEventBroker, format_sse
+from app.services.notification_service import NotificationService
+
+
+class TestNotificationEventBroker:
+    def test_publish_reaches_subscriber(self):
+        broker = NotificationEventBroker()
+
+        async def scenario():
+            queue = broker.subscribe(1)
+            broker.publish(1, "notification", {"id": 5})
+            broker.publish(2, "notification", {"id": 6})
+            event = await asyncio.wait_for(queue.get(), timeout=1)
+            assert queue.empty()
+            broker.unsubscribe(1, queue)
+            return event
+
+        event = asyncio.run(scenario())
+        assert event.event == "notification"
+        assert event.data == {"id": 5}
+        assert format_sse(event).startswith(f"id: {event.id}\nevent: notification\n")
+
+    def test_replay_after_last_event_id(self):
+        broker = NotificationEventBroker()
+        first = broker.publish(1, "notification", {"id": 1})
+        second = broker.publish(1, "notification", {"id": 2})
+
+        assert broker.replay(1, None) == []
+        assert broker.replay(1, str(first.id)) == [second]
+        assert broker.replay(1, str(second.id)) == []
+
+    def test_replay_requests_resync_for_unknown_ids(self):
+        broker = NotificationEventBroker()
+        broker.publish(1, "notification", {"id": 1})
+
+        assert broker.replay(1, "1") is None
+        assert broker.replay(1, "not-an-id") is None
+
+    def test_unread_count_cache(self):
+        broker = NotificationEventBroker()
+
+        assert broker.get_cached_unread_count(1) is None
+        assert broker.adjust_unread_count(1, 1) is None
+        broker.set_unread_count(1, 3)
+        assert broker.adjust_unread_count(1, 2) == 5
+        assert broker.get_cached_unread_count(1) == 5
+        broker.invalidate_unread_count(1)
+        assert broker.get_cached_unread_count(1) is None
+
+
+class TestUnreadCountCaching:
+    def test_cached_count_tracks_create_and_read(self, db_session, create_test_user, monkeypatch):
+        broker = NotificationEventBroker()
+        monkeypatch.setattr("app.services.notification_service.notification_events", broker)
+        user = create_test_user()
+        service = NotificationService()
+
+        async def scenario():
+            assert await service.get_unread_count(db_session, user.id) == 0
+            await service._create_in_app_notification(
+                db_session, user.id, "budget_alert", "Title", "Body", None, 3, None, None
+            )
+            assert broker.get_cached_unread_count(user.id) == 1
+            notification = db_session.query(InAppNotification).one()
+            await service.mark_notification_read(db_session, user.id, notification.id)
+            return await service.get_unread_count(db_session, user.id)
+
+        assert asyncio.run(scenario()) == 0
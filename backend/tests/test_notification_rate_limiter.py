@@ -0,0 +1,113 @@
+"""Tests for the sliding-window notification rate limiter."""
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.notification import NotificationRateCounter
+from app.models.user import User
+from app.services.notification_rate_limiter import GLOBAL_CHANNEL, NotificationRateLimiter
+
+WINDOW_START = datetime(2026, 1, 1, 10, 0)
+
+
+class TestNotificationRateLimiter:
+    def test_blocks_after_limit(self, db_session, create_test_user):
+        user = create_test_user()
+        limiter = NotificationRateLimiter()
+        now = WINDOW_START + timedelta(minutes=5)
+
+        for _ in range(3):
+            assert limiter.allow(db_session, user.id, "push", 3, now=now)
+            limiter.record(user.id, "push", now=now)
+
+        assert not limiter.allow(db_session, user.id, "push", 3, now=now)
+        assert limiter.allow(db_session, user.id, "email", 3, now=now)
+
+    def test_record_counts_toward_global(self, db_session, create_test_user):
+        user = create_test_user()
+        limiter = NotificationRateLimiter()
+        now = WINDOW_START + timedelta(minutes=5)
+
+        limiter.record(user.id, "push", count=2, now=now)
+        limiter.record(user.id, "email", now=now)
+
+        assert not limiter.allow(db_session, user.id, GLOBAL_CHANNEL, 3, now=now)
+
+    def test_previous_window_decays(self, db_session, create_test_user):
+        user = create_test_user()
+        limiter = NotificationRateLimiter()
+
+        limiter.record(user.id, "push", count=4, now=WINDOW_START + timedelta(minutes=50))
+
+        # 15 min into the next window: 4 * 0.75 = 3 remaining in the sliding window
+        early = WINDOW_START + timedelta(minutes=75)
+        assert not limiter.allow(db_session, user.id, "push", 3, now=early)
+        # 45 min in: 4 * 0.25 = 1
+        late = WINDOW_START + timedelta(minutes=105)
+        assert limiter.allow(db_session, user.id, "push", 3, now=late)
+
+    def test_flush_persists_and_other_worker_sees_counts(self, db_session, create_test_user):
+        user = create_test_user()
+        now = WINDOW_START + timedelta(minutes=5)
+        worker_a = NotificationRateLimiter()
+        worker_b = NotificationRateLimiter()
+
+        worker_a.record(user.id, "push", count=3, now=now)
+        assert worker_a.flush(db_session) == 2
+
+        row = db_session.query(NotificationRateCounter).filter_by(
+            user_id=user.id, channel="push"
+        ).one()
+        assert row.count == 3
+        assert not worker_b.allow(db_session, user.id, "push", 3, now=now)
+
+    def test_flush_accumulates_across_batches(self, db_session, create_test_user):
+        user = create_test_user()
+        now = WINDOW_START + timedelta(minutes=5)
+        limiter = NotificationRateLimiter()
+
+        limiter.record(user.id, "email", now=now)
+        limiter.flush(db_session)
+        limiter.record(user.id, "email", now=now)
+        limiter.flush(db_session)
+
+        row = db_session.query(NotificationRateCounter).filter_by(
+            user_id=user.id, channel=GLOBAL_CHANNEL
+        ).one()
+        assert row.count == 2
+
+    def test_due_flush_uses_own_session(self, db_session, create_test_user):
+        user = create_test_user()
+        now = WINDOW_START + timedelta(minutes=5)
+        limiter = NotificationRateLimiter(
+            flush_batch_size=1,
+            session_factory=sessionmaker(bind=db_session.get_bind()),
+        )
+        pending = User(email="pending@example.com", hashed_password="fake_hash")
+        db_session.add(pending)
+
+        limiter.record(user.id, "push", now=now)
+
+        # The caller's uncommitted work is neither committed nor rolled back
+        assert pending in db_session.new
+        assert db_session.query(NotificationRateCounter).count() == 2
+
+    def test_record_without_factory_waits_for_flush(self, db_session, create_test_user):
+        user = create_test_user()
+        limiter = NotificationRateLimiter(flush_batch_size=1)
+
+        limiter.record(user.id, "push", now=WINDOW_START)
+
+        assert db_session.query(NotificationRateCounter).count() == 0
+        assert limiter.flush(db_session) == 2
+
+    def test_purge_expired(self, db_session, create_test_user):
+        user = create_test_user()
+        limiter = NotificationRateLimiter()
+        limiter.record(user.id, "push", now=WINDOW_START)
+        limiter.flush(db_session)
+
+        deleted = limiter.purge_expired(db_session, now=WINDOW_START + timedelta(hours=3))
+
+        assert deleted == 2
+        assert db_session.query(NotificationRateCounter).count() == 0
@@ -0,0 +1,80 @@
+"""Tests for relaying notification stream events between processes."""
+from datetime import datetime, timedelta
+
+from app.models.notification import NotificationStreamEvent
+from app.services.notification_events import NotificationEventBroker
+from app.services.notification_relay import NotificationEventRelay
+
+
+def make_relay(origin):
+    broker = NotificationEventBroker()
+    broker.enable_relay()
+    return NotificationEventRelay(broker=broker, origin=origin, interval=1)
+
+
+class TestNotificationEventRelay:
+    def test_events_reach_other_process(self, db_session, create_test_user):
+        user = create_test_user()
+        worker, api = make_relay("worker"), make_relay("api")
+        worker.sync_once(db_session)
+        api.sync_once(db_session)
+        api.broker.set_unread_count(user.id, 2)
+
+        worker.broker.publish(user.id, "notification", {"id": 7})
+        worker.sync_once(db_session)
+
+        assert api.sync_once(db_session) == 1
+        events = api.broker.replay(user.id, str(api.broker._first_id - 1))
+        assert [(e.event, e.data) for e in events] == [
+            ("notification", {"id": 7}),
+            ("unread_count", {"count": 3}),
+        ]
+        assert api.broker.get_cached_unread_count(user.id) == 3
+        # Applied events are neither re-applied nor relayed back
+        assert api.sync_once(db_session) == 0
+        assert worker.sync_once(db_session) == 0
+        assert db_session.query(NotificationStreamEvent).count() == 1
+
+    def test_authoritative_count_replaces_cache(self, db_session, create_test_user):
+        user = create_test_user()
+        worker, api = make_relay("worker"), make_relay("api")
+        api.sync_once(db_session)
+        api.broker.set_unread_count(user.id, 5)
+
+        worker.broker.publish(user.id, "unread_count", {"count": 0})
+        worker.broker.publish(user.id, "unread_count", {"count": 9}, relay=False)
+        worker.sync_once(db_session)
+        api.sync_once(db_session)
+
+        assert api.broker.get_cached_unread_count(user.id) == 0
+
+    def test_late_committed_rows_are_applied(self, db_session, create_test_user):
+        user = create_test_user()
+        api = make_relay("api")
+        api.sync_once(db_session)
+        db_session.add_all([
+            NotificationStreamEvent(
+                id=event_id, origin="worker", user_id=user.id,
+                event="notification", data={"id": event_id},
+            )
+            for event_id in (5, 3)
+        ])
+        db_session.commit()
+        assert api.sync_once(db_session) == 2
+
+        # A row with a lower id that committed after the last poll
+        db_session.add(NotificationStreamEvent(
+            id=4, origin="worker", user_id=user.id, event="notification", data={"id": 4},
+        ))
+        db_session.commit()
+
+        assert api.sync_once(db_session) == 1
+
+    def test_purge_expired(self, db_session, create_test_user):
+        user = create_test_user()
+        worker = make_relay("worker")
+        worker.broker.publish(user.id, "notification", {"id": 1})
+        worker.sync_once(db_session)
+
+        assert worker.purge_expired(db_session) == 0
+        assert worker.purge_expired(db_session, now=datetime.now() + timedelta(hours=1)) == 1
@@ -0,0 +1,217 @@
+"""Tests for the provider response cache."""
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.provider_response import ProviderResponse
+from app.models.transaction import Base
+from app.services.provider_cache import (
+    DatabaseResponseStore,
+    ProviderResponseCache,
+    wallet_cache_key,
+)
+from app.services.zerion_api_service import ZerionApiService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_cache(clock, stale_ttl=300, max_bytes=10_000):
+    return ProviderResponseCache(
+        ttl=60, stale_ttl=stale_ttl, max_bytes=max_bytes, clock=clock.monotonic
+    )
+
+
+def counting_fetch(calls, value="v"):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return f"{value}{len(calls)}"
+
+    return fetch
+
+
+class TestProviderResponseCache:
+    def test_fresh_stale_and_expired(self, clock):
+        cache = make_cache(clock, stale_ttl=300, max_bytes=10_000)
+        calls = []
+        fetch = counting_fetch(calls)
+
+        async def scenario():
+            results = [await cache.get("k", fetch)]
+            clock.now += 30
+            results.append(await cache.get("k", fetch))  # fresh
+            clock.now += 60
+            results.append(await cache.get("k", fetch))  # stale, refresh scheduled
+            await asyncio.sleep(0.01)
+            results.append(await cache.get("k", fetch))  # refreshed value
+            clock.now += 1000
+            results.append(await cache.get("k", fetch))  # expired, fetched inline
+            return results
+
+        assert asyncio.run(scenario()) == ["v1", "v1", "v1", "v2", "v3"]
+        assert len(calls) == 3
+
+    def test_stale_not_allowed_refetches_inline(self, clock):
+        cache = make_cache(clock, stale_ttl=300, max_bytes=10_000)
+        calls = []
+        fetch = counting_fetch(calls)
+
+        async def scenario():
+            await cache.get("k", fetch)
+            clock.now += 90
+            return await cache.get("k", fetch, allow_stale=False)
+
+        assert asyncio.run(scenario()) == "v2"
+
+    def test_force_refresh_and_concurrent_misses(self, clock):
+        cache = make_cache(clock, stale_ttl=300, max_bytes=10_000)
+        calls = []
+        fetch = counting_fetch(calls)
+
+        async def scenario():
+            first = await asyncio.gather(*(cache.get("k", fetch) for _ in range(5)))
+            forced = await cache.get("k", fetch, force_refresh=True)
+            return first, forced
+
+        first, forced = asyncio.run(scenario())
+        assert first == ["v1"] * 5
+        assert forced == "v2"
+        assert len(calls) == 2
+
+    def test_evicts_least_recently_used_over_memory_bound(self, clock):
+        cache = make_cache(clock, stale_ttl=0, max_bytes=300)
+
+        async def value(v):
+            return v
+
+        async def scenario():
+            for key in ("a", "b", "c"):
+                await cache.get(key, lambda key=key: value(key * 90))
+            await cache.get("a", lambda: value("unused"))  # touch a
+            await cache.get("d", lambda: value("d" * 90))
+
+        asyncio.run(scenario())
+        assert cache.size_bytes <= 300
+        assert "a" * 90 == asyncio.run(cache.get("a", lambda: value("refetched")))
+        assert "refetched" == asyncio.run(cache.get("b", lambda: value("refetched")))
+
+    def test_invalidate_wallet(self, clock):
+        cache = make_cache(clock, stale_ttl=0, max_bytes=10_000)
+
+        async def value(v):
+            return v
+
+        async def scenario():
+            await cache.get(wallet_cache_key("0xABC", ["eth"], "portfolio"), lambda: value(1))
+            await cache.get(wallet_cache_key("0xabc", None, "defi_positions"), lambda: value(2))
+            await cache.get(wallet_cache_key("0xdef", None, "portfolio"), lambda: value(3))
+
+        asyncio.run(scenario())
+        assert cache.invalidate_wallet("0xAbC") == 2
+        assert len(cache) == 1
+
+
+@pytest.fixture
+def shared_store():
+    # Store calls run on worker threads, which must share the in-memory database
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield DatabaseResponseStore(sessionmaker(bind=engine))
+    Base.metadata.drop_all(bind=engine)
+
+
+def make_shared_cache(clock, store):
+    return ProviderResponseCache(
+        ttl=60, stale_ttl=0, max_bytes=10_000, clock=clock.monotonic, store=store
+    )
+
+
+class TestSharedResponseStore:
+    def test_processes_share_responses(self, clock, shared_store):
+        api, worker = make_shared_cache(clock, shared_store), make_shared_cache(clock, shared_store)
+        key = wallet_cache_key("0xabc", ["eth"], "portfolio")
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return {"total_usd": Decimal("12.50"), "chains": [{"chain_id": "eth"}]}
+
+        async def scenario():
+            first = await worker.get(key, fetch)
+            second = await api.get(key, fetch)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second
+        assert second["total_usd"] == Decimal("12.50")
+        assert len(calls) == 1
+
+        clock.now += 61
+        asyncio.run(api.get(key, fetch))
+        assert len(calls) == 2
+
+    def test_invalidate_wallet_reaches_other_processes(self, clock, shared_store):
+        api, worker = make_shared_cache(clock, shared_store), make_shared_cache(clock, shared_store)
+        calls = []
+        key = wallet_cache_key("0xabc", None, "defi_positions")
+
+        asyncio.run(worker.get(key, counting_fetch(calls)))
+        assert api.invalidate_wallet("0xABC") == 1
+        assert asyncio.run(worker.get(key, counting_fetch(calls))) == "v2"
+
+    def test_purge_expired(self, clock, shared_store):
+        cache = make_shared_cache(clock, shared_store)
+
+        async def value():
+            return 1
+
+        asyncio.run(cache.get(wallet_cache_key("0xabc", None, "portfolio"), value))
+        db = shared_store.session_factory()
+        try:
+            assert DatabaseResponseStore.purge_expired(db, 60, now=clock.now + 30) == 0
+            assert DatabaseResponseStore.purge_expired(db, 60, now=clock.now + 90) == 1
+            assert db.query(ProviderResponse).count() == 0
+        finally:
+            db.close()
+
+
+class TestZerionCaching:
+    def test_positions_share_one_upstream_call(self, clock, monkeypatch):
+        cache = make_cache(clock, stale_ttl=300, max_bytes=10_000)
+        monkeypatch.setattr("app.services.zerion_api_service.provider_cache", cache)
+        calls = []
+
+        async def fake_fetch(wallet_address, chains):
+            calls.append((wallet_address, chains))
+            return [{"id": "pos-1"}]
+
+        monkeypatch.setattr(ZerionApiService, "_fetch_defi_positions", staticmethod(fake_fetch))
+
+        async def scenario():
+            first = await ZerionApiService.get_defi_positions("0xabc", ["polygon", "eth"])
+            second = await ZerionApiService.get_defi_positions("0xABC", ["eth", "polygon"])
+            forced = await ZerionApiService.get_defi_positions(
+                "0xabc", ["eth", "polygon"], force_refresh=True
+            )
+            return first, second, forced
+
+        first, second, forced = asyncio.run(scenario())
+        assert first == second == forced == [{"id": "pos-1"}]
+        assert len(calls) == 2
@@ -0,0 +1,96 @@
+"""Tests for QueuedNotificationJob batched delivery."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.notification import (
+    InAppNotification,
+    NotificationLog,
+    NotificationPreference,
+    PushSubscription,
+    QueuedNotification,
+)
+from app.services import notification_rate_limiter
+from app.services.notification_rate_limiter import NotificationRateLimiter
+from app.services.queued_notification_job import QueuedNotificationJob
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    limiter = NotificationRateLimiter()
+    monkeypatch.setattr(notification_rate_limiter, "rate_limiter", limiter)
+    monkeypatch.setattr("app.services.queued_notification_job.rate_limiter", limiter)
+    return limiter
+
+
+def queue(db, user_id, count=1, priority=3):
+    for i in range(count):
+        db.add(QueuedNotification(
+            user_id=user_id,
+            notification_type="budget_alert",
+            title=f"Alert {i}",
+            message="Over budget",
+            data={},
+            priority=priority,
+            next_attempt_at=datetime.now() - timedelta(minutes=1),
+        ))
+    db.commit()
+
+
+class TestQueuedNotificationJob:
+    def test_delivers_push_and_in_app_in_bulk(self, db_session, create_test_user):
+        user = create_test_user()
+        db_session.add(PushSubscription(
+            user_id=user.id, endpoint="https://push/1", p256dh="k", auth="a", browser="chrome"
+        ))
+        db_session.commit()
+        queue(db_session, user.id, count=2)
+
+        result = QueuedNotificationJob().process_queue(db_session)
+
+        assert result["processed"] == 2
+        assert db_session.query(InAppNotification).count() == 2
+        channels = sorted(c for (c,) in db_session.query(NotificationLog.channel))
+        assert channels == ["in_app", "in_app", "push", "push"]
+        assert all(q.completed_at for q in db_session.query(QueuedNotification))
+
+    def test_channel_rate_limit_defers_without_burning_attempts(self, db_session, create_test_user):
+        user = create_test_user()
+        queue(db_session, user.id, count=5)
+
+        result = QueuedNotificationJob().process_queue(db_session)
+
+        assert result["processed"] == 3
+        assert result["deferred"] == 2
+        pending = db_session.query(QueuedNotification).filter(
+            QueuedNotification.completed_at == None  # noqa: E711
+        ).all()
+        assert len(pending) == 2
+        assert all(q.attempts == 0 and q.next_attempt_at > datetime.now() for q in pending)
+
+    def test_no_channels_schedules_retry(self, db_session, create_test_user):
+        user = create_test_user()
+        db_session.add(NotificationPreference(user_id=user.id, channel="in_app", enabled=False))
+        db_session.commit()
+        queue(db_session, user.id)
+
+        result = QueuedNotificationJob().process_queue(db_session)
+
+        item = db_session.query(QueuedNotification).one()
+        assert result["processed"] == 0
+        assert item.attempts == 1
+        assert item.completed_at is None
+        assert item.error_message == "All channels failed"
+
+    def test_quiet_hours_defers_critical_items(self, db_session, create_test_user):
+        user = create_test_user()
+        db_session.add(NotificationPreference(
+            user_id=user.id, channel="push", enabled=True, settings={"quiet_hours": "00:00-23:59"}
+        ))
+        db_session.commit()
+        queue(db_session, user.id, priority=1)
+
+        result = QueuedNotificationJob().process_queue(db_session)
+
+        assert result["deferred"] == 1
+        assert db_session.query(InAppNotification).count() == 0
@@ -0,0 +1,107 @@
+"""Tests for RecurringTransactionService due-occurrence materialization."""
+from datetime import date
+
+from app.models.account import Account
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.services.recurring_service import RecurringTransactionService
+
+
+def create_account(db, user_id, name):
+    account = Account(
+        user_id=user_id,
+        name=name,
+        type="bank",
+        initial_balance=0,
+        initial_balance_date=date(2024, 1, 1),
+    )
+    db.add(account)
+    db.commit()
+    db.refresh(account)
+    return account
+
+
+def create_recurring(db, user_id, **kw):
+    recurring = RecurringTransaction(
+        user_id=user_id,
+        description=kw.pop("description", "Rent"),
+        amount=kw.pop("amount", 80000),
+        category=kw.pop("category", "Housing"),
+        frequency=kw.pop("frequency", "monthly"),
+        day_of_month=kw.pop("day_of_month", 25),
+        start_date=kw.pop("start_date", date(2024, 1, 25)),
+        next_run_date=kw.pop("next_run_date", date(2024, 1, 25)),
+        **kw,
+    )
+    db.add(recurring)
+    db.commit()
+    db.refresh(recurring)
+    return recurring
+
+
+class TestProcessDueRecurring:
+    def test_catches_up_missed_monthly_occurrences(self, db_session, create_test_user):
+        user = create_test_user()
+        recurring = create_recurring(db_session, user.id)
+
+        created = RecurringTransactionService.process_due_recurring(
+            db_session, date(2024, 4, 30)
+        )
+
+        assert created == 4
+        dates = [t.date for t in db_session.query(Transaction).order_by(Transaction.date)]
+        assert dates == [date(2024, 1, 25), date(2024, 2, 25), date(2024, 3, 25), date(2024, 4, 25)]
+        db_session.refresh(recurring)
+        assert recurring.last_run_date == date(2024, 4, 25)
+        assert recurring.next_run_date == date(2024, 5, 25)
+
+    def test_rerun_is_idempotent(self, db_session, create_test_user):
+        user = create_test_user()
+        recurring = create_recurring(db_session, user.id)
+
+        RecurringTransactionService.process_due_recurring(db_session, date(2024, 3, 1))
+        # Simulate a crashed run that materialized rows but lost the schedule update
+        recurring.next_run_date = date(2024, 1, 25)
+        db_session.commit()
+        created = RecurringTransactionService.process_due_recurring(db_session, date(2024, 3, 1))
+
+        assert created == 0
+        assert db_session.query(Transaction).count() == 2
+
+    def test_respects_end_date(self, db_session, create_test_user):
+        user = create_test_user()
+        recurring = create_recurring(db_session, user.id, end_date=date(2024, 2, 28))
+
+        created = RecurringTransactionService.process_due_recurring(
+            db_session, date(2024, 4, 30)
+        )
+
+        assert created == 2
+        db_session.refresh(recurring)
+        assert recurring.next_run_date == date(2024, 5, 25)
+
+    def test_transfer_pairs_with_fee(self, db_session, create_test_user):
+        user = create_test_user()
+        src = create_account(db_session, user.id, "Bank A")
+        dst = create_account(db_session, user.id, "Bank B")
+        create_recurring(
+            db_session,
+            user.id,
+            description="Savings",
+            amount=10000,
+            category="Transfer",
+            is_transfer=True,
+            account_id=src.id,
+            to_account_id=dst.id,
+            transfer_fee_amount=110,
+        )
+
+        created = RecurringTransactionService.process_due_recurring(
+            db_session, date(2024, 2, 26)
+        )
+
+        assert created == 6
+        txns = db_session.query(Transaction).filter(Transaction.date == date(2024, 2, 25)).all()
+        assert sorted(t.transfer_type for t in txns) == ["fee", "incoming", "outgoing"]
+        assert len({t.transfer_id for t in txns}) == 1
+        assert {t.source for t in txns} == {"Bank A", "Bank B"}
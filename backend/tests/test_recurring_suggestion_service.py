@@ -0,0 +1,117 @@
+"""Tests for RecurringSuggestionService pattern detection."""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.services import recurring_suggestion_service as rss
+from app.services.recurring_suggestion_service import RecurringSuggestionService
+
+
+@pytest.fixture(autouse=True)
+def clear_group_cache():
+    rss._group_cache.clear()
+    yield
+    rss._group_cache.clear()
+
+
+def add_txn(db, user_id, txn_date, description, amount, category="Subscriptions"):
+    db.add(Transaction(
+        user_id=user_id,
+        date=txn_date,
+        description=description,
+        amount=amount,
+        category=category,
+        source="Test",
+        is_income=amount > 0,
+        month_key=txn_date.strftime("%Y-%m"),
+        tx_hash=f"{description}-{txn_date.isoformat()}-{amount}",
+    ))
+    db.commit()
+
+
+class TestRecurringSuggestionService:
+    def test_detects_monthly_pattern(self, db_session, create_test_user):
+        user = create_test_user()
+        start = date.today() - timedelta(days=150)
+        for i in range(5):
+            add_txn(db_session, user.id, start + timedelta(days=30 * i), "NETFLIX 1234", -1490)
+
+        suggestions = RecurringSuggestionService.detect_patterns(db_session, user.id)
+
+        assert len(suggestions) == 1
+        s = suggestions[0]
+        assert s["frequency"] == "monthly"
+        assert s["normalized_description"] == "netflix"
+        assert s["amount"] == 1490
+        assert s["occurrences"] == 5
+        assert s["avg_interval"] == 30.0
+        assert s["periodicity_score"] == 1.0
+
+    def test_detects_weekly_pattern_day_of_week(self, db_session, create_test_user):
+        user = create_test_user()
+        start = date.today() - timedelta(days=60)
+        for i in range(6):
+            add_txn(db_session, user.id, start + timedelta(days=7 * i), "Gym", -1000)
+
+        suggestions = RecurringSuggestionService.detect_patterns(db_session, user.id)
+
+        assert suggestions[0]["frequency"] == "weekly"
+        assert suggestions[0]["day_of_week"] == start.weekday()
+
+    def test_detects_yearly_pattern(self, db_session, create_test_user):
+        user = create_test_user()
+        last = date.today() - timedelta(days=30)
+        add_txn(db_session, user.id, last - timedelta(days=365), "Amazon Prime", -5900)
+        add_txn(db_session, user.id, last, "Amazon Prime", -5900)
+
+        suggestions = RecurringSuggestionService.detect_patterns(db_session, user.id)
+
+        assert len(suggestions) == 1
+        assert suggestions[0]["frequency"] == "yearly"
+        assert suggestions[0]["occurrences"] == 2
+        assert suggestions[0]["month_of_year"] == last.month
+        assert suggestions[0]["day_of_month"] == last.day
+
+    def test_sparse_group_only_matches_yearly(self, db_session, create_test_user):
+        # Monthly rows that mostly predate the lookback must not be suggested
+        user = create_test_user()
+        start = date.today() - timedelta(days=420)
+        for i in range(4):
+            add_txn(db_session, user.id, start + timedelta(days=30 * i), "Magazine", -800)
+
+        assert RecurringSuggestionService.detect_patterns(db_session, user.id) == []
+
+    def test_rejects_variable_amounts(self, db_session, create_test_user):
+        user = create_test_user()
+        start = date.today() - timedelta(days=90)
+        for i, amount in enumerate((-1000, -3000, -1200, -5000)):
+            add_txn(db_session, user.id, start + timedelta(days=30 * i), "Restaurant", amount)
+
+        assert RecurringSuggestionService.detect_patterns(db_session, user.id) == []
+
+    def test_cached_group_reanalyzed_on_new_transaction(self, db_session, create_test_user):
+        user = create_test_user()
+        start = date.today() - timedelta(days=120)
+        for i in range(3):
+            add_txn(db_session, user.id, start + timedelta(days=30 * i), "Spotify", -980)
+
+        first = RecurringSuggestionService.detect_patterns(db_session, user.id)
+        assert first[0]["occurrences"] == 3
+        assert (user.id, "spotify") in rss._group_cache
+
+        add_txn(db_session, user.id, start + timedelta(days=90), "Spotify", -980)
+        second = RecurringSuggestionService.detect_patterns(db_session, user.id)
+
+        assert second[0]["occurrences"] == 4
+
+    def test_dismissed_suggestion_filtered(self, db_session, create_test_user):
+        user = create_test_user()
+        start = date.today() - timedelta(days=120)
+        for i in range(4):
+            add_txn(db_session, user.id, start + timedelta(days=30 * i), "Rent", -80000)
+
+        suggestion = RecurringSuggestionService.detect_patterns(db_session, user.id)[0]
+        RecurringSuggestionService.dismiss_suggestion(db_session, user.id, suggestion["hash"])
+
+        assert RecurringSuggestionService.detect_patterns(db_session, user.id) == []
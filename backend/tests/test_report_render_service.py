@@ -0,0 +1,133 @@
+"""Tests for the background PDF render pool and artifact cache."""
+import asyncio
+import os
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.models.transaction import Transaction
+from app.routes import reports
+from app.schemas.report import PDFRenderJobRequest
+from app.services.report_render_service import ReportRenderService
+
+
+def yearly_payload(net=100):
+    return {
+        "user_id": 1,
+        "year": 2026,
+        "transactions": [],
+        "totals": {"income": net, "expense": 0, "net": net},
+        "categories": [],
+    }
+
+
+async def inline_threadpool(func, *args, **kwargs):
+    # In-memory SQLite connections are per thread, so stay on the test thread
+    return func(*args, **kwargs)
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    service = ReportRenderService(cache_dir=str(tmp_path), max_workers=1)
+    yield service
+    service.shutdown()
+
+
+class TestReportRenderService:
+    def test_renders_in_pool_and_reuses_cached_file(self, renderer):
+        path = asyncio.run(renderer.render(1, "yearly", "2026", "v1", yearly_payload()))
+
+        with open(path, "rb") as f:
+            assert f.read(5) == b"%PDF-"
+
+        job = renderer.submit(1, "yearly", "2026", "v1", yearly_payload())
+        assert job.future is None
+        assert job.status == "done"
+        assert job.path == path
+
+    def test_cached_job_found_without_payload(self, renderer):
+        assert renderer.cached_job(1, "yearly", "2026", "v1") is None
+
+        path = asyncio.run(renderer.render(1, "yearly", "2026", "v1", yearly_payload()))
+
+        assert renderer.cached_job(1, "yearly", "2026", "v1").path == path
+        assert renderer.cached_job(1, "yearly", "2026", "v2") is None
+
+    def test_data_version_changes_key(self, renderer):
+        key = renderer.cache_key(1, "yearly", "2026", "v1")
+
+        assert key == renderer.cache_key(1, "yearly", "2026", "v1")
+        assert key != renderer.cache_key(1, "yearly", "2026", "v2")
+        assert key != renderer.cache_key(2, "yearly", "2026", "v1")
+
+    def test_payload_version_ignores_volatile_keys(self):
+        version = ReportRenderService.payload_version(yearly_payload(100))
+
+        assert version == ReportRenderService.payload_version(
+            {**yearly_payload(100), "generated_at": "x"}
+        )
+        assert version != ReportRenderService.payload_version(yearly_payload(200))
+
+    def test_jobs_are_scoped_to_user(self, renderer):
+        asyncio.run(renderer.render(1, "yearly", "2026", "v1", yearly_payload()))
+        job_id = renderer.cache_key(1, "yearly", "2026", "v1")
+
+        assert renderer.get_job(1, job_id).status == "done"
+        assert renderer.get_job(2, job_id) is None
+
+    def test_purge_cache_removes_stale_files(self, renderer):
+        path = asyncio.run(renderer.render(1, "yearly", "2026", "v1", yearly_payload()))
+        os.utime(path, (0, 0))
+
+        assert renderer.purge_cache() == 1
+        assert not os.path.exists(path)
+
+    def test_unknown_report_type_rejected(self, renderer):
+        with pytest.raises(ValueError):
+            renderer.submit(1, "weekly", "2026", "v1", {})
+
+
+@patch.object(reports, "run_in_threadpool", inline_threadpool)
+class TestReportRoutesCache:
+    def add_transaction(self, db, user_id, tx_hash, amount=-1000):
+        db.add(Transaction(
+            user_id=user_id,
+            date=date(2026, 1, 15),
+            description="Shop",
+            amount=amount,
+            category="Food",
+            source="Card",
+            is_income=False,
+            is_transfer=False,
+            month_key="2026-01",
+            tx_hash=tx_hash,
+        ))
+        db.commit()
+
+    def test_data_version_tracks_report_transactions(self, db_session, create_test_user):
+        user = create_test_user()
+        request = PDFRenderJobRequest(report_type="yearly", year=2026)
+        self.add_transaction(db_session, user.id, "a")
+        version = reports._data_version(db_session, user.id, request)
+
+        assert reports._data_version(db_session, user.id, request) == version
+
+        self.add_transaction(db_session, user.id, "b")
+        assert reports._data_version(db_session, user.id, request) != version
+
+    def test_cache_hit_skips_payload_build(self, db_session, create_test_user, renderer):
+        user = create_test_user()
+        self.add_transaction(db_session, user.id, "a")
+        request = PDFRenderJobRequest(report_type="yearly", year=2026)
+
+        with patch.object(reports, "report_renderer", renderer), \
+                patch.object(reports, "_build_payload", wraps=reports._build_payload) as build:
+            job, filename = asyncio.run(reports._submit_render(db_session, user.id, request))
+            asyncio.run(renderer.wait(job))
+            cached, _ = asyncio.run(reports._submit_render(db_session, user.id, request))
+
+        assert filename == "yearly_report_2026.pdf"
+        assert build.call_count == 1
+        assert cached.job_id == job.job_id
+        assert cached.status == "done"
@@ -0,0 +1,147 @@
+"""Tests for indexed reward-to-position attribution."""
+import asyncio
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.models.account import Account
+from app.models.crypto_wallet import PositionReward
+from app.models.transaction import Transaction
+from app.services.merkl_service import MerklService
+from app.services.reward_matching_service import PositionAttributionIndex, RewardMatchingService
+from app.services.reward_service import RewardService
+
+POOL = "0x" + "ab" * 20
+POSITIONS = [
+    {
+        "id": f"{POOL}-polygon-steer protocol yield: weth/quick pool (steerqv404)-deposit",
+        "protocol": "Steer Protocol",
+        "protocol_id": "steer",
+        "name": "weth/quick pool (steerqv404)",
+        "symbol": "WETH",
+    },
+    {
+        "id": "0x" + "cd" * 20 + "-polygon-quickswap-deposit",
+        "protocol": "QuickSwap",
+        "protocol_id": "quickswap",
+        "name": "wmatic/usdc pool",
+        "symbol": "WMATIC",
+    },
+]
+
+
+def add_reward(db, user_id, n, symbol="QUICK", campaign=None, reward_usd=None):
+    reward = PositionReward(
+        user_id=user_id,
+        wallet_address="0xabc",
+        chain_id="polygon",
+        reward_token_address="0x" + "01" * 20,
+        reward_token_symbol=symbol,
+        reward_amount=Decimal("2"),
+        reward_usd=reward_usd,
+        claimed_at=datetime(2026, 10, 1),
+        tx_hash=f"0x{n:064x}",
+        merkl_campaign_id=campaign,
+    )
+    db.add(reward)
+    return reward
+
+
+class TestPositionAttributionIndex:
+    def test_strategy_precedence(self):
+        index = PositionAttributionIndex(POSITIONS)
+        steer, quickswap = POSITIONS[0]["id"], POSITIONS[1]["id"]
+
+        # Pool address in the campaign wins over the protocol token rule
+        assert index.match_reward("QUICK", f"campaign-{POOL}") == steer
+        assert index.match_reward("QUICK", None) == quickswap
+        assert index.match_reward("STEER", None) == steer
+        # Token in position name
+        assert index.match_reward("usdc", None) == quickswap
+        assert index.match_reward("UNKNOWN", None) is None
+        assert index.match_reward(None, None) is None
+
+    def test_campaign_reason(self):
+        assert MerklService.match_campaign_to_position(
+            "Steer weth/quick pool (steerqv404) rewards", POSITIONS
+        ) == POSITIONS[0]["id"]
+        assert MerklService.match_campaign_to_position("unrelated", POSITIONS) is None
+
+
+class TestBulkAttribution:
+    def test_match_pending_rewards_in_one_pass(self, db_session, create_test_user):
+        user = create_test_user()
+        for n in range(50):
+            add_reward(db_session, user.id, n, symbol="QUICK" if n % 2 else "NOPE")
+        db_session.commit()
+
+        index = PositionAttributionIndex(POSITIONS)
+        result = asyncio.run(RewardMatchingService.match_rewards_to_positions(
+            db_session, user.id, "0xabc", index=index
+        ))
+
+        assert result == {"matched": 25, "unmatched": 25}
+        db_session.expire_all()
+        attributed = db_session.query(PositionReward).filter_by(is_attributed=True).all()
+        assert {r.position_id for r in attributed} == {POSITIONS[1]["id"]}
+
+    def test_bulk_attribute_skips_other_users(self, db_session, create_test_user):
+        user = create_test_user()
+        other = create_test_user(email="other@example.com")
+        mine = [add_reward(db_session, user.id, n) for n in range(3)]
+        theirs = add_reward(db_session, other.id, 99)
+        db_session.commit()
+
+        ids = [r.id for r in mine] + [theirs.id, mine[0].id]
+        attributed = RewardMatchingService.bulk_attribute_rewards(db_session, user.id, ids, "pos-1")
+
+        assert attributed == 3
+        db_session.expire_all()
+        assert {r.position_id for r in mine} == {"pos-1"}
+        assert theirs.position_id is None
+
+    def test_create_transactions_from_rewards(self, db_session, create_test_user):
+        user = create_test_user()
+        db_session.add(Account(
+            user_id=user.id, name="Crypto Income", type="other", currency="USD",
+            initial_balance_date=date(2026, 1, 1),
+        ))
+        priced = [add_reward(db_session, user.id, n, reward_usd=Decimal("1.50")) for n in range(3)]
+        unpriced = add_reward(db_session, user.id, 10)
+        db_session.commit()
+
+        ids = [r.id for r in priced] + [unpriced.id, 12345]
+        stats = RewardService.create_transactions_from_rewards(db_session, user.id, ids)
+
+        assert stats == {"created": 3, "skipped": 1, "failed": 1, "total_usd": 4.5}
+        assert db_session.query(Transaction).filter_by(user_id=user.id).count() == 3
+        assert all(r.transaction_id is not None for r in priced)
+
+        again = RewardService.create_transactions_from_rewards(db_session, user.id, ids)
+        assert again["created"] == 0 and again["skipped"] == 4
+
+    def test_failed_reward_does_not_abort_batch(self, db_session, create_test_user, monkeypatch):
+        user = create_test_user()
+        db_session.add(Account(
+            user_id=user.id, name="Crypto Income", type="other", currency="USD",
+            initial_balance_date=date(2026, 1, 1),
+        ))
+        rewards = [add_reward(db_session, user.id, n, reward_usd=Decimal("2")) for n in range(3)]
+        db_session.commit()
+
+        build = RewardService._reward_transaction
+
+        def reward_transaction(reward, *args):
+            transaction = build(reward, *args)
+            if reward.id == rewards[1].id:
+                transaction.tx_hash = None  # violates NOT NULL on flush
+            return transaction
+
+        monkeypatch.setattr(RewardService, "_reward_transaction", staticmethod(reward_transaction))
+        stats = RewardService.create_transactions_from_rewards(
+            db_session, user.id, [r.id for r in rewards]
+        )
+
+        assert stats == {"created": 2, "skipped": 0, "failed": 1, "total_usd": 4.0}
+        assert db_session.query(Transaction).filter_by(user_id=user.id).count() == 2
+        db_session.expire_all()
+        assert rewards[1].transaction_id is None
@@ -0,0 +1,147 @@
+"""Tests for incremental reward claim sync."""
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.models.crypto_wallet import CryptoWallet, PositionReward, RewardScanCursor
+from app.routes.crypto import scan_rewards
+from app.schemas.crypto_wallet import RewardsScanRequest
+from app.services import http_client, polygonscan_service
+from app.services.http_client import http_clients, run_with_clients
+from app.services.polygonscan_service import MERKL_DISTRIBUTOR
+from app.services.reward_sync_service import RewardSyncService
+from app.utils.rate_limit import AsyncTokenBucket
+
+WALLET = "0x00000000000000000000000000000000000000aa"
+
+
+def claim(block, tx_hash):
+    return {
+        "hash": tx_hash,
+        "blockNumber": str(block),
+        "timeStamp": "1700000000",
+        "from": MERKL_DISTRIBUTOR,
+        "to": WALLET,
+        "contractAddress": "0x0000000000000000000000000000000000000001",
+        "value": str(5 * 10**18),
+        "tokenSymbol": "QUICK",
+        "tokenDecimal": "18",
+    }
+
+
+class FakeEtherscan:
+    """Answers tokentx, getblocknobytime and eth_blockNumber queries."""
+
+    def __init__(self):
+        self.head = 3128
+        self.transfers = [claim(1500, "0xa"), claim(2500, "0xb")]
+        self.tokentx_ranges = []
+        self.block_lookups = 0
+
+    def __call__(self, request):
+        params = request.url.params
+        action = params["action"]
+        if action == "eth_blockNumber":
+            return httpx.Response(200, json={"result": hex(self.head)})
+        if action == "getblocknobytime":
+            self.block_lookups += 1
+            return httpx.Response(200, json={"status": "1", "result": "1000"})
+
+        start, end = int(params["startblock"]), int(params["endblock"])
+        page, offset = int(params["page"]), int(params["offset"])
+        self.tokentx_ranges.append((start, end, page))
+        in_range = [t for t in self.transfers if start <= int(t["blockNumber"]) <= end]
+        rows = in_range[(page - 1) * offset:page * offset]
+        if not rows:
+            # What Etherscan actually answers for an empty tokentx range
+            return httpx.Response(200, json={"status": "0", "message": "No transactions found", "result": []})
+        return httpx.Response(200, json={"status": "1", "message": "OK", "result": rows})
+
+
+@pytest.fixture
+def etherscan(monkeypatch):
+    fake = FakeEtherscan()
+    monkeypatch.setattr(settings, "polygonscan_api_key", "test-key")
+    monkeypatch.setattr(http_clients, "transport", httpx.MockTransport(fake))
+    monkeypatch.setitem(http_client._buckets, "polygonscan", AsyncTokenBucket(1000, 1000))
+    monkeypatch.setattr(polygonscan_service, "PAGE_SIZE", 1)
+    monkeypatch.setattr(polygonscan_service, "_block_cache", {})
+    return fake
+
+
+class TestRewardSync:
+    def test_rescans_only_new_blocks(self, db_session, create_test_user, etherscan):
+        user = create_test_user()
+
+        def sync():
+            return run_with_clients(
+                RewardSyncService.sync_claims(db_session, user.id, WALLET, "merkl", days=30)
+            )
+
+        first = sync()
+        assert first == {"scanned": 2, "new": 2, "blocks": 2001}
+        # One page per transfer plus a terminating empty page
+        assert etherscan.tokentx_ranges == [(1000, 3000, 1), (1000, 3000, 2), (1000, 3000, 3)]
+        cursor = db_session.query(RewardScanCursor).one()
+        assert (cursor.start_block, cursor.last_block) == (1000, 3000)
+
+        etherscan.head = 3628
+        etherscan.transfers.append(claim(3200, "0xc"))
+        etherscan.tokentx_ranges.clear()
+        second = sync()
+        assert second == {"scanned": 1, "new": 1, "blocks": 500}
+        assert {r[:2] for r in etherscan.tokentx_ranges} == {(3001, 3500)}
+
+        etherscan.tokentx_ranges.clear()
+        assert sync() == {"scanned": 0, "new": 0, "blocks": 0}
+        assert etherscan.tokentx_ranges == []
+
+        assert etherscan.block_lookups == 1
+        rewards = db_session.query(PositionReward).order_by(PositionReward.block_number).all()
+        assert [r.tx_hash for r in rewards] == ["0xa", "0xb", "0xc"]
+        assert all(r.source == "merkl" and not r.is_attributed for r in rewards)
+
+    def test_error_response_does_not_advance_cursor(self, db_session, create_test_user, etherscan, monkeypatch):
+        user = create_test_user()
+
+        def failing(request):
+            if request.url.params["action"] == "tokentx":
+                return httpx.Response(200, json={"status": "0", "message": "NOTOK"})
+            return etherscan(request)
+
+        monkeypatch.setattr(http_clients, "transport", httpx.MockTransport(failing))
+
+        with pytest.raises(RuntimeError):
+            run_with_clients(
+                RewardSyncService.sync_claims(db_session, user.id, WALLET, "merkl", days=30)
+            )
+        assert db_session.query(RewardScanCursor).count() == 0
+
+    def test_quiet_range_advances_cursor(self, db_session, create_test_user, etherscan):
+        user = create_test_user()
+        etherscan.transfers = []
+
+        result = run_with_clients(
+            RewardSyncService.sync_claims(db_session, user.id, WALLET, "merkl", days=30)
+        )
+
+        assert result == {"scanned": 0, "new": 0, "blocks": 2001}
+        cursor = db_session.query(RewardScanCursor).one()
+        assert cursor.last_block == 3000
+
+    def test_scan_route_reports_upstream_error(self, db_session, create_test_user, etherscan, monkeypatch):
+        user = create_test_user()
+        db_session.add(CryptoWallet(user_id=user.id, wallet_address=WALLET, chains=["polygon"]))
+        db_session.commit()
+
+        def failing(request):
+            if request.url.params["action"] == "tokentx":
+                return httpx.Response(200, json={"status": "0", "message": "NOTOK"})
+            return etherscan(request)
+
+        monkeypatch.setattr(http_clients, "transport", httpx.MockTransport(failing))
+
+        with pytest.raises(HTTPException) as exc:
+            run_with_clients(scan_rewards(RewardsScanRequest(days=30), db_session, user))
+        assert exc.value.status_code == 502
@@ -0,0 +1,104 @@
+"""Tests for the vectorized IL / HODL scenario engine."""
+import math
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.models.crypto_wallet import DefiPositionSnapshot
+from app.schemas.crypto_wallet import DefiPositionSnapshotResponse
+from app.services.hodl_scenario_service import HodlScenarioService
+from app.services.il_calculator_service import ILCalculatorService
+from app.services.scenario_engine import ScenarioEngine
+
+
+def snapshot(day, price, balance_usd, symbol="WETH", position_id="pos-weth"):
+    return DefiPositionSnapshotResponse(
+        id=day,
+        position_id=position_id,
+        protocol="Uniswap V3",
+        chain_id="eth",
+        position_type="deposit",
+        symbol=symbol,
+        balance=Decimal(balance_usd) / Decimal(price),
+        balance_usd=Decimal(balance_usd),
+        price_usd=Decimal(price),
+        snapshot_date=datetime(2026, 1, 1) + timedelta(days=day),
+    )
+
+
+class TestScenarioEngine:
+    def test_il_matches_closed_form(self):
+        ratios = ScenarioEngine.price_ratio_grid(0.1, 10.0, 201)
+        expected = [2 * math.sqrt(r) / (1 + r) - 1 for r in ratios]
+        assert np.allclose(ScenarioEngine.il(ratios), expected)
+        assert ScenarioEngine.il([0.0, -1.0]).tolist() == [0.0, 0.0]
+        assert ILCalculatorService.calculate_il_percentage(4.0) == pytest.approx(-0.2)
+
+    def test_fee_yield_offsets_il(self):
+        curve = ScenarioEngine.scenario_curve([1.0, 4.0], apy=30, days=365)
+        # (1 - 20% IL) * HODL + 30% fees on the deposit, relative to HODL of 2.5
+        assert curve["lp_vs_hodl"][1] == pytest.approx((2.5 * 0.8 + 0.3) / 2.5 - 1)
+        assert curve["lp_vs_hodl"][0] == pytest.approx(0.3)
+
+    def test_default_scenarios_unchanged(self):
+        scenarios = ILCalculatorService.get_il_scenarios()
+        assert [s["price_ratio"] for s in scenarios] == [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 4.0]
+        doubled = next(s for s in scenarios if s["price_ratio"] == 2.0)
+        assert doubled == {
+            "price_change": "+100%", "price_ratio": 2.0, "il_percentage": -5.72, "vs_hodl": "LP loses",
+        }
+
+    def test_il_series_and_performance(self):
+        history = [snapshot(0, 100, 1000), snapshot(10, 400, 1500), snapshot(20, 200, 1400)]
+        series = ILCalculatorService.calculate_il_series(history)
+        assert [p["price_ratio"] for p in series] == [1.0, 4.0, 2.0]
+        assert series[1]["il_percentage"] == -20.0
+        assert series[2]["hodl_value_usd"] == 2000.0
+        assert series[2]["lp_vs_hodl_usd"] == -600.0
+
+        performance = ILCalculatorService.calculate_position_performance(history[::-1])
+        assert performance["il_percentage"] == -5.72
+        assert performance["max_il_percentage"] == -20.0
+
+
+class TestHodlScenarios:
+    def test_scenarios_with_history(self, db_session, create_test_user):
+        user = create_test_user()
+        start = datetime(2026, 1, 1)
+        # (days, WETH price, WETH qty, QUICK price, QUICK qty)
+        rows = [(0, 100, 5, 1, 500), (7, 150, 4, 1, 600), (14, 200, 3.6, 1, 700)]
+        for day, weth_price, weth_qty, quick_price, quick_qty in rows:
+            for symbol, price, qty in (("WETH", weth_price, weth_qty), ("QUICK", quick_price, quick_qty)):
+                db_session.add(DefiPositionSnapshot(
+                    user_id=user.id,
+                    wallet_address="0xabc",
+                    position_id=f"pos-{symbol.lower()}",
+                    protocol="Steer",
+                    chain_id="polygon",
+                    position_type="deposit",
+                    symbol=symbol,
+                    balance=Decimal(str(qty)),
+                    balance_usd=Decimal(str(qty * price)),
+                    price_usd=Decimal(price),
+                    snapshot_date=start + timedelta(days=day),
+                ))
+        db_session.commit()
+
+        result = HodlScenarioService.calculate_scenarios(
+            db_session, user.id, ["pos-weth", "pos-quick"]
+        )
+
+        assert result["tokens"] == ["QUICK", "WETH"]
+        assert result["initial_value_usd"] == 1000
+        values = {s["name"]: s["value_usd"] for s in result["scenarios"]}
+        assert values == {
+            "100% WETH": 2000.0,
+            "100% QUICK": 1000.0,
+            "50/50 HODL": 1500.0,
+            "Current LP": 1420.0,
+        }
+        assert result["winner"] == "100% WETH"
+        assert [p["lp_value_usd"] for p in result["history"]] == [1000.0, 1200.0, 1420.0]
+        assert result["history"][1]["token_values_usd"] == {"QUICK": 1000.0, "WETH": 1500.0}
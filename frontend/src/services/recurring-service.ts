@@ -190,11 +190,13 @@ export interface RecurringSuggestion {
   frequency: string
   day_of_month: number | null
   day_of_week: number | null
+  month_of_year?: number | null
   interval_days: number | null
   is_income: boolean
   occurrences: number
   last_date: string
   avg_interval: number
+  periodicity_score?: number | null
   confidence: number
 }
 